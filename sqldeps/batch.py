@@ -0,0 +1,429 @@
+"""Offline extraction with provider batch jobs.
+
+This module extracts SQL dependencies of large corpora through the batch API of
+OpenAI-compatible providers (OpenAI, Groq or a self-hosted endpoint), which
+processes requests asynchronously within a completion window, without rate
+limits and at a discounted price. Requests are submitted as JSONL files, the
+job IDs are checkpointed in a local JSON file, and the results of completed
+jobs are saved to the extraction cache, where the regular extraction picks
+them up.
+"""
+
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+
+from loguru import logger
+
+from sqldeps.cache import (
+    CACHE_DIR,
+    file_hashes,
+    flush_cache,
+    load_from_cache,
+    save_to_cache,
+)
+from sqldeps.llm_parsers.base import BaseSQLExtractor
+from sqldeps.models import SQLProfile
+
+# Local file checkpointing the submitted batch jobs
+DEFAULT_CHECKPOINT = Path(".sqldeps_batches.json")
+
+# Maximum number of requests of a batch job (limit of the OpenAI batch API)
+MAX_BATCH_REQUESTS = 50_000
+
+# Endpoint and completion window of the batch requests
+BATCH_ENDPOINT = "/v1/chat/completions"
+COMPLETION_WINDOW = "24h"
+
+# Statuses of batch jobs that will not progress anymore
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+def _batch_client(extractor: BaseSQLExtractor) -> object:
+    """Get the provider client of an extractor, checking it supports batches.
+
+    Args:
+        extractor: Extractor of the provider
+
+    Returns:
+        Provider client with `files` and `batches` resources
+
+    Raises:
+        ValueError: If the provider client has no batch API
+    """
+    client = getattr(extractor, "client", None)
+    if not (hasattr(client, "files") and hasattr(client, "batches")):
+        raise ValueError(
+            f"The {extractor.framework} framework does not support batch jobs. "
+            "Use openai, groq or openai-compatible."
+        )
+    return client
+
+
+def build_batch_requests(
+    extractor: BaseSQLExtractor, sql_files: dict[str, Path]
+) -> list[dict]:
+    """Build the batch API requests extracting the dependencies of SQL files.
+
+    Args:
+        extractor: Extractor whose model, parameters and prompts are used
+        sql_files: Dictionary mapping request IDs to SQL file paths
+
+    Returns:
+        List of batch requests, one per file, in the JSONL line format of the
+        batch API
+    """
+    requests = []
+    for custom_id, sql_file in sql_files.items():
+        with open(sql_file) as f:
+            sql = f.read()
+        prompt = extractor._prepare_prompt(sql)
+        body = {
+            "model": extractor.model,
+            "messages": extractor._build_messages(prompt),
+            **extractor._response_params(prompt),
+            **extractor.params,
+        }
+        requests.append(
+            {
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": BATCH_ENDPOINT,
+                "body": body,
+            }
+        )
+    return requests
+
+
+def load_checkpoint(checkpoint_path: Path = DEFAULT_CHECKPOINT) -> dict:
+    """Load the checkpoint of submitted batch jobs.
+
+    Args:
+        checkpoint_path: Path to the checkpoint file
+
+    Returns:
+        Checkpoint with the extractor settings ("framework", "model",
+        "prompt_path", "base_url", "cache_key", "cache_namespace",
+        "cache_backend", "cache_compress") and the submitted jobs ("jobs")
+
+    Raises:
+        FileNotFoundError: If no checkpoint exists
+    """
+    if not checkpoint_path.exists():
+        raise FileNotFoundError(f"No batch checkpoint found: {checkpoint_path}")
+    with open(checkpoint_path) as f:
+        return json.load(f)
+
+
+def _save_checkpoint(checkpoint: dict, checkpoint_path: Path) -> None:
+    """Atomically save the checkpoint of submitted batch jobs.
+
+    Args:
+        checkpoint: Checkpoint to save
+        checkpoint_path: Path to the checkpoint file
+    """
+    tmp_path = checkpoint_path.with_name(f"{checkpoint_path.name}.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(tmp_path, checkpoint_path)
+
+
+def _new_checkpoint(extractor: BaseSQLExtractor) -> dict:
+    """Create the checkpoint of an extractor without jobs."""
+    client = _batch_client(extractor)
+    base_url = getattr(client, "base_url", None)
+    return {
+        "framework": extractor.framework,
+        "model": extractor.model,
+        "prompt_path": str(extractor.prompt_path) if extractor.prompt_path else None,
+        "base_url": str(base_url) if base_url is not None else None,
+        "cache_key": extractor.cache_key,
+        "cache_namespace": extractor.cache_namespace,
+        "cache_backend": extractor.cache_backend,
+        "cache_compress": extractor.cache_compress,
+        "jobs": [],
+    }
+
+
+def submit_batches(
+    extractor: BaseSQLExtractor,
+    sql_files: list[Path],
+    checkpoint_path: Path = DEFAULT_CHECKPOINT,
+    max_requests: int = MAX_BATCH_REQUESTS,
+    use_cache: bool = True,
+    cache_dir: Path = Path(CACHE_DIR),
+) -> list[dict]:
+    """Submit batch jobs extracting the dependencies of SQL files.
+
+    Files are split into jobs of at most `max_requests` requests. Each job is
+    checkpointed as soon as it is submitted, with the hashes of the submitted
+    content of its files, so that an interrupted submission keeps track of the
+    jobs already created and results of files edited in the meantime are not
+    cached under their new content. Jobs are appended to an existing
+    checkpoint of the same configuration: its jobs are collected under the
+    cache namespace and settings it records.
+
+    Args:
+        extractor: Extractor whose provider, model and prompts are used
+        sql_files: SQL files to extract
+        checkpoint_path: Path to the checkpoint file
+        max_requests: Maximum number of requests per job
+        use_cache: Whether to skip files whose result is cached
+        cache_dir: Cache directory
+
+    Returns:
+        List of the submitted jobs
+
+    Raises:
+        ValueError: If the provider has no batch API, or the checkpoint belongs
+            to another framework, model, cache namespace or cache settings
+    """
+    client = _batch_client(extractor)
+    settings = _new_checkpoint(extractor)
+    if checkpoint_path.exists():
+        checkpoint = load_checkpoint(checkpoint_path)
+        if (checkpoint["framework"], checkpoint["model"]) != (
+            extractor.framework,
+            extractor.model,
+        ):
+            raise ValueError(
+                f"Checkpoint {checkpoint_path} holds {checkpoint['framework']}/"
+                f"{checkpoint['model']} jobs. Collect them or use another checkpoint."
+            )
+        changed = [
+            name
+            for name, value in settings.items()
+            if name != "jobs" and checkpoint.get(name) != value
+        ]
+        if changed:
+            raise ValueError(
+                f"Checkpoint {checkpoint_path} holds jobs of other settings "
+                f"({', '.join(changed)}). Collect them or use another checkpoint."
+            )
+    else:
+        checkpoint = settings
+
+    sql_files = [Path(f).resolve() for f in sql_files]
+    if use_cache:
+        sql_files = [
+            f
+            for f in sql_files
+            if load_from_cache(
+                f,
+                cache_dir,
+                extractor.cache_key,
+                extractor.cache_namespace,
+                extractor.cache_backend,
+            )
+            is None
+        ]
+    if not sql_files:
+        logger.info("All SQL files are cached, nothing to submit")
+        return []
+
+    jobs = []
+    for start in range(0, len(sql_files), max_requests):
+        files = {
+            f"file-{start + i}": sql_file
+            for i, sql_file in enumerate(sql_files[start : start + max_requests])
+        }
+        hashes = {
+            custom_id: file_hashes(f, extractor.cache_key)
+            for custom_id, f in files.items()
+        }
+        lines = build_batch_requests(extractor, files)
+        content = "\n".join(json.dumps(line) for line in lines).encode()
+
+        input_file = client.files.create(
+            file=("sqldeps_batch.jsonl", content), purpose="batch"
+        )
+        batch = client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=COMPLETION_WINDOW,
+        )
+        job = {
+            "id": batch.id,
+            "input_file_id": input_file.id,
+            "submitted": datetime.now(timezone.utc).isoformat(),
+            "status": batch.status,
+            "files": {custom_id: str(f) for custom_id, f in files.items()},
+            "hashes": hashes,
+            "collected": False,
+        }
+        checkpoint["jobs"].append(job)
+        _save_checkpoint(checkpoint, checkpoint_path)
+        jobs.append(job)
+        logger.info(f"Submitted batch job {batch.id} with {len(files)} requests")
+
+    return jobs
+
+
+def _refresh_jobs(client: object, checkpoint: dict) -> None:
+    """Refresh the status of the checkpointed jobs not yet collected.
+
+    Args:
+        client: Provider client
+        checkpoint: Checkpoint whose jobs are updated in place
+    """
+    for job in checkpoint["jobs"]:
+        if job["collected"]:
+            continue
+        batch = client.batches.retrieve(job["id"])
+        job["status"] = batch.status
+        job["output_file_id"] = batch.output_file_id
+        job["error_file_id"] = batch.error_file_id
+        counts = batch.request_counts
+        if counts is not None:
+            job["request_counts"] = {
+                "total": counts.total,
+                "completed": counts.completed,
+                "failed": counts.failed,
+            }
+
+
+def update_batches(
+    extractor: BaseSQLExtractor, checkpoint_path: Path = DEFAULT_CHECKPOINT
+) -> list[dict]:
+    """Refresh the status of the checkpointed batch jobs.
+
+    Args:
+        extractor: Extractor of the provider the jobs were submitted to
+        checkpoint_path: Path to the checkpoint file
+
+    Returns:
+        List of all checkpointed jobs, with their status, request counts
+        ("total", "completed", "failed") and output files
+    """
+    client = _batch_client(extractor)
+    checkpoint = load_checkpoint(checkpoint_path)
+    _refresh_jobs(client, checkpoint)
+    _save_checkpoint(checkpoint, checkpoint_path)
+    return checkpoint["jobs"]
+
+
+def _collect_output(
+    extractor: BaseSQLExtractor,
+    job: dict,
+    output: str,
+    cache_dir: Path,
+    namespace: str,
+) -> tuple[dict[str, SQLProfile], int]:
+    """Save the results of the output file of a batch job to the cache.
+
+    Args:
+        extractor: Extractor processing the responses
+        job: Checkpointed batch job
+        output: Content of the JSONL output file
+        cache_dir: Cache directory
+        namespace: Cache namespace of the configuration that submitted the job
+
+    Returns:
+        Dictionary mapping file paths to their SQLProfile, and the number of
+        unusable responses
+    """
+    results = {}
+    failed = 0
+    for line in output.splitlines():
+        if not line.strip():
+            continue
+        try:
+            result = json.loads(line)
+            custom_id = result["custom_id"]
+        except (ValueError, TypeError, KeyError) as e:
+            logger.warning(f"Malformed line in output of batch job {job['id']}: {e}")
+            failed += 1
+            continue
+        sql_file = job["files"].get(custom_id)
+        response = result.get("response") or {}
+        if (
+            sql_file is None
+            or result.get("error")
+            or response.get("status_code") != 200
+        ):
+            logger.warning(
+                f"Batch request {custom_id} failed: "
+                f"{result.get('error') or response.get('body')}"
+            )
+            failed += 1
+            continue
+
+        body = response["body"]
+        extractor._record_usage(body.get("usage"))
+        try:
+            profile = extractor._process_response(
+                body["choices"][0]["message"]["content"]
+            )
+        except ValueError as e:
+            logger.warning(f"Unusable batch response for {sql_file}: {e}")
+            failed += 1
+            continue
+        # Cache the result under the content submitted, the file may have
+        # been edited since (jobs checkpointed without hashes hash it now)
+        hashes = job.get("hashes", {}).get(custom_id)
+        save_to_cache(
+            profile,
+            Path(sql_file),
+            cache_dir,
+            extractor.cache_key,
+            namespace,
+            extractor.cache_backend,
+            extractor.cache_compress,
+            tuple(hashes) if hashes else None,
+        )
+        results[sql_file] = profile
+    return results, failed
+
+
+def collect_batches(
+    extractor: BaseSQLExtractor,
+    checkpoint_path: Path = DEFAULT_CHECKPOINT,
+    cache_dir: Path = Path(CACHE_DIR),
+) -> dict[str, SQLProfile]:
+    """Save the results of finished batch jobs to the extraction cache.
+
+    Jobs that expired or were cancelled may have answered part of their
+    requests, which are collected too. Files left without result can be
+    submitted again, cached files being skipped. Results are cached under the
+    namespace of the configuration that submitted the jobs.
+
+    Args:
+        extractor: Extractor of the provider the jobs were submitted to
+        checkpoint_path: Path to the checkpoint file
+        cache_dir: Cache directory
+
+    Returns:
+        Dictionary mapping file paths to the SQLProfile objects collected
+    """
+    client = _batch_client(extractor)
+    checkpoint = load_checkpoint(checkpoint_path)
+    _refresh_jobs(client, checkpoint)
+
+    results = {}
+    for job in checkpoint["jobs"]:
+        if job["collected"] or job["status"] not in TERMINAL_STATUSES:
+            continue
+        collected, failed = {}, 0
+        if job.get("output_file_id"):
+            output = client.files.content(job["output_file_id"]).read().decode()
+            collected, failed = _collect_output(
+                extractor,
+                job,
+                output,
+                cache_dir,
+                checkpoint.get("cache_namespace", extractor.cache_namespace),
+            )
+        logger.info(
+            f"Batch job {job['id']} {job['status']}: collected {len(collected)} "
+            f"of {len(job['files'])} results ({failed} failed)"
+        )
+        results.update(collected)
+        # Commit the results before marking the job as collected
+        flush_cache()
+        job["collected"] = True
+        # Checkpoint each job, so that an interrupted collection is resumed
+        _save_checkpoint(checkpoint, checkpoint_path)
+
+    _save_checkpoint(checkpoint, checkpoint_path)
+    return results
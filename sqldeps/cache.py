@@ -2,29 +2,178 @@
 
 This module provides functions for caching extraction results to avoid
 repeatedly processing the same SQL files, which can save API calls, cost, and time.
+Results are stored as one JSON file per result, or in a single SQLite database
+per cache directory (see `sqldeps.sqlite_cache`).
 """
 
 import hashlib
 import json
+import re
+from functools import lru_cache
 from pathlib import Path
 
 from loguru import logger
 
+from sqldeps import __version__
 from sqldeps.models import SQLProfile
+from sqldeps.preprocessing import canonicalize_sql
+from sqldeps.sqlite_cache import DB_NAME, flush_stores, get_store, remove_database
 
 CACHE_DIR = ".sqldeps_cache"
 
+# Cache key modes: "content" hashes the raw file, "canonical" hashes its
+# canonical token stream (ignoring comments, whitespace and keyword case) and
+# "canonical-literals" also ignores the values of literals
+CACHE_KEYS = ("content", "canonical", "canonical-literals")
 
-def get_cache_path(file_path: str | Path, cache_dir: str | Path = CACHE_DIR) -> Path:
+# Cache backends: "json" stores one JSON file per result, "sqlite" stores all
+# results in a single database
+CACHE_BACKENDS = ("json", "sqlite")
+
+# Name of JSON cache files: optional namespace, then the SQL file stem and hash
+_JSON_CACHE_NAME = re.compile(
+    r"(?:(?P<namespace>[0-9a-f]{12})_)?(?P<key>.+_[0-9a-f]{16})"
+)
+
+# Number of file hashes memoized by path, modification time and size
+KEY_CACHE_SIZE = 4096
+
+
+def cache_namespace(fingerprint: dict) -> str:
+    """Hash an extraction configuration into a cache namespace.
+
+    Results of different configurations (framework, model, prompts, parameters,
+    options, endpoint or sqldeps version) are cached side by side under
+    different namespaces.
+
+    Args:
+        fingerprint: JSON-serializable description of the configuration
+
+    Returns:
+        Short hexadecimal namespace
+    """
+    payload = json.dumps(
+        {**fingerprint, "sqldeps": __version__}, sort_keys=True, default=str
+    )
+    return hashlib.md5(payload.encode()).hexdigest()[:12]
+
+
+def _check_cache_key(key: str) -> None:
+    """Check that a cache key mode is supported.
+
+    Raises:
+        ValueError: If the cache key mode is not supported
+    """
+    if key not in CACHE_KEYS:
+        raise ValueError(
+            f"Unsupported cache key: {key}. Must be one of: {', '.join(CACHE_KEYS)}"
+        )
+
+
+def _check_cache_backend(backend: str) -> None:
+    """Check that a cache backend is supported.
+
+    Raises:
+        ValueError: If the cache backend is not supported
+    """
+    if backend not in CACHE_BACKENDS:
+        raise ValueError(
+            f"Unsupported cache backend: {backend}. "
+            f"Must be one of: {', '.join(CACHE_BACKENDS)}"
+        )
+
+
+@lru_cache(maxsize=KEY_CACHE_SIZE)
+def _hash_file(file_path: Path, modified: int, size: int, key: str) -> tuple[str, str]:
+    """Hash the canonical and raw content of a file.
+
+    The modification time and size are part of the memoization key, so that
+    edited files are hashed again.
+
+    Args:
+        file_path: Resolved path to the SQL file
+        modified: Modification time of the file, in nanoseconds
+        size: Size of the file, in bytes
+        key: Canonical cache key mode ("canonical" or "canonical-literals")
+
+    Returns:
+        Tuple of the canonical key hash and the raw content hash
+    """
+    with open(file_path, "rb") as f:
+        content = f.read()
+    canonical = canonicalize_sql(
+        content.decode("utf-8", errors="replace"),
+        normalize_literals=key == "canonical-literals",
+    )
+    key_hash = hashlib.md5(f"{key}\n{canonical}".encode()).hexdigest()[:16]
+    return key_hash, hashlib.md5(content).hexdigest()[:16]
+
+
+def _file_hashes(file_path: Path, key: str) -> tuple[str, str]:
+    """Get the canonical key hash and raw content hash of a file, once per file.
+
+    Args:
+        file_path: Resolved path to the SQL file
+        key: Canonical cache key mode ("canonical" or "canonical-literals")
+
+    Returns:
+        Tuple of the canonical key hash and the raw content hash
+    """
+    stat = file_path.stat()
+    return _hash_file(file_path, stat.st_mtime_ns, stat.st_size, key)
+
+
+def file_hashes(file_path: str | Path, key: str = "content") -> tuple[str, str]:
+    """Get the cache key hash and raw content hash of a file.
+
+    Hashes taken when a file is sent for extraction identify the content the
+    result was extracted from, even if the file is edited before the result
+    is saved (see `save_to_cache`).
+
+    Args:
+        file_path: Path to the SQL file
+        key: Cache key mode ("content", "canonical" or "canonical-literals")
+
+    Returns:
+        Tuple of the cache key hash and the raw content hash, equal with
+        content keys
+
+    Raises:
+        FileNotFoundError: If the SQL file doesn't exist
+        ValueError: If the cache key mode is not supported
+    """
+    _check_cache_key(key)
+    file_path = Path(file_path).resolve()
+    if key == "content":
+        with open(file_path, "rb") as f:
+            content_hash = hashlib.md5(f.read()).hexdigest()[:16]
+        return content_hash, content_hash
+    return _file_hashes(file_path, key)
+
+
+def get_cache_path(
+    file_path: str | Path,
+    cache_dir: str | Path = CACHE_DIR,
+    key: str = "content",
+    namespace: str | None = None,
+    hashes: tuple[str, str] | None = None,
+) -> Path:
     """Generate a consistent cache file path based on SQL file content.
 
-    Creates a unique cache filename by hashing the SQL file's content.
-    Includes the original filename in the cache name for easier debugging.
+    Creates a unique cache filename by hashing the SQL file's content, or its
+    canonical token stream with canonical keys (computed once per file and
+    modification). Includes the configuration namespace and the original
+    filename in the cache name for easier debugging.
 
     Args:
         file_path: Path to the SQL file to be processed
         cache_dir: Directory where cache files will be stored.
                    Defaults to ".sqldeps_cache"
+        key: Cache key mode ("content", "canonical" or "canonical-literals")
+        namespace: Namespace of the extraction configuration (see
+            `cache_namespace`), None for no namespace
+        hashes: Hashes of the file content (see `file_hashes`), None to hash
+            the current content
 
     Returns:
         Path object pointing to the cache file location
@@ -32,18 +181,16 @@ def get_cache_path(file_path: str | Path, cache_dir: str | Path = CACHE_DIR) ->
     Raises:
         FileNotFoundError: If the SQL file doesn't exist
         PermissionError: If the SQL file can't be read
+        ValueError: If the cache key mode is not supported
     """
+    _check_cache_key(key)
     file_path = Path(file_path).resolve()
-
-    # Read file content and create hash
-    with open(file_path, "rb") as f:
-        content = f.read()
-
-    # Hash the content
-    content_hash = hashlib.md5(content).hexdigest()[:16]
+    content_hash = (hashes or file_hashes(file_path, key))[0]
 
     # Use a combination of filename and content hash for better readability/debugging
     cache_name = f"{file_path.stem}_{content_hash}"
+    if namespace:
+        cache_name = f"{namespace}_{cache_name}"
 
     # Ensure a valid filename
     cache_name = "".join(c if c.isalnum() or c in "_-." else "_" for c in cache_name)
@@ -52,62 +199,192 @@ def get_cache_path(file_path: str | Path, cache_dir: str | Path = CACHE_DIR) ->
 
 
 def save_to_cache(
-    result: SQLProfile, file_path: Path, cache_dir: Path = Path(CACHE_DIR)
+    result: SQLProfile,
+    file_path: Path,
+    cache_dir: Path = Path(CACHE_DIR),
+    key: str = "content",
+    namespace: str | None = None,
+    backend: str = "json",
+    compress: bool = False,
+    hashes: tuple[str, str] | None = None,
 ) -> bool:
     """Save extraction result to cache.
 
+    With canonical keys, the hash of the raw content is stored with the result,
+    to tell hits of cosmetically edited files apart. The SQLite backend buffers
+    results and commits them in batches (see `flush_cache`). Results extracted
+    before the file was last read are saved with the hashes taken when it was
+    sent, so that they are not cached under the content of an edited file.
+
     Args:
         result: The SQLProfile to save
         file_path: The original SQL file path
         cache_dir: The cache directory
+        key: Cache key mode ("content", "canonical" or "canonical-literals")
+        namespace: Namespace of the extraction configuration
+        backend: Cache backend ("json" or "sqlite")
+        compress: Whether to compress the result (SQLite backend only)
+        hashes: Hashes of the content the result was extracted from (see
+            `file_hashes`), None to hash the current content
 
     Returns:
         True if saved successfully, False otherwise
+
+    Raises:
+        ValueError: If the cache backend is not supported
     """
+    _check_cache_backend(backend)
+    if backend == "sqlite":
+        try:
+            cache_name = get_cache_path(file_path, cache_dir, key, hashes=hashes).stem
+            get_store(cache_dir).put(
+                namespace or "",
+                cache_name,
+                _cache_data(result, file_path, key, hashes),
+                compress,
+            )
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to save cache for {file_path}: {e}")
+            return False
+
     cache_dir.mkdir(parents=True, exist_ok=True)
-    cache_file = get_cache_path(file_path, cache_dir)
+    cache_file = get_cache_path(file_path, cache_dir, key, namespace, hashes)
 
     try:
         with open(cache_file, "w") as f:
-            json.dump(result.to_dict(), f)
+            json.dump(_cache_data(result, file_path, key, hashes), f)
         return True
     except Exception as e:
         logger.warning(f"Failed to save cache for {file_path}: {e}")
         return False
 
 
-def load_from_cache(
-    file_path: Path, cache_dir: Path = Path(CACHE_DIR)
-) -> SQLProfile | None:
-    """Load extraction result from cache.
+def _cache_data(
+    result: SQLProfile,
+    file_path: Path,
+    key: str,
+    hashes: tuple[str, str] | None = None,
+) -> dict:
+    """Serialize a result with its model and, for canonical keys, content hash.
+
+    Args:
+        result: The SQLProfile to save
+        file_path: The original SQL file path
+        key: Cache key mode ("content", "canonical" or "canonical-literals")
+        hashes: Hashes of the content the result was extracted from, None to
+            hash the current content
+
+    Returns:
+        JSON-serializable cached result
+    """
+    data = result.to_dict()
+    if result.model:
+        data["model"] = result.model
+    if key != "content":
+        data["content_hash"] = (hashes or file_hashes(file_path, key))[1]
+    return data
+
+
+def lookup_cache(
+    file_path: Path,
+    cache_dir: Path = Path(CACHE_DIR),
+    key: str = "content",
+    namespace: str | None = None,
+    backend: str = "json",
+) -> tuple[SQLProfile | None, bool]:
+    """Load extraction result from cache, telling whether the file was edited.
 
     Args:
         file_path: The original SQL file path
         cache_dir: The cache directory
+        key: Cache key mode ("content", "canonical" or "canonical-literals")
+        namespace: Namespace of the extraction configuration
+        backend: Cache backend ("json" or "sqlite")
 
     Returns:
-        SQLProfile if loaded successfully, None otherwise
+        Tuple of the SQLProfile (None if not cached) and whether the result was
+        only found thanks to a canonical key, i.e. the raw content of the file
+        differs from the content the result was extracted from
+
+    Raises:
+        ValueError: If the cache backend is not supported
     """
-    cache_file = get_cache_path(file_path, cache_dir)
+    _check_cache_backend(backend)
+    cache_file = get_cache_path(
+        file_path, cache_dir, key, None if backend == "sqlite" else namespace
+    )
 
-    if not cache_file.exists():
-        return None
+    if backend == "json" and not cache_file.exists():
+        return None, False
 
     try:
-        with open(cache_file) as f:
-            cached_data = json.load(f)
+        if backend == "sqlite":
+            cached_data = get_store(cache_dir).get(namespace or "", cache_file.stem)
+            if cached_data is None:
+                return None, False
             logger.info(f"Loading from cache: {file_path}")
-            return SQLProfile(**cached_data)
+        else:
+            with open(cache_file) as f:
+                cached_data = json.load(f)
+                logger.info(f"Loading from cache: {file_path}")
+        content_hash = cached_data.pop("content_hash", None)
+        edited = (
+            key != "content"
+            and content_hash is not None
+            and content_hash != _file_hashes(Path(file_path).resolve(), key)[1]
+        )
+        return SQLProfile(**cached_data), edited
     except Exception as e:
         logger.warning(f"Failed to load cache for {file_path}: {e}")
-        return None
+        return None, False
+
+
+def load_from_cache(
+    file_path: Path,
+    cache_dir: Path = Path(CACHE_DIR),
+    key: str = "content",
+    namespace: str | None = None,
+    backend: str = "json",
+) -> SQLProfile | None:
+    """Load extraction result from cache.
 
+    Args:
+        file_path: The original SQL file path
+        cache_dir: The cache directory
+        key: Cache key mode ("content", "canonical" or "canonical-literals")
+        namespace: Namespace of the extraction configuration
+        backend: Cache backend ("json" or "sqlite")
 
-def cleanup_cache(cache_dir: Path = Path(CACHE_DIR)) -> bool:
+    Returns:
+        SQLProfile if loaded successfully, None otherwise
+    """
+    return lookup_cache(file_path, cache_dir, key, namespace, backend)[0]
+
+
+def flush_cache() -> None:
+    """Commit the results buffered by the SQLite backend in this process.
+
+    Buffered results are committed in batches, at exit of the main process, and
+    at the end of each extraction run; call this to make them visible to other
+    processes earlier.
+    """
+    flush_stores()
+
+
+def cleanup_cache(
+    cache_dir: Path = Path(CACHE_DIR),
+    namespace: str | None = None,
+    backend: str | None = "json",
+) -> bool:
     """Clean up cache directory.
 
     Args:
         cache_dir: The cache directory to clean up
+        namespace: Only remove the results of this configuration namespace
+            (None to remove all results)
+        backend: Only remove the results of this cache backend ("json" or
+            "sqlite", None for both)
 
     Returns:
         True if cleaned up successfully, False otherwise
@@ -116,9 +393,14 @@ def cleanup_cache(cache_dir: Path = Path(CACHE_DIR)) -> bool:
         return True
 
     try:
-        # Remove all JSON files
-        for cache_file in cache_dir.glob("*.json"):
-            cache_file.unlink()
+        if backend in ("sqlite", None) and (cache_dir / DB_NAME).exists():
+            _clear_database(cache_dir, namespace)
+
+        if backend in ("json", None):
+            # Remove all JSON files (of the namespace)
+            pattern = f"{namespace}_*.json" if namespace else "*.json"
+            for cache_file in cache_dir.glob(pattern):
+                cache_file.unlink()
 
         # Try to remove directory if empty
         if not any(cache_dir.iterdir()):
@@ -132,3 +414,65 @@ def cleanup_cache(cache_dir: Path = Path(CACHE_DIR)) -> bool:
     except Exception as e:
         logger.warning(f"Failed to clean up cache: {e}")
         return False
+
+
+def _clear_database(cache_dir: Path, namespace: str | None) -> None:
+    """Remove the results of the SQLite database of a cache directory.
+
+    Args:
+        cache_dir: The cache directory
+        namespace: Only remove the results of this namespace (None to remove
+            the database)
+    """
+    if namespace is None:
+        remove_database(cache_dir)
+        logger.info(f"Removed cache database of {cache_dir}")
+        return
+    removed = get_store(cache_dir).clear(namespace)
+    logger.info(f"Removed {removed} results of namespace {namespace}")
+
+
+def migrate_cache(
+    cache_dir: Path = Path(CACHE_DIR),
+    compress: bool = False,
+    remove: bool = False,
+) -> int:
+    """Import the JSON cache files of a directory into its SQLite database.
+
+    Results keep their namespace, so they are found by the same extraction
+    configuration with the SQLite backend. Unreadable files are skipped.
+
+    Args:
+        cache_dir: The cache directory
+        compress: Whether to compress the imported results
+        remove: Whether to remove the JSON files once imported
+
+    Returns:
+        Number of results imported
+
+    Raises:
+        sqlite3.Error: If the results cannot be written to the database
+    """
+    store = get_store(cache_dir)
+    imported = []
+    for cache_file in sorted(Path(cache_dir).glob("*.json")):
+        match = _JSON_CACHE_NAME.fullmatch(cache_file.stem)
+        if not match:
+            logger.warning(f"Skipping file not named like a cache file: {cache_file}")
+            continue
+        try:
+            with open(cache_file) as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Skipping unreadable cache file {cache_file}: {e}")
+            continue
+        store.put(match["namespace"] or "", match["key"], data, compress)
+        imported.append(cache_file)
+
+    store.flush()
+
+    if remove:
+        for cache_file in imported:
+            cache_file.unlink()
+    logger.info(f"Migrated {len(imported)} cached results to {store.path}")
+    return len(imported)
@@ -0,0 +1,180 @@
+"""Statement-level chunking for oversized SQL files.
+
+This module splits large SQL scripts into groups of statements that can be
+extracted independently (and concurrently), and merges the resulting profiles
+back into a single SQLProfile for the whole script.
+"""
+
+import re
+
+import sqlparse
+
+from sqldeps.models import SQLProfile
+from sqldeps.utils import estimate_tokens
+
+# Identifier, optionally schema-qualified and/or double-quoted
+_IDENTIFIER = r'(?:"[^"]+"|[\w$]+)(?:\s*\.\s*(?:"[^"]+"|[\w$]+))?'
+
+# Temporary tables created by a statement (consumers must stay in the same chunk)
+_TEMP_TABLE_PATTERNS = [
+    re.compile(
+        r"\bCREATE\s+(?:(?:GLOBAL|LOCAL)\s+)?(?:TEMP|TEMPORARY)\s+TABLE\s+"
+        rf"(?:IF\s+NOT\s+EXISTS\s+)?({_IDENTIFIER})",
+        re.IGNORECASE,
+    ),
+    re.compile(
+        rf"\bINTO\s+(?:TEMP|TEMPORARY)\s+(?:TABLE\s+)?({_IDENTIFIER})",
+        re.IGNORECASE,
+    ),
+]
+
+
+def split_statements(sql: str) -> list[str]:
+    """Split a SQL script into its individual statements.
+
+    Dollar-quoted bodies (functions, procedures, DO blocks) are kept whole.
+
+    Args:
+        sql: SQL script
+
+    Returns:
+        List of non-empty SQL statements
+    """
+    return [stmt.strip() for stmt in sqlparse.split(sql) if stmt.strip()]
+
+
+def _normalize_identifier(name: str) -> str:
+    """Normalize an identifier by removing quotes, whitespace and case.
+
+    Args:
+        name: Identifier as it appears in the SQL
+
+    Returns:
+        Normalized identifier
+    """
+    return re.sub(r'[\s"]', "", name).lower()
+
+
+def _created_temp_tables(statement: str) -> set[str]:
+    """Find temporary tables created by a statement.
+
+    Args:
+        statement: SQL statement
+
+    Returns:
+        Set of normalized temporary table names
+    """
+    return {
+        _normalize_identifier(match.group(1))
+        for pattern in _TEMP_TABLE_PATTERNS
+        for match in pattern.finditer(statement)
+    }
+
+
+def group_statements(statements: list[str]) -> list[list[int]]:
+    """Group statements that must be analyzed together.
+
+    A statement that creates a temporary table is grouped with every later
+    statement referencing it, since the table is neither a dependency nor an
+    output of the script and can only be resolved with its producer in view.
+    CTEs never span statements, so they are always kept together.
+
+    Args:
+        statements: List of SQL statements
+
+    Returns:
+        List of groups of statement indices, ordered by their first statement
+    """
+    parent = list(range(len(statements)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, statement in enumerate(statements):
+        for table in _created_temp_tables(statement):
+            # Match the bare table name, quoted or not
+            name = re.escape(table.split(".")[-1])
+            reference = re.compile(rf'(?<![\w$])"?{name}"?(?![\w$])', re.IGNORECASE)
+            for j in range(i + 1, len(statements)):
+                if reference.search(statements[j]):
+                    parent[find(j)] = find(i)
+
+    groups: dict[int, list[int]] = {}
+    for i in range(len(statements)):
+        groups.setdefault(find(i), []).append(i)
+
+    return sorted(groups.values(), key=lambda group: group[0])
+
+
+def chunk_sql(sql: str, max_tokens: int) -> list[str]:
+    """Split a SQL script into chunks of up to `max_tokens` estimated tokens.
+
+    Statements are split with `sqlparse`, grouped so that temporary table
+    producers and consumers stay together, and greedily packed into chunks.
+    A single group larger than `max_tokens` becomes its own (oversized) chunk.
+
+    Args:
+        sql: SQL script
+        max_tokens: Maximum estimated tokens per chunk
+
+    Returns:
+        List of SQL chunks, in script order
+    """
+    statements = split_statements(sql)
+    if not statements:
+        return [sql]
+
+    chunks = []
+    current: list[int] = []
+    current_tokens = 0
+
+    for group in group_statements(statements):
+        tokens = sum(estimate_tokens(statements[i]) for i in group)
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append(current)
+            current, current_tokens = [], 0
+        current.extend(group)
+        current_tokens += tokens
+
+    if current:
+        chunks.append(current)
+
+    return ["\n".join(statements[i] for i in sorted(chunk)) for chunk in chunks]
+
+
+def merge_chunk_profiles(profiles: list[SQLProfile]) -> SQLProfile:
+    """Merge the profiles of consecutive chunks of the same script.
+
+    Tables created by an earlier chunk (present in its outputs but not in its
+    dependencies) do not need to exist before the script runs, so they are
+    removed from the dependencies of later chunks.
+
+    Args:
+        profiles: SQLProfile of each chunk, in script order
+
+    Returns:
+        SQLProfile for the whole script
+    """
+    dependencies: dict[str, set[str]] = {}
+    outputs: dict[str, set[str]] = {}
+    created: set[str] = set()
+
+    for profile in profiles:
+        for table, columns in profile.dependencies.items():
+            if table not in created:
+                dependencies.setdefault(table, set()).update(columns)
+        for table, columns in profile.outputs.items():
+            outputs.setdefault(table, set()).update(columns)
+
+        created.update(
+            table for table in profile.outputs if table not in profile.dependencies
+        )
+
+    return SQLProfile(
+        dependencies={table: list(cols) for table, cols in dependencies.items()},
+        outputs={table: list(cols) for table, cols in outputs.items()},
+        model=SQLProfile.combined_model(profiles),
+    )
@@ -0,0 +1,106 @@
+"""Circuit breaker for LLM providers.
+
+This module provides a circuit breaker that stops sending requests to a
+failing provider for a while, then lets a single probe request through to
+detect its recovery.
+"""
+
+import threading
+import time
+
+from loguru import logger
+
+# Circuit states
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Circuit breaker tracking consecutive failures of a provider.
+
+    The circuit opens after `failure_threshold` consecutive failures. While
+    open, requests are rejected. After `reset_timeout` seconds, a single probe
+    request is allowed (half-open state): its success closes the circuit, its
+    failure opens it again, and a probe ending without outcome (e.g.
+    cancelled) is released for the next request. Safe to share between
+    threads.
+
+    Attributes:
+        name: Name of the provider, used in log messages
+        failure_threshold: Consecutive failures opening the circuit
+        reset_timeout: Seconds before a probe request is allowed
+        state: Current state (CLOSED, OPEN or HALF_OPEN)
+        failures: Number of consecutive failures
+        lock: Lock serializing state changes across threads
+    """
+
+    def __init__(
+        self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0
+    ) -> None:
+        """Initialize a closed circuit breaker.
+
+        Args:
+            name: Name of the provider, used in log messages
+            failure_threshold: Consecutive failures opening the circuit
+            reset_timeout: Seconds before a probe request is allowed
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.lock = threading.Lock()
+        self._opened_at = 0.0
+
+    def allow(self) -> bool:
+        """Check whether a request may be sent to the provider.
+
+        Returns:
+            True if the circuit is closed, or if this request is the probe of
+            an open circuit whose reset timeout elapsed
+        """
+        with self.lock:
+            if self.state == CLOSED:
+                return True
+            if (
+                self.state == OPEN
+                and time.monotonic() - self._opened_at >= self.reset_timeout
+            ):
+                self.state = HALF_OPEN
+                logger.info(f"Probing {self.name} after {self.reset_timeout}s")
+                return True
+            return False
+
+    def record_success(self) -> None:
+        """Record a successful request, closing the circuit."""
+        with self.lock:
+            if self.state != CLOSED:
+                logger.info(f"{self.name} recovered, closing circuit")
+            self.state = CLOSED
+            self.failures = 0
+
+    def release(self) -> None:
+        """Release the probe of a request that ended without outcome.
+
+        The circuit goes back to open with its reset timeout elapsed, so that
+        the next request probes the provider again.
+        """
+        with self.lock:
+            if self.state == HALF_OPEN:
+                logger.debug(f"Probe of {self.name} ended without outcome")
+                self.state = OPEN
+
+    def record_failure(self) -> None:
+        """Record a failed request, opening the circuit if needed."""
+        with self.lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or (
+                self.state == CLOSED and self.failures >= self.failure_threshold
+            ):
+                logger.warning(
+                    f"{self.name} failed {self.failures} times, opening circuit "
+                    f"for {self.reset_timeout}s"
+                )
+                self.state = OPEN
+                self._opened_at = time.monotonic()
@@ -10,16 +10,31 @@ import sys
 from pathlib import Path
 from typing import Annotated
 
-import pandas as pd
 import typer
-import yaml
 from loguru import logger
 
 from sqldeps import __version__
-from sqldeps.cache import cleanup_cache
-from sqldeps.llm_parsers import BaseSQLExtractor, create_extractor
+from sqldeps.batch import (
+    DEFAULT_CHECKPOINT,
+    MAX_BATCH_REQUESTS,
+    collect_batches,
+    load_checkpoint,
+    submit_batches,
+    update_batches,
+)
+from sqldeps.cache import CACHE_DIR, cleanup_cache, migrate_cache
+from sqldeps.llm_parsers import (
+    BaseSQLExtractor,
+    HedgedExtractor,
+    HybridExtractor,
+    RouterExtractor,
+    create_extractor,
+    create_failover_extractor,
+)
 from sqldeps.models import SQLProfile
-from sqldeps.utils import merge_profiles
+from sqldeps.parallel import resolve_workers
+from sqldeps.usage import format_summary
+from sqldeps.utils import find_sql_files, merge_profiles
 
 # Main Typer app and subcommands
 app = typer.Typer(
@@ -34,10 +49,12 @@ app = typer.Typer(
 # Create subcommands
 app_cmd = typer.Typer(help="Run the SQLDeps web application")
 cache_cmd = typer.Typer(help="Manage SQLDeps cache")
+batch_cmd = typer.Typer(help="Extract large corpora offline with provider batch jobs")
 
 # Add subcommand groups to main app
 app.add_typer(app_cmd, name="app")
 app.add_typer(cache_cmd, name="cache")
+app.add_typer(batch_cmd, name="batch")
 
 
 def extract_dependencies(
@@ -50,6 +67,8 @@ def extract_dependencies(
     rpm: int = 100,
     use_cache: bool = True,
     clear_cache: bool = False,
+    executor: str = "process",
+    batch_token_budget: int | None = None,
 ) -> dict:
     """Extract dependencies from a file or directory.
 
@@ -59,10 +78,13 @@ def extract_dependencies(
         recursive: Whether to recursively scan directories
         merge_sql_profiles: Whether to merge all SQL profiles into a single one
         valid_extensions: Set of valid file extensions to process (default: {sql})
-        n_workers: Number of worker processes for parallel execution
+        n_workers: Number of parallel workers
         rpm: Maximum requests per minute for API rate limiting
         use_cache: Whether to use cached results
         clear_cache: Whether to clear the cache after processing
+        executor: Parallel execution strategy ("process", "thread" or "async")
+        batch_token_budget: If set, pack small files into shared requests of up
+            to this many estimated SQL tokens
 
     Returns:
         Dictionary mapping file paths to SQLProfile objects, or a single SQLProfile
@@ -87,9 +109,73 @@ def extract_dependencies(
             rpm=rpm,
             use_cache=use_cache,
             clear_cache=clear_cache,
+            executor=executor,
+            batch_token_budget=batch_token_budget,
         )
 
 
+def wrap_extractor(
+    extractor: BaseSQLExtractor,
+    framework: str,
+    prompt: Path | None,
+    endpoint: dict,
+    simple_model: str | None = None,
+    simple_max_tokens: int = 500,
+    hedge: bool = False,
+    hedge_model: str | None = None,
+    hybrid: bool = False,
+) -> BaseSQLExtractor:
+    """Wrap an extractor with the routing, hedging and hybrid extractors.
+
+    With routing, the extractor of each tier is hedged, so that queries are
+    still routed by complexity: hedge requests of simple queries go to the
+    simple model, those of complex queries to the hedge model (or the main
+    model).
+
+    Args:
+        extractor: Extractor of the main model
+        framework: LLM framework of the extractor
+        prompt: Path to custom prompt YAML file
+        endpoint: Endpoint settings of the framework (e.g. `base_url`)
+        simple_model: Fast model for simple SQL inputs (no routing if None)
+        simple_max_tokens: Maximum estimated tokens of simple SQL inputs
+        hedge: Whether to hedge slow requests
+        hedge_model: Model used for hedge requests (implies `hedge`)
+        hybrid: Whether to resolve simple statements with static analysis
+
+    Returns:
+        The wrapped extractor
+    """
+    hedge = hedge or bool(hedge_model)
+    if hedge:
+        hedge_extractor = None
+        if hedge_model:
+            hedge_extractor = create_extractor(
+                framework=framework,
+                model=hedge_model,
+                prompt_path=prompt,
+                **endpoint,
+                **extractor.options,
+            )
+        extractor = HedgedExtractor(extractor, hedge_extractor)
+    if simple_model:
+        simple_extractor = create_extractor(
+            framework=framework,
+            model=simple_model,
+            prompt_path=prompt,
+            **endpoint,
+            **extractor.options,
+        )
+        if hedge:
+            simple_extractor = HedgedExtractor(simple_extractor)
+        extractor = RouterExtractor(
+            simple_extractor, extractor, max_tokens=simple_max_tokens
+        )
+    if hybrid:
+        extractor = HybridExtractor(extractor)
+    return extractor
+
+
 def match_dependencies_against_schema(
     extractor: BaseSQLExtractor,
     dependencies: dict,
@@ -120,6 +206,8 @@ def match_dependencies_against_schema(
     logger.info("Retrieving schema from database...")
     schemas = [s.strip() for s in db_target_schemas.split(",")]
 
+    import yaml
+
     with open(db_credentials) as file:
         db_credentials = yaml.safe_load(file)["database"]
 
@@ -140,6 +228,28 @@ def match_dependencies_against_schema(
     return db_dependencies
 
 
+def save_usage_report(extractor: BaseSQLExtractor, output_path: Path) -> None:
+    """Print the summary of the LLM requests of a run and save it as JSON.
+
+    Args:
+        extractor: Extractor used for the run
+        output_path: Path of the JSON report, with the summary ("summary") and
+            the record of each request ("requests")
+
+    Returns:
+        None
+    """
+    summary = extractor.usage_summary()
+    typer.echo(format_summary(summary))
+    report = {
+        "summary": summary,
+        "requests": [r.to_dict() for r in extractor.request_records],
+    }
+    with open(output_path, "w") as f:
+        json.dump(report, f, indent=2)
+    logger.success(f"Saved usage report to JSON: {output_path}")
+
+
 def save_output(
     dependencies: SQLProfile | dict, output_path: Path, is_schema_match: bool = False
 ) -> None:
@@ -155,6 +265,8 @@ def save_output(
     """
     if output_path.suffix.lower() == ".csv" or is_schema_match:
         # Dataframe output
+        import pandas as pd
+
         output_path = output_path.with_suffix(".csv")
         if isinstance(dependencies, dict):
             df_output = (
@@ -245,13 +357,34 @@ def extract(
     framework: Annotated[
         str,
         typer.Option(
-            help="LLM framework to use [groq, openai, deepseek]",
+            help=(
+                "LLM framework to use "
+                "[litellm, groq, openai, deepseek, openai-compatible, static]"
+            ),
             case_sensitive=False,
         ),
     ] = "groq",
     model: Annotated[
         str | None, typer.Option(help="Model name for the selected framework")
     ] = None,
+    base_url: Annotated[
+        str | None,
+        typer.Option(
+            help=(
+                "Base URL of the endpoint for the openai-compatible framework, "
+                "e.g. http://localhost:8000/v1"
+            ),
+        ),
+    ] = None,
+    fallback: Annotated[
+        list[str] | None,
+        typer.Option(
+            help=(
+                "Fallback provider as framework[:model], used when the previous "
+                "ones fail (repeatable, tried in order)"
+            ),
+        ),
+    ] = None,
     prompt: Annotated[
         Path | None,
         typer.Option(
@@ -265,6 +398,114 @@ def extract(
         bool,
         typer.Option("--recursive", "-r", help="Recursively scan folder for SQL files"),
     ] = False,
+    chunk_token_limit: Annotated[
+        int | None,
+        typer.Option(
+            help=(
+                "Split SQL files above this many estimated tokens into statement "
+                "chunks extracted concurrently (disabled by default)"
+            ),
+        ),
+    ] = None,
+    formatting: Annotated[
+        str,
+        typer.Option(
+            help=(
+                "SQL formatting before prompting [off, lite, full]. Large files "
+                "are never reindented."
+            ),
+            case_sensitive=False,
+        ),
+    ] = "full",
+    compact: Annotated[
+        bool,
+        typer.Option(
+            help=(
+                "Strip comments and collapse whitespace instead of reindenting "
+                "SQL before prompting"
+            ),
+        ),
+    ] = False,
+    elide_literals: Annotated[
+        bool,
+        typer.Option(
+            help=(
+                "Replace bulk literal payloads (long VALUES and IN lists) with a "
+                "placeholder before prompting"
+            ),
+        ),
+    ] = False,
+    stream: Annotated[
+        bool,
+        typer.Option(
+            help=(
+                "Stream LLM responses and stop reading as soon as the JSON "
+                "answer is complete"
+            ),
+        ),
+    ] = False,
+    prompt_cache: Annotated[
+        bool,
+        typer.Option(
+            help=(
+                "Mark the system prompt for provider-side prompt caching "
+                "(LiteLLM models requiring cache-control markers)"
+            ),
+        ),
+    ] = True,
+    structured_output: Annotated[
+        bool,
+        typer.Option(
+            help=(
+                "Constrain LLM responses to a strict JSON schema where the "
+                "provider supports it (JSON mode otherwise)"
+            ),
+        ),
+    ] = False,
+    auto_max_tokens: Annotated[
+        bool,
+        typer.Option(
+            help="Limit the output tokens of each LLM request to its prompt size",
+        ),
+    ] = False,
+    hedge: Annotated[
+        bool,
+        typer.Option(
+            help=(
+                "Send a duplicate request when an LLM request is slower than the "
+                "95th latency percentile of the run, keeping the first answer"
+            ),
+        ),
+    ] = False,
+    hedge_model: Annotated[
+        str | None,
+        typer.Option(
+            help="Model used for hedge requests (implies --hedge, default: --model)"
+        ),
+    ] = None,
+    simple_model: Annotated[
+        str | None,
+        typer.Option(
+            help=(
+                "Fast model of the same framework for simple SQL inputs; complex "
+                "inputs (procedural code, dynamic SQL, nested CTEs, many "
+                "statements or tokens) use --model"
+            ),
+        ),
+    ] = None,
+    simple_max_tokens: Annotated[
+        int,
+        typer.Option(help="Maximum estimated tokens of inputs sent to --simple-model"),
+    ] = 500,
+    hybrid: Annotated[
+        bool,
+        typer.Option(
+            help=(
+                "Resolve simple statements with local static analysis and only "
+                "send the remaining ones to the LLM"
+            ),
+        ),
+    ] = False,
     db_match_schema: Annotated[
         bool, typer.Option(help="Match dependencies against database schema")
     ] = False,
@@ -293,10 +534,31 @@ def extract(
         typer.Option(
             help=(
                 "Number of workers for parallel processing. "
-                "Use -1 for all CPU cores, 1 for sequential processing."
+                "Use -1 for all CPU cores (process) or the default concurrency "
+                "(thread/async), 1 for sequential processing."
             ),
         ),
     ] = 1,
+    executor: Annotated[
+        str,
+        typer.Option(
+            help=(
+                "Parallel execution strategy [process, thread, async]. "
+                "Thread and async workers share one extractor and are not "
+                "limited by the CPU count."
+            ),
+            case_sensitive=False,
+        ),
+    ] = "process",
+    batch_token_budget: Annotated[
+        int | None,
+        typer.Option(
+            help=(
+                "Pack small SQL files into shared requests of up to this many "
+                "estimated SQL tokens (disabled by default)"
+            ),
+        ),
+    ] = None,
     rpm: Annotated[
         int,
         typer.Option(
@@ -307,9 +569,38 @@ def extract(
         bool,
         typer.Option(help="Use local cache for SQL extraction results"),
     ] = True,
+    cache_key: Annotated[
+        str,
+        typer.Option(
+            help=(
+                "Key of cached results [content, canonical, canonical-literals]. "
+                "Canonical keys ignore comments, whitespace and keyword case."
+            ),
+            case_sensitive=False,
+        ),
+    ] = "content",
+    cache_backend: Annotated[
+        str,
+        typer.Option(
+            help=(
+                "Storage of cached results [json, sqlite]. SQLite keeps all "
+                "results in a single database file."
+            ),
+            case_sensitive=False,
+        ),
+    ] = "json",
+    cache_compress: Annotated[
+        bool,
+        typer.Option(help="Compress cached results (SQLite backend)"),
+    ] = False,
     clear_cache: Annotated[
         bool,
-        typer.Option(help="Clear local cache after processing"),
+        typer.Option(
+            help=(
+                "Clear the cached results of the framework, model and prompt "
+                "after processing"
+            )
+        ),
     ] = False,
     output: Annotated[
         Path,
@@ -317,6 +608,16 @@ def extract(
             "--output", "-o", help="Output file path for extracted dependencies"
         ),
     ] = Path("dependencies.json"),
+    usage_report: Annotated[
+        Path | None,
+        typer.Option(
+            help=(
+                "Print a summary of LLM requests (tokens, latency percentiles, "
+                "throughput, cost) and save it with per-request records to this "
+                "JSON file"
+            ),
+        ),
+    ] = None,
 ) -> None:
     """Extract SQL dependencies from file or folder.
 
@@ -324,8 +625,51 @@ def extract(
     optionally validating them against a real database schema.
     """
     try:
-        extractor = create_extractor(
-            framework=framework, model=model, prompt_path=prompt
+        options = {
+            "chunk_token_limit": chunk_token_limit,
+            "formatting": formatting.lower(),
+            "compact": compact,
+            "elide_literals": elide_literals,
+            "stream": stream,
+            "prompt_cache": prompt_cache,
+            "structured_output": structured_output,
+            "auto_max_tokens": auto_max_tokens,
+            "cache_key": cache_key.lower(),
+            "cache_backend": cache_backend.lower(),
+            "cache_compress": cache_compress,
+        }
+        # Thread and async workers share the connection pool of one extractor
+        if executor.lower() in ("thread", "async") and n_workers != 1:
+            options["max_connections"] = resolve_workers(
+                n_workers, executor=executor.lower()
+            )
+        endpoint = {"base_url": base_url} if base_url else {}
+        if fallback:
+            chain = [(framework, model)]
+            for provider in fallback:
+                fallback_framework, _, fallback_model = provider.partition(":")
+                chain.append((fallback_framework, fallback_model or None))
+            extractor = create_failover_extractor(
+                chain, prompt_path=prompt, **endpoint, **options
+            )
+        else:
+            extractor = create_extractor(
+                framework=framework,
+                model=model,
+                prompt_path=prompt,
+                **endpoint,
+                **options,
+            )
+        extractor = wrap_extractor(
+            extractor,
+            framework,
+            prompt,
+            endpoint,
+            simple_model=simple_model,
+            simple_max_tokens=simple_max_tokens,
+            hedge=hedge,
+            hedge_model=hedge_model,
+            hybrid=hybrid,
         )
 
         dependencies = extract_dependencies(
@@ -336,6 +680,8 @@ def extract(
             rpm=rpm,
             use_cache=use_cache,
             clear_cache=clear_cache,
+            executor=executor.lower(),
+            batch_token_budget=batch_token_budget,
         )
 
         if db_match_schema:
@@ -345,6 +691,9 @@ def extract(
 
         save_output(dependencies, output, is_schema_match=db_match_schema)
 
+        if usage_report:
+            save_usage_report(extractor, usage_report)
+
     except Exception as e:
         logger.error(f"Error extracting dependencies: {e}")
         raise typer.Exit(code=1) from e
@@ -374,10 +723,10 @@ def app_main() -> None:
 # Cache subcommands
 @cache_cmd.command("clear")
 def cache_clear() -> None:
-    """Clear the SQLDeps cache directory."""
+    """Clear the SQLDeps cache directory (JSON files and SQLite database)."""
     try:
         logger.info("Clearing SQLDeps cache...")
-        success = cleanup_cache()
+        success = cleanup_cache(backend=None)
         if success:
             logger.success("Cache cleared successfully")
         else:
@@ -388,5 +737,196 @@ def cache_clear() -> None:
         raise typer.Exit(code=1) from e
 
 
+@cache_cmd.command("migrate")
+def cache_migrate(
+    cache_dir: Annotated[
+        Path, typer.Option(help="Cache directory holding the JSON cache files")
+    ] = Path(CACHE_DIR),
+    compress: Annotated[
+        bool, typer.Option(help="Compress the migrated results")
+    ] = False,
+    remove: Annotated[
+        bool, typer.Option(help="Remove the JSON cache files once migrated")
+    ] = False,
+) -> None:
+    """Migrate JSON cache files to the SQLite cache backend."""
+    try:
+        migrated = migrate_cache(cache_dir, compress=compress, remove=remove)
+        logger.success(
+            f"Migrated {migrated} results, use them with --cache-backend=sqlite"
+        )
+    except Exception as e:
+        logger.error(f"Error migrating cache: {e}")
+        raise typer.Exit(code=1) from e
+
+
+def checkpoint_extractor(checkpoint_path: Path) -> BaseSQLExtractor:
+    """Create the extractor of the provider batch jobs were submitted to.
+
+    Args:
+        checkpoint_path: Path to the batch checkpoint file
+
+    Returns:
+        Extractor with the framework, model, prompts and endpoint of the jobs
+    """
+    checkpoint = load_checkpoint(checkpoint_path)
+    endpoint = {"base_url": checkpoint["base_url"]}
+    return create_extractor(
+        framework=checkpoint["framework"],
+        model=checkpoint["model"],
+        prompt_path=checkpoint["prompt_path"],
+        cache_key=checkpoint.get("cache_key", "content"),
+        cache_backend=checkpoint.get("cache_backend", "json"),
+        cache_compress=checkpoint.get("cache_compress", False),
+        **(endpoint if checkpoint["framework"] == "openai-compatible" else {}),
+    )
+
+
+# Batch subcommands
+@batch_cmd.command("submit")
+def batch_submit(
+    fpath: Annotated[
+        Path,
+        typer.Argument(
+            help="SQL file or directory path",
+            exists=True,
+            dir_okay=True,
+            file_okay=True,
+            resolve_path=True,
+            autocompletion=path_complete,
+        ),
+    ],
+    framework: Annotated[
+        str,
+        typer.Option(
+            help="LLM framework to use [openai, groq, openai-compatible]",
+            case_sensitive=False,
+        ),
+    ] = "openai",
+    model: Annotated[
+        str | None, typer.Option(help="Model name for the selected framework")
+    ] = None,
+    base_url: Annotated[
+        str | None,
+        typer.Option(help="Base URL of the endpoint for openai-compatible"),
+    ] = None,
+    prompt: Annotated[
+        Path | None,
+        typer.Option(
+            help="Path to custom prompt YAML file",
+            exists=True,
+            dir_okay=False,
+            resolve_path=True,
+        ),
+    ] = None,
+    recursive: Annotated[
+        bool,
+        typer.Option("--recursive", "-r", help="Recursively scan folder for SQL files"),
+    ] = False,
+    checkpoint: Annotated[
+        Path, typer.Option(help="Local file checkpointing the submitted jobs")
+    ] = DEFAULT_CHECKPOINT,
+    max_requests: Annotated[
+        int, typer.Option(help="Maximum number of requests per batch job")
+    ] = MAX_BATCH_REQUESTS,
+    use_cache: Annotated[
+        bool, typer.Option(help="Skip SQL files whose result is cached")
+    ] = True,
+    cache_key: Annotated[
+        str,
+        typer.Option(
+            help=(
+                "Key of cached results [content, canonical, canonical-literals]. "
+                "Canonical keys ignore comments, whitespace and keyword case."
+            ),
+            case_sensitive=False,
+        ),
+    ] = "content",
+    cache_backend: Annotated[
+        str,
+        typer.Option(
+            help=(
+                "Storage of cached results [json, sqlite]. SQLite keeps all "
+                "results in a single database file."
+            ),
+            case_sensitive=False,
+        ),
+    ] = "json",
+    cache_compress: Annotated[
+        bool,
+        typer.Option(help="Compress cached results (SQLite backend)"),
+    ] = False,
+) -> None:
+    """Submit batch jobs extracting the dependencies of SQL files."""
+    try:
+        endpoint = {"base_url": base_url} if base_url else {}
+        extractor = create_extractor(
+            framework=framework,
+            model=model,
+            prompt_path=prompt,
+            cache_key=cache_key.lower(),
+            cache_backend=cache_backend.lower(),
+            cache_compress=cache_compress,
+            **endpoint,
+        )
+        sql_files = [fpath] if fpath.is_file() else find_sql_files(fpath, recursive)
+        jobs = submit_batches(
+            extractor,
+            sql_files,
+            checkpoint_path=checkpoint,
+            max_requests=max_requests,
+            use_cache=use_cache,
+        )
+        logger.success(f"Submitted {len(jobs)} batch jobs, saved to {checkpoint}")
+    except Exception as e:
+        logger.error(f"Error submitting batch jobs: {e}")
+        raise typer.Exit(code=1) from e
+
+
+@batch_cmd.command("status")
+def batch_status(
+    checkpoint: Annotated[
+        Path, typer.Option(help="Local file checkpointing the submitted jobs")
+    ] = DEFAULT_CHECKPOINT,
+) -> None:
+    """Show the status of the submitted batch jobs."""
+    try:
+        jobs = update_batches(checkpoint_extractor(checkpoint), checkpoint)
+        for job in jobs:
+            counts = job.get("request_counts") or {}
+            progress = (
+                f"{counts.get('completed', 0)}/{counts.get('total', 0)} completed, "
+                f"{counts.get('failed', 0)} failed"
+            )
+            collected = ", collected" if job["collected"] else ""
+            typer.echo(f"{job['id']}: {job['status']} ({progress}){collected}")
+    except Exception as e:
+        logger.error(f"Error retrieving batch jobs: {e}")
+        raise typer.Exit(code=1) from e
+
+
+@batch_cmd.command("collect")
+def batch_collect(
+    checkpoint: Annotated[
+        Path, typer.Option(help="Local file checkpointing the submitted jobs")
+    ] = DEFAULT_CHECKPOINT,
+    output: Annotated[
+        Path | None,
+        typer.Option(
+            "--output", "-o", help="Output file path for the collected dependencies"
+        ),
+    ] = None,
+) -> None:
+    """Save the results of finished batch jobs to the cache."""
+    try:
+        results = collect_batches(checkpoint_extractor(checkpoint), checkpoint)
+        logger.success(f"Collected {len(results)} results into the cache")
+        if output and results:
+            save_output(results, output)
+    except Exception as e:
+        logger.error(f"Error collecting batch jobs: {e}")
+        raise typer.Exit(code=1) from e
+
+
 if __name__ == "__main__":
     app()
@@ -0,0 +1,140 @@
+"""Complexity scoring of SQL inputs.
+
+This module measures cheap local features of SQL scripts (statement count,
+estimated tokens, procedural code, dynamic SQL and CTE nesting depth) in a
+single regex pass, without parsing, to route simple inputs to fast models.
+"""
+
+import re
+from dataclasses import dataclass
+
+from sqldeps.utils import estimate_tokens
+
+# Lexical elements of SQL relevant to complexity, in order of precedence:
+# comments, dollar-quoted bodies and quoted strings/identifiers are consumed
+# whole so that keywords within them are ignored
+_TOKEN_PATTERN = re.compile(
+    r"""
+    (?P<comment>--[^\n]*|/\*.*?\*/)
+    |(?P<dollar>\$(?P<tag>(?:[A-Za-z_]\w*)?)\$.*?\$(?P=tag)\$)
+    |(?P<quoted>'(?:[^']|'')*'|"(?:[^"]|"")*")
+    |(?P<cte>\bWITH\s+(?:RECURSIVE\s+)?(?:\w+|"[^"]*")\s*(?:\([^()]*\)\s*)?AS\b)
+    |(?P<dynamic>\bEXEC(?:UTE)?\b(?!\s+(?:FUNCTION|PROCEDURE)\b)|\bsp_executesql\b)
+    |(?P<procedural>
+        \bCREATE\s+(?:OR\s+REPLACE\s+)?(?:FUNCTION|PROCEDURE|TRIGGER)\b
+        |\bDECLARE\b|\bLANGUAGE\s+plpgsql\b
+    )
+    |(?P<punct>[();])
+    """,
+    re.IGNORECASE | re.DOTALL | re.VERBOSE,
+)
+
+# Dynamic SQL within procedural bodies
+_DYNAMIC_PATTERN = re.compile(
+    r"\bEXEC(?:UTE)?\b(?!\s+(?:FUNCTION|PROCEDURE)\b)|\bsp_executesql\b",
+    re.IGNORECASE,
+)
+
+
+@dataclass
+class SQLComplexity:
+    """Complexity features of a SQL input.
+
+    Attributes:
+        statements: Number of statements
+        tokens: Estimated number of tokens
+        procedural: Whether the input contains procedural code (function,
+            procedure or trigger definitions, `DO` blocks, `DECLARE`)
+        dynamic_sql: Whether the input executes dynamic SQL
+        cte_depth: Maximum nesting depth of `WITH` clauses (0 without CTE)
+    """
+
+    statements: int
+    tokens: int
+    procedural: bool
+    dynamic_sql: bool
+    cte_depth: int
+
+    def is_simple(
+        self, max_tokens: int, max_statements: int, max_cte_depth: int
+    ) -> bool:
+        """Check whether the input is within the thresholds of simple inputs.
+
+        Procedural code and dynamic SQL are never simple.
+
+        Args:
+            max_tokens: Maximum estimated tokens
+            max_statements: Maximum number of statements
+            max_cte_depth: Maximum nesting depth of `WITH` clauses
+
+        Returns:
+            True if the input is simple
+        """
+        return (
+            not self.procedural
+            and not self.dynamic_sql
+            and self.tokens <= max_tokens
+            and self.statements <= max_statements
+            and self.cte_depth <= max_cte_depth
+        )
+
+
+def measure_complexity(sql: str) -> SQLComplexity:  # noqa: C901
+    """Measure the complexity features of a SQL input.
+
+    Args:
+        sql: SQL script
+
+    Returns:
+        SQLComplexity with the features of the script
+    """
+    statements = 0
+    pending = False  # Whether the current statement has content
+    procedural = dynamic_sql = False
+    depth = cte_depth = 0
+    # Parenthesis depths of the enclosing WITH clauses
+    open_ctes: list[int] = []
+
+    position = 0
+    for match in _TOKEN_PATTERN.finditer(sql):
+        pending = pending or bool(sql[position : match.start()].strip())
+        position = match.end()
+        kind = match.lastgroup
+        if kind == "comment":
+            continue
+
+        token = match.group()
+        if kind == "punct" and token == ";":
+            statements += pending
+            pending = False
+            depth = 0
+            open_ctes.clear()
+            continue
+
+        pending = True
+        if kind == "punct":
+            depth += 1 if token == "(" else -1
+            while open_ctes and open_ctes[-1] > depth:
+                open_ctes.pop()
+        elif kind == "cte":
+            # A sibling WITH clause at the same depth replaces the previous one
+            while open_ctes and open_ctes[-1] >= depth:
+                open_ctes.pop()
+            open_ctes.append(depth)
+            cte_depth = max(cte_depth, len(open_ctes))
+        elif kind == "dollar":
+            procedural = True
+            dynamic_sql = dynamic_sql or bool(_DYNAMIC_PATTERN.search(token))
+        elif kind == "dynamic":
+            dynamic_sql = True
+        elif kind == "procedural":
+            procedural = True
+
+    pending = pending or bool(sql[position:].strip())
+    return SQLComplexity(
+        statements=statements + pending,
+        tokens=estimate_tokens(sql),
+        procedural=procedural,
+        dynamic_sql=dynamic_sql,
+        cte_depth=cte_depth,
+    )
@@ -0,0 +1,217 @@
+"""JSON helpers for LLM responses.
+
+This module provides incremental detection of complete JSON objects in
+streamed LLM responses, and tolerant parsing of malformed or truncated
+responses.
+"""
+
+import json
+import re
+
+
+class JsonCompletionDetector:
+    """Incrementally detect the end of the first JSON object in a text stream.
+
+    Feed the streamed text chunk by chunk; `complete` becomes True as soon as
+    the braces of the first top-level JSON object are balanced, taking string
+    literals and escapes into account. Anything before the first `{` (such as
+    a code fence) is ignored.
+
+    Attributes:
+        complete: Whether the first JSON object has been fully received
+        end: Number of characters fed up to the end of the JSON object
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty detector."""
+        self.complete = False
+        self.end: int | None = None
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._position = 0
+
+    def feed(self, text: str) -> bool:
+        """Process the next chunk of the stream.
+
+        Args:
+            text: Next chunk of streamed text
+
+        Returns:
+            True if the first JSON object is complete
+        """
+        if self.complete:
+            return True
+
+        for i, char in enumerate(text):
+            if self._in_string:
+                self._scan_string(char)
+            elif self._scan_structure(char):
+                self.complete = True
+                self.end = self._position + i + 1
+                break
+
+        self._position += len(text)
+        return self.complete
+
+    def _scan_string(self, char: str) -> None:
+        """Process a character inside a string literal."""
+        if self._escaped:
+            self._escaped = False
+        elif char == "\\":
+            self._escaped = True
+        elif char == '"':
+            self._in_string = False
+
+    def _scan_structure(self, char: str) -> bool:
+        """Process a character outside string literals.
+
+        Returns:
+            True if the character closes the first JSON object
+        """
+        if not self._depth:
+            # Skip anything before the first opening brace
+            self._depth = int(char == "{")
+        elif char == '"':
+            self._in_string = True
+        elif char in "{[":
+            self._depth += 1
+        elif char in "}]":
+            self._depth -= 1
+            return self._depth == 0
+        return False
+
+
+# Maximum number of truncation points tried when salvaging a truncated response
+MAX_SALVAGE_ATTEMPTS = 16
+
+# Start of a JSON object: an opening brace followed by a key or a closing brace
+_OBJECT_START = re.compile(r'\{\s*["}]')
+
+
+def _string_end(text: str, start: int) -> int | None:
+    """Find the end of the string literal opening at `start`.
+
+    Returns:
+        Index after the closing quote, or None if the string is unterminated
+    """
+    escaped = False
+    for i in range(start + 1, len(text)):
+        if escaped:
+            escaped = False
+        elif text[i] == "\\":
+            escaped = True
+        elif text[i] == '"':
+            return i + 1
+    return None
+
+
+def _close_json(text: str) -> tuple[str, list[int]]:
+    """Drop trailing commas and truncated strings, and close arrays and objects.
+
+    Args:
+        text: JSON text, possibly truncated
+
+    Returns:
+        Tuple of (repaired JSON text, positions in `text` where it can be cut
+        back to the end of a complete value)
+    """
+    parts: list[str] = []
+    closers: list[str] = []
+    cut_points: list[int] = []
+    last_comma = None
+    i = 0
+
+    while i < len(text):
+        char = text[i]
+        if char == '"':
+            end = _string_end(text, i)
+            if end is None:
+                # A truncated string (e.g. a column name) may be wrong, so drop it
+                return _close_json(text[:i])[0], cut_points
+            parts.append(text[i:end])
+            last_comma = None
+            i = end
+            continue
+
+        if char in "}]" and last_comma is not None:
+            parts[last_comma] = ""
+        if char in "}]" and closers:
+            closers.pop()
+        elif char in "{[":
+            closers.append("}" if char == "{" else "]")
+            cut_points.append(i + 1)
+        elif char == ",":
+            cut_points.append(i)
+            last_comma = len(parts)
+        if not char.isspace() and char != ",":
+            last_comma = None
+        parts.append(char)
+        i += 1
+
+    if last_comma is not None:
+        parts[last_comma] = ""
+    return "".join(parts).rstrip() + "".join(reversed(closers)), cut_points
+
+
+def _salvage(candidate: str) -> object:
+    """Parse a JSON object after repairing trailing commas and truncation.
+
+    If the repaired text still cannot be parsed (e.g. it was truncated after
+    a key), it is cut back to the end of the last complete values.
+
+    Args:
+        candidate: Text starting with the opening brace of a JSON object
+
+    Returns:
+        Parsed JSON value
+
+    Raises:
+        json.JSONDecodeError: If no repair produces valid JSON
+    """
+    repaired, cut_points = _close_json(candidate)
+    try:
+        return json.loads(repaired)
+    except json.JSONDecodeError as e:
+        error = e
+
+    for cut in reversed(cut_points[-MAX_SALVAGE_ATTEMPTS:]):
+        try:
+            return json.loads(_close_json(candidate[:cut])[0])
+        except json.JSONDecodeError:
+            continue
+    raise error
+
+
+def parse_json(text: str) -> tuple[object, bool]:
+    """Parse a JSON object from an LLM response, repairing it if needed.
+
+    Valid JSON is parsed as is. Otherwise the first JSON object is extracted
+    from the response, ignoring code fences and surrounding prose, trailing
+    commas are dropped, and truncated strings, arrays and objects are closed.
+
+    Args:
+        text: Response text
+
+    Returns:
+        Tuple of (parsed JSON value, whether the response had to be repaired)
+
+    Raises:
+        ValueError: If no JSON object can be salvaged from the response
+    """
+    try:
+        return json.loads(text), False
+    except json.JSONDecodeError as e:
+        error = e
+
+    for match in _OBJECT_START.finditer(text):
+        candidate = text[match.start() :]
+        detector = JsonCompletionDetector()
+        if detector.feed(candidate):
+            candidate = candidate[: detector.end]
+        try:
+            return _salvage(candidate), True
+        except json.JSONDecodeError:
+            continue
+
+    raise ValueError(f"Failed to decode JSON: {error}")
@@ -2,33 +2,94 @@
 
 This package provides integrations with various LLM providers for extracting
 SQL dependencies, with a common interface and factory function.
+
+Provider extractors are imported on first use, so that importing the package
+does not load the SDK of every provider.
 """
 
+from importlib import import_module
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 from dotenv import load_dotenv
 
 from .base import BaseSQLExtractor
-from .deepseek import DeepseekExtractor
-from .groq import GroqExtractor
-from .litellm import LiteLlmExtractor
-from .openai import OpenaiExtractor
+from .failover import FailoverExtractor
+from .hedged import HedgedExtractor
+from .hybrid import HybridExtractor
+from .router import RouterExtractor
+from .static import StaticExtractor
+
+if TYPE_CHECKING:
+    from .deepseek import DeepseekExtractor
+    from .groq import GroqExtractor
+    from .litellm import LiteLlmExtractor
+    from .openai import OpenaiExtractor
+    from .openai_compatible import OpenaiCompatibleExtractor
 
 load_dotenv()
 
+# Extractor class ("module:class" within this package) and default model of
+# each framework
 DEFAULTS = {
-    "litellm": {"class": LiteLlmExtractor, "model": "openai/gpt-4.1"},
-    "groq": {"class": GroqExtractor, "model": "llama-3.3-70b-versatile"},
-    "openai": {"class": OpenaiExtractor, "model": "gpt-4.1"},
-    "deepseek": {"class": DeepseekExtractor, "model": "deepseek-chat"},
+    "litellm": {"class": "litellm:LiteLlmExtractor", "model": "openai/gpt-4.1"},
+    "groq": {"class": "groq:GroqExtractor", "model": "llama-3.3-70b-versatile"},
+    "openai": {"class": "openai:OpenaiExtractor", "model": "gpt-4.1"},
+    "deepseek": {"class": "deepseek:DeepseekExtractor", "model": "deepseek-chat"},
+    # Any OpenAI-compatible endpoint, which defines the model
+    "openai-compatible": {
+        "class": "openai_compatible:OpenaiCompatibleExtractor",
+        "model": None,
+    },
+    "static": {"class": "static:StaticExtractor", "model": "sqlparse"},
 }
 
+# Provider extractors exposed as attributes of the package, imported on access
+_LAZY_CLASSES = {
+    config["class"].split(":")[1]: config["class"] for config in DEFAULTS.values()
+}
+
+
+def _load_class(path: str) -> type[BaseSQLExtractor]:
+    """Import an extractor class of this package.
+
+    Args:
+        path: Class path as "module:class", the module being relative to this
+            package
+
+    Returns:
+        The extractor class
+    """
+    module_name, class_name = path.split(":")
+    module = import_module(f".{module_name}", __name__)
+    return getattr(module, class_name)
+
+
+def __getattr__(name: str) -> type[BaseSQLExtractor]:
+    """Import provider extractors on first access.
+
+    Args:
+        name: Attribute name
+
+    Returns:
+        The extractor class
+
+    Raises:
+        AttributeError: If the attribute is not a provider extractor
+    """
+    if name not in _LAZY_CLASSES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    extractor_class = _load_class(_LAZY_CLASSES[name])
+    globals()[name] = extractor_class
+    return extractor_class
+
 
 def create_extractor(
     framework: str = "litellm",
     model: str | None = None,
     params: dict | None = None,
     prompt_path: Path | None = None,
+    **kwargs: object,
 ) -> BaseSQLExtractor:
     """Create an appropriate SQL extractor based on the specified framework.
 
@@ -36,10 +97,14 @@ def create_extractor(
         framework: The LLM framework to use ("litellm", "groq", "openai", or "deepseek")
             Note: Direct framework options are maintained for backward compatibility,
             but "litellm" is recommended as it provides integrations for all models
-            from multiple providers
+            from multiple providers. Use "static" for offline extraction with
+            local static analysis (no LLM requests), and "openai-compatible"
+            for a self-hosted endpoint (pass its `base_url`)
         model: The model name within the selected framework (uses default if None)
         params: Additional parameters to pass to the LLM API
         prompt_path: Path to a custom prompt YAML file
+        **kwargs: Extraction options passed to the extractor (see
+            `BaseSQLExtractor`), e.g. `chunk_token_limit`
 
     Returns:
         An instance of the appropriate SQL extractor
@@ -55,16 +120,77 @@ def create_extractor(
         )
 
     config = DEFAULTS[framework]
-    extractor_class = config["class"]
+    extractor_class = _load_class(config["class"])
     model_name = model or config["model"]
 
-    return extractor_class(model=model_name, params=params, prompt_path=prompt_path)
+    return extractor_class(
+        model=model_name, params=params, prompt_path=prompt_path, **kwargs
+    )
+
+
+def create_failover_extractor(
+    chain: list[tuple[str, str | None]],
+    params: dict | None = None,
+    prompt_path: Path | None = None,
+    failure_threshold: int = 5,
+    reset_timeout: float = 30.0,
+    base_url: str | None = None,
+    **kwargs: object,
+) -> FailoverExtractor:
+    """Create an extractor failing over along a chain of frameworks and models.
+
+    Args:
+        chain: Ordered (framework, model) pairs, the first one being preferred
+            (a model of None uses the framework default)
+        params: Additional parameters to pass to the LLM APIs
+        prompt_path: Path to a custom prompt YAML file
+        failure_threshold: Consecutive failures after which a provider is skipped
+        reset_timeout: Seconds a provider is skipped before it is probed again
+        base_url: Base URL of the endpoint of the "openai-compatible"
+            frameworks of the chain
+        **kwargs: Extraction options passed to the extractors (see
+            `BaseSQLExtractor`)
+
+    Returns:
+        A FailoverExtractor querying the chain in order
+
+    Raises:
+        ValueError: If the chain is empty or a framework is not supported
+    """
+    if not chain:
+        raise ValueError("The failover chain must contain at least one framework")
+
+    extractors = [
+        create_extractor(
+            framework,
+            model,
+            params,
+            prompt_path,
+            **(
+                {"base_url": base_url}
+                if base_url and framework.lower() == "openai-compatible"
+                else {}
+            ),
+            **kwargs,
+        )
+        for framework, model in chain
+    ]
+    return FailoverExtractor(
+        extractors, failure_threshold=failure_threshold, reset_timeout=reset_timeout
+    )
 
 
 __all__ = [
     "DeepseekExtractor",
+    "FailoverExtractor",
     "GroqExtractor",
+    "HedgedExtractor",
+    "HybridExtractor",
     "LiteLlmExtractor",
+    "OpenaiCompatibleExtractor",
     "OpenaiExtractor",
+    "RouterExtractor",
+    "StaticExtractor",
     "create_extractor",
+    "create_failover_extractor",
 ]
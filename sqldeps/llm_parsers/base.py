@@ -4,23 +4,189 @@ This module defines the abstract base class for all LLM-based SQL parsers,
 providing a common interface and shared functionality.
 """
 
+import asyncio
 import importlib.resources as pkg_resources
-import json
+import statistics
+import threading
+import time
 from abc import ABC, abstractmethod
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextvars import ContextVar, copy_context
+from functools import lru_cache, partial
 from pathlib import Path
-from typing import ClassVar
+from typing import TYPE_CHECKING, ClassVar, TypeVar
 
-import pandas as pd
-import sqlparse
-import yaml
 from loguru import logger
 from tqdm import tqdm
 
-from sqldeps.cache import cleanup_cache, load_from_cache, save_to_cache
-from sqldeps.database.base import SQLBaseConnector
+from sqldeps.cache import (
+    CACHE_BACKENDS,
+    CACHE_KEYS,
+    cache_namespace,
+    cleanup_cache,
+    flush_cache,
+    lookup_cache,
+    save_to_cache,
+)
+from sqldeps.chunking import chunk_sql, merge_chunk_profiles
+from sqldeps.json_parsing import JsonCompletionDetector, parse_json
 from sqldeps.models import SQLProfile
-from sqldeps.rate_limiter import RateLimiter
-from sqldeps.utils import find_sql_files, merge_profiles, merge_schemas
+from sqldeps.preprocessing import (
+    FORMAT_MAX_BYTES,
+    FORMAT_TIMEOUT,
+    FORMATTING_MODES,
+    compact_sql,
+    elide_literals,
+    format_sql,
+)
+from sqldeps.rate_limiter import AsyncRateLimiter, RateLimiter
+from sqldeps.retry import (
+    BAD_OUTPUT,
+    DEFAULT_RETRY_BUDGET,
+    NETWORK,
+    RATE_LIMIT,
+    SERVER,
+    MultiprocessingRetryBudget,
+    RetryBudget,
+    RetryPolicy,
+    classify_error,
+    current_attempt,
+)
+from sqldeps.usage import (
+    RequestRecord,
+    format_summary,
+    summarize_requests,
+    take_queue_wait,
+    timed_queue_wait,
+    usage_tokens,
+)
+from sqldeps.utils import (
+    estimate_tokens,
+    find_sql_files,
+    merge_profiles,
+    merge_schemas,
+)
+
+if TYPE_CHECKING:
+    import httpx
+    import pandas as pd
+
+    from sqldeps.database.base import SQLBaseConnector
+
+T = TypeVar("T")
+
+# User prompt used to pack several SQL files into a single request. Custom prompt
+# files may override it with a `batch_user_prompt` key.
+BATCH_USER_PROMPT = """\
+Extract SQL dependencies and outputs for each of the {n_queries} SQL files below.
+Analyze every file independently, as if it were the only query.
+
+Respond with a single JSON object with one entry per file key, where each value
+follows the usual output format:
+{{
+  "<file key>": {{
+    "dependencies": {{"table_name": ["column1", "column2"]}},
+    "outputs": {{"table_name": ["column1", "column2"]}}
+  }}
+}}
+
+{queries}
+"""
+
+# Estimated token overhead of each query header in a batched prompt
+BATCH_QUERY_OVERHEAD = 8
+
+# Tables and their columns in structured outputs. Strict schemas cannot have
+# free-form keys, so tables are listed as entries instead of mapped by name.
+_TABLES_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "table": {"type": "string", "description": "Table name"},
+            "columns": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "Column names ([] for all or no columns)",
+            },
+        },
+        "required": ["table", "columns"],
+        "additionalProperties": False,
+    },
+}
+
+# Strict JSON schema of single-query responses
+RESPONSE_SCHEMA = {
+    "name": "sql_profile",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "properties": {
+            "dependencies": _TABLES_SCHEMA,
+            "outputs": _TABLES_SCHEMA,
+        },
+        "required": ["dependencies", "outputs"],
+        "additionalProperties": False,
+    },
+}
+
+# Output token limit sized from the prompt: a fixed allowance for the JSON
+# structure plus a multiple of the prompt tokens (each identifier of the SQL
+# may appear as a dependency and an output), capped for runaway responses
+OUTPUT_TOKENS_BASE = 256
+OUTPUT_TOKENS_PER_PROMPT_TOKEN = 2
+MAX_OUTPUT_TOKENS = 16_384
+
+# File (or query key) being prepared, used to label per-file log messages
+_current_source: ContextVar[str | None] = ContextVar("current_source", default=None)
+
+# Whether the request in progress packs several queries, whose keyed response
+# does not follow the response schema
+_packed_request: ContextVar[bool] = ContextVar("packed_request", default=False)
+
+# Record of the LLM request in progress, filled with the usage of its response
+_request_record: ContextVar[RequestRecord | None] = ContextVar(
+    "request_record", default=None
+)
+
+
+@lru_cache(maxsize=16)
+def _read_prompts(path: Path | None, modified: int | None) -> dict:
+    """Read and validate a prompt YAML file.
+
+    Cached so that extractors created for every file of a run parse the
+    prompts once.
+
+    Args:
+        path: Path to the prompt YAML file (None for the default prompts)
+        modified: Modification time of the file, invalidating the cache when
+            the file changes
+
+    Returns:
+        Dictionary with loaded prompts
+
+    Raises:
+        ValueError: If required keys are missing from prompt file
+    """
+    import yaml
+
+    if path is None:
+        with (
+            pkg_resources.files("sqldeps.configs.prompts")
+            .joinpath("default.yml")
+            .open("r") as f
+        ):
+            prompts = yaml.safe_load(f)
+    else:
+        with open(path) as f:
+            prompts = yaml.safe_load(f)
+
+    required_keys = {"user_prompt", "system_prompt"}
+    if not all(key in prompts for key in required_keys):
+        raise ValueError(f"Prompt file must contain all required keys: {required_keys}")
+
+    return prompts
 
 
 class BaseSQLExtractor(ABC):
@@ -33,13 +199,125 @@ class BaseSQLExtractor(ABC):
         prompt_path: Path to custom prompt file
         params: Additional parameters for the LLM
         prompts: Loaded prompt templates
+        chunk_token_limit: Queries above this many estimated tokens are split
+            into statement chunks extracted concurrently (None to disable)
+        chunk_workers: Maximum number of chunks extracted concurrently
+        compact: Whether SQL is compacted (comments and formatting removed)
+            instead of reindented before prompting
+        token_savings: Estimated input tokens before and after compaction
+            ("original" and "compacted") accumulated since creation
+        elide_literals: Whether bulk literal payloads (long VALUES lists and IN
+            lists) are replaced with a placeholder before prompting
+        elision_stats: Bytes and estimated tokens ("bytes" and "tokens")
+            removed by literal elision since creation
+        formatting: SQL formatting mode before prompting ("off", "lite" or
+            "full"), ignored when `compact` is enabled
+        format_max_bytes: SQL larger than this is not reindented
+        format_timeout: Maximum formatting time in seconds per query
+        stream: Whether completions are streamed (and cut as soon as the JSON
+            response is complete)
+        stream_idle_timeout: Seconds without streamed data before a request is
+            aborted
+        stream_metrics: Latency metrics of each streamed request
+            ("first_token_latency", "latency" and "early_stop")
+        parse_retries: Number of re-queries after an unusable response
+        parse_stats: Number of responses repaired and of unusable responses
+            ("repaired" and "failed")
+        max_retries: Maximum number of retries of a file after a retryable error
+        retry_budget: Maximum number of retries in a folder extraction
+        retry_stats: Number of retries by error kind
+        prompt_cache: Whether the system prompt is marked for provider-side
+            prompt caching where supported
+        max_connections: Size of the client connection pool (None for the
+            client default)
+        structured_output: Whether responses are constrained to a strict JSON
+            schema where the provider supports it
+        auto_max_tokens: Whether output tokens are limited in proportion to
+            the prompt size
+        cache_key: Key of cached results ("content", "canonical" or
+            "canonical-literals")
+        cache_backend: Storage of cached results ("json" or "sqlite")
+        cache_compress: Whether cached results are compressed (SQLite backend)
+        cache_stats: Number of cache lookups that found a result ("hits"), of
+            those found only thanks to a canonical key because the file was
+            edited ("canonical_hits"), and of lookups without result ("misses")
+        usage_stats: Number of requests reporting token usage ("requests"), and
+            their prompt, cached prompt and completion tokens ("prompt_tokens",
+            "cached_tokens" and "completion_tokens")
+        request_records: Tokens and timings of each LLM request since creation
+        rate_limiter: Rate limiter of the last folder extraction (None before
+            any folder extraction)
+        OPTIONS: Names of the extraction options accepted by the constructor
+        FINGERPRINT_OPTIONS: Names of the options changing the prompts sent or
+            the responses requested, which are part of the cache namespace
+        SUPPORTS_RESPONSE_SCHEMA: Whether the provider accepts strict JSON
+            schemas as response format
+        MAX_TOKENS_PARAM: Name of the request parameter limiting output tokens
     """
 
     VALID_EXTENSIONS: ClassVar[set[str]] = {"sql"}
+    OPTIONS: ClassVar[tuple[str, ...]] = (
+        "chunk_token_limit",
+        "chunk_workers",
+        "compact",
+        "elide_literals",
+        "formatting",
+        "format_max_bytes",
+        "format_timeout",
+        "stream",
+        "stream_idle_timeout",
+        "parse_retries",
+        "max_retries",
+        "retry_budget",
+        "prompt_cache",
+        "max_connections",
+        "structured_output",
+        "auto_max_tokens",
+        "cache_key",
+        "cache_backend",
+        "cache_compress",
+    )
+    # The other options do not change the requests (concurrency, streaming,
+    # retries, prompt cache markers, cache storage), or only make them fail:
+    # auto_max_tokens truncates responses that are never cached. Formatting
+    # timeouts depend on the load of the machine, so format_timeout is left
+    # out rather than splitting results of the same SQL across namespaces.
+    FINGERPRINT_OPTIONS: ClassVar[tuple[str, ...]] = (
+        "chunk_token_limit",
+        "compact",
+        "elide_literals",
+        "formatting",
+        "format_max_bytes",
+        "structured_output",
+    )
+    SUPPORTS_RESPONSE_SCHEMA: ClassVar[bool] = False
+    MAX_TOKENS_PARAM: ClassVar[str] = "max_tokens"
 
     @abstractmethod
     def __init__(
-        self, model: str, params: dict | None = None, prompt_path: Path | None = None
+        self,
+        model: str,
+        params: dict | None = None,
+        prompt_path: Path | None = None,
+        chunk_token_limit: int | None = None,
+        chunk_workers: int = 4,
+        compact: bool = False,
+        elide_literals: bool = False,
+        formatting: str = "full",
+        format_max_bytes: int | None = FORMAT_MAX_BYTES,
+        format_timeout: float | None = FORMAT_TIMEOUT,
+        stream: bool = False,
+        stream_idle_timeout: float | None = 60.0,
+        parse_retries: int = 1,
+        max_retries: int = 2,
+        retry_budget: int | None = DEFAULT_RETRY_BUDGET,
+        prompt_cache: bool = True,
+        max_connections: int | None = None,
+        structured_output: bool = False,
+        auto_max_tokens: bool = False,
+        cache_key: str = "content",
+        cache_backend: str = "json",
+        cache_compress: bool = False,
     ) -> None:
         """Initialize with model name and vendor-specific params.
 
@@ -47,12 +325,108 @@ class BaseSQLExtractor(ABC):
             model: Name of the LLM model to use
             params: Additional parameters for the LLM API
             prompt_path: Path to custom prompt YAML file
+            chunk_token_limit: Split queries above this many estimated tokens
+                into statement chunks (None to disable)
+            chunk_workers: Maximum number of chunks extracted concurrently
+            compact: Strip comments and collapse whitespace instead of
+                reindenting the SQL before prompting
+            elide_literals: Replace bulk literal payloads (long VALUES and IN
+                lists) with a short placeholder before prompting
+            formatting: SQL formatting mode before prompting: "off" (as is),
+                "lite" (upper-case keywords) or "full" (also reindent)
+            format_max_bytes: Do not reindent SQL larger than this many bytes
+                (None for no limit)
+            format_timeout: Send SQL unformatted if formatting takes more than
+                this many seconds of CPU time (None for no limit)
+            stream: Stream completions, stopping as soon as the JSON response
+                is complete and recording first-token latency
+            stream_idle_timeout: Abort streamed requests that receive no data
+                for this many seconds (None for the client default)
+            parse_retries: Number of times the LLM is queried again when its
+                response cannot be parsed or repaired
+            max_retries: Maximum number of retries of a file after a rate limit,
+                network or server error (other errors are never retried)
+            retry_budget: Maximum number of retries across all files of a
+                folder extraction (None for no limit)
+            prompt_cache: Mark the system prompt with cache-control markers for
+                providers that require them to cache prompt prefixes
+            max_connections: Size of the client connection pool, kept alive
+                between requests, e.g. the number of concurrent requests (None
+                for the client default)
+            structured_output: Constrain responses to a strict JSON schema
+                where the provider supports it (JSON mode otherwise)
+            auto_max_tokens: Limit output tokens of each request in proportion
+                to its prompt size, unless `params` sets a limit
+            cache_key: Key of cached results: "content" (raw file content),
+                "canonical" (ignoring comments, whitespace and keyword case) or
+                "canonical-literals" (also ignoring literal values)
+            cache_backend: Storage of cached results: "json" (one file per
+                result) or "sqlite" (a single database in the cache directory)
+            cache_compress: Compress cached results with zlib (SQLite backend)
+
+        Raises:
+            ValueError: If the formatting mode, cache key or cache backend is
+                not supported
         """
+        if formatting not in FORMATTING_MODES:
+            raise ValueError(
+                f"Unsupported formatting mode: {formatting}. "
+                f"Must be one of: {', '.join(FORMATTING_MODES)}"
+            )
+        if cache_key not in CACHE_KEYS:
+            raise ValueError(
+                f"Unsupported cache key: {cache_key}. "
+                f"Must be one of: {', '.join(CACHE_KEYS)}"
+            )
+        if cache_backend not in CACHE_BACKENDS:
+            raise ValueError(
+                f"Unsupported cache backend: {cache_backend}. "
+                f"Must be one of: {', '.join(CACHE_BACKENDS)}"
+            )
+
         self.framework = self.__class__.__name__.replace("Extractor", "").lower()
         self.model = model
         self.prompt_path = prompt_path
         self.params = params or {}
         self.prompts = self._load_prompts(prompt_path)
+        self.chunk_token_limit = chunk_token_limit
+        self.chunk_workers = chunk_workers
+        self.compact = compact
+        self.elide_literals = elide_literals
+        self.formatting = formatting
+        self.format_max_bytes = format_max_bytes
+        self.format_timeout = format_timeout
+        self.stream = stream
+        self.stream_idle_timeout = stream_idle_timeout
+        self.parse_retries = parse_retries
+        self.parse_stats = {"repaired": 0, "failed": 0}
+        self.max_retries = max_retries
+        self.retry_budget = retry_budget
+        self.retry_stats = {RATE_LIMIT: 0, NETWORK: 0, SERVER: 0}
+        self.prompt_cache = prompt_cache
+        self.max_connections = max_connections
+        self.structured_output = structured_output
+        self.auto_max_tokens = auto_max_tokens
+        self.cache_key = cache_key
+        self.cache_backend = cache_backend
+        self.cache_compress = cache_compress
+        self.cache_stats = {"hits": 0, "canonical_hits": 0, "misses": 0}
+        self.usage_stats = {
+            "requests": 0,
+            "prompt_tokens": 0,
+            "cached_tokens": 0,
+            "completion_tokens": 0,
+        }
+        self.request_records: list[RequestRecord] = []
+        self.stream_metrics: list[dict] = []
+        self.token_savings = {"original": 0, "compacted": 0}
+        self.elision_stats = {"bytes": 0, "tokens": 0}
+        self.rate_limiter: RateLimiter | AsyncRateLimiter | None = None
+        self._stats_lock = threading.Lock()
+
+        # Async clients are bound to the event loop they were created in
+        self._async_client = None
+        self._async_client_loop = None
 
         # Set default temperature to 0 in case it's not specified (fails for OpenAI o3)
         if "temperature" not in self.params:
@@ -70,11 +444,202 @@ class BaseSQLExtractor(ABC):
         Raises:
             ValueError: If response cannot be processed
         """
-        formatted_sql = sqlparse.format(sql, reindent=True, keyword_case="upper")
-        prompt = self._generate_prompt(formatted_sql)
-        response = self._query_llm(prompt)
-        self.last_response = response
-        return self._process_response(response)
+        if self._needs_chunking(sql):
+            return self._extract_chunked(sql)
+        return self._extract_single(sql)
+
+    async def aextract_from_query(self, sql: str) -> SQLProfile:
+        """Asynchronous version of `extract_from_query`.
+
+        Args:
+            sql: SQL query string to analyze
+
+        Returns:
+            SQLProfile object containing dependencies and outputs
+
+        Raises:
+            ValueError: If response cannot be processed
+        """
+        if self._needs_chunking(sql):
+            return await self._aextract_chunked(sql)
+        return await self._aextract_single(sql)
+
+    @property
+    def options(self) -> dict:
+        """Extraction options of this extractor, as passed to the constructor.
+
+        Returns:
+            Dictionary mapping option names to their values
+        """
+        return {name: getattr(self, name) for name in self.OPTIONS}
+
+    @property
+    def cache_namespace(self) -> str:
+        """Cache namespace of the extraction configuration.
+
+        Results are cached per framework, model, prompts, API parameters,
+        prompt-changing options (see `FINGERPRINT_OPTIONS`), endpoint and
+        sqldeps version, so that results of other configurations are never
+        reused and configurations keep their results side by side.
+
+        Returns:
+            Short hexadecimal namespace
+        """
+        return cache_namespace(self._cache_fingerprint())
+
+    def _cache_fingerprint(self) -> dict:
+        """Describe the configuration determining the extracted results.
+
+        Composite extractors add the configuration of the extractors they
+        query, and extractors of configurable endpoints add the endpoint.
+
+        Returns:
+            JSON-serializable description of the configuration
+        """
+        return {
+            "framework": self.framework,
+            "model": self.model,
+            "prompts": self.prompts,
+            "params": self.params,
+            "options": {name: getattr(self, name) for name in self.FINGERPRINT_OPTIONS},
+        }
+
+    def usage_summary(self, cost: bool = True) -> dict:
+        """Summarize the LLM requests made since creation.
+
+        Args:
+            cost: Whether to estimate the cost from the LiteLLM price map
+
+        Returns:
+            Request counts, token totals, latency percentiles, throughput and
+            estimated cost (see `sqldeps.usage.summarize_requests`)
+        """
+        with self._stats_lock:
+            records = list(self.request_records)
+        return summarize_requests(records, cost=cost)
+
+    def _extract_single(self, sql: str) -> SQLProfile:
+        """Extract dependencies from a SQL query with a single LLM request.
+
+        Args:
+            sql: SQL query string to analyze
+
+        Returns:
+            SQLProfile object containing dependencies and outputs
+        """
+        return self._extract_prompt(self._prepare_prompt(sql))
+
+    def _extract_prompt(self, prompt: str, file: str | None = None) -> SQLProfile:
+        """Extract dependencies from a prompt, querying again unusable responses.
+
+        Args:
+            prompt: Generated prompt to send
+            file: File or query key of the request (defaults to the file being
+                extracted)
+
+        Returns:
+            SQLProfile object containing dependencies and outputs
+        """
+        for attempt in range(self.parse_retries + 1):
+            response, record = self._query_recorded(prompt, attempt, file)
+            self.last_response = response
+            try:
+                return self._process_recorded(record, self._process_response, response)
+            except ValueError as e:
+                if attempt == self.parse_retries:
+                    raise
+                logger.warning(f"Unusable LLM response, querying again: {e}")
+
+    async def _aextract_single(self, sql: str) -> SQLProfile:
+        """Asynchronous version of `_extract_single`.
+
+        Args:
+            sql: SQL query string to analyze
+
+        Returns:
+            SQLProfile object containing dependencies and outputs
+        """
+        prompt = self._prepare_prompt(sql)
+        for attempt in range(self.parse_retries + 1):
+            response, record = await self._aquery_recorded(prompt, attempt)
+            self.last_response = response
+            try:
+                return self._process_recorded(record, self._process_response, response)
+            except ValueError as e:
+                if attempt == self.parse_retries:
+                    raise
+                logger.warning(f"Unusable LLM response, querying again: {e}")
+
+    def _needs_chunking(self, sql: str) -> bool:
+        """Check whether a query exceeds the chunking threshold.
+
+        Args:
+            sql: SQL query string to analyze
+
+        Returns:
+            True if the query should be split into statement chunks
+        """
+        return bool(self.chunk_token_limit) and (
+            estimate_tokens(sql) > self.chunk_token_limit
+        )
+
+    def _extract_chunked(self, sql: str) -> SQLProfile:
+        """Extract dependencies from an oversized query chunk by chunk.
+
+        Chunks are extracted concurrently in a thread pool and merged in script
+        order, taking tables created by earlier chunks into account.
+
+        Args:
+            sql: SQL query string to analyze
+
+        Returns:
+            SQLProfile object for the whole query
+        """
+        chunks = chunk_sql(sql, self.chunk_token_limit)
+        if len(chunks) == 1:
+            return self._extract_single(sql)
+
+        logger.info(
+            f"Splitting query of ~{estimate_tokens(sql)} tokens into "
+            f"{len(chunks)} chunks"
+        )
+        with ThreadPoolExecutor(
+            max_workers=min(self.chunk_workers, len(chunks))
+        ) as executor:
+            # Each chunk keeps the file label and retry attempt of the query
+            futures = [
+                executor.submit(copy_context().run, self._extract_single, chunk)
+                for chunk in chunks
+            ]
+            profiles = [future.result() for future in futures]
+
+        return merge_chunk_profiles(profiles)
+
+    async def _aextract_chunked(self, sql: str) -> SQLProfile:
+        """Asynchronous version of `_extract_chunked`.
+
+        Args:
+            sql: SQL query string to analyze
+
+        Returns:
+            SQLProfile object for the whole query
+        """
+        chunks = chunk_sql(sql, self.chunk_token_limit)
+        if len(chunks) == 1:
+            return await self._aextract_single(sql)
+
+        logger.info(
+            f"Splitting query of ~{estimate_tokens(sql)} tokens into "
+            f"{len(chunks)} chunks"
+        )
+        semaphore = asyncio.Semaphore(self.chunk_workers)
+
+        async def extract_chunk(chunk: str) -> SQLProfile:
+            async with semaphore:
+                return await self._aextract_single(chunk)
+
+        profiles = await asyncio.gather(*(extract_chunk(c) for c in chunks))
+        return merge_chunk_profiles(list(profiles))
 
     def extract_from_file(self, file_path: str | Path) -> SQLProfile:
         """Extract dependencies from a SQL file.
@@ -95,7 +660,67 @@ class BaseSQLExtractor(ABC):
         with open(file_path) as f:
             sql = f.read()
 
-        return self.extract_from_query(sql)
+        token = _current_source.set(str(file_path))
+        try:
+            return self.extract_from_query(sql)
+        finally:
+            _current_source.reset(token)
+
+    async def aextract_from_file(self, file_path: str | Path) -> SQLProfile:
+        """Asynchronous version of `extract_from_file`.
+
+        Args:
+            file_path: Path to SQL file
+
+        Returns:
+            SQLProfile object containing dependencies and outputs
+
+        Raises:
+            FileNotFoundError: If file does not exist
+        """
+        file_path = Path(file_path)
+        if not file_path.exists():
+            raise FileNotFoundError(f"SQL file not found: {file_path}")
+
+        with open(file_path) as f:
+            sql = f.read()
+
+        token = _current_source.set(str(file_path))
+        try:
+            return await self.aextract_from_query(sql)
+        finally:
+            _current_source.reset(token)
+
+    def extract_from_queries(
+        self,
+        queries: dict[str, str],
+        token_budget: int = 4000,
+        rate_limiter: RateLimiter | None = None,
+    ) -> dict[str, SQLProfile]:
+        """Extract dependencies from several SQL queries using batched requests.
+
+        Small queries are packed together, up to `token_budget` estimated SQL
+        tokens per request, so that they share a single system prompt and round
+        trip. The keyed JSON response is split back into one SQLProfile per query.
+        Queries missing from (or invalid in) a batched response, and every query
+        of a batch whose response cannot be parsed, fall back to single-query
+        requests. Requests are retried according to the retry policy, and a
+        batched request failing otherwise raises its error.
+
+        Args:
+            queries: Dictionary mapping query keys (e.g. file paths) to SQL
+            token_budget: Maximum estimated SQL tokens per batched request
+            rate_limiter: Optional rate limiter applied before each request
+
+        Returns:
+            Dictionary mapping query keys to SQLProfile objects. Queries that
+            could not be extracted are omitted.
+        """
+        results = {}
+        retry_policy = self.create_retry_policy()
+        for batch in self._pack_batches(queries, token_budget):
+            results.update(self._extract_batch(batch, rate_limiter, retry_policy))
+        return results
 
     def extract_from_folder(
         self,
@@ -107,6 +732,8 @@ class BaseSQLExtractor(ABC):
         rpm: int = 100,
         use_cache: bool = True,
         clear_cache: bool = False,
+        executor: str = "process",
+        batch_token_budget: int | None = None,
     ) -> SQLProfile | dict[str, SQLProfile]:
         """Extract and merge dependencies from all SQL files in a folder.
 
@@ -115,10 +742,19 @@ class BaseSQLExtractor(ABC):
             recursive: Whether to search recursively
             merge_sql_profiles: Whether to merge all results into a single SQLProfile
             valid_extensions: Set of valid file extensions to process
-            n_workers: Number of worker processes for parallel execution
+            n_workers: Number of parallel workers (processes, threads or in-flight
+                async requests, depending on `executor`)
             rpm: Maximum requests per minute for API rate limiting
             use_cache: Whether to use cached results
             clear_cache: Whether to clear the cache after processing
+            executor: Parallel execution strategy used when n_workers != 1:
+                "process" (one extractor per process, capped at the CPU count),
+                "thread" (one shared extractor and HTTP client) or "async"
+                (single event loop)
+            batch_token_budget: If set, pack several small files into a single
+                request of up to this many estimated SQL tokens (see
+                `extract_from_queries`). Batches are sent from a thread pool
+                when n_workers != 1.
 
         Returns:
             SQLProfile object or dictionary mapping file paths to SQLProfile objects
@@ -129,11 +765,23 @@ class BaseSQLExtractor(ABC):
         # Find all SQL files
         sql_files = find_sql_files(folder_path, recursive, valid_extensions)
 
-        # Choose processing strategy based on n_workers
-        if n_workers != 1:
+        # Choose processing strategy based on batching and n_workers
+        if batch_token_budget:
+            dependencies = self._process_files_in_batches(
+                sql_files,
+                token_budget=batch_token_budget,
+                n_workers=n_workers,
+                rpm=rpm,
+                use_cache=use_cache,
+            )
+        elif n_workers != 1:
             # Parallel processing
             dependencies = self._process_files_in_parallel(
-                sql_files, n_workers=n_workers, rpm=rpm, use_cache=use_cache
+                sql_files,
+                n_workers=n_workers,
+                rpm=rpm,
+                use_cache=use_cache,
+                executor=executor,
             )
         else:
             # Sequential processing
@@ -141,13 +789,174 @@ class BaseSQLExtractor(ABC):
                 sql_files, rpm=rpm, use_cache=use_cache
             )
 
+        return self._finalize_results(
+            dependencies,
+            merge_sql_profiles=merge_sql_profiles,
+            use_cache=use_cache,
+            clear_cache=clear_cache,
+        )
+
+    async def aextract_from_folder(
+        self,
+        folder_path: str | Path,
+        recursive: bool = False,
+        merge_sql_profiles: bool = False,
+        valid_extensions: set[str] | None = None,
+        max_concurrency: int = 100,
+        rpm: int = 100,
+        use_cache: bool = True,
+        clear_cache: bool = False,
+    ) -> SQLProfile | dict[str, SQLProfile]:
+        """Asynchronously extract dependencies from all SQL files in a folder.
+
+        All requests are issued from the current process and event loop, with at
+        most `max_concurrency` requests in flight at any time.
+
+        Args:
+            folder_path: Path to folder containing SQL files
+            recursive: Whether to search recursively
+            merge_sql_profiles: Whether to merge all results into a single SQLProfile
+            valid_extensions: Set of valid file extensions to process
+            max_concurrency: Maximum number of in-flight LLM requests
+            rpm: Maximum requests per minute for API rate limiting
+            use_cache: Whether to use cached results
+            clear_cache: Whether to clear the cache after processing
+
+        Returns:
+            SQLProfile object or dictionary mapping file paths to SQLProfile objects
+
+        Raises:
+            ValueError: If no dependencies could be extracted
+        """
+        sql_files = find_sql_files(folder_path, recursive, valid_extensions)
+
+        dependencies = await self._aprocess_files(
+            sql_files, max_concurrency=max_concurrency, rpm=rpm, use_cache=use_cache
+        )
+
+        return self._finalize_results(
+            dependencies,
+            merge_sql_profiles=merge_sql_profiles,
+            use_cache=use_cache,
+            clear_cache=clear_cache,
+        )
+
+    def _log_run_stats(self) -> None:
+        """Log the statistics accumulated during extraction."""
+        if self.compact and self.token_savings["original"]:
+            original = self.token_savings["original"]
+            saved = original - self.token_savings["compacted"]
+            logger.info(
+                f"Compaction saved ~{saved} of ~{original} input SQL tokens "
+                f"({saved / original:.0%})"
+            )
+        if self.stream_metrics:
+            first_token = [
+                m["first_token_latency"]
+                for m in self.stream_metrics
+                if m["first_token_latency"] is not None
+            ]
+            logger.info(
+                f"Streamed {len(self.stream_metrics)} requests, median first-token "
+                f"latency: {statistics.median(first_token or [0]):.2f}s, "
+                f"early stops: {sum(m['early_stop'] for m in self.stream_metrics)}"
+            )
+        if self.request_records:
+            logger.info(
+                "LLM requests summary:\n" + format_summary(self.usage_summary())
+            )
+        if any(self.retry_stats.values()):
+            logger.info(
+                "Retries: "
+                + ", ".join(f"{n} after {kind}" for kind, n in self.retry_stats.items())
+            )
+        if any(self.parse_stats.values()):
+            logger.info(
+                f"Malformed LLM responses: {self.parse_stats['repaired']} repaired, "
+                f"{self.parse_stats['failed']} unsalvageable"
+            )
+        if self.elision_stats["bytes"]:
+            logger.info(
+                f"Literal elision removed {self.elision_stats['bytes']} bytes "
+                f"(~{self.elision_stats['tokens']} tokens)"
+            )
+        if self.cache_stats["hits"] or self.cache_stats["misses"]:
+            logger.info(
+                f"Cache: {self.cache_stats['hits']} hits "
+                f"({self.cache_stats['canonical_hits']} of edited files thanks to "
+                f"{self.cache_key} keys), {self.cache_stats['misses']} misses"
+            )
+
+    def _load_cached(self, sql_file: Path) -> SQLProfile | None:
+        """Load the cached result of a file, counting the lookup.
+
+        Args:
+            sql_file: Path to SQL file
+
+        Returns:
+            Cached SQLProfile, or None if the file has no cached result
+        """
+        result, edited = lookup_cache(
+            sql_file,
+            key=self.cache_key,
+            namespace=self.cache_namespace,
+            backend=self.cache_backend,
+        )
+        with self._stats_lock:
+            self.cache_stats["hits" if result is not None else "misses"] += 1
+            self.cache_stats["canonical_hits"] += edited
+        return result
+
+    def _save_cached(self, result: SQLProfile, sql_file: Path) -> None:
+        """Save the result of a file to the cache.
+
+        Args:
+            result: SQLProfile extracted from the file
+            sql_file: Path to SQL file
+        """
+        save_to_cache(
+            result,
+            sql_file,
+            key=self.cache_key,
+            namespace=self.cache_namespace,
+            backend=self.cache_backend,
+            compress=self.cache_compress,
+        )
+
+    def _finalize_results(
+        self,
+        dependencies: dict[str, SQLProfile],
+        merge_sql_profiles: bool = False,
+        use_cache: bool = True,
+        clear_cache: bool = False,
+    ) -> SQLProfile | dict[str, SQLProfile]:
+        """Validate, clean up and optionally merge the results of a folder run.
+
+        Args:
+            dependencies: Dictionary mapping file paths to SQLProfile objects
+            merge_sql_profiles: Whether to merge all results into a single SQLProfile
+            use_cache: Whether cached results were used
+            clear_cache: Whether to clear the cache after processing
+
+        Returns:
+            SQLProfile object or dictionary mapping file paths to SQLProfile objects
+
+        Raises:
+            ValueError: If no dependencies could be extracted
+        """
         # If no results were extracted
         if not dependencies:
             raise ValueError("No dependencies could be extracted from any SQL file")
 
-        # Clean up cache if requested - now handled in one place
+        self._log_run_stats()
+
+        # Commit the results buffered by the SQLite backend
+        if use_cache and self.cache_backend == "sqlite":
+            flush_cache()
+
+        # Clean up the results of this configuration if requested
         if clear_cache and use_cache:
-            cleanup_cache()
+            cleanup_cache(namespace=self.cache_namespace, backend=self.cache_backend)
 
         # Merge results if requested - now handled in one place
         if merge_sql_profiles:
@@ -171,8 +980,10 @@ class BaseSQLExtractor(ABC):
         Raises:
             ValueError: If no dependencies could be extracted
         """
-        # Create rate limiter
+        # Create rate limiter and retry policy
         rate_limiter = RateLimiter(rpm)
+        retry_policy = self.create_retry_policy()
+        self.rate_limiter = rate_limiter
         dependencies = {}
 
         # Log about cache and rate limiting
@@ -188,21 +999,20 @@ class BaseSQLExtractor(ABC):
             try:
                 # Check cache first if enabled
                 if use_cache:
-                    result = load_from_cache(sql_file)
+                    result = self._load_cached(sql_file)
                     if result:
                         dependencies[str(sql_file)] = result
                         continue
 
-                # Apply rate limiting
-                rate_limiter.wait_if_needed()
-
-                # Extract dependencies
-                result = self.extract_from_file(sql_file)
+                # Extract dependencies, applying rate limiting to each attempt
+                result = retry_policy.call(
+                    partial(self._extract_rate_limited, sql_file, rate_limiter)
+                )
                 dependencies[str(sql_file)] = result
 
                 # Save to cache if enabled
                 if use_cache:
-                    save_to_cache(result, sql_file)
+                    self._save_cached(result, sql_file)
 
             except Exception as e:
                 logger.warning(f"Failed to process {sql_file}: {e}")
@@ -214,49 +1024,448 @@ class BaseSQLExtractor(ABC):
 
         return dependencies
 
-    def _process_files_in_parallel(
+    def _extract_rate_limited(
+        self, sql_file: Path, rate_limiter: RateLimiter
+    ) -> SQLProfile:
+        """Extract dependencies from a file once a rate limit slot is available.
+
+        Args:
+            sql_file: Path to SQL file
+            rate_limiter: Rate limiter shared by all requests of the run
+
+        Returns:
+            SQLProfile object containing dependencies and outputs
+        """
+        with timed_queue_wait():
+            rate_limiter.wait_if_needed()
+        return self.extract_from_file(sql_file)
+
+    async def _aextract_rate_limited(
+        self, sql_file: Path, rate_limiter: AsyncRateLimiter
+    ) -> SQLProfile:
+        """Asynchronous version of `_extract_rate_limited`.
+
+        Args:
+            sql_file: Path to SQL file
+            rate_limiter: Rate limiter shared by all requests of the run
+
+        Returns:
+            SQLProfile object containing dependencies and outputs
+        """
+        with timed_queue_wait():
+            await rate_limiter.wait_if_needed()
+        return await self.aextract_from_file(sql_file)
+
+    def create_retry_policy(
+        self, budget: RetryBudget | MultiprocessingRetryBudget | None = None
+    ) -> RetryPolicy:
+        """Create the retry policy of an extraction run.
+
+        Unusable responses are not retried by the policy, since they are
+        already re-queried according to `parse_retries`.
+
+        Args:
+            budget: Retry budget shared by the run (defaults to a new budget of
+                `retry_budget` retries)
+
+        Returns:
+            Retry policy recording its retries in `retry_stats`
+        """
+        return RetryPolicy(
+            max_retries=self.max_retries,
+            budget=budget or RetryBudget(self.retry_budget),
+            retryable=(RATE_LIMIT, NETWORK, SERVER),
+            stats=self.retry_stats,
+        )
+
+    def _process_files_in_batches(
         self,
         sql_files: list[Path],
-        n_workers: int = 2,
+        token_budget: int,
+        n_workers: int = 1,
         rpm: int = 100,
         use_cache: bool = True,
     ) -> dict[str, SQLProfile]:
-        """Process a list of SQL files in parallel with rate limiting.
+        """Process a list of SQL files by packing small files into shared requests.
 
         Args:
             sql_files: List of SQL file paths to process
-            n_workers: Number of worker processes
+            token_budget: Maximum estimated SQL tokens per batched request
+            n_workers: Number of threads sending batches concurrently
             rpm: Requests per minute limit
             use_cache: Whether to use cached results
 
         Returns:
             Dictionary mapping file paths to their respective SQLProfile objects
         """
-        from sqldeps.parallel import process_files_in_parallel
+        from sqldeps.parallel import resolve_workers
 
-        return process_files_in_parallel(
-            sql_files,
-            framework=self.framework,
-            model=self.model,
-            prompt_path=self.prompt_path,
-            n_workers=n_workers,
-            rpm=rpm,
-            use_cache=use_cache,
+        rate_limiter = RateLimiter(rpm)
+        self.rate_limiter = rate_limiter
+        retry_policy = self.create_retry_policy()
+        dependencies = {}
+        queries = {}
+
+        # Serve cached files first, then read the remaining ones
+        for sql_file in sql_files:
+            if use_cache:
+                result = self._load_cached(sql_file)
+                if result:
+                    dependencies[str(sql_file)] = result
+                    continue
+            try:
+                with open(sql_file) as f:
+                    queries[str(sql_file)] = f.read()
+            except OSError as e:
+                logger.warning(f"Failed to read {sql_file}: {e}")
+
+        batches = self._pack_batches(queries, token_budget)
+        n_workers = resolve_workers(n_workers, executor="thread")
+        logger.info(
+            f"Processing {len(queries)} SQL files in {len(batches)} batched "
+            f"requests (token budget: {token_budget}, workers: {n_workers})"
         )
 
-    def match_database_schema(
-        self,
-        dependencies: SQLProfile,
-        db_connection: SQLBaseConnector,
-        target_schemas: list[str] | None = None,
-    ) -> pd.DataFrame:
-        """Match extracted dependencies against actual database schema.
+        with ThreadPoolExecutor(max_workers=n_workers) as executor:
+            futures = [
+                executor.submit(self._extract_batch, batch, rate_limiter, retry_policy)
+                for batch in batches
+            ]
+            for future in tqdm(
+                as_completed(futures), total=len(futures), desc="Processing batches"
+            ):
+                try:
+                    batch_results = future.result()
+                except Exception as e:
+                    logger.warning(f"Failed to process batch: {e}")
+                    continue
 
-        Args:
-            dependencies:SQLDependency object containing tables and columns to match
-            db_connection: Database connector instance to use for schema validation
-            target_schemas: Optional list of database schemas to validate against
-                (default: ["public"])
+                for sql_file, result in batch_results.items():
+                    dependencies[sql_file] = result
+                    if use_cache:
+                        self._save_cached(result, Path(sql_file))
+
+        return dependencies
+
+    def _pack_batches(
+        self, queries: dict[str, str], token_budget: int
+    ) -> list[dict[str, str]]:
+        """Greedily pack queries into batches that fit the token budget.
+
+        Queries are formatted first, so that the budget applies to the SQL that
+        is actually sent. A query larger than the budget forms its own batch.
+
+        Args:
+            queries: Dictionary mapping query keys to raw SQL
+            token_budget: Maximum estimated SQL tokens per batch
+
+        Returns:
+            List of batches, each mapping query keys to formatted SQL
+        """
+        batches = []
+        current = {}
+        current_tokens = 0
+
+        for key, sql in queries.items():
+            token = _current_source.set(key)
+            try:
+                prepared = self._prepare_sql(sql)
+            finally:
+                _current_source.reset(token)
+            tokens = estimate_tokens(prepared) + BATCH_QUERY_OVERHEAD
+
+            if current and current_tokens + tokens > token_budget:
+                batches.append(current)
+                current, current_tokens = {}, 0
+
+            current[key] = prepared
+            current_tokens += tokens
+
+        if current:
+            batches.append(current)
+
+        return batches
+
+    def _extract_batch(
+        self,
+        batch: dict[str, str],
+        rate_limiter: RateLimiter | None = None,
+        retry_policy: RetryPolicy | None = None,
+    ) -> dict[str, SQLProfile]:
+        """Extract dependencies for one batch, falling back to single requests.
+
+        The batched request and the single-query requests are retried
+        according to the retry policy. Only queries missing from an unusable
+        or incomplete batched response fall back to single-query requests;
+        other errors of the batched request (rate limits, authentication, ...)
+        are raised rather than multiplied across the queries of the batch.
+
+        Args:
+            batch: Dictionary mapping query keys to formatted SQL
+            rate_limiter: Optional rate limiter applied before each request
+            retry_policy: Retry policy of the run (defaults to a new policy)
+
+        Returns:
+            Dictionary mapping query keys to SQLProfile objects
+
+        Raises:
+            Exception: Error of the batched request, other than an unusable
+                response, once retries are exhausted
+        """
+        retry_policy = retry_policy or self.create_retry_policy()
+        results = {}
+        aliases = {f"file_{i}": key for i, key in enumerate(batch, start=1)}
+
+        if len(batch) > 1:
+            packed = _packed_request.set(True)
+            try:
+                results = retry_policy.call(
+                    partial(self._query_batch, batch, aliases, rate_limiter)
+                )
+            except Exception as e:
+                if classify_error(e) != BAD_OUTPUT:
+                    raise
+                logger.warning(
+                    f"Unusable batched response for {len(batch)} queries, "
+                    f"falling back to single requests: {e}"
+                )
+            finally:
+                _packed_request.reset(packed)
+
+        # Fall back to single-query requests for anything not resolved
+        for key, sql in batch.items():
+            if key in results:
+                continue
+            if len(batch) > 1:
+                logger.debug(f"Falling back to single request for {key}")
+            try:
+                results[key] = retry_policy.call(
+                    partial(self._query_single, key, sql, rate_limiter)
+                )
+            except Exception as e:
+                logger.warning(f"Failed to process {key}: {e}")
+
+        return results
+
+    @staticmethod
+    def _wait_rate_limit(rate_limiter: RateLimiter | None) -> None:
+        """Wait for the rate limiter, if any, recording the queue wait."""
+        if rate_limiter:
+            with timed_queue_wait():
+                rate_limiter.wait_if_needed()
+
+    def _query_batch(
+        self,
+        batch: dict[str, str],
+        aliases: dict[str, str],
+        rate_limiter: RateLimiter | None = None,
+    ) -> dict[str, SQLProfile]:
+        """Send one batched request and split its response by query.
+
+        Args:
+            batch: Dictionary mapping query keys to formatted SQL
+            aliases: Dictionary mapping the aliases used in the prompt to keys
+            rate_limiter: Optional rate limiter applied before the request
+
+        Returns:
+            Dictionary mapping query keys to the SQLProfile objects of the
+            queries found in the response
+        """
+        self._wait_rate_limit(rate_limiter)
+        response, record = self._query_recorded(
+            self._generate_batch_prompt(batch, aliases), file=", ".join(batch)
+        )
+        self.last_response = response
+        return self._process_recorded(
+            record, partial(self._process_batch_response, aliases=aliases), response
+        )
+
+    def _query_single(
+        self, key: str, sql: str, rate_limiter: RateLimiter | None = None
+    ) -> SQLProfile:
+        """Send a single-query request for a query of a batch.
+
+        Args:
+            key: Query key
+            sql: Formatted SQL of the query
+            rate_limiter: Optional rate limiter applied before the request
+
+        Returns:
+            SQLProfile object containing dependencies and outputs
+        """
+        self._wait_rate_limit(rate_limiter)
+        return self._extract_prompt(self._generate_prompt(sql), file=key)
+
+    def _process_files_in_parallel(
+        self,
+        sql_files: list[Path],
+        n_workers: int = 2,
+        rpm: int = 100,
+        use_cache: bool = True,
+        executor: str = "process",
+    ) -> dict[str, SQLProfile]:
+        """Process a list of SQL files in parallel with rate limiting.
+
+        Args:
+            sql_files: List of SQL file paths to process
+            n_workers: Number of parallel workers
+            rpm: Requests per minute limit
+            use_cache: Whether to use cached results
+            executor: Parallel execution strategy ("process", "thread" or "async")
+
+        Returns:
+            Dictionary mapping file paths to their respective SQLProfile objects
+
+        Raises:
+            ValueError: If the executor is not supported
+        """
+        from sqldeps.parallel import (
+            EXECUTORS,
+            process_files_in_parallel,
+            process_files_in_threads,
+            resolve_workers,
+        )
+
+        if executor not in EXECUTORS:
+            raise ValueError(
+                f"Unsupported executor: {executor}. "
+                f"Must be one of: {', '.join(EXECUTORS)}"
+            )
+
+        if executor == "async":
+            return asyncio.run(
+                self._aprocess_files(
+                    sql_files,
+                    max_concurrency=resolve_workers(n_workers, executor="async"),
+                    rpm=rpm,
+                    use_cache=use_cache,
+                )
+            )
+
+        # Serve cached files before dispatching the others to workers
+        dependencies = {}
+        if use_cache:
+            for sql_file in sql_files:
+                result = self._load_cached(sql_file)
+                if result is not None:
+                    dependencies[str(sql_file)] = result
+            sql_files = [f for f in sql_files if str(f) not in dependencies]
+            if not sql_files:
+                return dependencies
+
+        if executor == "thread":
+            dependencies.update(
+                process_files_in_threads(
+                    sql_files,
+                    extractor=self,
+                    n_workers=n_workers,
+                    rpm=rpm,
+                    use_cache=use_cache,
+                )
+            )
+            return dependencies
+
+        dependencies.update(
+            process_files_in_parallel(
+                sql_files,
+                framework=self.framework,
+                model=self.model,
+                prompt_path=self.prompt_path,
+                n_workers=n_workers,
+                rpm=rpm,
+                use_cache=use_cache,
+                extractor_options=self.options,
+                request_records=self.request_records,
+                cache_namespace=self.cache_namespace,
+                params=self.params,
+            )
+        )
+        return dependencies
+
+    async def _aprocess_files(
+        self,
+        sql_files: list[Path],
+        max_concurrency: int = 100,
+        rpm: int = 100,
+        use_cache: bool = True,
+    ) -> dict[str, SQLProfile]:
+        """Process a list of SQL files concurrently on the running event loop.
+
+        Args:
+            sql_files: List of SQL file paths to process
+            max_concurrency: Maximum number of in-flight LLM requests
+            rpm: Requests per minute limit
+            use_cache: Whether to use cached results
+
+        Returns:
+            Dictionary mapping file paths to their respective SQLProfile objects
+
+        Raises:
+            ValueError: If max_concurrency is not positive
+        """
+        if max_concurrency < 1:
+            raise ValueError(
+                f"Invalid concurrency: {max_concurrency}. Must be a positive integer."
+            )
+
+        rate_limiter = AsyncRateLimiter(rpm)
+        retry_policy = self.create_retry_policy()
+        self.rate_limiter = rate_limiter
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        if use_cache:
+            logger.info("Cache usage: enabled")
+        logger.info(
+            f"Processing {len(sql_files)} SQL files asynchronously with up to "
+            f"{max_concurrency} concurrent requests"
+            + (f" and RPM: {rpm}" if rpm > 0 else "")
+        )
+
+        async def process_file(sql_file: Path) -> tuple[Path, SQLProfile | None]:
+            async with semaphore:
+                try:
+                    # Check cache first if enabled
+                    if use_cache:
+                        result = self._load_cached(sql_file)
+                        if result:
+                            return sql_file, result
+
+                    result = await retry_policy.acall(
+                        partial(self._aextract_rate_limited, sql_file, rate_limiter)
+                    )
+
+                    if use_cache:
+                        self._save_cached(result, sql_file)
+
+                    return sql_file, result
+                except Exception as e:
+                    logger.warning(f"Failed to process {sql_file}: {e}")
+                    return sql_file, None
+
+        dependencies = {}
+        tasks = [asyncio.ensure_future(process_file(f)) for f in sql_files]
+        for task in tqdm(
+            asyncio.as_completed(tasks), total=len(tasks), desc="Processing SQL files"
+        ):
+            sql_file, result = await task
+            if result:
+                dependencies[str(sql_file)] = result
+
+        return dependencies
+
+    def match_database_schema(
+        self,
+        dependencies: SQLProfile,
+        db_connection: "SQLBaseConnector",
+        target_schemas: list[str] | None = None,
+    ) -> "pd.DataFrame":
+        """Match extracted dependencies against actual database schema.
+
+        Args:
+            dependencies:SQLDependency object containing tables and columns to match
+            db_connection: Database connector instance to use for schema validation
+            target_schemas: Optional list of database schemas to validate against
+                (default: ["public"])
 
         Returns:
             pd.DataFrame: Merged schema DataFrame with validation information
@@ -283,24 +1492,102 @@ class BaseSQLExtractor(ABC):
         Raises:
             ValueError: If required keys are missing from prompt file
         """
-        if path is None:
-            with (
-                pkg_resources.files("sqldeps.configs.prompts")
-                .joinpath("default.yml")
-                .open("r") as f
-            ):
-                prompts = yaml.safe_load(f)
-        else:
-            with open(path) as f:
-                prompts = yaml.safe_load(f)
+        path = Path(path) if path is not None else None
+        modified = path.stat().st_mtime_ns if path is not None else None
+        return dict(_read_prompts(path, modified))
 
-        required_keys = {"user_prompt", "system_prompt"}
-        if not all(key in prompts for key in required_keys):
-            raise ValueError(
-                f"Prompt file must contain all required keys: {required_keys}"
+    def _prepare_prompt(self, sql: str) -> str:
+        """Format the SQL query and wrap it into the user prompt.
+
+        Args:
+            sql: SQL query to analyze
+
+        Returns:
+            Formatted prompt string
+        """
+        return self._generate_prompt(self._prepare_sql(sql))
+
+    def _prepare_sql(self, sql: str) -> str:
+        """Format (or compact) the SQL query before it is sent to the LLM.
+
+        Args:
+            sql: SQL query to analyze
+
+        Returns:
+            Formatted SQL query
+        """
+        if not self.compact:
+            if self.elide_literals:
+                sql = self._elide_literals(sql)
+            return format_sql(
+                sql,
+                self.formatting,
+                max_bytes=self.format_max_bytes,
+                timeout=self.format_timeout,
             )
 
-        return prompts
+        compacted = compact_sql(sql)
+        original_tokens = estimate_tokens(sql)
+        compacted_tokens = estimate_tokens(compacted)
+        with self._stats_lock:
+            self.token_savings["original"] += original_tokens
+            self.token_savings["compacted"] += compacted_tokens
+
+        saved = original_tokens - compacted_tokens
+        logger.debug(
+            f"{_current_source.get() or 'Query'}: compacted SQL from "
+            f"~{original_tokens} to ~{compacted_tokens} tokens "
+            f"({saved / max(original_tokens, 1):.0%} saved)"
+        )
+
+        # Elide after compaction so that the placeholder comments are kept
+        if self.elide_literals:
+            compacted = self._elide_literals(compacted)
+        return compacted
+
+    def _elide_literals(self, sql: str) -> str:
+        """Replace bulk literal payloads and log the bytes and tokens removed.
+
+        Args:
+            sql: SQL query to analyze
+
+        Returns:
+            SQL query with bulk literals elided
+        """
+        elided = elide_literals(sql)
+        if len(elided) == len(sql):
+            return sql
+
+        removed_bytes = len(sql.encode()) - len(elided.encode())
+        removed_tokens = estimate_tokens(sql) - estimate_tokens(elided)
+        with self._stats_lock:
+            self.elision_stats["bytes"] += removed_bytes
+            self.elision_stats["tokens"] += removed_tokens
+
+        logger.info(
+            f"{_current_source.get() or 'Query'}: elided bulk literals, "
+            f"{removed_bytes} bytes (~{removed_tokens} tokens) removed"
+        )
+        return elided
+
+    def _generate_batch_prompt(
+        self, batch: dict[str, str], aliases: dict[str, str]
+    ) -> str:
+        """Generate a prompt packing several queries into one request.
+
+        Args:
+            batch: Dictionary mapping query keys to formatted SQL
+            aliases: Dictionary mapping short file keys used in the prompt to
+                query keys
+
+        Returns:
+            Formatted batch prompt string
+        """
+        template = self.prompts.get("batch_user_prompt", BATCH_USER_PROMPT)
+        queries = "\n".join(
+            f"### File key: {alias}\n{batch[key]}\n" for alias, key in aliases.items()
+        )
+        return template.format(n_queries=len(batch), queries=queries)
 
     def _generate_prompt(self, sql: str) -> str:
         """Generate the prompt for the LLM.
@@ -324,9 +1611,471 @@ class BaseSQLExtractor(ABC):
             Response from the LLM
         """
 
+    async def _aquery_llm(self, prompt: str) -> str:
+        """Asynchronously query the LLM with the generated prompt.
+
+        Extractors with a native async client override this method. The default
+        implementation runs the blocking `_query_llm` in a worker thread.
+
+        Args:
+            prompt: Prompt to send to the LLM
+
+        Returns:
+            Response from the LLM
+        """
+        return await asyncio.to_thread(self._query_llm, prompt)
+
+    def _build_messages(self, user_prompt: str) -> list[dict]:
+        """Build the chat messages sent to the LLM.
+
+        The system prompt comes first and never varies within a run, so that
+        providers caching prompt prefixes reuse it across requests.
+
+        Args:
+            user_prompt: Generated user prompt
+
+        Returns:
+            List of chat messages with the system and user prompts
+        """
+        return [
+            {"role": "system", "content": self.prompts["system_prompt"]},
+            {"role": "user", "content": user_prompt},
+        ]
+
+    def _stream_params(self) -> dict:
+        """Get the request parameters enabling streaming.
+
+        The idle timeout replaces the read timeout of the client, which applies
+        to each read of a streamed response. Its connect, write and pool
+        timeouts are kept; without a client timeout the idle timeout applies
+        to the whole request.
+
+        Returns:
+            Dictionary of request parameters (empty if streaming is disabled)
+        """
+        if not self.stream:
+            return {}
+        # Usage is sent in a last chunk, unless the stream is cut early
+        params = {"stream": True, "stream_options": {"include_usage": True}}
+        if self.stream_idle_timeout is not None:
+            params["timeout"] = self._stream_timeout()
+        return params
+
+    def _stream_timeout(self) -> "float | httpx.Timeout":
+        """Get the request timeout of a streamed response.
+
+        Returns:
+            The client timeout with `stream_idle_timeout` as read timeout, or
+            `stream_idle_timeout` itself if the client has no timeout
+        """
+        timeout = getattr(self, "timeout", None)
+        if timeout is None:
+            timeout = getattr(getattr(self, "client", None), "timeout", None)
+
+        import httpx
+
+        if isinstance(timeout, int | float):
+            timeout = httpx.Timeout(timeout)
+        elif not isinstance(timeout, httpx.Timeout):
+            return self.stream_idle_timeout
+        return httpx.Timeout(
+            connect=timeout.connect,
+            read=self.stream_idle_timeout,
+            write=timeout.write,
+            pool=timeout.pool,
+        )
+
+    def _supports_response_schema(self) -> bool:
+        """Check whether the model accepts strict JSON schemas.
+
+        Returns:
+            True if responses can be constrained to `RESPONSE_SCHEMA`
+        """
+        return self.SUPPORTS_RESPONSE_SCHEMA
+
+    def _response_params(self, user_prompt: str) -> dict:
+        """Get the request parameters shaping the response.
+
+        Single-query requests use the strict response schema when structured
+        output is enabled and supported; packed requests, keyed by file, and
+        other providers use JSON mode. With `auto_max_tokens`, output tokens
+        are limited in proportion to the prompt size, unless `params` sets a
+        limit.
+
+        Args:
+            user_prompt: Generated user prompt
+
+        Returns:
+            Dictionary of request parameters (response format and token limit)
+        """
+        params = {"response_format": {"type": "json_object"}}
+        if (
+            self.structured_output
+            and not _packed_request.get()
+            and self._supports_response_schema()
+        ):
+            params["response_format"] = {
+                "type": "json_schema",
+                "json_schema": RESPONSE_SCHEMA,
+            }
+        if self.auto_max_tokens and not (
+            {"max_tokens", "max_completion_tokens"} & self.params.keys()
+        ):
+            params[self.MAX_TOKENS_PARAM] = min(
+                OUTPUT_TOKENS_BASE
+                + OUTPUT_TOKENS_PER_PROMPT_TOKEN * estimate_tokens(user_prompt),
+                MAX_OUTPUT_TOKENS,
+            )
+        return params
+
+    def _read_response(self, response: object, started: float) -> str:
+        """Get the content of a chat completion, streamed or not.
+
+        Args:
+            response: Chat completion, or stream of completion chunks
+            started: `time.perf_counter()` value when the request was sent
+
+        Returns:
+            Response content
+        """
+        if not self.stream:
+            self._record_usage(getattr(response, "usage", None))
+            return response.choices[0].message.content
+
+        detector = JsonCompletionDetector()
+        parts = []
+        first_token = None
+        try:
+            for chunk in response:
+                self._record_usage(getattr(chunk, "usage", None))
+                content = chunk.choices[0].delta.content if chunk.choices else None
+                if not content:
+                    continue
+                if first_token is None:
+                    first_token = time.perf_counter() - started
+                parts.append(content)
+                if detector.feed(content):
+                    break
+        finally:
+            close = getattr(response, "close", None)
+            if detector.complete and callable(close):
+                close()
+
+        return self._finish_stream(parts, detector, started, first_token)
+
+    async def _aread_response(self, response: object, started: float) -> str:
+        """Asynchronous version of `_read_response`.
+
+        Each streamed chunk must arrive within `stream_idle_timeout` seconds.
+
+        Args:
+            response: Chat completion, or async stream of completion chunks
+            started: `time.perf_counter()` value when the request was sent
+
+        Returns:
+            Response content
+
+        Raises:
+            TimeoutError: If the stream is idle for longer than the timeout
+        """
+        if not self.stream:
+            self._record_usage(getattr(response, "usage", None))
+            return response.choices[0].message.content
+
+        detector = JsonCompletionDetector()
+        parts = []
+        first_token = None
+        chunks = aiter(response)
+        try:
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(
+                        anext(chunks), timeout=self.stream_idle_timeout
+                    )
+                except StopAsyncIteration:
+                    break
+                except asyncio.TimeoutError as e:
+                    raise TimeoutError(
+                        f"LLM stream idle for more than {self.stream_idle_timeout}s"
+                    ) from e
+                self._record_usage(getattr(chunk, "usage", None))
+                content = chunk.choices[0].delta.content if chunk.choices else None
+                if not content:
+                    continue
+                if first_token is None:
+                    first_token = time.perf_counter() - started
+                parts.append(content)
+                if detector.feed(content):
+                    break
+        finally:
+            close = getattr(response, "close", None)
+            if detector.complete and callable(close):
+                result = close()
+                if asyncio.iscoroutine(result):
+                    await result
+
+        return self._finish_stream(parts, detector, started, first_token)
+
+    def _start_request(
+        self, retries: int, file: str | None
+    ) -> tuple[RequestRecord, object]:
+        """Create the record of an LLM request and make it current.
+
+        Args:
+            retries: Number of earlier attempts within the extraction of the
+                query (added to the attempts of the retry policy)
+            file: File or query key of the request (defaults to the file being
+                extracted)
+
+        Returns:
+            Tuple of the record and the token restoring the previous record
+        """
+        record = RequestRecord(
+            file=file or _current_source.get(),
+            model=self.model,
+            started=time.time(),
+            queue_wait=take_queue_wait(),
+            retries=current_attempt() + retries,
+        )
+        return record, _request_record.set(record)
+
+    def _end_request(
+        self, record: RequestRecord, token: object, started: float
+    ) -> None:
+        """Complete the record of an LLM request and store it.
+
+        Args:
+            record: Record of the request
+            token: Token returned by `_start_request`
+            started: `time.perf_counter()` value when the request was sent
+        """
+        record.latency = time.perf_counter() - started
+        _request_record.reset(token)
+        if record.error is None:
+            record.model = self._response_model()
+        with self._stats_lock:
+            self.request_records.append(record)
+            if record.prompt_tokens is not None:
+                self.usage_stats["requests"] += 1
+                for key in ("prompt_tokens", "cached_tokens", "completion_tokens"):
+                    self.usage_stats[key] += getattr(record, key) or 0
+
+    def _query_recorded(
+        self, prompt: str, retries: int = 0, file: str | None = None
+    ) -> tuple[str, RequestRecord]:
+        """Query the LLM, recording the tokens and latency of the request.
+
+        Args:
+            prompt: Prompt to send to the LLM
+            retries: Number of earlier attempts within the extraction of the query
+            file: File or query key of the request (defaults to the file being
+                extracted)
+
+        Returns:
+            Tuple of the response and the record of the request
+        """
+        record, token = self._start_request(retries, file)
+        started = time.perf_counter()
+        try:
+            return self._query_llm(prompt), record
+        except Exception as e:
+            record.error = classify_error(e)
+            raise
+        finally:
+            self._end_request(record, token, started)
+
+    async def _aquery_recorded(
+        self, prompt: str, retries: int = 0, file: str | None = None
+    ) -> tuple[str, RequestRecord]:
+        """Asynchronous version of `_query_recorded`.
+
+        Args:
+            prompt: Prompt to send to the LLM
+            retries: Number of earlier attempts within the extraction of the query
+            file: File or query key of the request (defaults to the file being
+                extracted)
+
+        Returns:
+            Tuple of the response and the record of the request
+        """
+        record, token = self._start_request(retries, file)
+        started = time.perf_counter()
+        try:
+            return await self._aquery_llm(prompt), record
+        except Exception as e:
+            record.error = classify_error(e)
+            raise
+        finally:
+            self._end_request(record, token, started)
+
+    @staticmethod
+    def _process_recorded(
+        record: RequestRecord, process: Callable[[str], T], response: str
+    ) -> T:
+        """Process a response, recording the parse time of the request.
+
+        Args:
+            record: Record of the request
+            process: Function parsing and validating the response
+            response: Response of the request
+
+        Returns:
+            Result of `process`
+        """
+        started = time.perf_counter()
+        try:
+            return process(response)
+        except Exception as e:
+            record.error = classify_error(e)
+            raise
+        finally:
+            record.parse_time += time.perf_counter() - started
+
+    def _record_usage(self, usage: object) -> None:
+        """Accumulate the token usage reported with a response.
+
+        Args:
+            usage: `usage` field of a completion or stream chunk (ignored if
+                missing)
+        """
+        tokens = usage_tokens(usage)
+        if tokens is None:
+            return
+        # Usage of a recorded request is accounted once the request completes
+        record = _request_record.get()
+        if record is not None:
+            record.add_usage(tokens)
+            return
+        with self._stats_lock:
+            self.usage_stats["requests"] += 1
+            for key, value in tokens.items():
+                self.usage_stats[key] += value
+
+    def _finish_stream(
+        self,
+        parts: list[str],
+        detector: JsonCompletionDetector,
+        started: float,
+        first_token: float | None,
+    ) -> str:
+        """Record the metrics of a streamed response and return its content.
+
+        Args:
+            parts: Streamed content chunks
+            detector: JSON completion detector fed with the chunks
+            started: `time.perf_counter()` value when the request was sent
+            first_token: Seconds until the first content chunk (None if empty)
+
+        Returns:
+            Response content, cut at the end of the JSON object if complete
+        """
+        latency = time.perf_counter() - started
+        self.stream_metrics.append(
+            {
+                "first_token_latency": first_token,
+                "latency": latency,
+                "early_stop": detector.complete,
+            }
+        )
+        logger.debug(
+            f"Streamed response: first token after {first_token or 0:.2f}s, "
+            f"completed after {latency:.2f}s"
+        )
+        content = "".join(parts)
+        return content[: detector.end] if detector.complete else content
+
+    def _client_options(self, http_client_class: type) -> dict:
+        """Get the client options sizing its connection pool.
+
+        Args:
+            http_client_class: HTTP client class of the provider SDK (e.g.
+                `openai.DefaultHttpxClient`), which keeps the SDK defaults
+
+        Returns:
+            Dictionary with an `http_client` whose pool keeps `max_connections`
+            connections alive, or an empty dictionary for the client default
+        """
+        if self.max_connections is None:
+            return {}
+
+        import httpx
+
+        limits = httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_connections,
+        )
+        return {"http_client": http_client_class(limits=limits)}
+
+    def _create_async_client(self) -> object:
+        """Create the async client used by `_aquery_llm`.
+
+        Returns:
+            Async client instance
+
+        Raises:
+            NotImplementedError: If the extractor has no native async client
+        """
+        raise NotImplementedError(
+            f"{self.__class__.__name__} does not provide an async client"
+        )
+
+    def _get_async_client(self) -> object:
+        """Get the async client bound to the running event loop.
+
+        Async HTTP clients cannot be shared across event loops, so a new client
+        is created whenever the running loop changes (e.g. between `asyncio.run`
+        calls).
+
+        Returns:
+            Async client instance
+        """
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_client_loop is not loop:
+            self._async_client = self._create_async_client()
+            self._async_client_loop = loop
+        return self._async_client
+
+    def _parse_json(self, response: str) -> object:
+        """Parse a JSON response, repairing it if needed, and count the outcome.
+
+        Args:
+            response: Response from the LLM
+
+        Returns:
+            Parsed JSON value
+
+        Raises:
+            ValueError: If no JSON object can be salvaged from the response
+        """
+        try:
+            result, repaired = parse_json(response)
+        except ValueError:
+            with self._stats_lock:
+                self.parse_stats["failed"] += 1
+            raise
+
+        if repaired:
+            logger.debug("Repaired malformed JSON response")
+            with self._stats_lock:
+                self.parse_stats["repaired"] += 1
+        return result
+
+    def _response_model(self) -> str:
+        """Get the model that produced the last response in this context.
+
+        Composite extractors querying several models override this method.
+
+        Returns:
+            Model name used to tag extracted profiles
+        """
+        return self.model
+
     def _process_response(self, response: str) -> SQLProfile:
         """Process the LLM response into a SQLProfile object.
 
+        Malformed responses (code fences, surrounding prose, trailing commas,
+        truncated output) are repaired when possible.
+
         Args:
             response: Response from the LLM
 
@@ -338,21 +2087,90 @@ class BaseSQLExtractor(ABC):
         """
         try:
             # Convert result into a dictionary
-            result = json.loads(response)
+            result = self._parse_json(response)
+        except ValueError as e:
+            raise ValueError(f"{e}\nResponse: {response}") from e
+
+        # Check if required keys are present
+        if (
+            not isinstance(result, dict)
+            or "dependencies" not in result
+            or "outputs" not in result
+        ):
+            with self._stats_lock:
+                self.parse_stats["failed"] += 1
+            raise ValueError(
+                "Missing required keys ('dependencies', 'outputs') in the response."
+            )
 
-            # Check if required keys are present
-            if "dependencies" not in result or "outputs" not in result:
-                raise ValueError(
-                    "Missing required keys ('dependencies', 'outputs') in the response."
-                )
+        # Convert dictionary to SQLProfile
+        return SQLProfile(
+            dependencies=self._table_mapping(result["dependencies"]),
+            outputs=self._table_mapping(result["outputs"]),
+            model=self._response_model(),
+        )
 
-            # Convert dictionary to SQLProfile
-            return SQLProfile(
-                dependencies=result["dependencies"], outputs=result["outputs"]
-            )
+    @staticmethod
+    def _table_mapping(tables: dict | list) -> dict:
+        """Convert the table entries of structured outputs to a mapping.
+
+        Args:
+            tables: Mapping of table names to columns, or list of entries with
+                "table" and "columns" keys (see `RESPONSE_SCHEMA`)
+
+        Returns:
+            Dictionary mapping table names to their columns
+
+        Raises:
+            ValueError: If an entry has no table or columns
+        """
+        if not isinstance(tables, list):
+            return tables
+        mapping = {}
+        for entry in tables:
+            if not isinstance(entry, dict) or not {"table", "columns"} <= entry.keys():
+                raise ValueError(f"Malformed table entry in the response: {entry}")
+            columns = mapping.setdefault(entry["table"], [])
+            columns.extend(c for c in entry["columns"] if c not in columns)
+        return mapping
+
+    def _process_batch_response(
+        self, response: str, aliases: dict[str, str]
+    ) -> dict[str, SQLProfile]:
+        """Split a keyed batch response into one SQLProfile per query.
+
+        Args:
+            response: Response from the LLM
+            aliases: Dictionary mapping short file keys used in the prompt to
+                query keys
+
+        Returns:
+            Dictionary mapping query keys to SQLProfile objects. Entries that are
+            missing or malformed in the response are omitted.
+
+        Raises:
+            ValueError: If the response is not a JSON object
+        """
+        result = self._parse_json(response)
+
+        if not isinstance(result, dict):
+            raise ValueError("Batched response is not a JSON object")
+
+        profiles = {}
+        for alias, key in aliases.items():
+            entry = result.get(alias)
+            if (
+                isinstance(entry, dict)
+                and isinstance(entry.get("dependencies"), dict)
+                and isinstance(entry.get("outputs"), dict)
+            ):
+                profiles[key] = SQLProfile(
+                    dependencies=entry["dependencies"],
+                    outputs=entry["outputs"],
+                    model=self._response_model(),
+                )
 
-        except json.JSONDecodeError as e:
-            raise ValueError(f"Failed to decode JSON: {e}\nResponse: {response}") from e
+        return profiles
 
     @staticmethod
     def _normalize_extensions(extensions: set[str] | None) -> set[str]:
@@ -5,9 +5,10 @@ for using DeepSeek's models to extract SQL dependencies.
 """
 
 import os
+import time
 from pathlib import Path
 
-from openai import OpenAI
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient, OpenAI
 
 from sqldeps.llm_parsers.base import BaseSQLExtractor
 
@@ -29,6 +30,7 @@ class DeepseekExtractor(BaseSQLExtractor):
         params: dict | None = None,
         api_key: str | None = None,
         prompt_path: Path | None = None,
+        **kwargs: object,
     ) -> None:
         """Initialize DeepSeek extractor.
 
@@ -37,11 +39,12 @@ class DeepseekExtractor(BaseSQLExtractor):
             params: Additional parameters for the API
             api_key: DeepSeek API key (defaults to environment variable)
             prompt_path: Path to custom prompt YAML file
+            **kwargs: Extraction options passed to BaseSQLExtractor
 
         Raises:
             ValueError: If API key is not provided
         """
-        super().__init__(model, params, prompt_path=prompt_path)
+        super().__init__(model, params, prompt_path=prompt_path, **kwargs)
 
         api_key = api_key or os.getenv(self.ENV_VAR_NAME)
         if not api_key:
@@ -50,7 +53,11 @@ class DeepseekExtractor(BaseSQLExtractor):
                 f"{self.ENV_VAR_NAME} environment variable."
             )
 
-        self.client = OpenAI(api_key=api_key, base_url="https://api.deepseek.com")
+        self.client = OpenAI(
+            api_key=api_key,
+            base_url="https://api.deepseek.com",
+            **self._client_options(DefaultHttpxClient),
+        )
 
     def _query_llm(self, user_prompt: str) -> str:
         """Query the DeepSeek LLM with the generated prompt.
@@ -61,15 +68,45 @@ class DeepseekExtractor(BaseSQLExtractor):
         Returns:
             Response content from DeepSeek
         """
+        started = time.perf_counter()
         response = self.client.chat.completions.create(
             model=self.model,
-            messages=[
-                {"role": "system", "content": self.prompts["system_prompt"]},
-                {"role": "user", "content": user_prompt},
-            ],
-            response_format={"type": "json_object"},
-            stream=False,
+            messages=self._build_messages(user_prompt),
+            **self._response_params(user_prompt),
+            **self._stream_params(),
+            **self.params,
+        )
+
+        return self._read_response(response, started)
+
+    def _create_async_client(self) -> AsyncOpenAI:
+        """Create an async client configured for the DeepSeek API.
+
+        Returns:
+            AsyncOpenAI client instance
+        """
+        return AsyncOpenAI(
+            api_key=self.client.api_key,
+            base_url=self.client.base_url,
+            **self._client_options(DefaultAsyncHttpxClient),
+        )
+
+    async def _aquery_llm(self, user_prompt: str) -> str:
+        """Asynchronously query the DeepSeek LLM with the generated prompt.
+
+        Args:
+            user_prompt: Generated prompt to send to DeepSeek
+
+        Returns:
+            Response content from DeepSeek
+        """
+        started = time.perf_counter()
+        response = await self._get_async_client().chat.completions.create(
+            model=self.model,
+            messages=self._build_messages(user_prompt),
+            **self._response_params(user_prompt),
+            **self._stream_params(),
             **self.params,
         )
 
-        return response.choices[0].message.content
+        return await self._aread_response(response, started)
@@ -0,0 +1,255 @@
+"""Failover SQL parser implementation.
+
+This module provides an extractor querying an ordered chain of LLM providers,
+failing over to the next provider when one degrades and routing back to it
+once it recovers.
+"""
+
+from collections.abc import Iterator
+from contextvars import ContextVar
+from pathlib import Path
+
+from loguru import logger
+
+from sqldeps.circuit_breaker import CircuitBreaker
+from sqldeps.llm_parsers.base import BaseSQLExtractor
+from sqldeps.models import SQLProfile
+from sqldeps.retry import FATAL, classify_error
+
+# Model that answered the last request in the current thread or task
+_answered_by: ContextVar[str | None] = ContextVar("failover_answered_by", default=None)
+
+
+class FailoverExtractor(BaseSQLExtractor):
+    """Extractor failing over along an ordered chain of LLM extractors.
+
+    Each request goes to the first extractor of the chain whose circuit
+    breaker is closed. A failed request is sent to the next extractor, and an
+    extractor failing `failure_threshold` times in a row is skipped for
+    `reset_timeout` seconds before a probe request checks whether it recovered.
+    If every circuit is open, all extractors are tried in order anyway.
+    Fatal errors (invalid requests, authentication, context length) are
+    failed over without counting against the circuit, since the provider
+    answered. Extracted profiles are tagged with the model that answered.
+
+    Attributes:
+        extractors: Extractors in order of preference
+        breakers: Circuit breaker of each extractor
+        failover_stats: Number of responses produced by each model
+    """
+
+    def __init__(
+        self,
+        extractors: list[BaseSQLExtractor],
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        **kwargs: object,
+    ) -> None:
+        """Initialize failover extractor.
+
+        Args:
+            extractors: Extractors in order of preference
+            failure_threshold: Consecutive failures after which an extractor is
+                skipped
+            reset_timeout: Seconds an extractor is skipped before a probe
+                request is sent to it
+            **kwargs: Extraction options passed to BaseSQLExtractor (defaults to
+                the options of the first extractor)
+
+        Raises:
+            ValueError: If no extractor is given
+        """
+        if not extractors:
+            raise ValueError("At least one extractor is required")
+
+        primary = extractors[0]
+        options = {**primary.options, **kwargs}
+        super().__init__(
+            primary.model,
+            primary.params,
+            prompt_path=primary.prompt_path,
+            **options,
+        )
+        self.extractors = extractors
+        self.breakers = [
+            CircuitBreaker(
+                f"{e.framework}/{e.model}",
+                failure_threshold=failure_threshold,
+                reset_timeout=reset_timeout,
+            )
+            for e in extractors
+        ]
+        self.failover_stats = {e.model: 0 for e in extractors}
+
+    def _candidates(self) -> Iterator[tuple[BaseSQLExtractor, CircuitBreaker]]:
+        """Get the extractors to try for the next request, in order.
+
+        Circuits are checked lazily, right before each extractor is tried, so
+        that the probe of a recovering extractor is only claimed by a request
+        that is actually sent to it.
+
+        Yields:
+            Extractors whose circuit allows a request, or all extractors if
+            every circuit is open
+        """
+        chain = list(zip(self.extractors, self.breakers, strict=True))
+        allowed = False
+        for extractor, breaker in chain:
+            if breaker.allow():
+                allowed = True
+                yield extractor, breaker
+        if not allowed:
+            logger.warning("All providers are unavailable, trying them in order")
+            yield from chain
+
+    def _answered(self, extractor: BaseSQLExtractor, breaker: CircuitBreaker) -> None:
+        """Record a successful request."""
+        breaker.record_success()
+        _answered_by.set(extractor.model)
+        with self._stats_lock:
+            self.failover_stats[extractor.model] += 1
+
+    @staticmethod
+    def _failed(breaker: CircuitBreaker, error: Exception) -> None:
+        """Record a failed request.
+
+        Fatal errors are caused by the request, not by a degraded provider,
+        and do not count as failures of the provider.
+        """
+        if classify_error(error) == FATAL:
+            # The provider answered, which also ends its probe if any
+            breaker.record_success()
+        else:
+            breaker.record_failure()
+        logger.warning(f"{breaker.name} failed, failing over: {error}")
+
+    def _query_llm(self, prompt: str) -> str:
+        """Query the first available extractor of the chain.
+
+        Args:
+            prompt: Generated prompt to send
+
+        Returns:
+            Response of the first extractor answering
+
+        Raises:
+            Exception: Error of the last extractor if every extractor failed
+        """
+        error = None
+        for extractor, breaker in self._candidates():
+            try:
+                response = extractor._query_llm(prompt)
+            except Exception as e:
+                self._failed(breaker, e)
+                error = e
+                continue
+            except BaseException:
+                breaker.release()
+                raise
+            self._answered(extractor, breaker)
+            return response
+        raise error
+
+    async def _aquery_llm(self, prompt: str) -> str:
+        """Asynchronously query the first available extractor of the chain.
+
+        Args:
+            prompt: Generated prompt to send
+
+        Returns:
+            Response of the first extractor answering
+
+        Raises:
+            Exception: Error of the last extractor if every extractor failed
+        """
+        error = None
+        for extractor, breaker in self._candidates():
+            try:
+                response = await extractor._aquery_llm(prompt)
+            except Exception as e:
+                self._failed(breaker, e)
+                error = e
+                continue
+            except BaseException:
+                # Cancelled, e.g. by a hedge request answering first
+                breaker.release()
+                raise
+            self._answered(extractor, breaker)
+            return response
+        raise error
+
+    def _response_model(self) -> str:
+        """Get the model of the extractor that answered the last request.
+
+        Returns:
+            Model name used to tag extracted profiles
+        """
+        return _answered_by.get() or self.model
+
+    def _cache_fingerprint(self) -> dict:
+        """Describe the configuration, including every extractor of the chain.
+
+        Returns:
+            JSON-serializable description of the configuration
+        """
+        return {
+            **super()._cache_fingerprint(),
+            "chain": [e._cache_fingerprint() for e in self.extractors],
+        }
+
+    def _process_files_in_parallel(
+        self,
+        sql_files: list[Path],
+        n_workers: int = 2,
+        rpm: int = 100,
+        use_cache: bool = True,
+        executor: str = "process",
+    ) -> dict[str, SQLProfile]:
+        """Process SQL files in parallel, using threads instead of processes.
+
+        Worker processes rebuild extractors by framework name, which cannot
+        reproduce a chain of extractors, and circuit breakers must be shared
+        by the whole run, so the process executor uses threads.
+
+        Args:
+            sql_files: List of SQL file paths to process
+            n_workers: Number of workers
+            rpm: Requests per minute limit
+            use_cache: Whether to use cached results
+            executor: Execution strategy ("process", "thread" or "async")
+
+        Returns:
+            Dictionary mapping file paths to their respective SQLProfile objects
+        """
+        if executor == "process":
+            logger.info("Failover extraction uses the thread executor")
+            executor = "thread"
+        return super()._process_files_in_parallel(
+            sql_files, n_workers, rpm, use_cache, executor=executor
+        )
+
+    def _finalize_results(
+        self,
+        dependencies: dict[str, SQLProfile],
+        merge_sql_profiles: bool = False,
+        use_cache: bool = True,
+        clear_cache: bool = False,
+    ) -> SQLProfile | dict[str, SQLProfile]:
+        """Report the responses of each model and finalize the results.
+
+        Args:
+            dependencies: Dictionary mapping file paths to SQLProfile objects
+            merge_sql_profiles: Whether to merge results into a single SQLProfile
+            use_cache: Whether cache was used
+            clear_cache: Whether to clear the cache
+
+        Returns:
+            Single SQLProfile or dictionary mapping file paths to SQLProfile objects
+        """
+        logger.info(
+            "Responses by model: "
+            + ", ".join(f"{m}: {n}" for m, n in self.failover_stats.items())
+        )
+        return super()._finalize_results(
+            dependencies, merge_sql_profiles, use_cache, clear_cache
+        )
@@ -5,9 +5,10 @@ for using Groq's models to extract SQL dependencies.
 """
 
 import os
+import time
 from pathlib import Path
 
-from groq import Groq
+from groq import AsyncGroq, DefaultAsyncHttpxClient, DefaultHttpxClient, Groq
 
 from sqldeps.llm_parsers.base import BaseSQLExtractor
 
@@ -21,6 +22,7 @@ class GroqExtractor(BaseSQLExtractor):
     """
 
     ENV_VAR_NAME = "GROQ_API_KEY"
+    MAX_TOKENS_PARAM = "max_completion_tokens"
 
     def __init__(
         self,
@@ -28,9 +30,10 @@ class GroqExtractor(BaseSQLExtractor):
         params: dict | None = None,
         api_key: str | None = None,
         prompt_path: Path | None = None,
+        **kwargs: object,
     ) -> None:
         """Initialize Groq extractor."""
-        super().__init__(model, params, prompt_path=prompt_path)
+        super().__init__(model, params, prompt_path=prompt_path, **kwargs)
 
         api_key = api_key or os.getenv(self.ENV_VAR_NAME)
         if not api_key:
@@ -39,7 +42,7 @@ class GroqExtractor(BaseSQLExtractor):
                 f"{self.ENV_VAR_NAME} environment variable."
             )
 
-        self.client = Groq(api_key=api_key)
+        self.client = Groq(api_key=api_key, **self._client_options(DefaultHttpxClient))
 
     def _query_llm(self, user_prompt: str) -> str:
         """Query the Groq LLM with the generated prompt.
@@ -50,14 +53,45 @@ class GroqExtractor(BaseSQLExtractor):
         Returns:
             Response content from Groq
         """
+        started = time.perf_counter()
         response = self.client.chat.completions.create(
             model=self.model,
-            messages=[
-                {"role": "system", "content": self.prompts["system_prompt"]},
-                {"role": "user", "content": user_prompt},
-            ],
-            response_format={"type": "json_object"},
+            messages=self._build_messages(user_prompt),
+            **self._response_params(user_prompt),
+            **self._stream_params(),
             **self.params,
         )
 
-        return response.choices[0].message.content
+        return self._read_response(response, started)
+
+    def _create_async_client(self) -> AsyncGroq:
+        """Create an async Groq client sharing the sync client's credentials.
+
+        Returns:
+            AsyncGroq client instance
+        """
+        return AsyncGroq(
+            api_key=self.client.api_key,
+            base_url=self.client.base_url,
+            **self._client_options(DefaultAsyncHttpxClient),
+        )
+
+    async def _aquery_llm(self, user_prompt: str) -> str:
+        """Asynchronously query the Groq LLM with the generated prompt.
+
+        Args:
+            user_prompt: Generated prompt to send to Groq
+
+        Returns:
+            Response content from Groq
+        """
+        started = time.perf_counter()
+        response = await self._get_async_client().chat.completions.create(
+            model=self.model,
+            messages=self._build_messages(user_prompt),
+            **self._response_params(user_prompt),
+            **self._stream_params(),
+            **self.params,
+        )
+
+        return await self._aread_response(response, started)
@@ -0,0 +1,346 @@
+"""Hedged SQL parser implementation.
+
+This module provides an extractor that cuts the latency tail of LLM requests
+by sending a duplicate (hedge) request when a request is slower than usual,
+and keeping whichever response arrives first.
+"""
+
+import asyncio
+import statistics
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextvars import ContextVar, copy_context
+from pathlib import Path
+
+from loguru import logger
+
+from sqldeps.llm_parsers.base import BaseSQLExtractor
+from sqldeps.models import SQLProfile
+
+# Model that answered the last request in the current thread or task
+_answered_by: ContextVar[str | None] = ContextVar("hedged_answered_by", default=None)
+
+
+class HedgedExtractor(BaseSQLExtractor):
+    """Extractor sending hedge requests when an LLM request is slow.
+
+    The latency of each request is recorded during the run. Once enough
+    requests completed, a request still running after the given latency
+    percentile is hedged: the same prompt is sent to the hedge extractor (the
+    same model by default) and the first successful response is used. The
+    other request is cancelled (or, for blocking clients, its response is
+    discarded). Hedge requests count against the rate limiter of the run, and
+    are skipped when the rate limit is reached.
+
+    Attributes:
+        extractor: Extractor used for primary requests
+        hedge_extractor: Extractor used for hedge requests
+        percentile: Latency percentile after which a request is hedged
+        min_samples: Number of completed requests before hedging starts
+        hedge_stats: Number of requests ("requests"), of hedge requests sent
+            ("hedged") and of hedge requests answering first ("won")
+    """
+
+    def __init__(
+        self,
+        extractor: BaseSQLExtractor,
+        hedge_extractor: BaseSQLExtractor | None = None,
+        percentile: float = 95.0,
+        min_samples: int = 10,
+        window: int = 500,
+        **kwargs: object,
+    ) -> None:
+        """Initialize hedged extractor.
+
+        Args:
+            extractor: Extractor used for primary requests
+            hedge_extractor: Extractor used for hedge requests, e.g. with a
+                secondary model (defaults to `extractor`)
+            percentile: Latency percentile (between 1 and 99) after which a
+                request is hedged
+            min_samples: Number of completed requests before hedging starts
+            window: Number of recent request latencies the percentile is
+                computed from
+            **kwargs: Extraction options passed to BaseSQLExtractor (defaults to
+                the options of the wrapped extractor)
+
+        Raises:
+            ValueError: If the percentile is not between 1 and 99
+        """
+        if not 1 <= percentile <= 99:
+            raise ValueError(
+                f"Invalid percentile: {percentile}. Must be between 1 and 99."
+            )
+
+        options = {**extractor.options, **kwargs}
+        super().__init__(
+            extractor.model,
+            extractor.params,
+            prompt_path=extractor.prompt_path,
+            **options,
+        )
+        self.extractor = extractor
+        self.hedge_extractor = hedge_extractor or extractor
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.hedge_stats = {"requests": 0, "hedged": 0, "won": 0}
+        self._latencies: deque[float] = deque(maxlen=window)
+
+    def hedge_delay(self) -> float | None:
+        """Get the latency after which a request is hedged.
+
+        Returns:
+            Latency percentile of recent requests in seconds, or None if too
+            few requests completed to estimate it
+        """
+        with self._stats_lock:
+            latencies = list(self._latencies)
+        if len(latencies) < max(self.min_samples, 2):
+            return None
+        return statistics.quantiles(latencies, n=100)[round(self.percentile) - 1]
+
+    def _count(self, key: str) -> None:
+        """Increment a counter of `hedge_stats`."""
+        with self._stats_lock:
+            self.hedge_stats[key] += 1
+
+    def _record_latency(self, started: float) -> None:
+        """Record the latency of a primary request started at `started`."""
+        with self._stats_lock:
+            self._latencies.append(time.perf_counter() - started)
+
+    def _can_hedge(self) -> bool:
+        """Check whether a hedge request fits the rate limit, and count it."""
+        if self.rate_limiter is not None and not self.rate_limiter.try_acquire():
+            logger.debug("Rate limit reached, not hedging")
+            return False
+        self._count("hedged")
+        return True
+
+    def _query_primary(self, prompt: str) -> tuple[str, str]:
+        """Query the primary extractor and record the request latency.
+
+        Returns:
+            Response, and the model that answered (the wrapped extractor may
+            fail over to another model)
+        """
+        started = time.perf_counter()
+        response = self.extractor._query_llm(prompt)
+        self._record_latency(started)
+        return response, self.extractor._response_model()
+
+    async def _aquery_primary(self, prompt: str) -> tuple[str, str]:
+        """Asynchronous version of `_query_primary`.
+
+        The latency of a cancelled request is recorded as the time it ran for,
+        so that slow requests lost to a hedge still count in the percentile.
+        """
+        started = time.perf_counter()
+        try:
+            response = await self.extractor._aquery_llm(prompt)
+        except asyncio.CancelledError:
+            self._record_latency(started)
+            raise
+        self._record_latency(started)
+        return response, self.extractor._response_model()
+
+    def _query_hedge(self, prompt: str) -> tuple[str, str]:
+        """Query the hedge extractor.
+
+        Returns:
+            Response, and the model that answered
+        """
+        return (
+            self.hedge_extractor._query_llm(prompt),
+            self.hedge_extractor._response_model(),
+        )
+
+    async def _aquery_hedge(self, prompt: str) -> tuple[str, str]:
+        """Asynchronous version of `_query_hedge`."""
+        response = await self.hedge_extractor._aquery_llm(prompt)
+        return response, self.hedge_extractor._response_model()
+
+    @staticmethod
+    def _answered(answer: tuple[str, str]) -> str:
+        """Record the model of an answer in the current context.
+
+        Requests run in copies of the context, so the model that answered is
+        returned with the response and recorded by the caller.
+
+        Args:
+            answer: Response and the model that answered
+
+        Returns:
+            Response
+        """
+        response, model = answer
+        _answered_by.set(model)
+        return response
+
+    def _query_llm(self, prompt: str) -> str:
+        """Query the LLM, hedging the request if it is slower than usual.
+
+        Args:
+            prompt: Generated prompt to send
+
+        Returns:
+            First successful response
+        """
+        self._count("requests")
+        delay = self.hedge_delay()
+        if delay is None:
+            return self._answered(self._query_primary(prompt))
+
+        executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="sqldeps-hedge")
+        try:
+            # Responses fill the usage of the request record of this thread
+            primary = executor.submit(copy_context().run, self._query_primary, prompt)
+            done, _ = wait([primary], timeout=delay)
+            if done or not self._can_hedge():
+                return self._answered(primary.result())
+
+            logger.debug(f"Request slower than {delay:.2f}s, sending hedge request")
+            hedge = executor.submit(copy_context().run, self._query_hedge, prompt)
+            return self._answered(self._first_result(primary, hedge))
+        finally:
+            # The losing request cannot be interrupted; its response is ignored
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _first_result(self, primary: Future, hedge: Future) -> tuple[str, str]:
+        """Wait for the first successful response of two concurrent requests.
+
+        Args:
+            primary: Primary request
+            hedge: Hedge request
+
+        Returns:
+            First successful response, and the model that answered
+
+        Raises:
+            Exception: Error of the primary request if both requests failed
+        """
+        pending = {primary, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        self._count("won")
+                    return future.result()
+        return primary.result()
+
+    async def _aquery_llm(self, prompt: str) -> str:
+        """Asynchronously query the LLM, hedging the request if it is slow.
+
+        Args:
+            prompt: Generated prompt to send
+
+        Returns:
+            First successful response
+        """
+        self._count("requests")
+        delay = self.hedge_delay()
+        primary = asyncio.ensure_future(self._aquery_primary(prompt))
+        if delay is None:
+            return self._answered(await primary)
+
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done or not self._can_hedge():
+            return self._answered(await primary)
+
+        logger.debug(f"Request slower than {delay:.2f}s, sending hedge request")
+        hedge = asyncio.ensure_future(self._aquery_hedge(prompt))
+        pending = {primary, hedge}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self._count("won")
+                        return self._answered(task.result())
+            return self._answered(primary.result())
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _response_model(self) -> str:
+        """Get the model of the request that answered first.
+
+        Returns:
+            Model name used to tag extracted profiles
+        """
+        return _answered_by.get() or self.model
+
+    def _cache_fingerprint(self) -> dict:
+        """Describe the configuration, including the hedge extractor.
+
+        Returns:
+            JSON-serializable description of the configuration
+        """
+        return {
+            **super()._cache_fingerprint(),
+            "hedge": self.hedge_extractor._cache_fingerprint(),
+        }
+
+    def _process_files_in_parallel(
+        self,
+        sql_files: list[Path],
+        n_workers: int = 2,
+        rpm: int = 100,
+        use_cache: bool = True,
+        executor: str = "process",
+    ) -> dict[str, SQLProfile]:
+        """Process SQL files in parallel, using threads instead of processes.
+
+        Worker processes rebuild extractors by framework name, which cannot
+        reproduce a wrapped extractor, and latencies must be learned across
+        the whole run, so the process executor uses threads.
+
+        Args:
+            sql_files: List of SQL file paths to process
+            n_workers: Number of workers
+            rpm: Requests per minute limit
+            use_cache: Whether to use cached results
+            executor: Execution strategy ("process", "thread" or "async")
+
+        Returns:
+            Dictionary mapping file paths to their respective SQLProfile objects
+        """
+        if executor == "process":
+            logger.info("Hedged extraction uses the thread executor")
+            executor = "thread"
+        return super()._process_files_in_parallel(
+            sql_files, n_workers, rpm, use_cache, executor=executor
+        )
+
+    def _finalize_results(
+        self,
+        dependencies: dict[str, SQLProfile],
+        merge_sql_profiles: bool = False,
+        use_cache: bool = True,
+        clear_cache: bool = False,
+    ) -> SQLProfile | dict[str, SQLProfile]:
+        """Report the hedging statistics and finalize the extraction results.
+
+        Args:
+            dependencies: Dictionary mapping file paths to SQLProfile objects
+            merge_sql_profiles: Whether to merge results into a single SQLProfile
+            use_cache: Whether cache was used
+            clear_cache: Whether to clear the cache
+
+        Returns:
+            Single SQLProfile or dictionary mapping file paths to SQLProfile objects
+        """
+        hedged = self.hedge_stats["hedged"]
+        won = self.hedge_stats["won"]
+        logger.info(
+            f"Hedging: {hedged} of {self.hedge_stats['requests']} requests hedged, "
+            f"hedge answered first {won} times ({won / max(hedged, 1):.0%})"
+        )
+        return super()._finalize_results(
+            dependencies, merge_sql_profiles, use_cache, clear_cache
+        )
@@ -0,0 +1,317 @@
+"""Hybrid SQL parser implementation.
+
+This module provides a routing extractor that resolves statements locally with
+static analysis and only sends the statements it cannot resolve to an LLM.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from loguru import logger
+
+from sqldeps.llm_parsers.base import BaseSQLExtractor
+from sqldeps.models import SQLProfile
+from sqldeps.rate_limiter import RateLimiter
+from sqldeps.retry import RetryPolicy
+from sqldeps.static_analysis import (
+    StatementAnalysis,
+    analyze_sql,
+    combine_statement_profiles,
+)
+
+
+class HybridExtractor(BaseSQLExtractor):
+    """Routing extractor combining static analysis with an LLM extractor.
+
+    Each statement is first analyzed locally. Fully resolved statements (no
+    dynamic SQL, function bodies, ambiguous columns or `*` over derived tables)
+    are accepted as is; consecutive unresolved statements are sent together to
+    the wrapped LLM extractor, preserving script order.
+
+    Attributes:
+        extractor: LLM extractor used for unresolved statements
+        routing_stats: Number of statements resolved by each path
+            ("static" and "llm") since the extractor was created
+        last_analysis: Per-statement analysis of the last extracted query
+    """
+
+    def __init__(self, extractor: BaseSQLExtractor, **kwargs: object) -> None:
+        """Initialize hybrid extractor.
+
+        Args:
+            extractor: LLM extractor used for statements that cannot be resolved
+                statically
+            **kwargs: Extraction options passed to BaseSQLExtractor (defaults to
+                the options of the wrapped extractor)
+        """
+        options = {**extractor.options, **kwargs}
+        super().__init__(
+            extractor.model,
+            extractor.params,
+            prompt_path=extractor.prompt_path,
+            **options,
+        )
+        self.extractor = extractor
+        # LLM requests are made by the wrapped extractor
+        self.request_records = extractor.request_records
+        self.usage_stats = extractor.usage_stats
+        self.routing_stats = {"static": 0, "llm": 0}
+        self.last_analysis: list[StatementAnalysis] = []
+        self._stats_lock = threading.Lock()
+
+    def _route(
+        self, sql: str
+    ) -> tuple[list[tuple[bool, list[StatementAnalysis]]], set[str]]:
+        """Analyze a query and group its statements by extraction path.
+
+        Args:
+            sql: SQL query string to analyze
+
+        Returns:
+            Tuple of (runs of consecutive statements with their resolution
+            status, temporary tables created by the query)
+        """
+        analysis = analyze_sql(sql)
+        self.last_analysis = analysis
+
+        runs: list[tuple[bool, list[StatementAnalysis]]] = []
+        for statement in analysis:
+            if runs and runs[-1][0] == statement.resolved:
+                runs[-1][1].append(statement)
+            else:
+                runs.append((statement.resolved, [statement]))
+
+        n_static = sum(a.resolved for a in analysis)
+        with self._stats_lock:
+            self.routing_stats["static"] += n_static
+            self.routing_stats["llm"] += len(analysis) - n_static
+
+        for statement in analysis:
+            if not statement.resolved:
+                logger.debug(
+                    f"Routing statement to LLM ({', '.join(statement.reasons)})"
+                )
+
+        temp_tables = set().union(*(a.temp_tables for a in analysis))
+        return runs, temp_tables
+
+    def _extract_single(self, sql: str) -> SQLProfile:
+        """Extract dependencies, querying the LLM only for unresolved statements.
+
+        Args:
+            sql: SQL query string to analyze
+
+        Returns:
+            SQLProfile object containing dependencies and outputs
+        """
+        runs, temp_tables = self._route(sql)
+        llm_runs = [
+            "\n".join(a.sql for a in run) for resolved, run in runs if not resolved
+        ]
+
+        llm_profiles = []
+        if len(llm_runs) == 1:
+            llm_profiles = [self.extractor.extract_from_query(llm_runs[0])]
+        elif llm_runs:
+            with ThreadPoolExecutor(
+                max_workers=min(self.chunk_workers, len(llm_runs))
+            ) as executor:
+                llm_profiles = list(
+                    executor.map(self.extractor.extract_from_query, llm_runs)
+                )
+
+        return self._combine(runs, llm_profiles, temp_tables)
+
+    async def _aextract_single(self, sql: str) -> SQLProfile:
+        """Asynchronous version of `_extract_single`.
+
+        Args:
+            sql: SQL query string to analyze
+
+        Returns:
+            SQLProfile object containing dependencies and outputs
+        """
+        runs, temp_tables = self._route(sql)
+        semaphore = asyncio.Semaphore(self.chunk_workers)
+
+        async def extract_run(run: list[StatementAnalysis]) -> SQLProfile:
+            async with semaphore:
+                return await self.extractor.aextract_from_query(
+                    "\n".join(a.sql for a in run)
+                )
+
+        llm_profiles = await asyncio.gather(
+            *(extract_run(run) for resolved, run in runs if not resolved)
+        )
+        return self._combine(runs, list(llm_profiles), temp_tables)
+
+    @staticmethod
+    def _combine(
+        runs: list[tuple[bool, list[StatementAnalysis]]],
+        llm_profiles: list[SQLProfile],
+        temp_tables: set[str],
+    ) -> SQLProfile:
+        """Combine static and LLM profiles in script order.
+
+        Args:
+            runs: Runs of consecutive statements with their resolution status
+            llm_profiles: LLM profile of each unresolved run, in script order
+            temp_tables: Temporary tables created by the query
+
+        Returns:
+            SQLProfile for the whole query
+        """
+        llm_iter = iter(llm_profiles)
+        profiles = []
+        for resolved, run in runs:
+            if resolved:
+                profiles.extend(a.profile for a in run)
+            else:
+                profiles.append(next(llm_iter))
+        return combine_statement_profiles(profiles, temp_tables)
+
+    def _needs_chunking(self, sql: str) -> bool:
+        """Routing is statement-level; chunking is left to the LLM extractor."""
+        return False
+
+    def _prepare_sql(self, sql: str) -> str:
+        """Keep the SQL as is (formatting would change identifier case)."""
+        return sql
+
+    def _cache_fingerprint(self) -> dict:
+        """Describe the configuration, including the LLM extractor.
+
+        Returns:
+            JSON-serializable description of the configuration
+        """
+        return {
+            **super()._cache_fingerprint(),
+            "extractor": self.extractor._cache_fingerprint(),
+        }
+
+    def _extract_batch(
+        self,
+        batch: dict[str, str],
+        rate_limiter: RateLimiter | None = None,
+        retry_policy: RetryPolicy | None = None,
+    ) -> dict[str, SQLProfile]:
+        """Extract dependencies for one batch, sending only unresolved statements.
+
+        Unresolved runs of every query in the batch are packed into a single
+        batched request to the LLM extractor.
+
+        Args:
+            batch: Dictionary mapping query keys to SQL
+            rate_limiter: Optional rate limiter applied before each request
+            retry_policy: Retry policy of the run (defaults to a new policy)
+
+        Returns:
+            Dictionary mapping query keys to SQLProfile objects
+        """
+        routed = {key: self._route(sql) for key, sql in batch.items()}
+
+        llm_batch = {}
+        for key, (runs, _) in routed.items():
+            unresolved = [run for resolved, run in runs if not resolved]
+            for i, run in enumerate(unresolved):
+                llm_batch[f"{key}#{i}"] = self.extractor._prepare_sql(
+                    "\n".join(a.sql for a in run)
+                )
+
+        llm_results = {}
+        if llm_batch:
+            llm_results = self.extractor._extract_batch(
+                llm_batch, rate_limiter, retry_policy
+            )
+
+        results = {}
+        for key, (runs, temp_tables) in routed.items():
+            n_unresolved = sum(not resolved for resolved, _ in runs)
+            llm_keys = [f"{key}#{i}" for i in range(n_unresolved)]
+            if any(k not in llm_results for k in llm_keys):
+                logger.warning(f"Failed to process {key}")
+                continue
+            llm_profiles = [llm_results[k] for k in llm_keys]
+            results[key] = self._combine(runs, llm_profiles, temp_tables)
+
+        return results
+
+    def _process_files_in_parallel(
+        self,
+        sql_files: list[Path],
+        n_workers: int = 2,
+        rpm: int = 100,
+        use_cache: bool = True,
+        executor: str = "process",
+    ) -> dict[str, SQLProfile]:
+        """Process SQL files in parallel, using threads instead of processes.
+
+        Worker processes rebuild extractors by framework name, which cannot
+        reproduce a wrapped extractor, so the process executor uses threads.
+
+        Args:
+            sql_files: List of SQL file paths to process
+            n_workers: Number of workers
+            rpm: Requests per minute limit
+            use_cache: Whether to use cached results
+            executor: Execution strategy ("process", "thread" or "async")
+
+        Returns:
+            Dictionary mapping file paths to their respective SQLProfile objects
+        """
+        if executor == "process":
+            logger.info("Hybrid extraction uses the thread executor")
+            executor = "thread"
+        return super()._process_files_in_parallel(
+            sql_files, n_workers, rpm, use_cache, executor=executor
+        )
+
+    def _finalize_results(
+        self,
+        dependencies: dict[str, SQLProfile],
+        merge_sql_profiles: bool = False,
+        use_cache: bool = True,
+        clear_cache: bool = False,
+    ) -> SQLProfile | dict[str, SQLProfile]:
+        """Report the routing statistics and finalize the extraction results.
+
+        Args:
+            dependencies: Dictionary mapping file paths to SQLProfile objects
+            merge_sql_profiles: Whether to merge results into a single SQLProfile
+            use_cache: Whether cache was used
+            clear_cache: Whether to clear the cache
+
+        Returns:
+            Single SQLProfile or dictionary mapping file paths to SQLProfile objects
+        """
+        logger.info(
+            f"Hybrid routing: {self.routing_stats['static']} statements resolved "
+            f"statically, {self.routing_stats['llm']} sent to the LLM"
+        )
+        return super()._finalize_results(
+            dependencies, merge_sql_profiles, use_cache, clear_cache
+        )
+
+    def _query_llm(self, prompt: str) -> str:
+        """Query the wrapped LLM extractor.
+
+        Args:
+            prompt: Generated prompt to send
+
+        Returns:
+            Response content from the LLM
+        """
+        return self.extractor._query_llm(prompt)
+
+    async def _aquery_llm(self, prompt: str) -> str:
+        """Asynchronously query the wrapped LLM extractor.
+
+        Args:
+            prompt: Generated prompt to send
+
+        Returns:
+            Response content from the LLM
+        """
+        return await self.extractor._aquery_llm(prompt)
@@ -5,9 +5,12 @@ for using various LLM models to extract SQL dependencies.
 """
 
 import os
+import time
 from pathlib import Path
 
-from litellm import UnsupportedParamsError, completion
+from litellm import UnsupportedParamsError, acompletion, completion
+from litellm.utils import supports_prompt_caching, supports_response_schema
+from loguru import logger
 
 from sqldeps.llm_parsers.base import BaseSQLExtractor
 
@@ -33,6 +36,7 @@ class LiteLlmExtractor(BaseSQLExtractor):
         params: dict | None = None,
         api_key: dict[str, str] | None = None,
         prompt_path: Path | None = None,
+        **kwargs: object,
     ) -> None:
         """Initialize LiteLLM extractor.
 
@@ -42,13 +46,74 @@ class LiteLlmExtractor(BaseSQLExtractor):
             api_key: Optional dictionary mapping environment variable names to
                 API key values. For example: {"OPENAI_API_KEY": "sk-..."}
             prompt_path: Path to custom prompt YAML file
+            **kwargs: Extraction options passed to BaseSQLExtractor
         """
-        super().__init__(model, params, prompt_path=prompt_path)
+        super().__init__(model, params, prompt_path=prompt_path, **kwargs)
 
         if api_key:
             for env_var, key_value in api_key.items():
                 os.environ[env_var] = key_value
 
+        self._cache_control = self.prompt_cache and self._supports_prompt_caching()
+        self._response_schema = (
+            self.structured_output and self._check_response_schema_support()
+        )
+
+    def _supports_prompt_caching(self) -> bool:
+        """Check whether the model caches prompts marked with cache control.
+
+        Returns:
+            True if LiteLLM knows the model supports prompt caching
+        """
+        try:
+            return supports_prompt_caching(model=self.model)
+        except Exception as e:
+            logger.debug(f"Cannot check prompt caching support of {self.model}: {e}")
+            return False
+
+    def _check_response_schema_support(self) -> bool:
+        """Check whether LiteLLM knows the model accepts JSON schemas.
+
+        Returns:
+            True if LiteLLM knows the model supports response schemas
+        """
+        try:
+            return supports_response_schema(model=self.model)
+        except Exception as e:
+            logger.debug(f"Cannot check response schema support of {self.model}: {e}")
+            return False
+
+    def _supports_response_schema(self) -> bool:
+        """Check whether the model accepts strict JSON schemas.
+
+        Returns:
+            True if responses can be constrained to the response schema
+        """
+        return self._response_schema
+
+    def _build_messages(self, user_prompt: str) -> list[dict]:
+        """Build the chat messages, marking the system prompt as cacheable.
+
+        Providers such as Anthropic only cache prompt prefixes ending with a
+        cache-control marker; others cache prefixes automatically.
+
+        Args:
+            user_prompt: Generated user prompt
+
+        Returns:
+            List of chat messages with the system and user prompts
+        """
+        messages = super()._build_messages(user_prompt)
+        if self._cache_control:
+            messages[0]["content"] = [
+                {
+                    "type": "text",
+                    "text": messages[0]["content"],
+                    "cache_control": {"type": "ephemeral"},
+                }
+            ]
+        return messages
+
     def _query_llm(self, user_prompt: str) -> str:
         """Query the LLM with the generated prompt using LiteLLM.
 
@@ -58,23 +123,55 @@ class LiteLlmExtractor(BaseSQLExtractor):
         Returns:
             Response content from the LLM
         """
-        messages = [
-            {"role": "system", "content": self.prompts["system_prompt"]},
-            {"role": "user", "content": user_prompt},
-        ]
+        started = time.perf_counter()
+        messages = self._build_messages(user_prompt)
+        response_params = self._response_params(user_prompt)
 
         try:
             response = completion(
                 model=self.model,
                 messages=messages,
-                response_format={"type": "json_object"},
+                **response_params,
+                **self._stream_params(),
                 **self.params,
             )
         except UnsupportedParamsError:
             response = completion(
                 model=self.model,
                 messages=messages,
-                response_format={"type": "json_object"},
+                **response_params,
+                **self._stream_params(),
+            )
+
+        return self._read_response(response, started)
+
+    async def _aquery_llm(self, user_prompt: str) -> str:
+        """Asynchronously query the LLM with the generated prompt using LiteLLM.
+
+        Args:
+            user_prompt: Generated prompt to send to the LLM
+
+        Returns:
+            Response content from the LLM
+        """
+        started = time.perf_counter()
+        messages = self._build_messages(user_prompt)
+        response_params = self._response_params(user_prompt)
+
+        try:
+            response = await acompletion(
+                model=self.model,
+                messages=messages,
+                **response_params,
+                **self._stream_params(),
+                **self.params,
+            )
+        except UnsupportedParamsError:
+            response = await acompletion(
+                model=self.model,
+                messages=messages,
+                **response_params,
+                **self._stream_params(),
             )
 
-        return response.choices[0].message.content
+        return await self._aread_response(response, started)
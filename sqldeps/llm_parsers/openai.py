@@ -5,9 +5,16 @@ for using OpenAI's models to extract SQL dependencies.
 """
 
 import os
+import time
 from pathlib import Path
 
-from openai import BadRequestError, OpenAI
+from openai import (
+    AsyncOpenAI,
+    BadRequestError,
+    DefaultAsyncHttpxClient,
+    DefaultHttpxClient,
+    OpenAI,
+)
 
 from sqldeps.llm_parsers.base import BaseSQLExtractor
 
@@ -22,6 +29,9 @@ class OpenaiExtractor(BaseSQLExtractor):
 
     # Expected environmental variable with the OpenAI key
     ENV_VAR_NAME = "OPENAI_API_KEY"
+    SUPPORTS_RESPONSE_SCHEMA = True
+    # Reasoning models reject the legacy `max_tokens` parameter
+    MAX_TOKENS_PARAM = "max_completion_tokens"
 
     def __init__(
         self,
@@ -29,6 +39,7 @@ class OpenaiExtractor(BaseSQLExtractor):
         params: dict | None = None,
         api_key: str | None = None,
         prompt_path: Path | None = None,
+        **kwargs: object,
     ) -> None:
         """Initialize OpenAI extractor.
 
@@ -37,11 +48,12 @@ class OpenaiExtractor(BaseSQLExtractor):
             params: Additional parameters for the API
             api_key: OpenAI API key (defaults to environment variable)
             prompt_path: Path to custom prompt YAML file
+            **kwargs: Extraction options passed to BaseSQLExtractor
 
         Raises:
             ValueError: If API key is not provided
         """
-        super().__init__(model, params, prompt_path=prompt_path)
+        super().__init__(model, params, prompt_path=prompt_path, **kwargs)
 
         api_key = api_key or os.getenv(self.ENV_VAR_NAME)
         if not api_key:
@@ -50,7 +62,9 @@ class OpenaiExtractor(BaseSQLExtractor):
                 f"{self.ENV_VAR_NAME} environment variable."
             )
 
-        self.client = OpenAI(api_key=api_key)
+        self.client = OpenAI(
+            api_key=api_key, **self._client_options(DefaultHttpxClient)
+        )
 
     def _query_llm(self, user_prompt: str) -> str:
         """Query the OpenAI LLM with the generated prompt.
@@ -61,16 +75,16 @@ class OpenaiExtractor(BaseSQLExtractor):
         Returns:
             Response content from OpenAI
         """
-        messages = [
-            {"role": "system", "content": self.prompts["system_prompt"]},
-            {"role": "user", "content": user_prompt},
-        ]
+        started = time.perf_counter()
+        messages = self._build_messages(user_prompt)
+        response_params = self._response_params(user_prompt)
 
         try:
             response = self.client.chat.completions.create(
                 model=self.model,
                 messages=messages,
-                response_format={"type": "json_object"},
+                **response_params,
+                **self._stream_params(),
                 **self.params,
             )
         except BadRequestError as e:
@@ -78,9 +92,57 @@ class OpenaiExtractor(BaseSQLExtractor):
                 response = self.client.chat.completions.create(
                     model=self.model,
                     messages=messages,
-                    response_format={"type": "json_object"},
+                    **response_params,
+                    **self._stream_params(),
                 )
             else:
                 raise
 
-        return response.choices[0].message.content
+        return self._read_response(response, started)
+
+    def _create_async_client(self) -> AsyncOpenAI:
+        """Create an async OpenAI client sharing the sync client's credentials.
+
+        Returns:
+            AsyncOpenAI client instance
+        """
+        return AsyncOpenAI(
+            api_key=self.client.api_key,
+            base_url=self.client.base_url,
+            **self._client_options(DefaultAsyncHttpxClient),
+        )
+
+    async def _aquery_llm(self, user_prompt: str) -> str:
+        """Asynchronously query the OpenAI LLM with the generated prompt.
+
+        Args:
+            user_prompt: Generated prompt to send to OpenAI
+
+        Returns:
+            Response content from OpenAI
+        """
+        started = time.perf_counter()
+        client = self._get_async_client()
+        messages = self._build_messages(user_prompt)
+        response_params = self._response_params(user_prompt)
+
+        try:
+            response = await client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                **response_params,
+                **self._stream_params(),
+                **self.params,
+            )
+        except BadRequestError as e:
+            if any(param in str(e) for param in ["temperature", "unsupported"]):
+                response = await client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    **response_params,
+                    **self._stream_params(),
+                )
+            else:
+                raise
+
+        return await self._aread_response(response, started)
@@ -0,0 +1,148 @@
+"""OpenAI-compatible SQL parser implementation.
+
+This module provides an implementation of the BaseSQLExtractor for any endpoint
+serving the OpenAI chat completions API, such as vLLM, the llama.cpp server or
+an in-house gateway.
+"""
+
+import os
+from pathlib import Path
+
+import httpx
+from loguru import logger
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient, OpenAI
+
+from sqldeps.llm_parsers.openai import OpenaiExtractor
+from sqldeps.models import SQLProfile
+
+# Default size of the connection pool. Self-hosted endpoints are not rate
+# limited, so the pool allows many concurrent requests.
+DEFAULT_MAX_CONNECTIONS = 64
+
+
+class OpenaiCompatibleExtractor(OpenaiExtractor):
+    """SQL dependency extractor for OpenAI-compatible endpoints.
+
+    Attributes:
+        ENV_VAR_NAME: Environment variable name for the API key
+        BASE_URL_ENV_VAR_NAME: Environment variable name for the base URL
+        client: OpenAI client instance configured for the endpoint
+        timeout: Timeout of the client requests
+    """
+
+    # Expected environmental variables with the API key and base URL
+    ENV_VAR_NAME = "OPENAI_COMPATIBLE_API_KEY"
+    BASE_URL_ENV_VAR_NAME = "OPENAI_COMPATIBLE_BASE_URL"
+    # Servers such as vLLM and llama.cpp accept the legacy parameter only
+    MAX_TOKENS_PARAM = "max_tokens"
+
+    def __init__(
+        self,
+        model: str | None = None,
+        params: dict | None = None,
+        api_key: str | None = None,
+        prompt_path: Path | None = None,
+        base_url: str | None = None,
+        timeout: float = 120.0,
+        connect_timeout: float = 5.0,
+        **kwargs: object,
+    ) -> None:
+        """Initialize OpenAI-compatible extractor.
+
+        Args:
+            model: Model name served by the endpoint
+            params: Additional parameters for the API
+            api_key: API key of the endpoint (defaults to environment variable,
+                or a placeholder for endpoints without authentication)
+            prompt_path: Path to custom prompt YAML file
+            base_url: Base URL of the endpoint, e.g. "http://localhost:8000/v1"
+                (defaults to environment variable)
+            timeout: Seconds to wait for a response (or, when streaming, for
+                the next chunk)
+            connect_timeout: Seconds to wait for a connection to the endpoint
+            **kwargs: Extraction options passed to BaseSQLExtractor. The
+                connection pool (`max_connections`) defaults to
+                `DEFAULT_MAX_CONNECTIONS` connections.
+
+        Raises:
+            ValueError: If the model or base URL is not provided
+        """
+        if not model:
+            raise ValueError(
+                "No model provided. Pass the model served by the endpoint."
+            )
+
+        base_url = base_url or os.getenv(self.BASE_URL_ENV_VAR_NAME)
+        if not base_url:
+            raise ValueError(
+                "No base URL provided. Either pass base_url parameter or set "
+                f"{self.BASE_URL_ENV_VAR_NAME} environment variable."
+            )
+
+        kwargs.setdefault("max_connections", DEFAULT_MAX_CONNECTIONS)
+        # OpenaiExtractor.__init__ creates a client for the OpenAI API, which
+        # is replaced below, so the base initialization is called directly
+        super(OpenaiExtractor, self).__init__(
+            model, params, prompt_path=prompt_path, **kwargs
+        )
+        self.framework = "openai-compatible"
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+
+        self.client = OpenAI(
+            api_key=api_key or os.getenv(self.ENV_VAR_NAME) or "not-needed",
+            base_url=base_url,
+            timeout=self.timeout,
+            **self._client_options(DefaultHttpxClient),
+        )
+
+    def _cache_fingerprint(self) -> dict:
+        """Describe the configuration, including the endpoint.
+
+        Returns:
+            JSON-serializable description of the configuration
+        """
+        return {**super()._cache_fingerprint(), "base_url": str(self.client.base_url)}
+
+    def _create_async_client(self) -> AsyncOpenAI:
+        """Create an async client sharing the sync client's endpoint.
+
+        Returns:
+            AsyncOpenAI client instance
+        """
+        return AsyncOpenAI(
+            api_key=self.client.api_key,
+            base_url=self.client.base_url,
+            timeout=self.timeout,
+            **self._client_options(DefaultAsyncHttpxClient),
+        )
+
+    def _process_files_in_parallel(
+        self,
+        sql_files: list[Path],
+        n_workers: int = 2,
+        rpm: int = 100,
+        use_cache: bool = True,
+        executor: str = "process",
+    ) -> dict[str, SQLProfile]:
+        """Process SQL files in parallel, using threads instead of processes.
+
+        Worker processes rebuild extractors by framework name, which loses the
+        endpoint settings, and requests are I/O-bound, so the process executor
+        uses threads sharing the connection pool.
+
+        Args:
+            sql_files: List of SQL file paths to process
+            n_workers: Number of workers
+            rpm: Requests per minute limit
+            use_cache: Whether to use cached results
+            executor: Execution strategy ("process", "thread" or "async")
+
+        Returns:
+            Dictionary mapping file paths to their respective SQLProfile objects
+        """
+        if executor == "process":
+            logger.info("OpenAI-compatible extraction uses the thread executor")
+            executor = "thread"
+        return super()._process_files_in_parallel(
+            sql_files, n_workers, rpm, use_cache, executor=executor
+        )
@@ -0,0 +1,278 @@
+"""Complexity-based routing SQL parser implementation.
+
+This module provides an extractor sending simple SQL inputs to a fast, cheap
+model and complex ones to a strong model, based on complexity features
+measured locally.
+"""
+
+from contextvars import ContextVar
+from pathlib import Path
+
+from loguru import logger
+
+from sqldeps.complexity import measure_complexity
+from sqldeps.llm_parsers.base import BaseSQLExtractor
+from sqldeps.models import SQLProfile
+from sqldeps.rate_limiter import RateLimiter
+from sqldeps.retry import RetryPolicy
+from sqldeps.usage import summarize_requests
+
+# Routing tiers
+SIMPLE = "simple"
+COMPLEX = "complex"
+
+# Tier of the query being extracted in the current thread or task
+_tier: ContextVar[str] = ContextVar("router_tier", default=COMPLEX)
+
+
+class RouterExtractor(BaseSQLExtractor):
+    """Extractor routing each SQL input to a model according to its complexity.
+
+    Each query (or chunk of a chunked file) is scored with cheap local
+    features (see `sqldeps.complexity`). Queries without procedural code or
+    dynamic SQL, and within the token, statement and CTE depth thresholds,
+    go to the simple extractor; all others go to the complex extractor.
+    Packed batches go to the complex extractor if any of their queries is
+    complex. Prompts and extraction options are those of the complex
+    extractor, and extracted profiles are tagged with the model that
+    answered.
+
+    Attributes:
+        extractors: Extractor of each tier ("simple" and "complex")
+        max_tokens: Maximum estimated tokens of simple inputs
+        max_statements: Maximum number of statements of simple inputs
+        max_cte_depth: Maximum nesting depth of `WITH` clauses of simple inputs
+        tier_stats: Number of inputs ("inputs") and their estimated tokens
+            ("tokens") routed to each tier
+    """
+
+    def __init__(
+        self,
+        simple_extractor: BaseSQLExtractor,
+        complex_extractor: BaseSQLExtractor,
+        max_tokens: int = 500,
+        max_statements: int = 3,
+        max_cte_depth: int = 1,
+        **kwargs: object,
+    ) -> None:
+        """Initialize router extractor.
+
+        Args:
+            simple_extractor: Extractor of a fast model for simple inputs
+            complex_extractor: Extractor of a strong model for complex inputs
+            max_tokens: Maximum estimated tokens of simple inputs
+            max_statements: Maximum number of statements of simple inputs
+            max_cte_depth: Maximum nesting depth of `WITH` clauses of simple
+                inputs
+            **kwargs: Extraction options passed to BaseSQLExtractor (defaults to
+                the options of the complex extractor)
+        """
+        options = {**complex_extractor.options, **kwargs}
+        super().__init__(
+            complex_extractor.model,
+            complex_extractor.params,
+            prompt_path=complex_extractor.prompt_path,
+            **options,
+        )
+        self.extractors = {SIMPLE: simple_extractor, COMPLEX: complex_extractor}
+        self.max_tokens = max_tokens
+        self.max_statements = max_statements
+        self.max_cte_depth = max_cte_depth
+        self.tier_stats = {tier: {"inputs": 0, "tokens": 0} for tier in self.extractors}
+
+    def _classify(self, sql: str) -> str:
+        """Score a query, count it in its tier and return the tier.
+
+        Args:
+            sql: SQL query string to analyze
+
+        Returns:
+            "simple" or "complex"
+        """
+        complexity = measure_complexity(sql)
+        simple = complexity.is_simple(
+            self.max_tokens, self.max_statements, self.max_cte_depth
+        )
+        tier = SIMPLE if simple else COMPLEX
+        with self._stats_lock:
+            self.tier_stats[tier]["inputs"] += 1
+            self.tier_stats[tier]["tokens"] += complexity.tokens
+        logger.debug(f"Routing query to the {tier} model: {complexity}")
+        return tier
+
+    def _extract_single(self, sql: str) -> SQLProfile:
+        """Extract dependencies with the model of the query's tier.
+
+        Args:
+            sql: SQL query string to analyze
+
+        Returns:
+            SQLProfile object containing dependencies and outputs
+        """
+        _tier.set(self._classify(sql))
+        return super()._extract_single(sql)
+
+    async def _aextract_single(self, sql: str) -> SQLProfile:
+        """Asynchronous version of `_extract_single`.
+
+        Args:
+            sql: SQL query string to analyze
+
+        Returns:
+            SQLProfile object containing dependencies and outputs
+        """
+        _tier.set(self._classify(sql))
+        return await super()._aextract_single(sql)
+
+    def _extract_batch(
+        self,
+        batch: dict[str, str],
+        rate_limiter: RateLimiter | None = None,
+        retry_policy: RetryPolicy | None = None,
+    ) -> dict[str, SQLProfile]:
+        """Extract a packed batch with the model of its most complex query.
+
+        Args:
+            batch: Dictionary mapping query keys to SQL
+            rate_limiter: Optional rate limiter applied before each request
+            retry_policy: Retry policy of the run (defaults to a new policy)
+
+        Returns:
+            Dictionary mapping query keys to SQLProfile objects
+        """
+        tiers = {self._classify(sql) for sql in batch.values()}
+        _tier.set(COMPLEX if COMPLEX in tiers else SIMPLE)
+        return super()._extract_batch(batch, rate_limiter, retry_policy)
+
+    def _query_llm(self, prompt: str) -> str:
+        """Query the extractor of the current tier.
+
+        Args:
+            prompt: Generated prompt to send
+
+        Returns:
+            Response content from the LLM
+        """
+        return self.extractors[_tier.get()]._query_llm(prompt)
+
+    async def _aquery_llm(self, prompt: str) -> str:
+        """Asynchronously query the extractor of the current tier.
+
+        Args:
+            prompt: Generated prompt to send
+
+        Returns:
+            Response content from the LLM
+        """
+        return await self.extractors[_tier.get()]._aquery_llm(prompt)
+
+    def _response_model(self) -> str:
+        """Get the model that answered with the extractor of the current tier.
+
+        Returns:
+            Model name used to tag extracted profiles
+        """
+        return self.extractors[_tier.get()]._response_model()
+
+    def _cache_fingerprint(self) -> dict:
+        """Describe the configuration, including the tiers and thresholds.
+
+        Returns:
+            JSON-serializable description of the configuration
+        """
+        return {
+            **super()._cache_fingerprint(),
+            "tiers": {t: e._cache_fingerprint() for t, e in self.extractors.items()},
+            "thresholds": [self.max_tokens, self.max_statements, self.max_cte_depth],
+        }
+
+    def tier_report(self, cost: bool = True) -> dict[str, dict]:
+        """Summarize the inputs and LLM requests of each tier.
+
+        Requests are attributed to tiers by model, so both tiers should use
+        different models.
+
+        Args:
+            cost: Whether to estimate the cost from the LiteLLM price map
+
+        Returns:
+            Dictionary mapping each tier to its model ("model"), number of
+            inputs and estimated tokens ("inputs", "tokens"), and request
+            summary ("requests", see `sqldeps.usage.summarize_requests`)
+        """
+        with self._stats_lock:
+            records = list(self.request_records)
+            tier_stats = {tier: dict(stats) for tier, stats in self.tier_stats.items()}
+        return {
+            tier: {
+                "model": extractor.model,
+                **tier_stats[tier],
+                "requests": summarize_requests(
+                    [r for r in records if r.model == extractor.model], cost=cost
+                ),
+            }
+            for tier, extractor in self.extractors.items()
+        }
+
+    def _process_files_in_parallel(
+        self,
+        sql_files: list[Path],
+        n_workers: int = 2,
+        rpm: int = 100,
+        use_cache: bool = True,
+        executor: str = "process",
+    ) -> dict[str, SQLProfile]:
+        """Process SQL files in parallel, using threads instead of processes.
+
+        Worker processes rebuild extractors by framework name, which cannot
+        reproduce the extractors of both tiers, so the process executor uses
+        threads.
+
+        Args:
+            sql_files: List of SQL file paths to process
+            n_workers: Number of workers
+            rpm: Requests per minute limit
+            use_cache: Whether to use cached results
+            executor: Execution strategy ("process", "thread" or "async")
+
+        Returns:
+            Dictionary mapping file paths to their respective SQLProfile objects
+        """
+        if executor == "process":
+            logger.info("Routed extraction uses the thread executor")
+            executor = "thread"
+        return super()._process_files_in_parallel(
+            sql_files, n_workers, rpm, use_cache, executor=executor
+        )
+
+    def _finalize_results(
+        self,
+        dependencies: dict[str, SQLProfile],
+        merge_sql_profiles: bool = False,
+        use_cache: bool = True,
+        clear_cache: bool = False,
+    ) -> SQLProfile | dict[str, SQLProfile]:
+        """Report the inputs, latency and cost of each tier and finalize results.
+
+        Args:
+            dependencies: Dictionary mapping file paths to SQLProfile objects
+            merge_sql_profiles: Whether to merge results into a single SQLProfile
+            use_cache: Whether cache was used
+            clear_cache: Whether to clear the cache
+
+        Returns:
+            Single SQLProfile or dictionary mapping file paths to SQLProfile objects
+        """
+        for tier, report in self.tier_report().items():
+            requests = report["requests"]
+            latency = requests["latency"]
+            cost = requests["cost"]
+            logger.info(
+                f"Routing {tier} ({report['model']}): {report['inputs']} inputs, "
+                f"{requests['requests']} requests"
+                + (f", p50 latency {latency['p50']:.2f}s" if latency else "")
+                + (f", cost ${cost['usd']:.4f}" if cost else "")
+            )
+        return super()._finalize_results(
+            dependencies, merge_sql_profiles, use_cache, clear_cache
+        )
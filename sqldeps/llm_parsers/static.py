@@ -0,0 +1,123 @@
+"""Static (offline) SQL parser implementation.
+
+This module provides an implementation of the BaseSQLExtractor that extracts
+SQL dependencies locally with `sqlparse`, without any network request.
+"""
+
+from pathlib import Path
+
+from loguru import logger
+
+from sqldeps.llm_parsers.base import BaseSQLExtractor
+from sqldeps.models import SQLProfile
+from sqldeps.rate_limiter import RateLimiter
+from sqldeps.retry import RetryPolicy
+from sqldeps.static_analysis import (
+    StatementAnalysis,
+    analyze_sql,
+    combine_statement_profiles,
+)
+
+
+class StaticExtractor(BaseSQLExtractor):
+    """Offline SQL dependency extractor based on static analysis.
+
+    Handles plain SELECT, INSERT, UPDATE, DELETE, CREATE TABLE/VIEW (including
+    CREATE TABLE AS), TRUNCATE and DROP statements following the conventions
+    of the default prompt. Statements that cannot be fully resolved (dynamic
+    SQL, function bodies, ambiguous columns, ...) contribute a best-effort
+    profile and are listed in `last_analysis`.
+
+    Attributes:
+        last_analysis: Per-statement analysis of the last extracted query
+    """
+
+    def __init__(
+        self,
+        model: str = "sqlparse",
+        params: dict | None = None,
+        api_key: str | None = None,
+        prompt_path: Path | None = None,
+        **kwargs: object,
+    ) -> None:
+        """Initialize static extractor.
+
+        Args:
+            model: Name of the analyzer (only "sqlparse" is available)
+            params: Unused, accepted for interface compatibility
+            api_key: Unused, accepted for interface compatibility
+            prompt_path: Unused, accepted for interface compatibility
+            **kwargs: Extraction options passed to BaseSQLExtractor
+        """
+        super().__init__(model, params, prompt_path=prompt_path, **kwargs)
+        self.last_analysis: list[StatementAnalysis] = []
+
+    def _extract_single(self, sql: str) -> SQLProfile:
+        """Extract dependencies from a SQL query with static analysis.
+
+        Args:
+            sql: SQL query string to analyze
+
+        Returns:
+            SQLProfile object containing dependencies and outputs
+        """
+        analysis = analyze_sql(sql)
+        self.last_analysis = analysis
+
+        unresolved = [a for a in analysis if not a.resolved]
+        if unresolved:
+            reasons = sorted({reason for a in unresolved for reason in a.reasons})
+            logger.debug(
+                f"{len(unresolved)}/{len(analysis)} statements not fully resolved: "
+                f"{', '.join(reasons)}"
+            )
+
+        temp_tables = set().union(*(a.temp_tables for a in analysis))
+        profile = combine_statement_profiles([a.profile for a in analysis], temp_tables)
+        profile.model = self.model
+        return profile
+
+    async def _aextract_single(self, sql: str) -> SQLProfile:
+        """Asynchronous version of `_extract_single` (runs synchronously).
+
+        Args:
+            sql: SQL query string to analyze
+
+        Returns:
+            SQLProfile object containing dependencies and outputs
+        """
+        return self._extract_single(sql)
+
+    def _needs_chunking(self, sql: str) -> bool:
+        """Static analysis is already statement-level, so never chunk."""
+        return False
+
+    def _prepare_sql(self, sql: str) -> str:
+        """Keep the SQL as is (formatting would change identifier case)."""
+        return sql
+
+    def _extract_batch(
+        self,
+        batch: dict[str, str],
+        rate_limiter: RateLimiter | None = None,
+        retry_policy: RetryPolicy | None = None,
+    ) -> dict[str, SQLProfile]:
+        """Extract dependencies for each query of a batch locally.
+
+        Args:
+            batch: Dictionary mapping query keys to SQL
+            rate_limiter: Unused, no request is sent
+            retry_policy: Unused, no request is sent
+
+        Returns:
+            Dictionary mapping query keys to SQLProfile objects
+        """
+        return {key: self._extract_single(sql) for key, sql in batch.items()}
+
+    def _query_llm(self, prompt: str) -> str:
+        """Not available: the static extractor does not query any LLM.
+
+        Raises:
+            NotImplementedError: Always
+        """
+        raise NotImplementedError("StaticExtractor does not query an LLM")
@@ -4,9 +4,12 @@ This module defines the core data structures used by SQLDeps for
 representing SQL dependencies and outputs.
 """
 
-from dataclasses import dataclass
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
 
-import pandas as pd
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 @dataclass
@@ -19,6 +22,9 @@ class SQLProfile:
     # Outputs (tables/columns created or modified by the query)
     outputs: dict[str, list[str]]
 
+    # Model that produced the profile (comma-separated if several did)
+    model: str | None = field(default=None, compare=False)
+
     def __post_init__(self) -> None:
         """Sort tables and columns for consistent output."""
         self.dependencies = {
@@ -55,7 +61,21 @@ class SQLProfile:
         """
         return {"dependencies": self.dependencies, "outputs": self.outputs}
 
-    def to_dataframe(self) -> pd.DataFrame:
+    @staticmethod
+    def combined_model(profiles: Iterable["SQLProfile"]) -> str | None:
+        """Get the model tag of a profile merged from several profiles.
+
+        Args:
+            profiles: Profiles being merged
+
+        Returns:
+            Comma-separated sorted models of the profiles, or None if none of
+            them is tagged
+        """
+        models = sorted({p.model for p in profiles if p.model})
+        return ",".join(models) or None
+
+    def to_dataframe(self) -> "pd.DataFrame":
         """Convert to a DataFrame with type column indicating dependency or outcome.
 
         Returns:
@@ -109,4 +129,6 @@ class SQLProfile:
                     }
                 )
 
+        import pandas as pd
+
         return pd.DataFrame(records)
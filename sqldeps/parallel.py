@@ -1,35 +1,143 @@
 """Parallel processing utilities for SQL dependency extraction.
 
 This module provides functions for extracting SQL dependencies in parallel
-using multiple worker processes, with shared rate limiting.
+using multiple worker processes or threads, with shared rate limiting.
 """
 
-from concurrent.futures import ProcessPoolExecutor, as_completed
+import json
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from functools import partial
 from multiprocessing import Manager, cpu_count
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 import numpy as np
 from loguru import logger
-from tenacity import retry, stop_after_attempt, wait_exponential
+from tqdm import tqdm
 
-from sqldeps.cache import load_from_cache, save_to_cache
+from sqldeps.cache import flush_cache, load_from_cache, save_to_cache
 from sqldeps.models import SQLProfile
-from sqldeps.rate_limiter import MultiprocessingRateLimiter
+from sqldeps.rate_limiter import MultiprocessingRateLimiter, RateLimiter
+from sqldeps.retry import (
+    DEFAULT_RETRY_BUDGET,
+    MultiprocessingRetryBudget,
+    RetryPolicy,
+)
+from sqldeps.usage import RequestRecord, timed_queue_wait
 
+if TYPE_CHECKING:
+    from sqldeps.llm_parsers.base import BaseSQLExtractor
 
-def resolve_workers(n_workers: int) -> int:
-    """Resolve the number of worker processes to use.
+# Supported execution strategies for folder extraction
+EXECUTORS = ("process", "thread", "async")
+
+# Default number of concurrent requests for I/O-bound executors (thread/async)
+DEFAULT_CONCURRENCY = 32
+
+# Extractors of the current process by framework, model, prompt and options, so
+# that worker processes reuse their client (and its open connections) and
+# parsed prompts across files
+_extractors: dict[tuple, "BaseSQLExtractor"] = {}
+_extractors_lock = threading.Lock()
+
+
+def _get_extractor(
+    framework: str,
+    model: str | None,
+    prompt_path: Path | None = None,
+    extractor_options: dict | None = None,
+    params: dict | None = None,
+) -> "BaseSQLExtractor":
+    """Get the extractor of the current process, creating it if needed.
 
     Args:
-        n_workers: Requested number of workers (-1 for all, >0 for specific count)
+        framework: LLM framework to use
+        model: Model name within the framework
+        prompt_path: Optional path to custom prompt
+        extractor_options: Extraction options passed to the extractor
+        params: Parameters of the LLM API (None for the extractor defaults)
 
     Returns:
-        int: Actual number of worker processes to use
+        Extractor shared by all files processed by the current process
+    """
+    from sqldeps.llm_parsers import create_extractor
+
+    options = extractor_options or {}
+    key = (
+        framework,
+        model,
+        str(prompt_path) if prompt_path else None,
+        tuple(sorted(options.items())),
+        json.dumps(params, sort_keys=True, default=str),
+    )
+    with _extractors_lock:
+        if key not in _extractors:
+            _extractors[key] = create_extractor(
+                framework=framework,
+                model=model,
+                params=params,
+                prompt_path=prompt_path,
+                **options,
+            )
+        return _extractors[key]
+
+
+def _init_worker(
+    framework: str,
+    model: str | None,
+    prompt_path: Path | None = None,
+    extractor_options: dict | None = None,
+    params: dict | None = None,
+) -> None:
+    """Create the extractor of a worker process when the process starts.
+
+    Args:
+        framework: LLM framework to use
+        model: Model name within the framework
+        prompt_path: Optional path to custom prompt
+        extractor_options: Extraction options passed to the extractor
+        params: Parameters of the LLM API (None for the extractor defaults)
+    """
+    try:
+        _get_extractor(framework, model, prompt_path, extractor_options, params)
+    except Exception as e:
+        # Reported for each file, when the extractor is needed
+        logger.debug(f"Failed to create worker extractor: {e}")
+
+
+def resolve_workers(n_workers: int, executor: str = "process") -> int:
+    """Resolve the number of workers to use.
+
+    Process workers are capped at the number of CPUs. Thread and async workers
+    only wait on network I/O, so their count is independent of the CPU count.
+
+    Args:
+        n_workers: Requested number of workers (-1 for default, >0 for specific count)
+        executor: Execution strategy ("process", "thread" or "async")
+
+    Returns:
+        int: Actual number of workers to use
 
     Raises:
-        ValueError: If n_workers is invalid (not -1, or not between 1 and cpu_count)
+        ValueError: If the executor is unknown or n_workers is invalid (not -1,
+            or not between 1 and cpu_count for process workers)
     """
+    if executor not in EXECUTORS:
+        raise ValueError(
+            f"Unsupported executor: {executor}. Must be one of: {', '.join(EXECUTORS)}"
+        )
+
+    if executor != "process":
+        if n_workers == -1:
+            return DEFAULT_CONCURRENCY
+        if n_workers >= 1:
+            return n_workers
+        raise ValueError(
+            f"Invalid worker count: {n_workers}. "
+            "Must be -1 (default) or a positive integer."
+        )
+
     max_workers = cpu_count()
 
     if n_workers == -1:
@@ -50,6 +158,11 @@ def _extract_from_file(
     model: str,
     prompt_path: Path | None = None,
     use_cache: bool = True,
+    extractor_options: dict | None = None,
+    retry_budget: MultiprocessingRetryBudget | None = None,
+    request_records: list[RequestRecord] | None = None,
+    cache_namespace: str | None = None,
+    params: dict | None = None,
 ) -> tuple[Path, object]:
     """Process a single file with rate limiting and extraction.
 
@@ -60,38 +173,137 @@ def _extract_from_file(
         model: Model name within the framework
         prompt_path: Optional path to custom prompt
         use_cache: Whether to use cache
+        extractor_options: Extraction options passed to the extractor
+        retry_budget: Retry budget shared by all workers
+        request_records: Shared list collecting the records of LLM requests
+        cache_namespace: Cache namespace of the extraction configuration
+        params: Parameters of the LLM API (None for the extractor defaults)
 
     Returns:
         Tuple of (file_path, result) or (file_path, None) on failure
     """
-    from sqldeps.llm_parsers import create_extractor
-
     # Check cache if enabled
     if use_cache:
-        result = load_from_cache(file_path)
+        options = extractor_options or {}
+        result = load_from_cache(
+            file_path,
+            key=options.get("cache_key", "content"),
+            namespace=cache_namespace,
+            backend=options.get("cache_backend", "json"),
+        )
         if result:
             return file_path, result
 
     try:
-        # Create extractor
-        extractor = create_extractor(
-            framework=framework, model=model, prompt_path=prompt_path
+        # Reuse the extractor of the worker process
+        extractor = _get_extractor(
+            framework, model, prompt_path, extractor_options, params
         )
+        n_records = len(extractor.request_records)
+
+        try:
+            return file_path, _extract_with_retry(
+                file_path,
+                extractor,
+                rate_limiter,
+                extractor.create_retry_policy(retry_budget),
+                use_cache,
+                cache_namespace,
+            )
+        finally:
+            # Hand the records of this file over to the parent process
+            if request_records is not None:
+                request_records.extend(extractor.request_records[n_records:])
+                del extractor.request_records[n_records:]
+    except Exception as e:
+        logger.error(f"Failed to process {file_path}: {e}")
+        return file_path, None
+
+
+def _extract_with_retry(
+    file_path: Path,
+    extractor: "BaseSQLExtractor",
+    rate_limiter: RateLimiter | MultiprocessingRateLimiter,
+    retry_policy: RetryPolicy,
+    use_cache: bool = True,
+    cache_namespace: str | None = None,
+) -> SQLProfile:
+    """Extract dependencies from a file with rate limiting and retries.
+
+    Args:
+        file_path: Path to SQL file
+        extractor: Extractor instance to use
+        rate_limiter: Rate limiter shared by all workers
+        retry_policy: Retry policy of the run
+        use_cache: Whether to save the result to cache
+        cache_namespace: Cache namespace the result is saved under, the one
+            cached results are looked up in
 
-        # Apply rate limiting and extract with retry
-        @retry(stop=stop_after_attempt(3), wait=wait_exponential(min=2, max=10))
-        def extract_with_rate_limit() -> SQLProfile:
+    Returns:
+        SQLProfile extracted from the file
+    """
+
+    # Apply rate limiting to each attempt
+    def extract_with_rate_limit() -> SQLProfile:
+        with timed_queue_wait():
             rate_limiter.wait_if_needed()
-            logger.debug(f"Extracting from file: {file_path}")
-            return extractor.extract_from_file(file_path)
+        logger.debug(f"Extracting from file: {file_path}")
+        return extractor.extract_from_file(file_path)
+
+    result = retry_policy.call(extract_with_rate_limit)
+
+    # Save to cache if enabled
+    if use_cache:
+        save_to_cache(
+            result,
+            file_path,
+            key=extractor.cache_key,
+            namespace=cache_namespace,
+            backend=extractor.cache_backend,
+            compress=extractor.cache_compress,
+        )
 
-        result = extract_with_rate_limit()
+    return result
 
-        # Save to cache if enabled
-        if use_cache:
-            save_to_cache(result, file_path)
 
-        return file_path, result
+def _extract_from_file_shared(
+    file_path: Path,
+    extractor: "BaseSQLExtractor",
+    rate_limiter: RateLimiter,
+    retry_policy: RetryPolicy,
+    use_cache: bool = True,
+) -> tuple[Path, SQLProfile | None]:
+    """Process a single file with an extractor shared between threads.
+
+    Args:
+        file_path: Path to SQL file
+        extractor: Extractor instance shared by all threads
+        rate_limiter: Thread-safe rate limiter
+        retry_policy: Retry policy shared by all threads
+        use_cache: Whether to use cache
+
+    Returns:
+        Tuple of (file_path, result) or (file_path, None) on failure
+    """
+    if use_cache:
+        result = load_from_cache(
+            file_path,
+            key=extractor.cache_key,
+            namespace=extractor.cache_namespace,
+            backend=extractor.cache_backend,
+        )
+        if result:
+            return file_path, result
+
+    try:
+        return file_path, _extract_with_retry(
+            file_path,
+            extractor,
+            rate_limiter,
+            retry_policy,
+            use_cache,
+            extractor.cache_namespace,
+        )
     except Exception as e:
         logger.error(f"Failed to process {file_path}: {e}")
         return file_path, None
@@ -104,6 +316,11 @@ def _process_batch_files(
     model: str,
     prompt_path: Path | None = None,
     use_cache: bool = True,
+    extractor_options: dict | None = None,
+    retry_budget: MultiprocessingRetryBudget | None = None,
+    request_records: list[RequestRecord] | None = None,
+    cache_namespace: str | None = None,
+    params: dict | None = None,
 ) -> dict:
     """Process a batch of files with shared rate limiting.
 
@@ -114,6 +331,11 @@ def _process_batch_files(
         model: Model name
         prompt_path: Optional path to custom prompt
         use_cache: Whether to use cache
+        extractor_options: Extraction options passed to the extractor
+        retry_budget: Retry budget shared by all workers
+        request_records: Shared list collecting the records of LLM requests
+        cache_namespace: Cache namespace of the extraction configuration
+        params: Parameters of the LLM API (None for the extractor defaults)
 
     Returns:
         Dictionary mapping file paths to results
@@ -122,11 +344,25 @@ def _process_batch_files(
 
     for file_path in batch_files:
         path, result = _extract_from_file(
-            file_path, rate_limiter, framework, model, prompt_path, use_cache
+            file_path,
+            rate_limiter,
+            framework,
+            model,
+            prompt_path,
+            use_cache,
+            extractor_options,
+            retry_budget,
+            request_records,
+            cache_namespace,
+            params,
         )
         if result:
             results[str(path)] = result
 
+    # Worker processes exit without running exit handlers
+    if use_cache:
+        flush_cache()
+
     return results
 
 
@@ -138,6 +374,10 @@ def process_files_in_parallel(
     n_workers: int = 1,
     rpm: int = 100,
     use_cache: bool = True,
+    extractor_options: dict | None = None,
+    request_records: list[RequestRecord] | None = None,
+    cache_namespace: str | None = None,
+    params: dict | None = None,
 ) -> dict:
     """Extract SQL dependencies from SQL files in parallel with rate limiting.
 
@@ -149,6 +389,12 @@ def process_files_in_parallel(
         n_workers: Number of worker processes to use (-1 for all)
         rpm: Requests per minute limit across all workers
         use_cache: Whether to use cached results
+        extractor_options: Extraction options passed to each worker's extractor
+        request_records: List extended with the records of the LLM requests
+            made by all workers
+        cache_namespace: Cache namespace of the extraction configuration
+        params: Parameters of the LLM API passed to each worker's extractor
+            (None for the extractor defaults)
 
     Returns:
         Dictionary mapping file paths to SQLProfile objects
@@ -180,12 +426,26 @@ def process_files_in_parallel(
 
     all_results = {}
 
+    # Each worker extracts one file at a time, with up to `chunk_workers`
+    # concurrent requests for chunked files
+    extractor_options = dict(extractor_options or {})
+    if extractor_options.get("max_connections") is None:
+        extractor_options["max_connections"] = extractor_options.get("chunk_workers", 1)
+
     # Create shared rate limiter
     with Manager() as manager:
         rate_limiter = MultiprocessingRateLimiter(manager, rpm)
+        retry_budget = MultiprocessingRetryBudget(
+            manager, extractor_options.get("retry_budget", DEFAULT_RETRY_BUDGET)
+        )
+        shared_records = manager.list() if request_records is not None else None
 
         # Process batches in parallel
-        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        with ProcessPoolExecutor(
+            max_workers=n_workers,
+            initializer=_init_worker,
+            initargs=(framework, model, prompt_path, extractor_options, params),
+        ) as executor:
             process_func = partial(
                 _process_batch_files,
                 rate_limiter=rate_limiter,
@@ -193,6 +453,11 @@ def process_files_in_parallel(
                 model=model,
                 prompt_path=prompt_path,
                 use_cache=use_cache,
+                extractor_options=extractor_options,
+                retry_budget=retry_budget,
+                request_records=shared_records,
+                cache_namespace=cache_namespace,
+                params=params,
             )
 
             futures = {
@@ -212,6 +477,81 @@ def process_files_in_parallel(
                 except Exception as e:
                     logger.error(f"Batch {batch_idx + 1} failed: {e}")
 
+        if shared_records is not None:
+            request_records.extend(shared_records)
+
+    # If no results were extracted
+    if not all_results:
+        raise ValueError("No dependencies could be extracted from any SQL file")
+
+    return all_results
+
+
+def process_files_in_threads(
+    sql_files: list[Path],
+    extractor: "BaseSQLExtractor",
+    n_workers: int = -1,
+    rpm: int = 100,
+    use_cache: bool = True,
+) -> dict:
+    """Extract SQL dependencies from SQL files using a pool of threads.
+
+    All threads share a single extractor (and therefore a single HTTP client and
+    connection pool) and a thread-safe rate limiter. Since the work is I/O-bound,
+    the number of concurrent requests is not limited by the CPU count.
+
+    Args:
+        sql_files: List of Paths to SQL files to process
+        extractor: Extractor instance shared by all threads
+        n_workers: Number of concurrent requests (-1 for default)
+        rpm: Requests per minute limit across all threads
+        use_cache: Whether to use cached results
+
+    Returns:
+        Dictionary mapping file paths to SQLProfile objects
+
+    Raises:
+        ValueError: If no SQL files provided or no dependencies extracted
+    """
+    n_workers = resolve_workers(n_workers, executor="thread")
+    sql_files = [Path(f) for f in sql_files]
+
+    if not sql_files:
+        raise ValueError("No SQL files provided")
+
+    n_workers = min(n_workers, len(sql_files))
+
+    logger.info(f"Processing {len(sql_files)} SQL files")
+    logger.info(
+        f"Using {n_workers} threads with global rate limit of {rpm} requests per minute"
+    )
+    logger.info(f"Cache usage: {'enabled' if use_cache else 'disabled'}")
+
+    rate_limiter = RateLimiter(rpm)
+    retry_policy = extractor.create_retry_policy()
+    extractor.rate_limiter = rate_limiter
+    all_results = {}
+
+    with ThreadPoolExecutor(max_workers=n_workers) as executor:
+        futures = [
+            executor.submit(
+                _extract_from_file_shared,
+                file_path,
+                extractor,
+                rate_limiter,
+                retry_policy,
+                use_cache,
+            )
+            for file_path in sql_files
+        ]
+
+        for future in tqdm(
+            as_completed(futures), total=len(futures), desc="Processing SQL files"
+        ):
+            path, result = future.result()
+            if result:
+                all_results[str(path)] = result
+
     # If no results were extracted
     if not all_results:
         raise ValueError("No dependencies could be extracted from any SQL file")
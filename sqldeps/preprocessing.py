@@ -0,0 +1,400 @@
+"""SQL preprocessing before prompting.
+
+This module formats SQL before it is sent to the LLM, and reduces the number of
+input tokens without changing the meaning of the SQL, by removing content that
+only matters to human readers.
+"""
+
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterator
+
+from loguru import logger
+from sqlparse import engine, filters, formatter, lexer, tokens as ttypes
+from sqlparse.engine import grouping
+from sqlparse.exceptions import SQLParseError
+
+# Formatting modes: "off" sends SQL as is, "lite" only upper-cases keywords and
+# "full" also reindents the SQL
+FORMATTING_MODES = ("off", "lite", "full")
+
+# SQL larger than this (in bytes) is not reindented, since reindenting is slow
+FORMAT_MAX_BYTES = 200_000
+
+# Maximum CPU time spent formatting a single SQL query, in seconds
+FORMAT_TIMEOUT = 5.0
+
+# Number of lexed tokens between two checks of the formatting deadline
+FORMAT_CHECK_TOKENS = 1000
+
+# Number of formatted queries memoized by content hash
+FORMAT_CACHE_SIZE = 1024
+
+_format_cache: OrderedDict[str, str] = OrderedDict()
+_format_cache_lock = threading.Lock()
+
+# Tokens that never need surrounding whitespace
+_NO_SPACE_AFTER = frozenset({"(", ","})
+_NO_SPACE_BEFORE = frozenset({")", ",", ";"})
+
+# Dollar-quoted string, e.g. a function body: $tag$ ... $tag$
+_DOLLAR_QUOTED = re.compile(r"(\$\w*\$)(.*)\1", re.DOTALL)
+
+
+def compact_sql(sql: str) -> str:
+    """Strip comments and collapse whitespace in a SQL script.
+
+    Comments are removed (optimizer hints such as `/*+ ... */` are kept),
+    whitespace runs are collapsed into a single space (a newline between
+    statements), and spaces next to parentheses, commas and semicolons are
+    dropped. Dollar-quoted bodies, such as function bodies, are compacted
+    recursively; string literals are left untouched.
+
+    Args:
+        sql: SQL script
+
+    Returns:
+        Compacted SQL script
+    """
+    parts: list[str] = []
+    pending_space = False
+
+    for ttype, value in lexer.tokenize(sql):
+        if ttype in ttypes.Comment and ttype not in ttypes.Comment.Multiline.Hint:
+            pending_space = True
+            continue
+        if ttype in ttypes.Whitespace or ttype in ttypes.Newline:
+            pending_space = True
+            continue
+        if ttype is ttypes.Literal and (match := _DOLLAR_QUOTED.fullmatch(value)):
+            tag, body = match.groups()
+            value = f"{tag}{compact_sql(body)}{tag}"
+
+        if parts and pending_space:
+            previous = parts[-1]
+            if previous == ";":
+                parts.append("\n")
+            elif previous not in _NO_SPACE_AFTER and value not in _NO_SPACE_BEFORE:
+                parts.append(" ")
+        pending_space = False
+        parts.append(value)
+
+    return "".join(parts)
+
+
+def canonicalize_sql(sql: str, normalize_literals: bool = False) -> str:
+    """Reduce a SQL script to a canonical token stream.
+
+    Comments are dropped, tokens are separated by a single space whatever the
+    original whitespace, and keywords and built-in type names are upper-cased,
+    so that cosmetic edits (reformatting, comment or keyword case changes) do
+    not change the result. Identifiers and string literals keep their case.
+    Dollar-quoted bodies are canonicalized recursively.
+
+    Args:
+        sql: SQL script
+        normalize_literals: Replace string and numeric literals with `?`, so
+            that scripts differing only by constants have the same result.
+            Table names built from strings in dynamic SQL are lost.
+
+    Returns:
+        Canonical SQL script
+    """
+    parts: list[str] = []
+
+    for ttype, value in lexer.tokenize(sql):
+        if _is_blank(ttype):
+            continue
+        if ttype in ttypes.Keyword or ttype in ttypes.Name.Builtin:
+            value = value.upper()
+        elif ttype is ttypes.Literal and (match := _DOLLAR_QUOTED.fullmatch(value)):
+            tag, body = match.groups()
+            value = f"{tag} {canonicalize_sql(body, normalize_literals)} {tag}"
+        elif normalize_literals and (
+            ttype in ttypes.String.Single or ttype in ttypes.Number
+        ):
+            value = "?"
+        parts.append(value)
+
+    return " ".join(parts)
+
+
+# Literal lists longer than this are elided
+ELIDE_MIN_ITEMS = 10
+
+# Number of rows (or list items) kept as examples when eliding
+ELIDE_KEEP_ITEMS = 2
+
+# Keywords allowed in literal rows
+_LITERAL_KEYWORDS = frozenset({"NULL", "TRUE", "FALSE", "DEFAULT"})
+
+
+def _is_blank(ttype: object) -> bool:
+    """Check whether a token type is whitespace or a comment."""
+    return ttype in ttypes.Whitespace or ttype in ttypes.Comment
+
+
+def _skip_blanks(tokens: list[tuple], i: int) -> int:
+    """Return the index of the first non-blank token at or after i."""
+    while i < len(tokens) and _is_blank(tokens[i][0]):
+        i += 1
+    return i
+
+
+def _literal_tuple(tokens: list[tuple], i: int) -> tuple[int, list[int]] | None:
+    """Match a parenthesized list of literals starting at i.
+
+    Args:
+        tokens: Lexer tokens as (ttype, value) pairs
+        i: Index of the opening parenthesis
+
+    Returns:
+        Tuple of (index after the closing parenthesis, indices of the top-level
+        commas), or None if the tokens at i are not a list of literals
+    """
+    if i >= len(tokens) or tokens[i][1] != "(":
+        return None
+
+    commas = []
+    for j in range(i + 1, len(tokens)):
+        ttype, value = tokens[j]
+        if value == ")":
+            return j + 1, commas
+        if value == ",":
+            commas.append(j)
+        elif not (
+            _is_blank(ttype)
+            or ttype in ttypes.Literal
+            or ttype in ttypes.Name.Builtin
+            or value in ("::", "-", "+")
+            or (ttype in ttypes.Keyword and value.upper() in _LITERAL_KEYWORDS)
+        ):
+            return None
+    return None
+
+
+def elide_literals(sql: str, min_items: int = ELIDE_MIN_ITEMS) -> str:
+    """Replace bulk literal payloads with a short placeholder comment.
+
+    `VALUES` clauses with at least `min_items` literal rows and `IN` lists with
+    at least `min_items` literal values keep their first rows (or values) as
+    examples, followed by a comment such as `/* 998 more rows */`. Rows or
+    lists containing anything but literals (columns, function calls,
+    subqueries) are kept, so the statement structure is unchanged.
+
+    Args:
+        sql: SQL script
+        min_items: Minimum number of rows or values for a list to be elided
+
+    Returns:
+        SQL script with bulk literals elided
+    """
+    min_items = max(min_items, ELIDE_KEEP_ITEMS + 1)
+    tokens = list(lexer.tokenize(sql))
+    parts: list[str] = []
+    i = 0
+
+    while i < len(tokens):
+        ttype, value = tokens[i]
+        keyword = value.upper() if ttype in ttypes.Keyword else None
+
+        if keyword == "VALUES":
+            # Consecutive literal rows separated by commas
+            row_ends = []
+            j = _skip_blanks(tokens, i + 1)
+            while (match := _literal_tuple(tokens, j)) is not None:
+                row_ends.append(match[0])
+                k = _skip_blanks(tokens, match[0])
+                if k >= len(tokens) or tokens[k][1] != ",":
+                    break
+                j = _skip_blanks(tokens, k + 1)
+
+            if len(row_ends) >= min_items:
+                kept_end = row_ends[ELIDE_KEEP_ITEMS - 1]
+                parts.extend(v for _, v in tokens[i:kept_end])
+                parts.append(f" /* {len(row_ends) - ELIDE_KEEP_ITEMS} more rows */")
+                i = row_ends[-1]
+                continue
+
+        elif keyword == "IN":
+            j = _skip_blanks(tokens, i + 1)
+            match = _literal_tuple(tokens, j)
+            if match is not None and len(match[1]) + 1 >= min_items:
+                end, commas = match
+                kept_end = commas[ELIDE_KEEP_ITEMS - 1]
+                parts.extend(v for _, v in tokens[i:kept_end])
+                n_elided = len(commas) + 1 - ELIDE_KEEP_ITEMS
+                parts.append(f" /* {n_elided} more values */)")
+                i = end
+                continue
+
+        parts.append(value)
+        i += 1
+
+    return "".join(parts)
+
+
+# Passes of `sqlparse.engine.grouping.group`, in order, run one at a time so
+# that the formatting deadline is checked between them
+_GROUPING_PASSES = tuple(
+    getattr(grouping, name) for name in grouping.group.__code__.co_names
+)
+
+
+class _FormatTimeoutError(Exception):
+    """Raised when formatting exceeds its deadline."""
+
+
+class _DeadlineFilter:
+    """Token stream filter aborting formatting past a thread CPU time deadline."""
+
+    def __init__(self, deadline: float) -> None:
+        self.deadline = deadline
+
+    def check(self) -> None:
+        """Raise if the deadline has passed.
+
+        Raises:
+            _FormatTimeoutError: If the deadline has passed
+        """
+        if time.thread_time() > self.deadline:
+            raise _FormatTimeoutError
+
+    def process(self, stream: Iterator[tuple]) -> Iterator[tuple]:
+        """Pass tokens through, checking the deadline periodically."""
+        for i, token in enumerate(stream):
+            if i % FORMAT_CHECK_TOKENS == 0:
+                self.check()
+            yield token
+
+
+def _format(sql: str, mode: str, timeout: float | None = None) -> str:
+    """Format SQL with sqlparse according to the formatting mode.
+
+    The deadline is checked against the CPU time of the calling thread, so
+    that neither waiting for other threads nor a slow machine under load
+    counts against it. It is checked while lexing, between the grouping passes
+    of each statement and between statements: a single pass over a very large
+    statement may overrun it.
+
+    Args:
+        sql: SQL query
+        mode: Formatting mode ("lite" or "full")
+        timeout: Maximum CPU time in seconds (None for no limit)
+
+    Returns:
+        Formatted SQL query
+
+    Raises:
+        _FormatTimeoutError: If formatting takes longer than the timeout
+        SQLParseError: If sqlparse cannot format the SQL
+    """
+    options = {"keyword_case": "upper"}
+    if mode == "full":
+        options["reindent"] = True
+    stack = formatter.build_filter_stack(
+        engine.FilterStack(), formatter.validate_options(options)
+    )
+    stack.postprocess.append(filters.SerializerUnicode())
+    if timeout is None:
+        return "".join(stack.run(sql))
+
+    # Run the filter stack with checked grouping passes (see FilterStack.run)
+    deadline = _DeadlineFilter(time.thread_time() + timeout)
+    stream = deadline.process(lexer.tokenize(sql))
+    for filter_ in stack.preprocess:
+        stream = filter_.process(stream)
+    parts = []
+    try:
+        for statement in engine.StatementSplitter().process(stream):
+            if mode == "full":
+                for group_pass in _GROUPING_PASSES:
+                    deadline.check()
+                    group_pass(statement)
+            deadline.check()
+            for filter_ in stack.stmtprocess:
+                filter_.process(statement)
+            for filter_ in stack.postprocess:
+                statement = filter_.process(statement)
+            parts.append(statement)
+    except RecursionError as e:
+        raise SQLParseError("Maximum recursion depth exceeded") from e
+    return "".join(parts)
+
+
+def format_sql(
+    sql: str,
+    mode: str = "full",
+    max_bytes: int | None = FORMAT_MAX_BYTES,
+    timeout: float | None = FORMAT_TIMEOUT,
+) -> str:
+    """Format SQL before prompting, bounded in size and time.
+
+    Queries larger than `max_bytes` are formatted in "lite" mode instead of
+    being reindented. SQL that sqlparse cannot reindent (e.g. statements above
+    its token limit) is formatted in "lite" mode, or sent unformatted if that
+    fails too. Formatting runs in the calling thread and is abandoned once it
+    used `timeout` seconds of CPU time, the SQL being returned unformatted;
+    the deadline is checked between formatting steps, which may overrun it
+    on very large statements.
+    Results are memoized by content hash, so retries and reruns do not format
+    the same SQL twice; timed out formatting is not memoized.
+
+    Args:
+        sql: SQL query
+        mode: Formatting mode ("off", "lite" or "full")
+        max_bytes: Maximum size in bytes of reindented SQL (None for no limit)
+        timeout: Maximum formatting CPU time in seconds (None for no limit)
+
+    Returns:
+        Formatted SQL query
+
+    Raises:
+        ValueError: If the formatting mode is not supported
+    """
+    if mode not in FORMATTING_MODES:
+        raise ValueError(
+            f"Unsupported formatting mode: {mode}. "
+            f"Must be one of: {', '.join(FORMATTING_MODES)}"
+        )
+    if mode == "off":
+        return sql
+
+    size = len(sql.encode())
+    if mode == "full" and max_bytes is not None and size > max_bytes:
+        logger.debug(f"Skipping reindent of {size} bytes of SQL (> {max_bytes})")
+        mode = "lite"
+
+    key = f"{mode}:{hashlib.sha256(sql.encode()).hexdigest()}"
+    with _format_cache_lock:
+        if key in _format_cache:
+            _format_cache.move_to_end(key)
+            return _format_cache[key]
+
+    try:
+        try:
+            formatted = _format(sql, mode, timeout)
+        except SQLParseError as e:
+            if mode != "full":
+                raise
+            logger.warning(f"Cannot reindent {size} bytes of SQL ({e}), using lite")
+            formatted = _format(sql, "lite", timeout)
+    except SQLParseError as e:
+        logger.warning(f"Cannot format {size} bytes of SQL ({e}), sending it as is")
+        formatted = sql
+    except _FormatTimeoutError:
+        logger.warning(
+            f"Formatting {size} bytes of SQL timed out after {timeout}s, "
+            "sending it unformatted"
+        )
+        return sql
+
+    with _format_cache_lock:
+        _format_cache[key] = formatted
+        while len(_format_cache) > FORMAT_CACHE_SIZE:
+            _format_cache.popitem(last=False)
+
+    return formatted
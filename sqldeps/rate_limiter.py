@@ -1,9 +1,11 @@
 """Rate limiting utilities for API calls.
 
 This module provides classes for limiting the rate of API calls to stay
-within provider limits, in both single-process and multi-process contexts.
+within provider limits, in single-process, multi-process and asyncio contexts.
 """
 
+import asyncio
+import threading
 import time
 from collections import deque
 from multiprocessing.managers import SyncManager
@@ -16,11 +18,13 @@ class RateLimiter:
 
     Tracks API call timestamps and enforces waiting periods
     to respect the specified requests per minute (RPM) limit.
+    Safe to share between threads of the same process.
 
     Attributes:
         rpm: Maximum requests per minute allowed
         call_times: Deque storing timestamps of recent API calls
         window: Time window in seconds (default: 60 seconds = 1 minute)
+        lock: Lock serializing access to the call history across threads
     """
 
     def __init__(self, rpm: int) -> None:
@@ -32,6 +36,7 @@ class RateLimiter:
         self.rpm = rpm
         self.call_times = deque()
         self.window = 60  # 60 seconds =  1 minute window
+        self.lock = threading.Lock()
 
     def wait_if_needed(self) -> None:
         """Ensures that calls do not exceed the rate limit.
@@ -41,28 +46,137 @@ class RateLimiter:
         if self.rpm <= 0:  # Disable rate limiting if rpm is 0
             return
 
-        now = time.time()
+        with self.lock:
+            now = time.time()
+
+            # Remove timestamps older than our time window (60 seconds)
+            cutoff = now - self.window
+            while self.call_times and self.call_times[0] < cutoff:
+                self.call_times.popleft()
+
+            # If we've reached the RPM limit, wait until the oldest timestamp expires
+            if len(self.call_times) >= self.rpm:
+                wait_time = max(0, self.call_times[0] + self.window - now)
+                if wait_time > 0:
+                    logger.debug(f"Rate limit reached. Waiting {wait_time:.2f} seconds")
+                    time.sleep(wait_time)
+
+                    # After waiting, recalculate current time and clean up again
+                    now = time.time()
+                    cutoff = now - self.window
+                    while self.call_times and self.call_times[0] < cutoff:
+                        self.call_times.popleft()
+
+            # Record this API call's timestamp
+            self.call_times.append(now)
+
+    def try_acquire(self) -> bool:
+        """Record a call only if it fits the rate limit right away, without waiting.
+
+        Used for optional requests (such as hedged requests) that should
+        consume the budget but never delay other calls.
+
+        Returns:
+            True if the call was recorded, False if the limit is reached
+        """
+        if self.rpm <= 0:
+            return True
+
+        # Another call waiting for a slot means that the limit is reached
+        if not self.lock.acquire(blocking=False):
+            return False
+        try:
+            now = time.time()
+            cutoff = now - self.window
+            while self.call_times and self.call_times[0] < cutoff:
+                self.call_times.popleft()
+
+            if len(self.call_times) >= self.rpm:
+                return False
+            self.call_times.append(now)
+            return True
+        finally:
+            self.lock.release()
+
+
+class AsyncRateLimiter:
+    """Rate limiter for coroutines sharing a single event loop.
+
+    Same sliding-window logic as `RateLimiter`, but waits with `asyncio.sleep`
+    so that other in-flight requests keep making progress.
+
+    Attributes:
+        rpm: Maximum requests per minute allowed
+        call_times: Deque storing timestamps of recent API calls
+        window: Time window in seconds (default: 60 seconds = 1 minute)
+        lock: Lock serializing access to the call history
+    """
 
-        # Remove timestamps older than our time window (60 seconds)
+    def __init__(self, rpm: int) -> None:
+        """Initialize the rate limiter with an RPM limit.
+
+        Args:
+            rpm: Maximum number of API requests allowed per minute
+        """
+        self.rpm = rpm
+        self.call_times = deque()
+        self.window = 60
+        self.lock = asyncio.Lock()
+
+    async def wait_if_needed(self) -> None:
+        """Ensures that calls do not exceed the rate limit.
+
+        If the limit is reached, it waits until a slot is available.
+        """
+        if self.rpm <= 0:
+            return
+
+        async with self.lock:
+            now = time.time()
+
+            # Remove timestamps older than our time window
+            cutoff = now - self.window
+            while self.call_times and self.call_times[0] < cutoff:
+                self.call_times.popleft()
+
+            # If we've reached the RPM limit, wait until the oldest timestamp expires
+            if len(self.call_times) >= self.rpm:
+                wait_time = max(0, self.call_times[0] + self.window - now)
+                if wait_time > 0:
+                    logger.debug(f"Rate limit reached. Waiting {wait_time:.2f} seconds")
+                    await asyncio.sleep(wait_time)
+
+                    # After waiting, recalculate current time and clean up again
+                    now = time.time()
+                    cutoff = now - self.window
+                    while self.call_times and self.call_times[0] < cutoff:
+                        self.call_times.popleft()
+
+            # Record this API call's timestamp
+            self.call_times.append(now)
+
+    def try_acquire(self) -> bool:
+        """Record a call only if it fits the rate limit right away, without waiting.
+
+        Returns:
+            True if the call was recorded, False if the limit is reached
+        """
+        if self.rpm <= 0:
+            return True
+
+        # Another coroutine waiting for a slot means that the limit is reached
+        if self.lock.locked():
+            return False
+
+        now = time.time()
         cutoff = now - self.window
         while self.call_times and self.call_times[0] < cutoff:
             self.call_times.popleft()
 
-        # If we've reached the RPM limit, wait until the oldest timestamp expires
         if len(self.call_times) >= self.rpm:
-            wait_time = max(0, self.call_times[0] + self.window - now)
-            if wait_time > 0:
-                logger.debug(f"Rate limit reached. Waiting {wait_time:.2f} seconds")
-                time.sleep(wait_time)
-
-                # After waiting, recalculate current time and clean up again
-                now = time.time()
-                cutoff = now - self.window
-                while self.call_times and self.call_times[0] < cutoff:
-                    self.call_times.popleft()
-
-        # Record this API call's timestamp
+            return False
         self.call_times.append(now)
+        return True
 
 
 class MultiprocessingRateLimiter:
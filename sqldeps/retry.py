@@ -0,0 +1,364 @@
+"""Retry utilities for LLM API calls.
+
+This module classifies errors raised while querying LLM providers, and retries
+only those that may succeed on a later attempt, with jittered exponential
+backoff, provider `Retry-After` and rate limit reset headers, and a retry
+budget shared by a whole extraction run.
+"""
+
+import asyncio
+import random
+import re
+import threading
+import time
+from collections.abc import Awaitable, Callable
+from contextvars import ContextVar
+from email.utils import parsedate_to_datetime
+from multiprocessing.managers import SyncManager
+from typing import TypeVar
+
+from loguru import logger
+
+T = TypeVar("T")
+
+# Error kinds
+RATE_LIMIT = "rate_limit"
+NETWORK = "network"
+SERVER = "server"
+BAD_OUTPUT = "bad_output"
+FATAL = "fatal"
+
+# Error kinds worth retrying
+RETRYABLE = (RATE_LIMIT, NETWORK, SERVER, BAD_OUTPUT)
+
+# Default maximum number of retries across all requests of an extraction run
+DEFAULT_RETRY_BUDGET = 100
+
+# Number of the attempt in progress in the current thread or task
+_attempt: ContextVar[int] = ContextVar("retry_attempt", default=0)
+
+# Response headers giving the time to wait before retrying, by priority
+_RESET_HEADERS = (
+    "x-ratelimit-reset-requests",
+    "x-ratelimit-reset-tokens",
+    "x-ratelimit-reset",
+)
+
+# Durations such as "1s", "6m0s" or "250ms" used by rate limit reset headers
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATIONS = re.compile(r"(?:\d+(?:\.\d+)?(?:ms|s|m|h))+")
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def current_attempt() -> int:
+    """Get the number of the attempt in progress.
+
+    Returns:
+        0 for the first call made by a retry policy, then 1 for its first retry
+        and so on (0 outside of retry policies)
+    """
+    return _attempt.get()
+
+
+def _status_code(error: BaseException) -> int | None:
+    """Get the HTTP status code of a provider error, if any."""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def classify_error(error: BaseException) -> str:
+    """Classify an error raised while extracting dependencies.
+
+    Args:
+        error: Exception raised by the provider client or the response parser
+
+    Returns:
+        Error kind: RATE_LIMIT, NETWORK, SERVER, BAD_OUTPUT or FATAL
+    """
+    status = _status_code(error)
+    if status is not None:
+        if status == 429:
+            return RATE_LIMIT
+        if status == 408:
+            return NETWORK
+        if status >= 500:
+            return SERVER
+        # Authentication, permission, invalid request, context length, ...
+        return FATAL
+
+    # Provider clients raise their own connection and timeout errors
+    names = {cls.__name__ for cls in type(error).__mro__}
+    if isinstance(error, TimeoutError | ConnectionError) or any(
+        "Timeout" in name or "Connection" in name for name in names
+    ):
+        return NETWORK
+    if "RateLimitError" in names:
+        return RATE_LIMIT
+
+    # Unparseable or incomplete responses (including validation errors)
+    if isinstance(error, ValueError):
+        return BAD_OUTPUT
+    return FATAL
+
+
+def _parse_delay(value: str) -> float | None:
+    """Parse a delay header value into seconds.
+
+    Args:
+        value: Seconds ("2.5"), epoch timestamp, duration ("6m0s") or HTTP date
+
+    Returns:
+        Delay in seconds, or None if the value cannot be parsed
+    """
+    value = value.strip()
+    try:
+        seconds = float(value)
+    except ValueError:
+        pass
+    else:
+        # Large values are epoch timestamps rather than delays
+        return seconds - time.time() if seconds > 1e9 else seconds
+
+    if _DURATIONS.fullmatch(value):
+        return sum(
+            float(amount) * _DURATION_UNITS[unit]
+            for amount, unit in _DURATION.findall(value)
+        )
+
+    try:
+        return parsedate_to_datetime(value).timestamp() - time.time()
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_after(error: BaseException) -> float | None:
+    """Get the delay requested by the provider before retrying.
+
+    Honors `Retry-After` (in seconds or as an HTTP date), `retry-after-ms` and
+    the `x-ratelimit-reset-*` headers of the error response.
+
+    Args:
+        error: Exception raised by the provider client
+
+    Returns:
+        Delay in seconds, or None if the response does not specify one
+    """
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if headers is None:
+        headers = getattr(error, "headers", None)
+    if not headers:
+        return None
+
+    headers = {str(k).lower(): str(v) for k, v in dict(headers).items()}
+    if "retry-after-ms" in headers:
+        delay = _parse_delay(headers["retry-after-ms"])
+        if delay is not None:
+            return max(delay / 1000, 0.0)
+    for name in ("retry-after", *_RESET_HEADERS):
+        if name in headers:
+            delay = _parse_delay(headers[name])
+            if delay is not None:
+                return max(delay, 0.0)
+    return None
+
+
+class RetryBudget:
+    """Maximum number of retries shared by all requests of an extraction run.
+
+    Safe to share between threads of the same process.
+
+    Attributes:
+        budget: Maximum number of retries (None for no limit)
+        used: Number of retries spent so far
+        lock: Lock serializing access to the counter across threads
+    """
+
+    def __init__(self, budget: int | None) -> None:
+        """Initialize the budget.
+
+        Args:
+            budget: Maximum number of retries (None for no limit)
+        """
+        self.budget = budget
+        self.used = 0
+        self.lock = threading.Lock()
+
+    def acquire(self) -> bool:
+        """Spend one retry from the budget.
+
+        Returns:
+            True if a retry was available
+        """
+        with self.lock:
+            if self.budget is not None and self.used >= self.budget:
+                return False
+            self.used += 1
+            return True
+
+
+class MultiprocessingRetryBudget:
+    """A retry budget shared between processes.
+
+    Uses a manager to share the counter between processes, so that all
+    processes collectively respect the budget.
+
+    Attributes:
+        budget: Maximum number of retries (None for no limit)
+        used: A shared counter of retries spent so far
+        lock: A shared lock for process-safe operations
+    """
+
+    def __init__(self, manager: SyncManager, budget: int | None) -> None:
+        """Initialize with a multiprocessing manager and a budget.
+
+        Args:
+            manager: A multiprocessing.Manager instance
+            budget: Maximum number of retries (None for no limit)
+        """
+        self.budget = budget
+        self.used = manager.Value("i", 0)
+        self.lock = manager.Lock()
+
+    def acquire(self) -> bool:
+        """Spend one retry from the budget.
+
+        Returns:
+            True if a retry was available
+        """
+        with self.lock:
+            if self.budget is not None and self.used.value >= self.budget:
+                return False
+            self.used.value += 1
+            return True
+
+
+class RetryPolicy:
+    """Retry policy based on the kind of error.
+
+    Fatal errors (authentication, invalid requests, ...) are never retried.
+    Rate limit, network and server errors are retried with full-jitter
+    exponential backoff, or after the delay requested by the provider.
+    Unusable responses are retried immediately.
+
+    Attributes:
+        max_retries: Maximum number of retries of a single call
+        base_delay: Backoff delay of the first retry, in seconds
+        max_delay: Maximum backoff delay, in seconds
+        budget: Retry budget shared by all calls of the run
+        retryable: Error kinds that are retried
+        stats: Number of retries by error kind
+    """
+
+    def __init__(
+        self,
+        max_retries: int = 2,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        budget: RetryBudget | MultiprocessingRetryBudget | None = None,
+        retryable: tuple[str, ...] = RETRYABLE,
+        stats: dict[str, int] | None = None,
+    ) -> None:
+        """Initialize the retry policy.
+
+        Args:
+            max_retries: Maximum number of retries of a single call
+            base_delay: Backoff delay of the first retry, in seconds
+            max_delay: Maximum backoff delay, in seconds
+            budget: Retry budget shared by all calls of the run (no limit if
+                None)
+            retryable: Error kinds that are retried
+            stats: Dictionary in which retries are counted by error kind
+                (defaults to a new dictionary)
+        """
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget or RetryBudget(None)
+        self.retryable = retryable
+        self.stats = stats if stats is not None else dict.fromkeys(retryable, 0)
+        self._lock = threading.Lock()
+
+    def delay(self, error: BaseException, attempt: int) -> float | None:
+        """Get the delay before retrying a failed call.
+
+        Args:
+            error: Exception raised by the call
+            attempt: Number of the failed attempt (0 for the first call)
+
+        Returns:
+            Delay in seconds, or None if the call must not be retried
+        """
+        kind = classify_error(error)
+        if kind not in self.retryable or attempt >= self.max_retries:
+            return None
+        if not self.budget.acquire():
+            logger.warning("Retry budget exhausted, not retrying")
+            return None
+
+        with self._lock:
+            self.stats[kind] = self.stats.get(kind, 0) + 1
+
+        if kind == BAD_OUTPUT:
+            delay = 0.0
+        else:
+            requested = retry_after(error)
+            backoff = min(self.max_delay, self.base_delay * 2**attempt)
+            delay = (
+                requested * random.uniform(1.0, 1.1)
+                if requested is not None
+                else random.uniform(0, backoff)
+            )
+
+        logger.debug(
+            f"Retrying after {kind} error in {delay:.2f}s "
+            f"(attempt {attempt + 1}/{self.max_retries}): {error}"
+        )
+        return delay
+
+    def call(self, func: Callable[[], T]) -> T:
+        """Call a function, retrying it according to the policy.
+
+        Args:
+            func: Function to call, without arguments
+
+        Returns:
+            Result of the function
+        """
+        attempt = 0
+        while True:
+            token = _attempt.set(attempt)
+            try:
+                return func()
+            except Exception as e:
+                delay = self.delay(e, attempt)
+                if delay is None:
+                    raise
+            finally:
+                _attempt.reset(token)
+            time.sleep(delay)
+            attempt += 1
+
+    async def acall(self, func: Callable[[], Awaitable[T]]) -> T:
+        """Asynchronous version of `call`.
+
+        Args:
+            func: Coroutine function to call, without arguments
+
+        Returns:
+            Result of the coroutine
+        """
+        attempt = 0
+        while True:
+            token = _attempt.set(attempt)
+            try:
+                return await func()
+            except Exception as e:
+                delay = self.delay(e, attempt)
+                if delay is None:
+                    raise
+            finally:
+                _attempt.reset(token)
+            await asyncio.sleep(delay)
+            attempt += 1
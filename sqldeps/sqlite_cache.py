@@ -0,0 +1,320 @@
+"""SQLite store of cached extraction results.
+
+This module keeps the cached results of a cache directory in a single SQLite
+database in write-ahead logging mode, instead of one JSON file per result.
+Lookups go through the primary key index, workers of several threads or
+processes upsert results atomically, and writes are buffered and committed in
+batches, optionally compressed with zlib.
+"""
+
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+
+from loguru import logger
+
+# Database file within the cache directory
+DB_NAME = "cache.sqlite"
+
+# Number of buffered results, and seconds since the oldest one, that trigger
+# a commit
+WRITE_BATCH_SIZE = 64
+WRITE_FLUSH_INTERVAL = 1.0
+
+# Seconds a connection waits for the write lock held by another worker
+BUSY_TIMEOUT = 30.0
+
+# zlib compression level of compressed results
+COMPRESSION_LEVEL = 6
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    data BLOB NOT NULL,
+    compressed INTEGER NOT NULL,
+    updated REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+) WITHOUT ROWID
+"""
+
+_UPSERT = """
+INSERT INTO results (namespace, key, data, compressed, updated)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (namespace, key) DO UPDATE SET
+    data = excluded.data,
+    compressed = excluded.compressed,
+    updated = excluded.updated
+"""
+
+
+class SQLiteCache:
+    """Cached results of a cache directory in a single SQLite database.
+
+    Results are JSON objects keyed by configuration namespace and cache name.
+    Each thread of each process uses its own connection. Writes are buffered
+    per process and committed in a single transaction once `batch_size`
+    results are pending or the oldest pending result is `flush_interval`
+    seconds old; pending results are visible to lookups of the same process
+    only, until `flush` commits them.
+
+    Attributes:
+        path: Path to the database file
+        batch_size: Number of pending results that triggers a commit
+        flush_interval: Age in seconds of the oldest pending result that
+            triggers a commit
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        batch_size: int = WRITE_BATCH_SIZE,
+        flush_interval: float = WRITE_FLUSH_INTERVAL,
+    ) -> None:
+        """Initialize the store, creating the database on first use.
+
+        Args:
+            path: Path to the database file
+            batch_size: Number of pending results that triggers a commit
+            flush_interval: Age in seconds of the oldest pending result that
+                triggers a commit
+        """
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._pending: dict[tuple[str, str], tuple] = {}
+        self._pending_since: float | None = None
+        self._pid = os.getpid()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get the connection of the current thread and process.
+
+        Returns:
+            Connection in autocommit mode, transactions being explicit
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(
+                self.path,
+                timeout=BUSY_TIMEOUT,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(_SCHEMA)
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def _check_process(self) -> None:
+        """Drop the pending results inherited from a parent process."""
+        if self._pid != os.getpid():
+            self._lock = threading.Lock()
+            self._pending = {}
+            self._pending_since = None
+            self._pid = os.getpid()
+
+    def get(self, namespace: str, key: str) -> dict | None:
+        """Get a cached result, pending or committed.
+
+        Args:
+            namespace: Namespace of the extraction configuration
+            key: Cache name of the SQL file
+
+        Returns:
+            Cached JSON object, or None if not cached
+        """
+        self._check_process()
+        with self._lock:
+            row = self._pending.get((namespace, key))
+        if row is not None:
+            data, compressed = row[2], row[3]
+        else:
+            row = (
+                self._connection()
+                .execute(
+                    "SELECT data, compressed FROM results "
+                    "WHERE namespace = ? AND key = ?",
+                    (namespace, key),
+                )
+                .fetchone()
+            )
+            if row is None:
+                return None
+            data, compressed = row
+        if compressed:
+            data = zlib.decompress(data)
+        return json.loads(data)
+
+    def put(self, namespace: str, key: str, data: dict, compress: bool = False) -> None:
+        """Buffer a result, committing pending results when due.
+
+        Args:
+            namespace: Namespace of the extraction configuration
+            key: Cache name of the SQL file
+            data: JSON-serializable result
+            compress: Whether to compress the result with zlib
+        """
+        payload = json.dumps(data).encode()
+        if compress:
+            payload = zlib.compress(payload, COMPRESSION_LEVEL)
+
+        self._check_process()
+        with self._lock:
+            self._pending[(namespace, key)] = (
+                namespace,
+                key,
+                payload,
+                int(compress),
+                time.time(),
+            )
+            if self._pending_since is None:
+                self._pending_since = time.monotonic()
+            due = (
+                len(self._pending) >= self.batch_size
+                or time.monotonic() - self._pending_since >= self.flush_interval
+            )
+        if due:
+            self.flush()
+
+    def flush(self) -> int:
+        """Commit the pending results in a single transaction.
+
+        Results of the same key committed by other workers are replaced.
+
+        Returns:
+            Number of results committed
+        """
+        self._check_process()
+        with self._lock:
+            rows = list(self._pending.values())
+            self._pending = {}
+            self._pending_since = None
+        if not rows:
+            return 0
+
+        connection = self._connection()
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            connection.executemany(_UPSERT, rows)
+            connection.execute("COMMIT")
+        except sqlite3.Error:
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+            raise
+        logger.debug(f"Committed {len(rows)} cached results to {self.path}")
+        return len(rows)
+
+    def count(self, namespace: str | None = None) -> int:
+        """Count the committed results.
+
+        Args:
+            namespace: Only count the results of this namespace (None for all)
+
+        Returns:
+            Number of committed results
+        """
+        if namespace is None:
+            query, args = "SELECT COUNT(*) FROM results", ()
+        else:
+            query = "SELECT COUNT(*) FROM results WHERE namespace = ?"
+            args = (namespace,)
+        return self._connection().execute(query, args).fetchone()[0]
+
+    def clear(self, namespace: str | None = None) -> int:
+        """Remove results, pending or committed.
+
+        Args:
+            namespace: Only remove the results of this namespace (None for all)
+
+        Returns:
+            Number of committed results removed
+        """
+        self._check_process()
+        with self._lock:
+            self._pending = {
+                k: row
+                for k, row in self._pending.items()
+                if namespace is not None and k[0] != namespace
+            }
+            if not self._pending:
+                self._pending_since = None
+
+        if namespace is None:
+            query, args = "DELETE FROM results", ()
+        else:
+            query, args = "DELETE FROM results WHERE namespace = ?", (namespace,)
+        return self._connection().execute(query, args).rowcount
+
+    def close(self) -> None:
+        """Commit the pending results and close the connection of this thread."""
+        self.flush()
+        connection = getattr(self._local, "connection", None)
+        if connection is not None and self._local.pid == os.getpid():
+            connection.close()
+        self._local.connection = None
+
+
+# Stores by database path, shared by all threads of a process
+_stores: dict[Path, SQLiteCache] = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(cache_dir: Path) -> SQLiteCache:
+    """Get the store of a cache directory.
+
+    Args:
+        cache_dir: The cache directory
+
+    Returns:
+        SQLiteCache of the directory's database, shared within the process
+    """
+    path = (Path(cache_dir) / DB_NAME).resolve()
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = SQLiteCache(path)
+    return store
+
+
+def remove_database(cache_dir: Path) -> None:
+    """Remove the database of a cache directory, with its pending results.
+
+    Args:
+        cache_dir: The cache directory
+    """
+    path = (Path(cache_dir) / DB_NAME).resolve()
+    with _stores_lock:
+        store = _stores.pop(path, None)
+    if store is not None:
+        store.clear()
+        store.close()
+    for suffix in ("", "-wal", "-shm"):
+        path.with_name(f"{DB_NAME}{suffix}").unlink(missing_ok=True)
+
+
+def flush_stores() -> None:
+    """Commit the pending results of all stores of this process.
+
+    Worker processes exit without running exit handlers, so they flush
+    explicitly once their files are processed.
+    """
+    with _stores_lock:
+        stores = list(_stores.values())
+    for store in stores:
+        try:
+            store.flush()
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to write cached results to {store.path}: {e}")
+
+
+atexit.register(flush_stores)
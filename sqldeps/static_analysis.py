@@ -0,0 +1,1075 @@
+"""Static (non-LLM) analysis of SQL dependencies.
+
+This module derives dependencies and outputs from the local `sqlparse` token
+stream of each statement, following the same conventions as the default LLM
+prompt. It handles plain SELECT, INSERT, UPDATE, DELETE, CREATE TABLE/VIEW
+(including CREATE TABLE AS), TRUNCATE and DROP statements. Statements it
+cannot fully understand (dynamic SQL, function bodies, ambiguous columns, ...)
+are reported as unresolved, together with a best-effort profile.
+"""
+
+from dataclasses import dataclass, field
+
+import sqlparse
+from sqlparse import tokens as tt
+
+from sqldeps.chunking import merge_chunk_profiles, split_statements
+from sqldeps.models import SQLProfile
+
+# Keywords that are never used as identifiers. sqlparse tags many non-reserved
+# words (e.g. `type`, `year`, `source`) as keywords; those are treated as names.
+_RESERVED_KEYWORDS = """
+    ALL AND ANY ARRAY AS ASC ASYMMETRIC AT BETWEEN BOTH BY CASCADE CASE CAST
+    COLLATE CONFLICT CONSTRAINT CREATE CROSS CURRENT CURRENT_DATE CURRENT_TIME
+    CURRENT_TIMESTAMP CURRENT_USER DEFAULT DELETE DESC DISTINCT DO DROP ELSE END
+    ESCAPE EXCEPT EXISTS FALSE FETCH FILTER FIRST FOLLOWING FOR FROM FULL GROUP
+    HAVING IF ILIKE IN INNER INSERT INTERSECT INTERVAL INTO IS JOIN LAST LATERAL
+    LEADING LEFT LIKE LIMIT LOCALTIME LOCALTIMESTAMP MATERIALIZED NATURAL NEXT
+    NOT NOTHING NULL NULLS OFFSET ON ONLY OR ORDER OUTER OVER PARTITION PRECEDING
+    RANGE RECURSIVE REPLACE RETURNING RIGHT ROW ROWS SELECT SESSION_USER SET
+    SIMILAR SOME SYMMETRIC TABLE TEMP TEMPORARY THEN TIES TRAILING TRUE UNBOUNDED
+    UNION UNIQUE UNLOGGED UPDATE USING VALUES VIEW WHEN WHERE WINDOW WITH WITHIN
+"""
+RESERVED_KEYWORDS = frozenset(_RESERVED_KEYWORDS.split())
+
+# Statements without dependencies or outputs
+_NO_OP_STATEMENTS = frozenset(
+    {"BEGIN", "COMMIT", "END", "ROLLBACK", "START", "SET", "RESET", "SAVEPOINT"}
+)
+
+# Clauses ending the select list / each other in a SELECT
+_SELECT_CLAUSES = (
+    "INTO",
+    "FROM",
+    "WHERE",
+    "GROUP",
+    "HAVING",
+    "WINDOW",
+    "ORDER",
+    "LIMIT",
+    "OFFSET",
+    "FETCH",
+    "FOR",
+)
+
+# Table constraints in CREATE TABLE column definitions
+_TABLE_CONSTRAINTS = frozenset(
+    {"CONSTRAINT", "PRIMARY", "FOREIGN", "UNIQUE", "CHECK", "EXCLUDE", "LIKE"}
+)
+
+
+@dataclass
+class StatementAnalysis:
+    """Result of the static analysis of a single SQL statement.
+
+    Attributes:
+        sql: The analyzed statement
+        profile: Dependencies and outputs of the statement (best effort when
+            the statement is not resolved)
+        resolved: Whether the statement was fully understood
+        reasons: Why the statement could not be fully resolved
+        temp_tables: Temporary tables created by the statement
+    """
+
+    sql: str
+    profile: SQLProfile
+    resolved: bool = True
+    reasons: list[str] = field(default_factory=list)
+    temp_tables: set[str] = field(default_factory=set)
+
+
+class UnsupportedSQLError(ValueError):
+    """Raised when a statement uses syntax the static parser cannot follow."""
+
+
+@dataclass
+class _Token:
+    """Normalized token used by the statement parser."""
+
+    kind: str  # name, keyword, punct, literal, wildcard, operator, other
+    value: str
+
+    @property
+    def upper(self) -> str:
+        return self.value.upper()
+
+
+@dataclass
+class _Source:
+    """A relation in a FROM clause (real table or derived table/CTE)."""
+
+    table: str | None  # None for CTEs and subqueries
+
+
+@dataclass
+class _Scope:
+    """Name resolution scope of a single SELECT (or UPDATE/DELETE)."""
+
+    parent: "_Scope | None" = None
+    sources: dict[str, _Source] = field(default_factory=dict)
+    refs: list[tuple[str | None, str]] = field(default_factory=list)
+    wildcards: list[str | None] = field(default_factory=list)
+
+    def add_source(self, alias: str, source: _Source) -> None:
+        self.sources[alias.lower()] = source
+
+
+def _normalize_name(value: str) -> str:
+    """Remove the double quotes around an identifier.
+
+    Args:
+        value: Identifier as it appears in the SQL
+
+    Returns:
+        Unquoted identifier
+    """
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return value[1:-1]
+    return value
+
+
+def _tokenize(statement: str) -> list[_Token]:  # noqa: C901
+    """Convert a statement into a flat list of normalized tokens.
+
+    Whitespace and comments are dropped and multi-word keywords (such as
+    `LEFT OUTER JOIN` or `IF NOT EXISTS`) are split into single words.
+
+    Args:
+        statement: SQL statement
+
+    Returns:
+        List of normalized tokens
+    """
+    tokens = []
+    for token in sqlparse.parse(statement)[0].flatten():
+        ttype = token.ttype
+        if token.is_whitespace or ttype in tt.Comment:
+            continue
+        if ttype in tt.Keyword:
+            for word in token.value.split():
+                if word.upper() in RESERVED_KEYWORDS or ttype in (
+                    tt.DML,
+                    tt.DDL,
+                    tt.CTE,
+                ):
+                    tokens.append(_Token("keyword", word.upper()))
+                else:
+                    tokens.append(_Token("name", word))
+        elif ttype in tt.Name or ttype == tt.String.Symbol:
+            if ttype == tt.Name.Placeholder:
+                tokens.append(_Token("literal", token.value))
+            else:
+                tokens.append(_Token("name", _normalize_name(token.value)))
+        elif ttype in tt.Literal:
+            tokens.append(_Token("literal", token.value))
+        elif ttype == tt.Wildcard:
+            tokens.append(_Token("wildcard", "*"))
+        elif ttype in tt.Punctuation:
+            tokens.append(_Token("punct", token.value))
+        elif ttype in tt.Operator:
+            tokens.append(_Token("operator", token.value))
+        else:
+            tokens.append(_Token("other", token.value))
+    return tokens
+
+
+class _StatementParser:
+    """Recursive parser collecting table and column references of a statement."""
+
+    def __init__(self, statement: str) -> None:
+        self.tokens = _tokenize(statement)
+        while self.tokens and self.tokens[-1].value == ";":
+            self.tokens.pop()
+        self.dependencies: dict[str, set[str]] = {}
+        self.outputs: dict[str, set[str]] = {}
+        self.temp_tables: set[str] = set()
+        self.reasons: list[str] = []
+        self.scopes: list[_Scope] = []
+        self.closing = self._match_parentheses()
+
+    # -- Helpers ---------------------------------------------------------------
+
+    def _match_parentheses(self) -> dict[int, int]:
+        """Map each opening parenthesis to its closing counterpart."""
+        closing, stack = {}, []
+        for i, token in enumerate(self.tokens):
+            if token.kind == "punct" and token.value == "(":
+                stack.append(i)
+            elif token.kind == "punct" and token.value == ")":
+                if not stack:
+                    raise UnsupportedSQLError("unbalanced parentheses")
+                closing[stack.pop()] = i
+        if stack:
+            raise UnsupportedSQLError("unbalanced parentheses")
+        return closing
+
+    def _unresolved(self, reason: str) -> None:
+        if reason not in self.reasons:
+            self.reasons.append(reason)
+
+    def _is_kw(self, i: int, *words: str) -> bool:
+        if i >= len(self.tokens):
+            return False
+        token = self.tokens[i]
+        return token.kind == "keyword" and token.value in words
+
+    def _is_punct(self, i: int, value: str) -> bool:
+        if i >= len(self.tokens):
+            return False
+        token = self.tokens[i]
+        return token.kind == "punct" and token.value == value
+
+    def _skip_group(self, i: int) -> int:
+        """Return the index after the token at i (skipping parenthesized groups)."""
+        if self._is_punct(i, "("):
+            return self.closing[i] + 1
+        return i + 1
+
+    def _split(self, start: int, end: int, sep: str = ",") -> list[tuple[int, int]]:
+        """Split a token range at top-level separators."""
+        parts, i, part_start = [], start, start
+        while i < end:
+            if self._is_punct(i, sep):
+                parts.append((part_start, i))
+                part_start = i + 1
+            i = self._skip_group(i)
+        if part_start < end:
+            parts.append((part_start, end))
+        return parts
+
+    def _find_keywords(self, start: int, end: int, words: tuple[str, ...]) -> int:
+        """Find the first top-level keyword in words, or end if absent."""
+        i = start
+        while i < end:
+            if self._is_kw(i, *words):
+                return i
+            i = self._skip_group(i)
+        return end
+
+    def _read_name(self, i: int, end: int) -> tuple[str | None, int]:
+        """Read a (possibly qualified) object name starting at i."""
+        if i >= end or self.tokens[i].kind != "name":
+            return None, i
+        parts = [self.tokens[i].value]
+        i += 1
+        while (
+            i + 1 < end and self._is_punct(i, ".") and self.tokens[i + 1].kind == "name"
+        ):
+            parts.append(self.tokens[i + 1].value)
+            i += 2
+        return ".".join(parts), i
+
+    def _read_alias(self, i: int, end: int) -> tuple[str | None, int]:
+        """Read an optional `[AS] alias` starting at i."""
+        if self._is_kw(i, "AS"):
+            i += 1
+        if i < end and self.tokens[i].kind == "name":
+            return self.tokens[i].value, i + 1
+        return None, i
+
+    def _read_column_list(self, i: int) -> tuple[list[str], int]:
+        """Read a parenthesized list of column names starting at i."""
+        end = self.closing[i]
+        columns = []
+        for start, stop in self._split(i + 1, end):
+            name, nxt = self._read_name(start, stop)
+            if name is None or nxt != stop:
+                raise UnsupportedSQLError("unsupported column list")
+            columns.append(name.split(".")[-1])
+        return columns, end + 1
+
+    def _add_table(self, target: dict[str, set[str]], table: str) -> set[str]:
+        return target.setdefault(table, set())
+
+    # -- Statements ------------------------------------------------------------
+
+    def parse(self) -> None:  # noqa: C901
+        """Parse the statement and resolve all column references."""
+        if not self.tokens:
+            return
+
+        ctes: set[str] = set()
+        i, end = 0, len(self.tokens)
+
+        # Statement-level CTEs (WITH ... INSERT/UPDATE/DELETE/SELECT)
+        if self._is_kw(0, "WITH"):
+            i = self._parse_ctes(0, end, ctes, None)
+
+        first = self.tokens[i].upper if i < end else ""
+        if first == "SELECT" or self._is_punct(i, "("):
+            self._parse_query(i, end, None, ctes, allow_into=True)
+        elif first == "INSERT":
+            self._parse_insert(i, end, ctes)
+        elif first == "UPDATE":
+            self._parse_update(i, end, ctes)
+        elif first == "DELETE":
+            self._parse_delete(i, end, ctes)
+        elif first == "CREATE":
+            self._parse_create(i, end, ctes)
+        elif first == "TRUNCATE":
+            self._parse_truncate(i, end)
+        elif first == "DROP":
+            self._parse_drop(i, end)
+        elif first in _NO_OP_STATEMENTS and i == 0:
+            return
+        else:
+            self._unresolved(f"unsupported statement: {first or '?'}")
+            return
+
+        self._resolve()
+
+    def _parse_ctes(
+        self, i: int, end: int, ctes: set[str], parent: _Scope | None
+    ) -> int:
+        """Parse a WITH clause, registering CTE names, and return the next index."""
+        i += 1
+        if self._is_kw(i, "RECURSIVE"):
+            i += 1
+        while True:
+            name, i = self._read_name(i, end)
+            if name is None:
+                raise UnsupportedSQLError("invalid CTE definition")
+            ctes.add(name.lower())
+            if self._is_punct(i, "("):
+                i = self.closing[i] + 1
+            if not self._is_kw(i, "AS"):
+                raise UnsupportedSQLError("invalid CTE definition")
+            i += 1
+            while self._is_kw(i, "NOT", "MATERIALIZED"):
+                i += 1
+            if not self._is_punct(i, "("):
+                raise UnsupportedSQLError("invalid CTE definition")
+            body_end = self.closing[i]
+            first = self.tokens[i + 1].upper if i + 1 < body_end else ""
+            if first not in ("SELECT", "WITH", "VALUES", "("):
+                # Data-modifying CTEs (INSERT/UPDATE/DELETE ... RETURNING)
+                raise UnsupportedSQLError("data-modifying CTE")
+            self._parse_query(i + 1, body_end, parent, set(ctes))
+            i = body_end + 1
+            if not self._is_punct(i, ","):
+                return i
+            i += 1
+
+    def _parse_insert(self, i: int, end: int, ctes: set[str]) -> None:  # noqa: C901
+        i += 1
+        if not self._is_kw(i, "INTO"):
+            raise UnsupportedSQLError("invalid INSERT statement")
+        table, i = self._read_name(i + 1, end)
+        if table is None:
+            raise UnsupportedSQLError("invalid INSERT target")
+        alias, i = self._read_alias(i, end) if self._is_kw(i, "AS") else (None, i)
+
+        columns: list[str] = []
+        if self._is_punct(i, "("):
+            first = self.tokens[i + 1].upper if i + 1 < end else ""
+            if first not in ("SELECT", "WITH"):
+                columns, i = self._read_column_list(i)
+
+        self._add_table(self.dependencies, table).update(columns)
+        self._add_table(self.outputs, table).update(columns)
+
+        # The query body may contain `JOIN ... ON`: only `ON CONFLICT` ends it
+        body_end = self._find_keywords(i, end, ("ON", "RETURNING"))
+        while self._is_kw(body_end, "ON") and not self._is_kw(body_end + 1, "CONFLICT"):
+            body_end = self._find_keywords(body_end + 1, end, ("ON", "RETURNING"))
+        if self._is_kw(i, "DEFAULT"):
+            pass
+        elif self._is_kw(i, "VALUES"):
+            scope = self._new_scope(None)
+            for start, stop in self._split(i + 1, body_end):
+                self._parse_expr(start, stop, scope, ctes)
+        elif i < body_end:
+            self._parse_query(i, body_end, None, ctes)
+
+        if self._is_kw(body_end, "ON"):
+            self._unresolved("INSERT ... ON CONFLICT")
+            body_end = self._find_keywords(body_end, end, ("RETURNING",))
+        if self._is_kw(body_end, "RETURNING"):
+            scope = self._new_scope(None)
+            scope.add_source(alias or table.split(".")[-1], _Source(table))
+            self._parse_select_list(body_end + 1, end, scope, ctes)
+
+    def _parse_update(self, i: int, end: int, ctes: set[str]) -> None:
+        i += 1
+        if self._is_kw(i, "ONLY"):
+            i += 1
+        table, i = self._read_name(i, end)
+        if table is None:
+            raise UnsupportedSQLError("invalid UPDATE target")
+        alias, i = self._read_alias(i, end)
+        if not self._is_kw(i, "SET"):
+            raise UnsupportedSQLError("invalid UPDATE statement")
+
+        scope = self._new_scope(None)
+        scope.add_source(alias or table.split(".")[-1], _Source(table))
+        dependencies = self._add_table(self.dependencies, table)
+        outputs = self._add_table(self.outputs, table)
+
+        set_end = self._find_keywords(i + 1, end, ("FROM", "WHERE", "RETURNING"))
+        for start, stop in self._split(i + 1, set_end):
+            eq = start
+            while eq < stop and not (
+                self.tokens[eq].kind == "operator" and self.tokens[eq].value == "="
+            ):
+                eq = self._skip_group(eq)
+            if eq >= stop:
+                raise UnsupportedSQLError("invalid SET clause")
+            if self._is_punct(start, "("):
+                targets, _ = self._read_column_list(start)
+            else:
+                name, _ = self._read_name(start, eq)
+                if name is None:
+                    raise UnsupportedSQLError("invalid SET clause")
+                targets = [name.split(".")[-1]]
+            dependencies.update(targets)
+            outputs.update(targets)
+            self._parse_expr(eq + 1, stop, scope, ctes)
+
+        self._parse_tail(set_end, end, scope, ctes, from_keyword="FROM")
+
+    def _parse_delete(self, i: int, end: int, ctes: set[str]) -> None:
+        i += 1
+        if not self._is_kw(i, "FROM"):
+            raise UnsupportedSQLError("invalid DELETE statement")
+        i += 1
+        if self._is_kw(i, "ONLY"):
+            i += 1
+        table, i = self._read_name(i, end)
+        if table is None:
+            raise UnsupportedSQLError("invalid DELETE target")
+        alias, i = self._read_alias(i, end)
+
+        scope = self._new_scope(None)
+        scope.add_source(alias or table.split(".")[-1], _Source(table))
+        self._add_table(self.dependencies, table)
+        self._add_table(self.outputs, table)
+
+        self._parse_tail(i, end, scope, ctes, from_keyword="USING")
+
+    def _parse_tail(
+        self, i: int, end: int, scope: _Scope, ctes: set[str], from_keyword: str
+    ) -> None:
+        """Parse the FROM/USING, WHERE and RETURNING clauses of UPDATE/DELETE."""
+        if self._is_kw(i, from_keyword):
+            from_end = self._find_keywords(i + 1, end, ("WHERE", "RETURNING"))
+            self._parse_from(i + 1, from_end, scope, ctes)
+            i = from_end
+        if self._is_kw(i, "WHERE"):
+            if self._is_kw(i + 1, "CURRENT"):
+                raise UnsupportedSQLError("WHERE CURRENT OF cursor")
+            where_end = self._find_keywords(i + 1, end, ("RETURNING",))
+            self._parse_expr(i + 1, where_end, scope, ctes)
+            i = where_end
+        if self._is_kw(i, "RETURNING"):
+            self._parse_select_list(i + 1, end, scope, ctes)
+            i = end
+        if i < end:
+            raise UnsupportedSQLError(f"unexpected {self.tokens[i].value}")
+
+    def _parse_create(self, i: int, end: int, ctes: set[str]) -> None:  # noqa: C901
+        i += 1
+        temporary = False
+        while i < end and (
+            self._is_kw(i, "OR", "REPLACE", "TEMP", "TEMPORARY", "UNLOGGED")
+            or self.tokens[i].value.upper() in ("GLOBAL", "LOCAL", "UNLOGGED")
+        ):
+            temporary |= self._is_kw(i, "TEMP", "TEMPORARY")
+            i += 1
+
+        if self._is_kw(i, "MATERIALIZED") and self._is_kw(i + 1, "VIEW"):
+            i += 1
+        if self._is_kw(i, "VIEW"):
+            self._parse_create_view(i + 1, end, ctes)
+            return
+        if not self._is_kw(i, "TABLE"):
+            kind = self.tokens[i].value.upper() if i < end else "?"
+            raise UnsupportedSQLError(f"unsupported statement: CREATE {kind}")
+
+        i += 1
+        if self._is_kw(i, "IF"):
+            i += 3  # IF NOT EXISTS
+        table, i = self._read_name(i, end)
+        if table is None:
+            raise UnsupportedSQLError("invalid CREATE TABLE target")
+        if temporary:
+            self.temp_tables.add(table)
+
+        columns: list[str] | None = None
+        if self._is_punct(i, "("):
+            if self._is_kw(self.closing[i] + 1, "AS"):
+                # CREATE TABLE t (a, b) AS SELECT ... renames the query columns
+                columns, i = self._read_column_list(i)
+            else:
+                columns = self._parse_column_definitions(i)
+                i = self.closing[i] + 1
+        if self._is_kw(i, "AS"):
+            query_end = self._find_keywords(i + 1, end, ("WITH",))
+            query_end = end if query_end == i + 1 else query_end
+            _, out_columns = self._parse_query(i + 1, query_end, None, ctes)
+            if columns is None:
+                columns = self._output_columns(out_columns)
+        elif columns is None:
+            raise UnsupportedSQLError("unsupported CREATE TABLE syntax")
+
+        self._add_table(self.outputs, table).update(columns)
+
+    def _parse_column_definitions(self, i: int) -> list[str]:
+        """Read the column names of a CREATE TABLE column definition list."""
+        columns = []
+        for start, stop in self._split(i + 1, self.closing[i]):
+            token = self.tokens[start]
+            if token.kind == "keyword" or token.upper in _TABLE_CONSTRAINTS:
+                if token.upper == "LIKE":
+                    raise UnsupportedSQLError("CREATE TABLE ... LIKE")
+            elif token.kind == "name":
+                columns.append(token.value)
+            else:
+                raise UnsupportedSQLError("invalid column definition")
+            self._parse_references(start, stop)
+        return columns
+
+    def _parse_references(self, start: int, stop: int) -> None:
+        """Register tables referenced by foreign keys as dependencies."""
+        i = start
+        while i < stop:
+            if self.tokens[i].upper == "REFERENCES":
+                table, nxt = self._read_name(i + 1, stop)
+                if table is None:
+                    raise UnsupportedSQLError("invalid REFERENCES clause")
+                columns: list[str] = []
+                if self._is_punct(nxt, "("):
+                    columns, nxt = self._read_column_list(nxt)
+                self._add_table(self.dependencies, table).update(columns)
+                i = nxt
+            else:
+                i = self._skip_group(i)
+
+    def _parse_create_view(self, i: int, end: int, ctes: set[str]) -> None:
+        if self._is_kw(i, "IF"):
+            i += 3  # IF NOT EXISTS
+        view, i = self._read_name(i, end)
+        if view is None:
+            raise UnsupportedSQLError("invalid CREATE VIEW target")
+        columns: list[str] | None = None
+        if self._is_punct(i, "("):
+            columns, i = self._read_column_list(i)
+        if not self._is_kw(i, "AS"):
+            raise UnsupportedSQLError("unsupported CREATE VIEW syntax")
+        query_end = self._find_keywords(i + 1, end, ("WITH",))
+        query_end = end if query_end == i + 1 else query_end
+        _, out_columns = self._parse_query(i + 1, query_end, None, ctes)
+        if columns is None:
+            columns = self._output_columns(out_columns)
+        self._add_table(self.outputs, view).update(columns)
+
+    def _output_columns(self, out_columns: list[str | None] | None) -> list[str]:
+        """Convert the output columns of a query into output table columns."""
+        if out_columns is None:  # SELECT * (or VALUES)
+            return []
+        if any(column is None for column in out_columns):
+            self._unresolved("output column without alias")
+        return [column for column in out_columns if column is not None]
+
+    def _parse_truncate(self, i: int, end: int) -> None:
+        i += 1
+        if self._is_kw(i, "TABLE"):
+            i += 1
+        if self._is_kw(i, "ONLY"):
+            i += 1
+        table_end = end
+        for j in range(i, end):
+            if self.tokens[j].kind == "keyword" or self.tokens[j].upper in (
+                "RESTART",
+                "CONTINUE",
+            ):
+                table_end = j
+                break
+        for start, stop in self._split(i, table_end):
+            table, nxt = self._read_name(start, stop)
+            if table is None or nxt != stop:
+                raise UnsupportedSQLError("invalid TRUNCATE statement")
+            self._add_table(self.dependencies, table)
+            self._add_table(self.outputs, table)
+
+    def _parse_drop(self, i: int, end: int) -> None:
+        i += 1
+        if self._is_kw(i, "MATERIALIZED"):
+            i += 1
+        if not self._is_kw(i, "TABLE", "VIEW"):
+            kind = self.tokens[i].value.upper() if i < end else "?"
+            raise UnsupportedSQLError(f"unsupported statement: DROP {kind}")
+        i += 1
+        if_exists = self._is_kw(i, "IF")
+        if if_exists:
+            i += 2  # IF EXISTS
+        table_end = self._find_keywords(i, end, ("CASCADE",))
+        for j in range(i, table_end):
+            if self.tokens[j].upper == "RESTRICT":
+                table_end = j
+                break
+        for start, stop in self._split(i, table_end):
+            table, nxt = self._read_name(start, stop)
+            if table is None or nxt != stop:
+                raise UnsupportedSQLError("invalid DROP statement")
+            if not if_exists:
+                self._add_table(self.dependencies, table)
+
+    # -- Queries ---------------------------------------------------------------
+
+    def _new_scope(self, parent: _Scope | None) -> _Scope:
+        scope = _Scope(parent=parent)
+        self.scopes.append(scope)
+        return scope
+
+    def _parse_query(
+        self,
+        start: int,
+        end: int,
+        parent: _Scope | None,
+        ctes: set[str],
+        allow_into: bool = False,
+    ) -> tuple[_Scope, list[str | None] | None]:
+        """Parse a query expression (WITH, set operations, ORDER BY, LIMIT).
+
+        Returns:
+            Tuple of (scope of the first SELECT, its output column names, or
+            None when the output columns are unknown, e.g. for `SELECT *`)
+        """
+        ctes = set(ctes)
+        if self._is_kw(start, "WITH"):
+            start = self._parse_ctes(start, end, ctes, parent)
+
+        # Split on top-level set operations
+        parts, part_start, i = [], start, start
+        while i < end:
+            if self._is_kw(i, "UNION", "INTERSECT", "EXCEPT"):
+                parts.append((part_start, i))
+                i += 1
+                while self._is_kw(i, "ALL", "DISTINCT"):
+                    i += 1
+                part_start = i
+            else:
+                i = self._skip_group(i)
+        parts.append((part_start, end))
+
+        first_scope, out_columns = None, None
+        for n, (part_start, part_end) in enumerate(parts):
+            scope, columns = self._parse_select(
+                part_start, part_end, parent, ctes, allow_into and n == 0
+            )
+            if first_scope is None:
+                first_scope, out_columns = scope, columns
+        return first_scope, out_columns
+
+    def _parse_select(  # noqa: C901
+        self,
+        start: int,
+        end: int,
+        parent: _Scope | None,
+        ctes: set[str],
+        allow_into: bool = False,
+    ) -> tuple[_Scope, list[str | None] | None]:
+        """Parse a single SELECT (or parenthesized query / VALUES list)."""
+        if self._is_punct(start, "("):
+            close = self.closing[start]
+            scope, columns = self._parse_query(start + 1, close, parent, ctes)
+            if close + 1 < end:
+                self._parse_clauses(close + 1, end, scope, ctes, set())
+            return scope, columns
+
+        scope = self._new_scope(parent)
+        if self._is_kw(start, "VALUES"):
+            self._parse_expr(start + 1, end, scope, ctes)
+            return scope, None
+        if not self._is_kw(start, "SELECT"):
+            token = self.tokens[start].value if start < end else "?"
+            raise UnsupportedSQLError(f"unexpected {token} in query")
+
+        i = start + 1
+        if self._is_kw(i, "ALL"):
+            i += 1
+        elif self._is_kw(i, "DISTINCT"):
+            i += 1
+            if self._is_kw(i, "ON") and self._is_punct(i + 1, "("):
+                self._parse_expr(i + 2, self.closing[i + 1], scope, ctes)
+                i = self.closing[i + 1] + 1
+
+        list_end = self._find_keywords(i, end, _SELECT_CLAUSES)
+        out_columns = self._parse_select_list(i, list_end, scope, ctes)
+        aliases = {c.lower() for c in out_columns or [] if c is not None}
+
+        i = list_end
+        if self._is_kw(i, "INTO"):
+            if not allow_into:
+                raise UnsupportedSQLError("SELECT INTO in subquery")
+            i += 1
+            temporary = self._is_kw(i, "TEMP", "TEMPORARY", "UNLOGGED")
+            if temporary:
+                i += 1
+            if self._is_kw(i, "TABLE"):
+                i += 1
+            table, i = self._read_name(i, end)
+            if table is None:
+                raise UnsupportedSQLError("invalid SELECT INTO target")
+            if temporary:
+                self.temp_tables.add(table)
+            self._add_table(self.outputs, table).update(
+                self._output_columns(out_columns)
+            )
+
+        if self._is_kw(i, "FROM"):
+            from_end = self._find_keywords(i + 1, end, _SELECT_CLAUSES)
+            self._parse_from(i + 1, from_end, scope, ctes)
+            i = from_end
+
+        self._parse_clauses(i, end, scope, ctes, aliases)
+        return scope, out_columns
+
+    def _parse_clauses(
+        self, i: int, end: int, scope: _Scope, ctes: set[str], aliases: set[str]
+    ) -> None:
+        """Parse WHERE, GROUP BY, HAVING, WINDOW, ORDER BY, LIMIT... clauses."""
+        while i < end:
+            if not self._is_kw(i, *_SELECT_CLAUSES) or self._is_kw(i, "INTO", "FROM"):
+                raise UnsupportedSQLError(f"unexpected {self.tokens[i].value}")
+            keyword = self.tokens[i].value
+            clause_start = i + 2 if keyword in ("GROUP", "ORDER") else i + 1
+            clause_end = self._find_keywords(clause_start, end, _SELECT_CLAUSES)
+            if keyword == "FOR":
+                clause_end = end  # FOR UPDATE / FOR SHARE locking clause
+            elif keyword in ("GROUP", "ORDER"):
+                # Output column aliases may be referenced here
+                self._parse_expr(clause_start, clause_end, scope, ctes, aliases)
+            else:
+                self._parse_expr(clause_start, clause_end, scope, ctes)
+            i = clause_end
+
+    def _parse_select_list(
+        self, start: int, end: int, scope: _Scope, ctes: set[str]
+    ) -> list[str | None] | None:
+        """Parse a select (or RETURNING) list and return its output column names.
+
+        Returns:
+            List of output column names (None for unnamed expressions), or None
+            if the list contains a wildcard
+        """
+        out_columns: list[str | None] | None = []
+        for item_start, item_end in self._split(start, end):
+            tokens = self.tokens[item_start:item_end]
+
+            # Wildcards: `*` and `alias.*`
+            if tokens[-1].kind == "wildcard" and (
+                len(tokens) == 1 or self._is_punct(item_end - 2, ".")
+            ):
+                qualifier, _ = self._read_name(item_start, item_end - 2)
+                scope.wildcards.append(qualifier if len(tokens) > 1 else None)
+                out_columns = None
+                continue
+
+            expr_end, alias = item_end, None
+            if (
+                len(tokens) >= 2
+                and tokens[-1].kind == "name"
+                and (
+                    tokens[-2].upper == "AS"
+                    or tokens[-2].kind in ("name", "literal")
+                    or (tokens[-2].kind == "punct" and tokens[-2].value == ")")
+                )
+            ):
+                alias = tokens[-1].value
+                expr_end = item_end - (2 if tokens[-2].upper == "AS" else 1)
+
+            name, nxt = self._read_name(item_start, expr_end)
+            column = name.split(".")[-1] if name and nxt == expr_end else None
+            self._parse_expr(item_start, expr_end, scope, ctes)
+            if out_columns is not None:
+                out_columns.append(alias or column)
+        return out_columns
+
+    def _parse_from(self, start: int, end: int, scope: _Scope, ctes: set[str]) -> None:
+        """Parse a FROM list with joins, registering its sources in the scope."""
+        i = start
+        while i < end:
+            # Join operators and separators
+            if self._is_punct(i, ",") or (
+                self.tokens[i].kind == "keyword"
+                and self.tokens[i].value
+                in ("JOIN", "INNER", "LEFT", "RIGHT", "FULL", "OUTER", "CROSS")
+            ):
+                i += 1
+                continue
+            if self._is_kw(i, "NATURAL"):
+                self._unresolved("NATURAL JOIN")
+                i += 1
+                continue
+            if self._is_kw(i, "ON"):
+                cond_end = self._find_join_end(i + 1, end)
+                self._parse_expr(i + 1, cond_end, scope, ctes)
+                i = cond_end
+                continue
+            if self._is_kw(i, "USING"):
+                if not self._is_punct(i + 1, "("):
+                    raise UnsupportedSQLError("invalid USING clause")
+                columns, i = self._read_column_list(i + 1)
+                # Join columns must exist on both sides of the join
+                for alias in list(scope.sources)[-2:]:
+                    scope.refs.extend((alias, column) for column in columns)
+                continue
+            if self._is_kw(i, "LATERAL"):
+                raise UnsupportedSQLError("LATERAL join")
+            if self._is_kw(i, "ONLY"):
+                i += 1
+                continue
+            i = self._parse_from_item(i, end, scope, ctes)
+
+    def _find_join_end(self, i: int, end: int) -> int:
+        """Find the end of a join condition."""
+        while i < end:
+            if self._is_punct(i, ",") or self._is_kw(
+                i, "JOIN", "INNER", "LEFT", "RIGHT", "FULL", "CROSS", "NATURAL"
+            ):
+                return i
+            i = self._skip_group(i)
+        return end
+
+    def _parse_from_item(self, i: int, end: int, scope: _Scope, ctes: set[str]) -> int:
+        """Parse a single relation of a FROM list and return the next index."""
+        if self._is_punct(i, "("):
+            close = self.closing[i]
+            if self._is_kw(i + 1, "SELECT", "WITH", "VALUES") or self._is_punct(
+                i + 1, "("
+            ):
+                self._parse_query(i + 1, close, scope.parent, ctes)
+                alias, nxt = self._read_alias(close + 1, end)
+                if self._is_punct(nxt, "("):
+                    raise UnsupportedSQLError("derived table column aliases")
+                scope.add_source(alias or f"__derived_{close}", _Source(None))
+                return nxt
+            # Parenthesized join expression
+            self._parse_from(i + 1, close, scope, ctes)
+            return close + 1
+
+        table, nxt = self._read_name(i, end)
+        if table is None:
+            raise UnsupportedSQLError(f"unexpected {self.tokens[i].value} in FROM")
+        if self._is_punct(nxt, "("):
+            raise UnsupportedSQLError(f"table function {table}")
+
+        alias, nxt = self._read_alias(nxt, end)
+        if self._is_punct(nxt, "("):
+            raise UnsupportedSQLError("table column aliases")
+
+        if "." not in table and table.lower() in ctes:
+            scope.add_source(alias or table, _Source(None))
+        else:
+            self._add_table(self.dependencies, table)
+            source = _Source(table)
+            if alias:
+                scope.add_source(alias, source)
+            else:
+                scope.add_source(table, source)
+                scope.add_source(table.split(".")[-1], source)
+        return nxt
+
+    def _parse_expr(  # noqa: C901
+        self,
+        start: int,
+        end: int,
+        scope: _Scope,
+        ctes: set[str],
+        skip_names: set[str] | None = None,
+    ) -> None:
+        """Collect column references (and subqueries) of an expression."""
+        i = start
+        while i < end:
+            token = self.tokens[i]
+
+            if token.kind == "punct" and token.value == "(":
+                close = self.closing[i]
+                if self._is_kw(i + 1, "SELECT", "WITH", "VALUES"):
+                    self._parse_query(i + 1, close, scope, ctes)
+                else:
+                    self._parse_expr(i + 1, close, scope, ctes)
+                i = close + 1
+
+            elif token.kind == "punct" and token.value == "::":
+                # Type cast: skip the type name and its modifiers
+                i += 2
+                while i < end and self.tokens[i].kind == "name":
+                    i += 1
+                if self._is_punct(i, "("):
+                    i = self.closing[i] + 1
+
+            elif token.kind == "keyword" and token.value == "AS":
+                # CAST(x AS type): skip the type name and its modifiers
+                i += 1
+                while i < end and self.tokens[i].kind in ("name", "keyword"):
+                    i += 1
+                if self._is_punct(i, "("):
+                    i = self.closing[i] + 1
+
+            elif token.kind == "name":
+                name, nxt = self._read_name(i, end)
+                if self._is_punct(nxt, "("):
+                    # Function call
+                    close = self.closing[nxt]
+                    body_start = nxt + 1
+                    if name.upper() in ("EXTRACT", "SUBSTRING", "TRIM", "OVERLAY"):
+                        # Skip field names such as EXTRACT(YEAR FROM ...)
+                        from_kw = self._find_keywords(body_start, close, ("FROM",))
+                        if name.upper() == "EXTRACT" and from_kw < close:
+                            body_start = from_kw + 1
+                    self._parse_expr(body_start, close, scope, ctes)
+                    i = close + 1
+                elif (
+                    nxt < end
+                    and self.tokens[nxt].kind == "literal"
+                    and (self.tokens[nxt].value.startswith("'"))
+                ):
+                    # Typed literal, e.g. DATE '2024-01-01'
+                    i = nxt + 1
+                elif (
+                    self._is_punct(nxt, ".")
+                    and nxt + 1 < end
+                    and self.tokens[nxt + 1].kind == "wildcard"
+                ):
+                    i = nxt + 2  # alias.* inside an expression, e.g. COUNT(t.*)
+                else:
+                    parts = name.split(".")
+                    column = parts[-1]
+                    qualifier = ".".join(parts[:-1]) or None
+                    if not (
+                        qualifier is None
+                        and skip_names
+                        and column.lower() in skip_names
+                    ):
+                        scope.refs.append((qualifier, column))
+                    i = nxt
+
+            else:
+                i += 1
+
+    # -- Resolution ------------------------------------------------------------
+
+    def _lookup(self, scope: _Scope, qualifier: str) -> _Source | None:
+        """Find the source matching a column qualifier in a scope chain."""
+        current = scope
+        while current is not None:
+            source = current.sources.get(qualifier.lower())
+            if source is not None:
+                return source
+            current = current.parent
+        return None
+
+    def _resolve(self) -> None:  # noqa: C901
+        """Attribute every collected column reference to a table."""
+        for scope in self.scopes:
+            for qualifier, column in scope.refs:
+                if qualifier is not None:
+                    source = self._lookup(scope, qualifier)
+                    if source is None:
+                        self._unresolved(f"unknown qualifier: {qualifier}")
+                    elif source.table is not None:
+                        self.dependencies[source.table].add(column)
+                    continue
+
+                # Unqualified column: closest scope with sources must be unique
+                current = scope
+                while current is not None and not current.sources:
+                    current = current.parent
+                if current is None:
+                    self._unresolved(f"column without table: {column}")
+                    continue
+                sources = {id(s): s for s in current.sources.values()}
+                if len(sources) > 1:
+                    self._unresolved(f"ambiguous column: {column}")
+                    continue
+                source = next(iter(sources.values()))
+                if source.table is not None:
+                    self.dependencies[source.table].add(column)
+
+            for qualifier in scope.wildcards:
+                if qualifier is None:
+                    sources = scope.sources.values()
+                else:
+                    source = self._lookup(scope, qualifier)
+                    if source is None:
+                        self._unresolved(f"unknown qualifier: {qualifier}")
+                        continue
+                    sources = [source]
+                if any(source.table is None for source in sources):
+                    self._unresolved("wildcard over a derived table")
+
+
+def analyze_statement(statement: str) -> StatementAnalysis:
+    """Statically analyze a single SQL statement.
+
+    Args:
+        statement: SQL statement
+
+    Returns:
+        StatementAnalysis with the statement profile and resolution status
+    """
+    try:
+        parser = _StatementParser(statement)
+    except UnsupportedSQLError as e:
+        return StatementAnalysis(
+            sql=statement, profile=SQLProfile({}, {}), resolved=False, reasons=[str(e)]
+        )
+
+    try:
+        parser.parse()
+    except UnsupportedSQLError as e:
+        parser._unresolved(str(e))
+        parser._resolve()
+    except (IndexError, KeyError):
+        parser._unresolved("parse error")
+
+    return StatementAnalysis(
+        sql=statement,
+        profile=SQLProfile(
+            dependencies={t: list(c) for t, c in parser.dependencies.items()},
+            outputs={t: list(c) for t, c in parser.outputs.items()},
+        ),
+        resolved=not parser.reasons,
+        reasons=parser.reasons,
+        temp_tables=parser.temp_tables,
+    )
+
+
+def analyze_sql(sql: str) -> list[StatementAnalysis]:
+    """Statically analyze every statement of a SQL script.
+
+    Args:
+        sql: SQL script
+
+    Returns:
+        List of StatementAnalysis, one per statement, in script order
+    """
+    return [analyze_statement(statement) for statement in split_statements(sql)]
+
+
+def combine_statement_profiles(
+    profiles: list[SQLProfile], temp_tables: set[str]
+) -> SQLProfile:
+    """Combine per-statement profiles into the profile of the whole script.
+
+    Tables created by earlier statements are not dependencies of later ones,
+    and temporary tables are neither dependencies nor outputs.
+
+    Args:
+        profiles: SQLProfile of each statement, in script order
+        temp_tables: Temporary tables created by the script
+
+    Returns:
+        SQLProfile for the whole script
+    """
+    merged = merge_chunk_profiles(profiles)
+    temp = {table.lower() for table in temp_tables}
+    return SQLProfile(
+        dependencies={
+            t: c for t, c in merged.dependencies.items() if t.lower() not in temp
+        },
+        outputs={t: c for t, c in merged.outputs.items() if t.lower() not in temp},
+        model=merged.model,
+    )
@@ -0,0 +1,305 @@
+"""Token usage and request metrics of LLM extractions.
+
+This module reads the `usage` field of chat completions, whose cached prompt
+token count is reported differently by each provider, records the tokens and
+timings of each LLM request, and summarizes them per run for capacity
+planning against provider rate and token limits.
+"""
+
+import statistics
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+
+from loguru import logger
+
+# Seconds the next request of the current thread or task waited for a rate
+# limit slot
+_queue_wait: ContextVar[float] = ContextVar("queue_wait", default=0.0)
+
+# Fields holding the number of cached prompt tokens, by priority:
+# OpenAI-compatible APIs (and LiteLLM), DeepSeek, Anthropic through LiteLLM
+_CACHED_TOKEN_FIELDS = (
+    ("prompt_tokens_details", "cached_tokens"),
+    ("prompt_cache_hit_tokens",),
+    ("cache_read_input_tokens",),
+)
+
+
+def _field(obj: object, *path: str) -> int | None:
+    """Get a nested integer field of an object or dictionary.
+
+    Args:
+        obj: Object or dictionary to read
+        *path: Names of the nested fields
+
+    Returns:
+        Integer value, or None if missing or not an integer
+    """
+    for name in path:
+        obj = obj.get(name) if isinstance(obj, dict) else getattr(obj, name, None)
+        if obj is None:
+            return None
+    return obj if isinstance(obj, int) and not isinstance(obj, bool) else None
+
+
+def usage_tokens(usage: object) -> dict[str, int] | None:
+    """Get the prompt, cached prompt and completion tokens of a response.
+
+    Args:
+        usage: `usage` field of a chat completion or stream chunk, as an
+            object or a dictionary
+
+    Returns:
+        Dictionary with "prompt_tokens", "cached_tokens" and
+        "completion_tokens", or None if the usage is not reported
+    """
+    if usage is None:
+        return None
+    prompt_tokens = _field(usage, "prompt_tokens")
+    if prompt_tokens is None:
+        return None
+
+    cached_tokens = 0
+    for path in _CACHED_TOKEN_FIELDS:
+        value = _field(usage, *path)
+        if value is not None:
+            cached_tokens = value
+            break
+
+    return {
+        "prompt_tokens": prompt_tokens,
+        "cached_tokens": cached_tokens,
+        "completion_tokens": _field(usage, "completion_tokens") or 0,
+    }
+
+
+@dataclass
+class RequestRecord:
+    """Tokens and timings of a single LLM request.
+
+    Attributes:
+        file: File (or query key) the request was sent for, None for queries
+            extracted directly
+        model: Model that answered, or that was queried if the request failed
+        started: Time the request was sent, in seconds since the epoch
+        queue_wait: Seconds spent waiting for the rate limiter beforehand
+        latency: Seconds until the response was received
+        parse_time: Seconds spent parsing and validating the response
+        prompt_tokens: Prompt tokens (None if not reported)
+        cached_tokens: Prompt tokens read from the provider prompt cache
+        completion_tokens: Completion tokens (None if not reported)
+        retries: Number of earlier attempts for the same query
+        error: Kind of error (see `sqldeps.retry`) if the request failed
+    """
+
+    file: str | None
+    model: str
+    started: float
+    queue_wait: float = 0.0
+    latency: float = 0.0
+    parse_time: float = 0.0
+    prompt_tokens: int | None = None
+    cached_tokens: int | None = None
+    completion_tokens: int | None = None
+    retries: int = 0
+    error: str | None = None
+
+    def add_usage(self, tokens: dict[str, int]) -> None:
+        """Add token counts read with `usage_tokens` to the record.
+
+        Args:
+            tokens: Prompt, cached and completion tokens of a response
+        """
+        for key, value in tokens.items():
+            setattr(self, key, (getattr(self, key) or 0) + value)
+
+    def to_dict(self) -> dict:
+        """Convert to dictionary format.
+
+        Returns:
+            dict: Dictionary with the record fields
+        """
+        return asdict(self)
+
+
+@contextmanager
+def timed_queue_wait() -> Iterator[None]:
+    """Time a rate limiter wait and attribute it to the next request.
+
+    Yields:
+        None, while waiting for the rate limiter
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _queue_wait.set(time.perf_counter() - started)
+
+
+def take_queue_wait() -> float:
+    """Get the rate limiter wait of the next request and reset it.
+
+    Returns:
+        Seconds waited since the previous request of the thread or task
+    """
+    wait = _queue_wait.get()
+    _queue_wait.set(0.0)
+    return wait
+
+
+def _distribution(values: list[float]) -> dict[str, float] | None:
+    """Summarize a list of durations.
+
+    Args:
+        values: Durations in seconds
+
+    Returns:
+        Mean, median, 95th and 99th percentiles and maximum, or None if empty
+    """
+    if not values:
+        return None
+    if len(values) == 1:
+        percentiles = values * 99
+    else:
+        percentiles = statistics.quantiles(values, n=100, method="inclusive")
+    return {
+        "mean": statistics.fmean(values),
+        "p50": percentiles[49],
+        "p95": percentiles[94],
+        "p99": percentiles[98],
+        "max": max(values),
+    }
+
+
+def estimate_cost(records: list[RequestRecord]) -> dict | None:
+    """Estimate the cost of requests from the LiteLLM model price map.
+
+    Args:
+        records: Request records with token counts
+
+    Returns:
+        Estimated cost in USD ("usd") and models missing from the price map
+        ("unpriced_models"), or None if LiteLLM is not available
+    """
+    try:
+        from litellm import cost_per_token
+    except ImportError:
+        return None
+
+    tokens: dict[str, list[int]] = {}
+    for r in records:
+        counts = tokens.setdefault(r.model, [0, 0, 0])
+        counts[0] += r.prompt_tokens or 0
+        counts[1] += r.cached_tokens or 0
+        counts[2] += r.completion_tokens or 0
+
+    usd = 0.0
+    unpriced = []
+    for model, (prompt_tokens, cached_tokens, completion_tokens) in tokens.items():
+        try:
+            prompt_cost, completion_cost = cost_per_token(
+                model=model,
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                cache_read_input_tokens=cached_tokens,
+            )
+        except Exception as e:
+            logger.debug(f"No price found for {model}: {e}")
+            unpriced.append(model)
+            continue
+        usd += prompt_cost + completion_cost
+    return {"usd": usd, "unpriced_models": sorted(unpriced)}
+
+
+def summarize_requests(records: list[RequestRecord], cost: bool = True) -> dict:
+    """Aggregate the request records of a run.
+
+    Args:
+        records: Request records of the run
+        cost: Whether to estimate the cost from the LiteLLM price map
+
+    Returns:
+        Dictionary with request counts, token totals, timing distributions
+        (mean, p50, p95, p99, max), throughput and estimated cost
+    """
+    prompt_tokens = sum(r.prompt_tokens or 0 for r in records)
+    cached_tokens = sum(r.cached_tokens or 0 for r in records)
+    completion_tokens = sum(r.completion_tokens or 0 for r in records)
+
+    # Throughput over the time requests were in flight
+    duration = (
+        max(r.started + r.latency + r.parse_time for r in records)
+        - min(r.started for r in records)
+        if records
+        else 0.0
+    )
+    generation_time = sum(r.latency for r in records if r.completion_tokens)
+
+    return {
+        "requests": len(records),
+        "failed": sum(r.error is not None for r in records),
+        "retried": sum(r.retries > 0 for r in records),
+        "files": len({r.file for r in records if r.file}),
+        "models": sorted({r.model for r in records}),
+        "tokens": {
+            "prompt": prompt_tokens,
+            "cached": cached_tokens,
+            "completion": completion_tokens,
+            "total": prompt_tokens + completion_tokens,
+            "cached_ratio": cached_tokens / prompt_tokens if prompt_tokens else 0.0,
+        },
+        "latency": _distribution([r.latency for r in records]),
+        "queue_wait": _distribution([r.queue_wait for r in records]),
+        "parse_time": _distribution([r.parse_time for r in records if not r.error]),
+        "duration": duration,
+        "requests_per_minute": len(records) / duration * 60 if duration else 0.0,
+        "tokens_per_minute": (
+            (prompt_tokens + completion_tokens) / duration * 60 if duration else 0.0
+        ),
+        "completion_tokens_per_second": (
+            completion_tokens / generation_time if generation_time else 0.0
+        ),
+        "cost": estimate_cost(records) if cost and records else None,
+    }
+
+
+def format_summary(summary: dict) -> str:
+    """Format a run summary as a short human-readable report.
+
+    Args:
+        summary: Summary returned by `summarize_requests`
+
+    Returns:
+        Multi-line report
+    """
+    tokens = summary["tokens"]
+    lines = [
+        f"Requests: {summary['requests']} ({summary['failed']} failed, "
+        f"{summary['retried']} retries) for {summary['files']} files",
+        f"Tokens: {tokens['prompt']} prompt ({tokens['cached']} cached, "
+        f"{tokens['cached_ratio']:.0%}), {tokens['completion']} completion",
+    ]
+    for name in ("latency", "queue_wait", "parse_time"):
+        values = summary[name]
+        if values:
+            lines.append(
+                f"{name.replace('_', ' ').capitalize()}: p50 {values['p50']:.2f}s, "
+                f"p95 {values['p95']:.2f}s, p99 {values['p99']:.2f}s"
+            )
+    lines.append(
+        f"Throughput: {summary['requests_per_minute']:.1f} requests/min, "
+        f"{summary['tokens_per_minute']:.0f} tokens/min, "
+        f"{summary['completion_tokens_per_second']:.1f} completion tokens/s"
+    )
+    cost = summary["cost"]
+    if cost:
+        unpriced = (
+            f" (unpriced: {', '.join(cost['unpriced_models'])})"
+            if cost["unpriced_models"]
+            else ""
+        )
+        lines.append(f"Estimated cost: ${cost['usd']:.4f}{unpriced}")
+    return "\n".join(lines)
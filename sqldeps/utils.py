@@ -4,12 +4,15 @@ This module provides helper functions for finding SQL files, merging SQL profile
 and performing schema validation and comparison.
 """
 
+import math
 from pathlib import Path
-
-import pandas as pd
+from typing import TYPE_CHECKING
 
 from sqldeps.models import SQLProfile
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 
 def find_sql_files(
     folder_path: str | Path,
@@ -58,6 +61,21 @@ def find_sql_files(
     return sql_files
 
 
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of LLM tokens in a text.
+
+    Uses the common heuristic of ~4 characters per token, which is accurate
+    enough for budgeting requests without loading a model-specific tokenizer.
+
+    Args:
+        text: Text to estimate
+
+    Returns:
+        Estimated number of tokens
+    """
+    return math.ceil(len(text) / 4)
+
+
 def merge_profiles(analyses: list[SQLProfile]) -> SQLProfile:
     """Merges multiple SQLProfile objects into a single one.
 
@@ -90,12 +108,13 @@ def merge_profiles(analyses: list[SQLProfile]) -> SQLProfile:
             table: list(columns) for table, columns in merged_dependencies.items()
         },
         outputs={table: list(columns) for table, columns in merged_outputs.items()},
+        model=SQLProfile.combined_model(analyses),
     )
 
 
 def merge_schemas(
-    df_extracted_schema: pd.DataFrame, df_db_schema: pd.DataFrame
-) -> pd.DataFrame:
+    df_extracted_schema: "pd.DataFrame", df_db_schema: "pd.DataFrame"
+) -> "pd.DataFrame":
     """Matches extracted SQL dependencies with the actual database schema.
 
     Handles both exact schema matches and schema-agnostic matches.
@@ -110,6 +129,8 @@ def merge_schemas(
         Merged schema with an `exact_match` flag indicating whether
         the schema name matched exactly
     """
+    import pandas as pd
+
     # Create copy to avoid modifying input
     df_extracted = df_extracted_schema.copy()
     df_extracted["exact_match"] = pd.Series(dtype="boolean")
@@ -208,8 +229,10 @@ def merge_schemas(
 
 
 def schema_diff(
-    df_extracted_schema: pd.DataFrame, df_db_schema: pd.DataFrame, copy: bool = True
-) -> pd.DataFrame:
+    df_extracted_schema: "pd.DataFrame",
+    df_db_schema: "pd.DataFrame",
+    copy: bool = True,
+) -> "pd.DataFrame":
     """Checks if extracted schema entries exist in the database schema.
 
     Args:
@@ -220,6 +243,8 @@ def schema_diff(
     Returns:
         The extracted schema with an added `match_db` flag
     """
+    import pandas as pd
+
     # Copy dataframe to avoid in-place update
     if copy:
         df_extracted_schema = df_extracted_schema.copy()
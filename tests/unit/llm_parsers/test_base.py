@@ -4,14 +4,22 @@ This module contains tests for the common functionality provided by the
 BaseSQLExtractor abstract base class.
 """
 
+import asyncio
 import json
+import os
+import time
 from pathlib import Path
-from unittest.mock import MagicMock, mock_open, patch
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, mock_open, patch
 
+import httpx
 import pytest
+import yaml
 
 from sqldeps.llm_parsers import BaseSQLExtractor
+from sqldeps.llm_parsers.base import _read_prompts
 from sqldeps.models import SQLProfile
+from sqldeps.sqlite_cache import SQLiteCache
 
 
 class MockSQLExtractor(BaseSQLExtractor):
@@ -86,6 +94,53 @@ class TestBaseSQLExtractor:
         assert mock_extractor.model == "test-model"
         assert mock_extractor.framework == "mocksql"
         assert mock_extractor.params == {"temperature": 0}
+        assert mock_extractor.options == {
+            "chunk_token_limit": None,
+            "chunk_workers": 4,
+            "compact": False,
+            "elide_literals": False,
+            "formatting": "full",
+            "format_max_bytes": 200_000,
+            "format_timeout": 5.0,
+            "stream": False,
+            "stream_idle_timeout": 60.0,
+            "parse_retries": 1,
+            "max_retries": 2,
+            "retry_budget": 100,
+            "prompt_cache": True,
+            "max_connections": None,
+            "structured_output": False,
+            "auto_max_tokens": False,
+            "cache_key": "content",
+            "cache_backend": "json",
+            "cache_compress": False,
+        }
+
+    def test_initialization_invalid_formatting(
+        self, mock_extractor: MockSQLExtractor
+    ) -> None:
+        """Test unsupported formatting modes are rejected."""
+        with pytest.raises(ValueError, match="Unsupported formatting mode"):
+            BaseSQLExtractor.__init__(mock_extractor, "test-model", formatting="on")
+
+    def test_prepare_sql_formatting_off(self, mock_extractor: MockSQLExtractor) -> None:
+        """Test SQL is sent as is when formatting is disabled."""
+        mock_extractor.formatting = "off"
+
+        assert mock_extractor._prepare_sql("select a\nfrom t") == "select a\nfrom t"
+
+    def test_prepare_sql_compact(self, mock_extractor: MockSQLExtractor) -> None:
+        """Test compaction replaces reindenting and tracks token savings."""
+        sql = "-- License header\nSELECT id,\n       name\nFROM users;  -- trailing\n"
+
+        assert "\n" in mock_extractor._prepare_sql(sql)
+
+        mock_extractor.compact = True
+        assert mock_extractor._prepare_sql(sql) == "SELECT id,name FROM users;"
+        assert (
+            mock_extractor.token_savings["original"]
+            > (mock_extractor.token_savings["compacted"])
+        )
 
     def test_extract_from_query(
         self, mock_extractor: MockSQLExtractor, mock_sql_response: callable
@@ -150,11 +205,498 @@ class TestBaseSQLExtractor:
             assert len(result) == len(mock_files)
             assert mock_extractor.extract_from_file.call_count == len(mock_files)
 
+    def test_extract_from_folder_canonical_cache(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test reformatted files are served from cache with canonical keys."""
+        monkeypatch.chdir(tmp_path)
+        extractor = MockSQLExtractor()
+        extractor.cache_key = "canonical"
+        extractor._query_llm = MagicMock(
+            return_value='{"dependencies": {"t": ["a"]}, "outputs": {}}'
+        )
+        folder = tmp_path / "sql"
+        folder.mkdir()
+        (folder / "a.sql").write_text("select a from t")
+
+        extractor.extract_from_folder(folder, n_workers=1)
+        (folder / "a.sql").write_text("-- Reformatted\nSELECT a\nFROM t\n")
+        result = extractor.extract_from_folder(folder, n_workers=1)
+
+        assert result[str(folder / "a.sql")].dependencies == {"t": ["a"]}
+        extractor._query_llm.assert_called_once()
+        assert extractor.cache_stats == {"hits": 1, "canonical_hits": 1, "misses": 1}
+
+    def test_extract_from_folder_sqlite_cache(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test results are cached in a SQLite database, committed after the run."""
+        monkeypatch.chdir(tmp_path)
+        extractor = MockSQLExtractor()
+        extractor.cache_backend = "sqlite"
+        extractor.cache_compress = True
+        extractor._query_llm = MagicMock(
+            return_value='{"dependencies": {"t": ["a"]}, "outputs": {}}'
+        )
+        folder = tmp_path / "sql"
+        folder.mkdir()
+        for name in ["a", "b"]:
+            (folder / f"{name}.sql").write_text(f"SELECT a FROM t -- {name}")
+
+        extractor.extract_from_folder(folder, n_workers=1)
+
+        database = SQLiteCache(tmp_path / ".sqldeps_cache" / "cache.sqlite")
+        assert database.count(extractor.cache_namespace) == 2
+        assert not list((tmp_path / ".sqldeps_cache").glob("*.json"))
+        extractor.extract_from_folder(folder, n_workers=1)
+        assert extractor._query_llm.call_count == 2
+        assert extractor.cache_stats["hits"] == 2
+
+    def test_cache_namespace(self) -> None:
+        """Test the cache namespace changes with the configuration of requests."""
+        namespace = MockSQLExtractor().cache_namespace
+
+        assert MockSQLExtractor().cache_namespace == namespace
+        assert MockSQLExtractor(model="other").cache_namespace != namespace
+        assert MockSQLExtractor(params={"temperature": 1}).cache_namespace != namespace
+        custom = MockSQLExtractor()
+        custom.prompts = {**custom.prompts, "user_prompt": "SQL:\n{sql}"}
+        assert custom.cache_namespace != namespace
+        for name, value in [
+            ("compact", True),
+            ("elide_literals", True),
+            ("formatting", "off"),
+            ("format_max_bytes", 100),
+            ("chunk_token_limit", 1000),
+            ("structured_output", True),
+        ]:
+            configured = MockSQLExtractor()
+            setattr(configured, name, value)
+            assert configured.cache_namespace != namespace, name
+        configured = MockSQLExtractor()
+        configured.format_timeout = 0.1
+        configured.max_retries = 5
+        assert configured.cache_namespace == namespace
+
+    def test_extract_from_folder_retries(
+        self, mock_extractor: MockSQLExtractor
+    ) -> None:
+        """Test sequential extraction retries transient errors but not fatal ones."""
+        server_error = RuntimeError("Internal server error")
+        server_error.status_code = 503
+        auth_error = RuntimeError("Invalid API key")
+        auth_error.status_code = 401
+        profile = SQLProfile(dependencies={"table1": ["col1"]}, outputs={})
+
+        mock_extractor.extract_from_file = MagicMock(
+            side_effect=[server_error, profile, auth_error]
+        )
+
+        with (
+            patch(
+                "sqldeps.llm_parsers.base.find_sql_files",
+                return_value=[Path("file1.sql"), Path("file2.sql")],
+            ),
+            patch("sqldeps.retry.time.sleep"),
+        ):
+            result = mock_extractor.extract_from_folder(
+                "test_folder", n_workers=1, use_cache=False
+            )
+
+        assert set(result) == {"file1.sql"}
+        assert mock_extractor.extract_from_file.call_count == 3
+        assert mock_extractor.retry_stats["server"] == 1
+
+    def test_extract_from_folder_thread_executor(
+        self, mock_extractor: MockSQLExtractor
+    ) -> None:
+        """Test thread executor runs with the extractor itself."""
+        mock_files = [Path("file1.sql"), Path("file2.sql")]
+        profile = SQLProfile(dependencies={"table1": ["col1"]}, outputs={})
+
+        with (
+            patch("sqldeps.llm_parsers.base.find_sql_files", return_value=mock_files),
+            patch(
+                "sqldeps.parallel.process_files_in_threads",
+                return_value={str(f): profile for f in mock_files},
+            ) as mock_threads,
+        ):
+            result = mock_extractor.extract_from_folder(
+                "test_folder", n_workers=8, executor="thread", use_cache=False
+            )
+
+        assert len(result) == len(mock_files)
+        mock_threads.assert_called_once()
+        assert mock_threads.call_args.kwargs["extractor"] is mock_extractor
+        assert mock_threads.call_args.kwargs["n_workers"] == 8
+
+    def test_extract_from_folder_invalid_executor(
+        self, mock_extractor: MockSQLExtractor
+    ) -> None:
+        """Test an unknown executor is rejected."""
+        with (
+            patch(
+                "sqldeps.llm_parsers.base.find_sql_files",
+                return_value=[Path("file.sql")],
+            ),
+            pytest.raises(ValueError, match="Unsupported executor"),
+        ):
+            mock_extractor.extract_from_folder(
+                "test_folder", n_workers=2, executor="fork"
+            )
+
+    def test_pack_batches(self, mock_extractor: MockSQLExtractor) -> None:
+        """Test small queries are packed up to the token budget."""
+        queries = {
+            "a.sql": "SELECT a FROM t1",
+            "b.sql": "SELECT b FROM t2",
+            "big.sql": "SELECT " + ", ".join(f"col{i}" for i in range(200)) + " FROM t",
+            "c.sql": "SELECT c FROM t3",
+        }
+
+        batches = mock_extractor._pack_batches(queries, token_budget=40)
+
+        assert [list(batch) for batch in batches] == [
+            ["a.sql", "b.sql"],
+            ["big.sql"],
+            ["c.sql"],
+        ]
+        # Batched SQL is already formatted
+        assert batches[0]["a.sql"] == "SELECT a\nFROM t1"
+
+    def test_extract_from_queries_batched(
+        self, mock_extractor: MockSQLExtractor
+    ) -> None:
+        """Test a keyed batch response is split into one profile per query."""
+        response = json.dumps(
+            {
+                "file_1": {"dependencies": {"t1": ["a"]}, "outputs": {}},
+                "file_2": {"dependencies": {"t2": ["b"]}, "outputs": {}},
+            }
+        )
+        mock_extractor._query_llm = MagicMock(return_value=response)
+
+        results = mock_extractor.extract_from_queries(
+            {"a.sql": "SELECT a FROM t1", "b.sql": "SELECT b FROM t2"}
+        )
+
+        assert results["a.sql"].dependencies == {"t1": ["a"]}
+        assert results["b.sql"].dependencies == {"t2": ["b"]}
+        mock_extractor._query_llm.assert_called_once()
+        prompt = mock_extractor._query_llm.call_args[0][0]
+        assert "### File key: file_1" in prompt
+        assert "### File key: file_2" in prompt
+
+    def test_extract_from_queries_fallback(
+        self, mock_extractor: MockSQLExtractor, mock_sql_response: callable
+    ) -> None:
+        """Test queries missing from a batched response are re-sent alone."""
+        batch_response = json.dumps(
+            {"file_1": {"dependencies": {"t1": ["a"]}, "outputs": {}}}
+        )
+        single_response = mock_sql_response(dependencies={"t2": ["b"]})
+        mock_extractor._query_llm = MagicMock(
+            side_effect=[batch_response, single_response]
+        )
+
+        results = mock_extractor.extract_from_queries(
+            {"a.sql": "SELECT a FROM t1", "b.sql": "SELECT b FROM t2"}
+        )
+
+        assert results["b.sql"].dependencies == {"t2": ["b"]}
+        assert mock_extractor._query_llm.call_count == 2
+
+    def test_extract_from_queries_unparseable_batch(
+        self, mock_extractor: MockSQLExtractor, mock_sql_response: callable
+    ) -> None:
+        """Test every query falls back when the batched response is invalid."""
+        mock_extractor._query_llm = MagicMock(
+            side_effect=["not json", mock_sql_response(), mock_sql_response()]
+        )
+
+        results = mock_extractor.extract_from_queries(
+            {"a.sql": "SELECT a FROM t1", "b.sql": "SELECT b FROM t2"}
+        )
+
+        assert set(results) == {"a.sql", "b.sql"}
+        assert mock_extractor._query_llm.call_count == 3
+
+    def test_extract_from_queries_batch_retries(
+        self, mock_extractor: MockSQLExtractor
+    ) -> None:
+        """Test a batched request failing transiently is retried as a batch."""
+        server_error = RuntimeError("Internal server error")
+        server_error.status_code = 503
+        response = json.dumps(
+            {
+                "file_1": {"dependencies": {"t1": ["a"]}, "outputs": {}},
+                "file_2": {"dependencies": {"t2": ["b"]}, "outputs": {}},
+            }
+        )
+        mock_extractor._query_llm = MagicMock(side_effect=[server_error, response])
+
+        with patch("sqldeps.retry.time.sleep"):
+            results = mock_extractor.extract_from_queries(
+                {"a.sql": "SELECT a FROM t1", "b.sql": "SELECT b FROM t2"}
+            )
+
+        assert set(results) == {"a.sql", "b.sql"}
+        assert mock_extractor._query_llm.call_count == 2
+        assert "### File key: file_2" in mock_extractor._query_llm.call_args[0][0]
+        assert mock_extractor.retry_stats["server"] == 1
+
+    @pytest.mark.parametrize("status_code", [401, 429])
+    def test_extract_from_queries_batch_error(
+        self, mock_extractor: MockSQLExtractor, status_code: int
+    ) -> None:
+        """Test request errors of a batch are raised, not fanned out per query."""
+        error = RuntimeError("Request failed")
+        error.status_code = status_code
+        mock_extractor._query_llm = MagicMock(side_effect=error)
+        mock_extractor.max_retries = 1
+
+        with (
+            patch("sqldeps.retry.time.sleep"),
+            pytest.raises(RuntimeError, match="Request failed"),
+        ):
+            mock_extractor.extract_from_queries(
+                {"a.sql": "SELECT a FROM t1", "b.sql": "SELECT b FROM t2"}
+            )
+
+        expected_calls = 1 if status_code == 401 else 2
+        assert mock_extractor._query_llm.call_count == expected_calls
+
+    def test_extract_from_folder_batched(
+        self, mock_extractor: MockSQLExtractor, tmp_path: Path
+    ) -> None:
+        """Test folder extraction with batching sends one request for small files."""
+        for name in ["a", "b", "c"]:
+            (tmp_path / f"{name}.sql").write_text(f"SELECT {name} FROM t_{name}")
+        response = json.dumps(
+            {
+                f"file_{i}": {"dependencies": {f"t{i}": []}, "outputs": {}}
+                for i in range(1, 4)
+            }
+        )
+        mock_extractor._query_llm = MagicMock(return_value=response)
+
+        result = mock_extractor.extract_from_folder(
+            tmp_path, batch_token_budget=1000, use_cache=False
+        )
+
+        assert len(result) == 3
+        mock_extractor._query_llm.assert_called_once()
+
+    def test_extract_from_query_chunked(self, mock_sql_response: callable) -> None:
+        """Test oversized queries are split into chunks and merged."""
+        extractor = MockSQLExtractor()
+        extractor.chunk_token_limit = 10
+        sql = (
+            "CREATE TABLE stage AS SELECT a FROM src;\n"
+            "INSERT INTO target (a) SELECT a FROM stage;"
+        )
+
+        def fake_query(prompt: str) -> str:
+            if "CREATE TABLE stage" in prompt:
+                return mock_sql_response({"src": ["a"]}, {"stage": ["a"]})
+            return mock_sql_response(
+                {"stage": ["a"], "target": ["a"]}, {"target": ["a"]}
+            )
+
+        extractor._query_llm = MagicMock(side_effect=fake_query)
+
+        result = extractor.extract_from_query(sql)
+
+        assert extractor._query_llm.call_count == 2
+        assert result.dependencies == {"src": ["a"], "target": ["a"]}
+        assert result.outputs == {"stage": ["a"], "target": ["a"]}
+
+        # The async path produces the same merged profile
+        extractor._query_llm.reset_mock()
+        assert asyncio.run(extractor.aextract_from_query(sql)) == result
+        assert extractor._query_llm.call_count == 2
+
+    def test_extract_from_query_below_chunk_limit(
+        self, mock_sql_response: callable
+    ) -> None:
+        """Test queries under the chunk limit are sent in a single request."""
+        extractor = MockSQLExtractor()
+        extractor.chunk_token_limit = 1000
+        extractor._query_llm = MagicMock(return_value=mock_sql_response())
+
+        extractor.extract_from_query("SELECT 1; SELECT 2;")
+
+        extractor._query_llm.assert_called_once()
+
+    def test_aextract_from_query(
+        self, mock_extractor: MockSQLExtractor, mock_sql_response: callable
+    ) -> None:
+        """Test asynchronous extraction from a SQL query."""
+        response = mock_sql_response(dependencies={"table1": ["col1"]})
+        mock_extractor._aquery_llm = AsyncMock(return_value=response)
+
+        result = asyncio.run(mock_extractor.aextract_from_query("SELECT col1 FROM t"))
+
+        assert result.dependencies == {"table1": ["col1"]}
+        mock_extractor._aquery_llm.assert_awaited_once()
+
+    def test_aquery_llm_falls_back_to_sync(
+        self, mock_extractor: MockSQLExtractor, mock_sql_response: callable
+    ) -> None:
+        """Test default async query delegates to the blocking implementation."""
+        response = mock_sql_response(outputs={"table2": ["col2"]})
+        mock_extractor._query_llm = MagicMock(return_value=response)
+
+        result = asyncio.run(mock_extractor.aextract_from_query("SELECT 1"))
+
+        assert result.outputs == {"table2": ["col2"]}
+        mock_extractor._query_llm.assert_called_once()
+
+    def test_aextract_from_folder(self, mock_extractor: MockSQLExtractor) -> None:
+        """Test asynchronous extraction from a folder with bounded concurrency."""
+        mock_files = [Path(f"file{i}.sql") for i in range(5)]
+        in_flight = 0
+        max_in_flight = 0
+
+        async def fake_extract(file_path: Path) -> SQLProfile:
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            if file_path.name == "file0.sql":
+                raise ValueError("bad response")
+            return SQLProfile(dependencies={file_path.stem: []}, outputs={})
+
+        mock_extractor.aextract_from_file = fake_extract
+
+        with patch("sqldeps.llm_parsers.base.find_sql_files", return_value=mock_files):
+            result = asyncio.run(
+                mock_extractor.aextract_from_folder(
+                    "test_folder", max_concurrency=2, use_cache=False
+                )
+            )
+
+        # Failed files are skipped, the rest are returned
+        assert set(result) == {str(f) for f in mock_files[1:]}
+        assert max_in_flight == 2
+
+    def test_aextract_from_folder_invalid_concurrency(
+        self, mock_extractor: MockSQLExtractor
+    ) -> None:
+        """Test asynchronous extraction rejects a non-positive concurrency."""
+        with (
+            patch(
+                "sqldeps.llm_parsers.base.find_sql_files",
+                return_value=[Path("file.sql")],
+            ),
+            pytest.raises(ValueError, match="Invalid concurrency"),
+        ):
+            asyncio.run(
+                mock_extractor.aextract_from_folder("test_folder", max_concurrency=0)
+            )
+
+    def test_read_response_stream(self, mock_extractor: MockSQLExtractor) -> None:
+        """Test a streamed response stops once the JSON object is complete."""
+        mock_extractor.stream = True
+        pieces = ['```json\n{"dependencies": {}, ', '"outputs": {}}', "\n```", "x"]
+        stream = MagicMock()
+        stream.__iter__.return_value = iter(
+            [SimpleNamespace(choices=[])]
+            + [
+                SimpleNamespace(
+                    choices=[SimpleNamespace(delta=SimpleNamespace(content=p))]
+                )
+                for p in pieces
+            ]
+        )
+
+        content = mock_extractor._read_response(stream, time.perf_counter())
+
+        assert content == '```json\n{"dependencies": {}, "outputs": {}}'
+        stream.close.assert_called_once()
+        assert len(mock_extractor.stream_metrics) == 1
+        metrics = mock_extractor.stream_metrics[0]
+        assert metrics["early_stop"]
+        assert metrics["first_token_latency"] <= metrics["latency"]
+
+    def test_read_response_usage(self, mock_extractor: MockSQLExtractor) -> None:
+        """Test the token usage of each response is accumulated."""
+        usage = SimpleNamespace(
+            prompt_tokens=3000,
+            completion_tokens=50,
+            prompt_tokens_details=SimpleNamespace(cached_tokens=2048),
+        )
+        response = SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content="{}"))],
+            usage=usage,
+        )
+
+        for _ in range(2):
+            mock_extractor._read_response(response, time.perf_counter())
+
+        assert mock_extractor.usage_stats == {
+            "requests": 2,
+            "prompt_tokens": 6000,
+            "cached_tokens": 4096,
+            "completion_tokens": 100,
+        }
+
+    def test_read_response_stream_usage(self, mock_extractor: MockSQLExtractor) -> None:
+        """Test the usage sent in the last streamed chunk is recorded."""
+        mock_extractor.stream = True
+        assert mock_extractor._stream_params()["stream_options"] == {
+            "include_usage": True
+        }
+        chunks = [
+            SimpleNamespace(
+                choices=[SimpleNamespace(delta=SimpleNamespace(content='{"a": 1'))],
+                usage=None,
+            ),
+            SimpleNamespace(choices=[], usage={"prompt_tokens": 10}),
+        ]
+
+        content = mock_extractor._read_response(iter(chunks), time.perf_counter())
+
+        assert content == '{"a": 1'
+        assert mock_extractor.usage_stats["prompt_tokens"] == 10
+
+    def test_stream_params_idle_timeout(self, mock_extractor: MockSQLExtractor) -> None:
+        """Test the idle timeout only replaces the read timeout of the client."""
+        mock_extractor.stream = True
+        mock_extractor.stream_idle_timeout = 30.0
+        assert mock_extractor._stream_params()["timeout"] == 30.0
+
+        mock_extractor.timeout = httpx.Timeout(120.0, connect=5.0)
+        timeout = mock_extractor._stream_params()["timeout"]
+
+        assert timeout == httpx.Timeout(120.0, connect=5.0, read=30.0)
+
+    def test_aread_response_idle_timeout(
+        self, mock_extractor: MockSQLExtractor
+    ) -> None:
+        """Test an idle async stream raises a timeout."""
+        mock_extractor.stream = True
+        mock_extractor.stream_idle_timeout = 0.01
+
+        async def stream() -> object:
+            yield SimpleNamespace(
+                choices=[SimpleNamespace(delta=SimpleNamespace(content="{"))]
+            )
+            await asyncio.sleep(1)
+
+        with pytest.raises(TimeoutError, match="idle"):
+            asyncio.run(mock_extractor._aread_response(stream(), time.perf_counter()))
+
     @pytest.mark.parametrize(
         "response,error_pattern",
         [
             ("Invalid JSON", "Failed to decode JSON"),
             ('{"only_dependencies": {}}', "Missing required keys"),
+            (
+                '{"dependencies": [{"table": "t"}], "outputs": []}',
+                "Malformed table entry",
+            ),
         ],
     )
     def test_process_response_errors(
@@ -170,6 +712,174 @@ class TestBaseSQLExtractor:
         with pytest.raises(ValueError, match=error_pattern):
             mock_extractor._process_response(response)
 
+    def test_process_response_repaired(self, mock_extractor: MockSQLExtractor) -> None:
+        """Test malformed but salvageable responses are repaired and counted."""
+        response = '```json\n{"dependencies": {"t": ["a",]}, "outputs": {}}\n```'
+
+        result = mock_extractor._process_response(response)
+
+        assert result.dependencies == {"t": ["a"]}
+        assert mock_extractor.parse_stats == {"repaired": 1, "failed": 0}
+
+    def test_process_response_table_entries(
+        self, mock_extractor: MockSQLExtractor
+    ) -> None:
+        """Test table entries of structured outputs are merged into mappings."""
+        response = json.dumps(
+            {
+                "dependencies": [
+                    {"table": "t", "columns": ["a"]},
+                    {"table": "t", "columns": ["a", "b"]},
+                ],
+                "outputs": [{"table": "u", "columns": []}],
+            }
+        )
+
+        result = mock_extractor._process_response(response)
+
+        assert result.dependencies == {"t": ["a", "b"]}
+        assert result.outputs == {"u": []}
+
+    def test_response_params(self, mock_extractor: MockSQLExtractor) -> None:
+        """Test the response format and output token limit of requests."""
+        assert mock_extractor._response_params("SELECT 1") == {
+            "response_format": {"type": "json_object"}
+        }
+
+        # Providers without JSON schema support keep JSON mode
+        mock_extractor.structured_output = True
+        mock_extractor.auto_max_tokens = True
+        short = mock_extractor._response_params("SELECT 1")
+        assert short["response_format"] == {"type": "json_object"}
+        assert short["max_tokens"] == 256 + 2 * 2
+
+        long = mock_extractor._response_params("SELECT a FROM t " * 10_000)
+        assert long["max_tokens"] == 16_384
+
+        with patch.object(MockSQLExtractor, "SUPPORTS_RESPONSE_SCHEMA", True):
+            params = mock_extractor._response_params("SELECT 1")
+        assert params["response_format"]["type"] == "json_schema"
+
+        # Limits set in the parameters take precedence
+        mock_extractor.params["max_tokens"] = 100
+        assert "max_tokens" not in mock_extractor._response_params("SELECT 1")
+
+    def test_response_params_packed(self, mock_extractor: MockSQLExtractor) -> None:
+        """Test packed requests keep JSON mode for their keyed responses."""
+        mock_extractor.structured_output = True
+        formats = []
+
+        def query_llm(prompt: str) -> str:
+            formats.append(mock_extractor._response_params(prompt)["response_format"])
+            return json.dumps(
+                {
+                    "file_1": {"dependencies": {"t1": ["a"]}, "outputs": {}},
+                    "file_2": {"dependencies": {"t2": ["b"]}, "outputs": {}},
+                }
+            )
+
+        mock_extractor._query_llm = query_llm
+        with patch.object(MockSQLExtractor, "SUPPORTS_RESPONSE_SCHEMA", True):
+            mock_extractor.extract_from_queries(
+                {"a.sql": "SELECT a FROM t1", "b.sql": "SELECT b FROM t2"}
+            )
+            single = mock_extractor._response_params("SELECT 1")
+
+        assert formats == [{"type": "json_object"}]
+        assert single["response_format"]["type"] == "json_schema"
+
+    def test_extract_from_query_requery_unsalvageable(
+        self, mock_extractor: MockSQLExtractor, mock_sql_response: callable
+    ) -> None:
+        """Test the LLM is queried again only when a response cannot be repaired."""
+        mock_extractor._query_llm = MagicMock(
+            side_effect=[
+                "Sorry, I cannot help with that.",
+                mock_sql_response(dependencies={"t": ["a"]}) + ",",
+            ]
+        )
+
+        result = mock_extractor.extract_from_query("SELECT a FROM t")
+
+        assert result.dependencies == {"t": ["a"]}
+        assert mock_extractor._query_llm.call_count == 2
+        assert mock_extractor.parse_stats == {"repaired": 1, "failed": 1}
+
+    def test_extract_from_query_requery_exhausted(
+        self, mock_extractor: MockSQLExtractor
+    ) -> None:
+        """Test extraction fails once the re-queries are exhausted."""
+        mock_extractor.parse_retries = 0
+        mock_extractor._query_llm = MagicMock(return_value="no JSON here")
+
+        with pytest.raises(ValueError, match="Failed to decode JSON"):
+            mock_extractor.extract_from_query("SELECT 1")
+
+        mock_extractor._query_llm.assert_called_once()
+
+    def test_request_records(
+        self, mock_extractor: MockSQLExtractor, mock_sql_response: callable
+    ) -> None:
+        """Test each LLM request is recorded with its tokens and timings."""
+        responses = iter(["not JSON", mock_sql_response(dependencies={"t": []})])
+
+        def query_llm(prompt: str) -> str:
+            mock_extractor._record_usage(
+                {"prompt_tokens": 3000, "completion_tokens": 20}
+            )
+            return next(responses)
+
+        mock_extractor._query_llm = query_llm
+        with patch("sqldeps.llm_parsers.base._current_source") as mock_source:
+            mock_source.get.return_value = "query.sql"
+            mock_extractor.extract_from_query("SELECT * FROM t")
+
+        failed, answered = mock_extractor.request_records
+        assert failed.error == "bad_output"
+        assert (failed.retries, answered.retries) == (0, 1)
+        assert answered.error is None
+        assert answered.file == "query.sql"
+        assert answered.model == "test-model"
+        assert answered.prompt_tokens == 3000
+        assert answered.completion_tokens == 20
+        assert answered.latency >= 0
+        assert answered.parse_time > 0
+        assert mock_extractor.usage_stats["prompt_tokens"] == 6000
+
+        summary = mock_extractor.usage_summary(cost=False)
+        assert summary["requests"] == 2
+        assert summary["failed"] == 1
+        assert summary["tokens"]["completion"] == 40
+
+    def test_request_records_folder(
+        self, mock_extractor: MockSQLExtractor, mock_sql_response: callable
+    ) -> None:
+        """Test records of a folder run carry the file, queue wait and retries."""
+        server_error = RuntimeError("Internal server error")
+        server_error.status_code = 503
+        mock_extractor._query_llm = MagicMock(
+            side_effect=[server_error, mock_sql_response()]
+        )
+
+        with (
+            patch(
+                "sqldeps.llm_parsers.base.find_sql_files",
+                return_value=[Path("file1.sql")],
+            ),
+            patch("builtins.open", mock_open(read_data="SELECT 1")),
+            patch("pathlib.Path.exists", return_value=True),
+            patch("sqldeps.retry.time.sleep"),
+        ):
+            mock_extractor.extract_from_folder(
+                "test_folder", n_workers=1, use_cache=False
+            )
+
+        failed, answered = mock_extractor.request_records
+        assert failed.error == "server"
+        assert answered.retries == 1
+        assert {failed.file, answered.file} == {"file1.sql"}
+        assert answered.queue_wait >= 0
+
     def test_load_prompts_default(self, mock_extractor: MockSQLExtractor) -> None:
         """Test loading default prompts."""
         # Define a dict that mimics parsed YAML
@@ -178,15 +888,49 @@ class TestBaseSQLExtractor:
             "user_prompt": "test user prompt",
         }
 
-        # Directly patch yaml.safe_load to return our mock data
+        # Directly patch yaml.safe_load to return our mock data, bypassing the
+        # prompts already parsed by other extractors
+        _read_prompts.cache_clear()
         with patch("yaml.safe_load", return_value=mock_yaml_data):
             # Create a new extractor to trigger _load_prompts
             extractor = MockSQLExtractor()
+        _read_prompts.cache_clear()
+
+        # Verify the prompts were loaded correctly
+        assert extractor.prompts == mock_yaml_data
+        assert extractor.prompts["system_prompt"] == "test system prompt"
+        assert extractor.prompts["user_prompt"] == "test user prompt"
+
+    def test_load_prompts_cached(self, tmp_path: Path) -> None:
+        """Test prompt files are parsed once until they change."""
+        prompt_path = tmp_path / "prompt.yml"
+        prompt_path.write_text("system_prompt: a\nuser_prompt: '{sql}'\n")
+
+        with patch("yaml.safe_load", wraps=yaml.safe_load) as mock_load:
+            first = MockSQLExtractor(prompt_path=prompt_path)
+            MockSQLExtractor(prompt_path=prompt_path)
+            assert mock_load.call_count == 1
+
+            first.prompts["system_prompt"] = "changed in place"
+            prompt_path.write_text("system_prompt: b\nuser_prompt: '{sql}'\n")
+            os.utime(prompt_path, ns=(0, 10**9))
+            assert (
+                MockSQLExtractor(prompt_path=prompt_path).prompts["system_prompt"]
+                == "b"
+            )
+            assert mock_load.call_count == 2
+
+    def test_client_options(self, mock_extractor: MockSQLExtractor) -> None:
+        """Test the connection pool is sized to max_connections."""
+        assert mock_extractor._client_options(MagicMock()) == {}
+
+        mock_extractor.max_connections = 8
+        client_class = MagicMock()
+        options = mock_extractor._client_options(client_class)
 
-            # Verify the prompts were loaded correctly
-            assert extractor.prompts == mock_yaml_data
-            assert extractor.prompts["system_prompt"] == "test system prompt"
-            assert extractor.prompts["user_prompt"] == "test user prompt"
+        limits = client_class.call_args[1]["limits"]
+        assert limits.max_connections == limits.max_keepalive_connections == 8
+        assert options == {"http_client": client_class.return_value}
 
     def test_normalize_extensions(self) -> None:
         """Test normalization of file extensions."""
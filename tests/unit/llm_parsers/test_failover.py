@@ -0,0 +1,275 @@
+"""Unit tests for FailoverExtractor.
+
+This module tests failing over along a chain of LLM providers.
+"""
+
+import asyncio
+import json
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from sqldeps.llm_parsers import (
+    BaseSQLExtractor,
+    FailoverExtractor,
+    create_failover_extractor,
+)
+
+
+class ServiceUnavailableError(Exception):
+    """Provider error with an HTTP 503 response."""
+
+    status_code = 503
+
+
+class BadRequestError(Exception):
+    """Provider error with an HTTP 400 response."""
+
+    status_code = 400
+
+
+class FlakyLLMExtractor(BaseSQLExtractor):
+    """LLM extractor failing while `down` is set."""
+
+    def __init__(self, model: str, **kwargs: object) -> None:
+        """Initialize the fake extractor."""
+        super().__init__(model, **kwargs)
+        self.down = False
+        self.error = ServiceUnavailableError
+        self.calls = 0
+
+    def _query_llm(self, prompt: str) -> str:
+        """Answer with the model name as table, or fail if down."""
+        self.calls += 1
+        if self.down:
+            raise self.error("Provider error")
+        return json.dumps({"dependencies": {self.model: []}, "outputs": {}})
+
+    async def _aquery_llm(self, prompt: str) -> str:
+        """Asynchronous version of `_query_llm`."""
+        return self._query_llm(prompt)
+
+
+@pytest.fixture
+def chain() -> tuple[FlakyLLMExtractor, FlakyLLMExtractor]:
+    """Create a primary and a secondary extractor."""
+    return FlakyLLMExtractor("primary"), FlakyLLMExtractor("secondary")
+
+
+class TestFailoverExtractor:
+    """Test suite for FailoverExtractor."""
+
+    def test_initialization(self, chain: tuple) -> None:
+        """Test the failover extractor mirrors the first extractor."""
+        primary, secondary = chain
+        primary.chunk_token_limit = 1000
+        extractor = FailoverExtractor([primary, secondary])
+
+        assert extractor.framework == "failover"
+        assert extractor.model == "primary"
+        assert extractor.chunk_token_limit == 1000
+        assert extractor.failover_stats == {"primary": 0, "secondary": 0}
+
+    def test_empty_chain(self) -> None:
+        """Test an empty chain is rejected."""
+        with pytest.raises(ValueError, match="At least one extractor"):
+            FailoverExtractor([])
+
+    def test_primary_answers(self, chain: tuple) -> None:
+        """Test requests go to the first extractor while it is healthy."""
+        primary, secondary = chain
+        extractor = FailoverExtractor([primary, secondary])
+
+        result = extractor.extract_from_query("SELECT 1")
+
+        assert result.dependencies == {"primary": []}
+        assert result.model == "primary"
+        assert secondary.calls == 0
+
+    def test_fails_over_and_tags_model(self, chain: tuple) -> None:
+        """Test a failed request is sent to the next extractor."""
+        primary, secondary = chain
+        primary.down = True
+        extractor = FailoverExtractor([primary, secondary])
+
+        with patch("sqldeps.retry.time.sleep"):
+            result = extractor.extract_from_query("SELECT 1")
+
+        assert result.dependencies == {"secondary": []}
+        assert result.model == "secondary"
+        assert extractor.failover_stats == {"primary": 0, "secondary": 1}
+
+    def test_open_circuit_skips_provider(self, chain: tuple) -> None:
+        """Test a provider is skipped once its circuit is open."""
+        primary, secondary = chain
+        primary.down = True
+        extractor = FailoverExtractor([primary, secondary], failure_threshold=2)
+
+        for _ in range(4):
+            extractor._query_llm("prompt")
+
+        assert primary.calls == 2
+        assert secondary.calls == 4
+
+    def test_routes_back_after_recovery(self, chain: tuple) -> None:
+        """Test requests go back to a provider once its probe succeeds."""
+        primary, secondary = chain
+        primary.down = True
+        extractor = FailoverExtractor(
+            [primary, secondary], failure_threshold=1, reset_timeout=30.0
+        )
+
+        with patch("sqldeps.circuit_breaker.time.monotonic", return_value=0.0):
+            extractor._query_llm("prompt")
+        primary.down = False
+
+        with patch("sqldeps.circuit_breaker.time.monotonic", return_value=10.0):
+            assert json.loads(extractor._query_llm("prompt"))["dependencies"] == {
+                "secondary": []
+            }
+        with patch("sqldeps.circuit_breaker.time.monotonic", return_value=30.0):
+            assert json.loads(extractor._query_llm("prompt"))["dependencies"] == {
+                "primary": []
+            }
+        assert extractor.failover_stats == {"primary": 1, "secondary": 2}
+
+    def test_probe_not_claimed_when_unused(self, chain: tuple) -> None:
+        """Test a fallback's probe is kept until a request is sent to it."""
+        primary, secondary = chain
+        primary.down = secondary.down = True
+        extractor = FailoverExtractor(
+            [primary, secondary], failure_threshold=1, reset_timeout=30.0
+        )
+        with (
+            patch("sqldeps.circuit_breaker.time.monotonic", return_value=0.0),
+            pytest.raises(ServiceUnavailableError),
+        ):
+            extractor._query_llm("prompt")
+        primary.down = secondary.down = False
+
+        # The primary recovers: its probe answers and the fallback is untouched
+        with patch("sqldeps.circuit_breaker.time.monotonic", return_value=30.0):
+            extractor._query_llm("prompt")
+        assert [b.state for b in extractor.breakers] == ["closed", "open"]
+
+        # The primary fails again: the fallback gets its probe
+        primary.down = True
+        with patch("sqldeps.circuit_breaker.time.monotonic", return_value=31.0):
+            response = extractor._query_llm("prompt")
+        assert json.loads(response)["dependencies"] == {"secondary": []}
+        assert extractor.breakers[1].state == "closed"
+
+    def test_fatal_errors_do_not_open_circuit(self, chain: tuple) -> None:
+        """Test request errors fail over without counting against the provider."""
+        primary, secondary = chain
+        primary.down = True
+        primary.error = BadRequestError
+        extractor = FailoverExtractor([primary, secondary], failure_threshold=1)
+
+        for _ in range(3):
+            extractor._query_llm("prompt")
+
+        assert primary.calls == 3
+        assert secondary.calls == 3
+        assert extractor.breakers[0].state == "closed"
+
+    def test_cancelled_probe_released(self, chain: tuple) -> None:
+        """Test a cancelled probe does not keep the provider rejected."""
+        primary, secondary = chain
+        primary.down = True
+        extractor = FailoverExtractor(
+            [primary, secondary], failure_threshold=1, reset_timeout=0.0
+        )
+        extractor._query_llm("prompt")
+        primary.down = False
+
+        async def hang(prompt: str) -> str:
+            await asyncio.Event().wait()
+
+        async def cancel_probe() -> None:
+            primary._aquery_llm = hang
+            task = asyncio.ensure_future(extractor._aquery_llm("prompt"))
+            await asyncio.sleep(0.01)
+            assert extractor.breakers[0].state == "half_open"
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(cancel_probe())
+        del primary._aquery_llm
+        result = asyncio.run(extractor.aextract_from_query("SELECT 1"))
+
+        assert result.model == "primary"
+        assert extractor.breakers[0].state == "closed"
+
+    def test_all_providers_down(self, chain: tuple) -> None:
+        """Test all providers are tried when every circuit is open."""
+        primary, secondary = chain
+        primary.down = secondary.down = True
+        extractor = FailoverExtractor([primary, secondary], failure_threshold=1)
+
+        for _ in range(2):
+            with pytest.raises(ServiceUnavailableError):
+                extractor._query_llm("prompt")
+
+        assert primary.calls == secondary.calls == 2
+
+    def test_afails_over(self, chain: tuple) -> None:
+        """Test the async path fails over to the next extractor."""
+        primary, secondary = chain
+        primary.down = True
+        extractor = FailoverExtractor([primary, secondary])
+
+        result = asyncio.run(extractor.aextract_from_query("SELECT 1"))
+
+        assert result.dependencies == {"secondary": []}
+        assert result.model == "secondary"
+
+    def test_process_executor_uses_threads(self, chain: tuple) -> None:
+        """Test the process executor falls back to threads."""
+        extractor = FailoverExtractor(list(chain))
+
+        with patch.object(
+            BaseSQLExtractor, "_process_files_in_parallel", return_value={}
+        ) as mock_parallel:
+            extractor._process_files_in_parallel([Path("a.sql")], executor="process")
+
+        assert mock_parallel.call_args[1]["executor"] == "thread"
+
+
+def test_create_failover_extractor() -> None:
+    """Test creating a failover extractor from frameworks and models."""
+    with patch("sqldeps.llm_parsers.create_extractor") as mock_create:
+        mock_create.side_effect = lambda framework, model, *args, **kwargs: (
+            FlakyLLMExtractor(model or f"{framework}-default")
+        )
+        extractor = create_failover_extractor(
+            [("openai", "gpt-4o"), ("groq", None)], compact=True
+        )
+
+    assert [e.model for e in extractor.extractors] == ["gpt-4o", "groq-default"]
+    assert mock_create.call_args[1] == {"compact": True}
+
+
+def test_create_failover_extractor_base_url() -> None:
+    """Test the base URL only goes to the openai-compatible frameworks."""
+    with patch("sqldeps.llm_parsers.create_extractor") as mock_create:
+        mock_create.side_effect = lambda framework, model, *args, **kwargs: (
+            FlakyLLMExtractor(model or f"{framework}-default")
+        )
+        create_failover_extractor(
+            [("openai-compatible", "qwen"), ("openai", "gpt-4o")],
+            base_url="http://localhost:8000/v1",
+        )
+
+    assert [c.kwargs for c in mock_create.call_args_list] == [
+        {"base_url": "http://localhost:8000/v1"},
+        {},
+    ]
+
+
+def test_create_failover_extractor_empty_chain() -> None:
+    """Test an empty chain is rejected."""
+    with pytest.raises(ValueError, match="at least one framework"):
+        create_failover_extractor([])
@@ -0,0 +1,190 @@
+"""Unit tests for HedgedExtractor.
+
+This module tests hedge requests sent when LLM requests are slow.
+"""
+
+import asyncio
+import json
+import time
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from sqldeps.llm_parsers import BaseSQLExtractor, FailoverExtractor, HedgedExtractor
+from sqldeps.rate_limiter import RateLimiter
+
+
+def llm_response(table: str) -> str:
+    """Create a response depending on a single table."""
+    return json.dumps({"dependencies": {table: []}, "outputs": {}})
+
+
+class SlowLLMExtractor(BaseSQLExtractor):
+    """LLM extractor answering after a fixed delay."""
+
+    def __init__(
+        self, model: str = "fake-model", delay: float = 0.0, **kwargs: object
+    ) -> None:
+        """Initialize the fake extractor."""
+        super().__init__(model, **kwargs)
+        self.delay = delay
+        self.calls = 0
+
+    def _query_llm(self, prompt: str) -> str:
+        """Wait for the delay and answer with the model name as table."""
+        self.calls += 1
+        time.sleep(self.delay)
+        return llm_response(self.model)
+
+    async def _aquery_llm(self, prompt: str) -> str:
+        """Asynchronously wait for the delay and answer."""
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return llm_response(self.model)
+
+
+def failing_over(delay: float = 0.0) -> FailoverExtractor:
+    """Create a failover chain whose primary provider is down."""
+    down = SlowLLMExtractor(model="down")
+    error = RuntimeError("Service unavailable")
+    error.status_code = 503
+    down._query_llm = MagicMock(side_effect=error)
+    down._aquery_llm = MagicMock(side_effect=error)
+    return FailoverExtractor([down, SlowLLMExtractor(model="backup", delay=delay)])
+
+
+def warmed_up(extractor: HedgedExtractor, latency: float = 0.01) -> HedgedExtractor:
+    """Fill the latency history so that hedging is enabled."""
+    extractor._latencies.extend([latency] * extractor.min_samples)
+    return extractor
+
+
+class TestHedgedExtractor:
+    """Test suite for HedgedExtractor."""
+
+    def test_initialization(self) -> None:
+        """Test the hedged extractor mirrors the wrapped extractor."""
+        primary = SlowLLMExtractor(chunk_token_limit=1000)
+        extractor = HedgedExtractor(primary)
+
+        assert extractor.framework == "hedged"
+        assert extractor.model == "fake-model"
+        assert extractor.chunk_token_limit == 1000
+        assert extractor.hedge_extractor is primary
+        assert extractor.hedge_delay() is None
+
+    def test_invalid_percentile(self) -> None:
+        """Test percentiles outside 1-99 are rejected."""
+        with pytest.raises(ValueError, match="Invalid percentile"):
+            HedgedExtractor(SlowLLMExtractor(), percentile=100)
+
+    def test_hedge_delay_learned(self) -> None:
+        """Test the hedge delay is the latency percentile of the run."""
+        extractor = HedgedExtractor(SlowLLMExtractor(), percentile=50, min_samples=3)
+        extractor._latencies.extend([1.0, 2.0, 3.0, 4.0, 100.0])
+
+        assert extractor.hedge_delay() == pytest.approx(3.0)
+
+    def test_no_hedge_before_min_samples(self) -> None:
+        """Test requests are not hedged until enough latencies are known."""
+        primary = SlowLLMExtractor(delay=0.05)
+        extractor = HedgedExtractor(primary, min_samples=5)
+
+        extractor.extract_from_query("SELECT 1")
+
+        assert primary.calls == 1
+        assert extractor.hedge_stats == {"requests": 1, "hedged": 0, "won": 0}
+        assert len(extractor._latencies) == 1
+
+    def test_hedge_wins(self) -> None:
+        """Test a slow request is hedged and the first answer is used."""
+        primary = SlowLLMExtractor(model="primary", delay=0.5)
+        secondary = SlowLLMExtractor(model="secondary")
+        extractor = warmed_up(HedgedExtractor(primary, secondary))
+
+        result = extractor.extract_from_query("SELECT 1")
+
+        assert result.dependencies == {"secondary": []}
+        assert extractor.hedge_stats == {"requests": 1, "hedged": 1, "won": 1}
+
+    def test_fast_request_not_hedged(self) -> None:
+        """Test requests faster than the percentile are not hedged."""
+        primary = SlowLLMExtractor(model="primary")
+        secondary = SlowLLMExtractor(model="secondary")
+        extractor = warmed_up(HedgedExtractor(primary, secondary), latency=1.0)
+
+        result = extractor.extract_from_query("SELECT 1")
+
+        assert result.dependencies == {"primary": []}
+        assert secondary.calls == 0
+
+    def test_hedge_counts_against_rate_limit(self) -> None:
+        """Test hedges are skipped when the rate limit is reached."""
+        primary = SlowLLMExtractor(model="primary", delay=0.1)
+        secondary = SlowLLMExtractor(model="secondary")
+        extractor = warmed_up(HedgedExtractor(primary, secondary))
+        extractor.rate_limiter = RateLimiter(rpm=1)
+        extractor.rate_limiter.wait_if_needed()
+
+        result = extractor.extract_from_query("SELECT 1")
+
+        assert result.dependencies == {"primary": []}
+        assert secondary.calls == 0
+        assert extractor.hedge_stats["hedged"] == 0
+
+    def test_hedge_failure_falls_back_to_primary(self) -> None:
+        """Test a failed hedge request does not fail the query."""
+        primary = SlowLLMExtractor(model="primary", delay=0.1)
+        secondary = SlowLLMExtractor(model="secondary")
+        secondary._query_llm = MagicMock(side_effect=RuntimeError("boom"))
+        extractor = warmed_up(HedgedExtractor(primary, secondary))
+
+        result = extractor.extract_from_query("SELECT 1")
+
+        assert result.dependencies == {"primary": []}
+        assert extractor.hedge_stats == {"requests": 1, "hedged": 1, "won": 0}
+
+    def test_tags_model_of_failover(self) -> None:
+        """Test profiles are tagged with the model a wrapped failover used."""
+        extractor = HedgedExtractor(failing_over())
+
+        assert extractor.extract_from_query("SELECT 1").model == "backup"
+        result = asyncio.run(extractor.aextract_from_query("SELECT 1"))
+        assert result.model == "backup"
+
+    def test_hedge_tags_model_of_failover(self) -> None:
+        """Test a winning hedge is tagged with the model its failover used."""
+        primary = SlowLLMExtractor(model="primary", delay=0.5)
+        extractor = warmed_up(HedgedExtractor(primary, failing_over()))
+
+        result = extractor.extract_from_query("SELECT 1")
+
+        assert result.model == "backup"
+        assert extractor.hedge_stats["won"] == 1
+
+    def test_ahedge_cancels_loser(self) -> None:
+        """Test the async path cancels the slower request."""
+        primary = SlowLLMExtractor(model="primary", delay=10)
+        secondary = SlowLLMExtractor(model="secondary")
+        extractor = warmed_up(HedgedExtractor(primary, secondary))
+
+        started = time.perf_counter()
+        result = asyncio.run(extractor.aextract_from_query("SELECT 1"))
+
+        assert result.dependencies == {"secondary": []}
+        assert time.perf_counter() - started < 5
+        assert extractor.hedge_stats["won"] == 1
+        # The cancelled request still counts in the latency history
+        assert len(extractor._latencies) == extractor.min_samples + 1
+
+    def test_process_executor_uses_threads(self) -> None:
+        """Test the process executor falls back to threads."""
+        extractor = HedgedExtractor(SlowLLMExtractor())
+
+        with patch.object(
+            BaseSQLExtractor, "_process_files_in_parallel", return_value={}
+        ) as mock_parallel:
+            extractor._process_files_in_parallel([Path("a.sql")], executor="process")
+
+        assert mock_parallel.call_args[1]["executor"] == "thread"
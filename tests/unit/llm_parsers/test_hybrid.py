@@ -0,0 +1,123 @@
+"""Unit tests for HybridExtractor.
+
+This module tests the routing between static analysis and the LLM.
+"""
+
+import asyncio
+import json
+from pathlib import Path
+
+from sqldeps.llm_parsers import BaseSQLExtractor, HybridExtractor
+
+LLM_RESPONSE = json.dumps(
+    {"dependencies": {"events": ["payload"]}, "outputs": {"audit": []}}
+)
+
+SCRIPT = """
+CREATE TEMP TABLE tmp AS SELECT id, amount FROM orders;
+DO $$ BEGIN EXECUTE 'INSERT INTO audit SELECT payload FROM events'; END $$;
+INSERT INTO report (id, amount) SELECT id, amount FROM tmp;
+"""
+
+
+class FakeLLMExtractor(BaseSQLExtractor):
+    """LLM extractor returning a fixed response and recording its prompts."""
+
+    def __init__(self, model: str = "fake-model", **kwargs: object) -> None:
+        """Initialize the fake extractor."""
+        super().__init__(model, **kwargs)
+        self.prompts_sent: list[str] = []
+
+    def _query_llm(self, prompt: str) -> str:
+        """Record the prompt and return the fixed response."""
+        self.prompts_sent.append(prompt)
+        return LLM_RESPONSE
+
+
+class TestHybridExtractor:
+    """Test suite for HybridExtractor."""
+
+    def test_initialization(self) -> None:
+        """Test the hybrid extractor mirrors the wrapped extractor."""
+        llm = FakeLLMExtractor(chunk_token_limit=1000)
+        extractor = HybridExtractor(llm)
+
+        assert extractor.framework == "hybrid"
+        assert extractor.model == "fake-model"
+        assert extractor.chunk_token_limit == 1000
+        assert extractor.routing_stats == {"static": 0, "llm": 0}
+
+    def test_fully_static_query(self) -> None:
+        """Test resolved queries never reach the LLM."""
+        llm = FakeLLMExtractor()
+        extractor = HybridExtractor(llm)
+
+        result = extractor.extract_from_query("SELECT id FROM users")
+
+        assert result.dependencies == {"users": ["id"]}
+        assert llm.prompts_sent == []
+        assert extractor.routing_stats == {"static": 1, "llm": 0}
+
+    def test_mixed_query(self) -> None:
+        """Test only unresolved statements are sent to the LLM."""
+        llm = FakeLLMExtractor()
+        extractor = HybridExtractor(llm)
+
+        result = extractor.extract_from_query(SCRIPT)
+
+        assert len(llm.prompts_sent) == 1
+        assert "EXECUTE" in llm.prompts_sent[0]
+        assert "CREATE TEMP TABLE" not in llm.prompts_sent[0]
+        assert extractor.routing_stats == {"static": 2, "llm": 1}
+        assert result.dependencies == {
+            "events": ["payload"],
+            "orders": ["amount", "id"],
+            "report": ["amount", "id"],
+        }
+        assert result.outputs == {"audit": [], "report": ["amount", "id"]}
+
+    def test_aextract_from_query(self) -> None:
+        """Test asynchronous extraction matches the synchronous result."""
+        extractor = HybridExtractor(FakeLLMExtractor())
+
+        result = asyncio.run(extractor.aextract_from_query(SCRIPT))
+
+        assert result == HybridExtractor(FakeLLMExtractor()).extract_from_query(SCRIPT)
+
+    def test_extract_from_queries(self) -> None:
+        """Test batched extraction sends unresolved statements in one request."""
+        llm = FakeLLMExtractor()
+        extractor = HybridExtractor(llm)
+        llm_batch_response = json.dumps(
+            {
+                "file_1": json.loads(LLM_RESPONSE),
+                "file_2": {"dependencies": {"t": []}, "outputs": {}},
+            }
+        )
+        llm._query_llm = lambda prompt: llm_batch_response
+
+        results = extractor.extract_from_queries(
+            {
+                "a": SCRIPT,
+                "b": "SELECT id FROM users",
+                "c": "SELECT id, name FROM t, u",
+            }
+        )
+
+        assert results["a"].outputs == {"audit": [], "report": ["amount", "id"]}
+        assert results["b"].dependencies == {"users": ["id"]}
+        assert results["c"].dependencies == {"t": []}
+        assert extractor.routing_stats == {"static": 3, "llm": 2}
+
+    def test_extract_from_folder_process_uses_threads(self, tmp_path: Path) -> None:
+        """Test the process executor falls back to threads."""
+        (tmp_path / "a.sql").write_text("SELECT id FROM users")
+        (tmp_path / "b.sql").write_text(SCRIPT)
+        extractor = HybridExtractor(FakeLLMExtractor())
+
+        results = extractor.extract_from_folder(
+            tmp_path, n_workers=2, executor="process", use_cache=False
+        )
+
+        assert {Path(k).name for k in results} == {"a.sql", "b.sql"}
+        assert extractor.routing_stats == {"static": 3, "llm": 1}
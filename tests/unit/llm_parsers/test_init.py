@@ -4,8 +4,12 @@ This module tests the factory function and other initialization
 logic of the llm_parsers package.
 """
 
+import subprocess
+import sys
+
 import pytest
 
+import sqldeps.llm_parsers
 from sqldeps.llm_parsers import create_extractor
 
 
@@ -17,3 +21,22 @@ class TestLLMParsersInit:
         # No need to patch anything for this test
         with pytest.raises(ValueError, match="Unsupported framework"):
             create_extractor(framework="invalid_framework")
+
+    def test_provider_classes_lazy(self) -> None:
+        """Test provider SDKs are only imported when a provider is used."""
+        code = (
+            "import sys, sqldeps.llm_parsers; "
+            "print('openai' in sys.modules, 'litellm' in sys.modules); "
+            "from sqldeps.llm_parsers import OpenaiExtractor; "
+            "print('openai' in sys.modules)"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        )
+
+        assert result.stdout.split() == ["False", "False", "True"]
+
+    def test_unknown_attribute(self) -> None:
+        """Test unknown package attributes raise AttributeError."""
+        with pytest.raises(AttributeError, match="UnknownExtractor"):
+            sqldeps.llm_parsers.UnknownExtractor  # noqa: B018
@@ -0,0 +1,64 @@
+"""Unit tests for LiteLlmExtractor.
+
+This module tests the LiteLLM-specific LLM implementation.
+"""
+
+from unittest.mock import patch
+
+from sqldeps.llm_parsers.litellm import LiteLlmExtractor
+
+
+class TestLiteLlmExtractor:
+    """Test suite for LiteLlmExtractor."""
+
+    def test_build_messages_cache_control(self) -> None:
+        """Test the system prompt is marked for caching when supported."""
+        with patch(
+            "sqldeps.llm_parsers.litellm.supports_prompt_caching", return_value=True
+        ):
+            extractor = LiteLlmExtractor(model="anthropic/claude-sonnet-4-20250514")
+
+        messages = extractor._build_messages("SELECT 1")
+
+        assert messages[0]["content"] == [
+            {
+                "type": "text",
+                "text": extractor.prompts["system_prompt"],
+                "cache_control": {"type": "ephemeral"},
+            }
+        ]
+        assert messages[1] == {"role": "user", "content": "SELECT 1"}
+
+    def test_build_messages_without_cache_control(self) -> None:
+        """Test no marker is added when caching is unsupported or disabled."""
+        with patch(
+            "sqldeps.llm_parsers.litellm.supports_prompt_caching", return_value=True
+        ):
+            disabled = LiteLlmExtractor(model="openai/gpt-4.1", prompt_cache=False)
+        with patch(
+            "sqldeps.llm_parsers.litellm.supports_prompt_caching",
+            side_effect=Exception("unknown model"),
+        ):
+            unknown = LiteLlmExtractor(model="custom/model")
+
+        for extractor in (disabled, unknown):
+            system = extractor._build_messages("SELECT 1")[0]
+            assert system["content"] == extractor.prompts["system_prompt"]
+
+    def test_response_params_schema_support(self) -> None:
+        """Test the response schema is only sent to models supporting it."""
+        with patch(
+            "sqldeps.llm_parsers.litellm.supports_response_schema",
+            side_effect=lambda model: model == "openai/gpt-4.1",
+        ):
+            supported = LiteLlmExtractor(model="openai/gpt-4.1", structured_output=True)
+            unsupported = LiteLlmExtractor(
+                model="groq/llama-3.3-70b-versatile", structured_output=True
+            )
+
+        assert supported._response_params("SELECT 1")["response_format"]["type"] == (
+            "json_schema"
+        )
+        assert unsupported._response_params("SELECT 1") == {
+            "response_format": {"type": "json_object"}
+        }
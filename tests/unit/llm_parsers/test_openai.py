@@ -3,7 +3,8 @@
 This module tests the OpenAI-specific LLM implementation.
 """
 
-from unittest.mock import MagicMock, patch
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
@@ -59,3 +60,69 @@ class TestOpenaiExtractor:
             assert len(call_args["messages"]) == 2
             assert call_args["messages"][0]["role"] == "system"
             assert call_args["messages"][1]["role"] == "user"
+
+    def test_query_llm_structured_output(self) -> None:
+        """Test the strict response schema and output token limit are sent."""
+        with patch.dict("os.environ", {"OPENAI_API_KEY": "fake-key"}):
+            extractor = OpenaiExtractor(
+                model="gpt-4o", structured_output=True, auto_max_tokens=True
+            )
+
+            mock_response = MagicMock()
+            mock_response.choices = [MagicMock()]
+            mock_response.choices[
+                0
+            ].message.content = (
+                '{"dependencies": [{"table": "test", "columns": []}], "outputs": []}'
+            )
+            extractor.client = MagicMock()
+            extractor.client.chat.completions.create.return_value = mock_response
+
+            profile = extractor._process_response(
+                extractor._query_llm("SELECT * FROM test")
+            )
+
+            call_args = extractor.client.chat.completions.create.call_args[1]
+            assert call_args["response_format"]["type"] == "json_schema"
+            assert call_args["response_format"]["json_schema"]["strict"] is True
+            assert "max_tokens" not in call_args
+            assert call_args["max_completion_tokens"] > 256
+            assert profile.dependencies == {"test": []}
+
+    def test_aquery_llm(self) -> None:
+        """Test asynchronous LLM query uses the async client."""
+        with patch.dict("os.environ", {"OPENAI_API_KEY": "fake-key"}):
+            extractor = OpenaiExtractor(model="gpt-4o")
+
+            mock_response = MagicMock()
+            mock_response.choices = [MagicMock()]
+            mock_response.choices[
+                0
+            ].message.content = '{"dependencies": {}, "outputs": {}}'
+
+            mock_client = MagicMock()
+            mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
+
+            with patch.object(
+                extractor, "_create_async_client", return_value=mock_client
+            ):
+                result = asyncio.run(extractor._aquery_llm("SELECT * FROM test"))
+
+            assert result == '{"dependencies": {}, "outputs": {}}'
+            call_args = mock_client.chat.completions.create.call_args[1]
+            assert call_args["model"] == "gpt-4o"
+            assert call_args["response_format"] == {"type": "json_object"}
+
+    def test_async_client_is_bound_to_event_loop(self) -> None:
+        """Test a new async client is created for each event loop."""
+        with patch.dict("os.environ", {"OPENAI_API_KEY": "fake-key"}):
+            extractor = OpenaiExtractor(model="gpt-4o")
+
+            async def get_client() -> object:
+                return extractor._get_async_client(), extractor._get_async_client()
+
+            first, same = asyncio.run(get_client())
+            second, _ = asyncio.run(get_client())
+
+            assert first is same
+            assert first is not second
@@ -0,0 +1,190 @@
+"""Unit tests for OpenaiCompatibleExtractor.
+
+This module tests the extractor for OpenAI-compatible endpoints against a local
+stand-in server.
+"""
+
+import asyncio
+import json
+import threading
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from sqldeps.llm_parsers import BaseSQLExtractor, create_extractor
+from sqldeps.llm_parsers.openai_compatible import OpenaiCompatibleExtractor
+
+
+class ChatCompletionsHandler(BaseHTTPRequestHandler):
+    """Stand-in for the chat completions route of an OpenAI-compatible server.
+
+    The model answers with the first word after FROM in the user prompt as
+    dependency, and the server records the requests it received.
+    """
+
+    def do_POST(self) -> None:
+        """Answer a chat completion request."""
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests.append((self.path, body))
+
+        prompt = body["messages"][-1]["content"]
+        table = prompt.split("FROM ")[1].split()[0].strip(";")
+        content = json.dumps({"dependencies": {table: []}, "outputs": {}})
+        payload = json.dumps(
+            {
+                "id": "chatcmpl-1",
+                "object": "chat.completion",
+                "created": 0,
+                "model": body["model"],
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": 10,
+                    "completion_tokens": 5,
+                    "total_tokens": 15,
+                },
+            }
+        ).encode()
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format: str, *args: object) -> None:
+        """Silence request logs."""
+
+
+@pytest.fixture
+def server() -> Iterator[ThreadingHTTPServer]:
+    """Run a local OpenAI-compatible server.
+
+    Yields:
+        ThreadingHTTPServer: Server with the received requests in `requests`
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ChatCompletionsHandler)
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def base_url(server: ThreadingHTTPServer) -> str:
+    """Get the base URL of the local server."""
+    return f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+class TestOpenaiCompatibleExtractor:
+    """Test suite for OpenaiCompatibleExtractor."""
+
+    def test_initialization(self) -> None:
+        """Test the endpoint, timeouts and connection pool are configured."""
+        extractor = OpenaiCompatibleExtractor(
+            model="qwen",
+            base_url="http://localhost:8000/v1",
+            timeout=30,
+            connect_timeout=2,
+        )
+
+        assert extractor.framework == "openai-compatible"
+        assert str(extractor.client.base_url) == "http://localhost:8000/v1/"
+        assert extractor.timeout.read == 30
+        assert extractor.timeout.connect == 2
+        assert extractor.max_connections == 64
+
+    def test_initialization_from_environment(self) -> None:
+        """Test the base URL and API key are read from the environment."""
+        env = {
+            "OPENAI_COMPATIBLE_BASE_URL": "http://gateway/v1",
+            "OPENAI_COMPATIBLE_API_KEY": "secret",
+        }
+        with patch.dict("os.environ", env):
+            extractor = create_extractor("openai-compatible", model="qwen")
+
+        assert str(extractor.client.base_url) == "http://gateway/v1/"
+        assert extractor.client.api_key == "secret"
+
+    def test_cache_namespace(self) -> None:
+        """Test results of different endpoints are cached apart."""
+        local = OpenaiCompatibleExtractor(model="qwen", base_url="http://localhost/v1")
+        gateway = OpenaiCompatibleExtractor(model="qwen", base_url="http://gateway/v1")
+
+        assert local.cache_namespace != gateway.cache_namespace
+        assert (
+            local.cache_namespace
+            == OpenaiCompatibleExtractor(
+                model="qwen", base_url="http://localhost/v1"
+            ).cache_namespace
+        )
+
+    def test_missing_settings(self) -> None:
+        """Test the model and base URL are required."""
+        with patch.dict("os.environ", clear=True):
+            with pytest.raises(ValueError, match="No model provided"):
+                create_extractor("openai-compatible", base_url="http://gateway/v1")
+            with pytest.raises(ValueError, match="No base URL provided"):
+                OpenaiCompatibleExtractor(model="qwen")
+
+    def test_extract_from_server(self, server: ThreadingHTTPServer) -> None:
+        """Test a query is extracted through the local server."""
+        extractor = OpenaiCompatibleExtractor(model="qwen", base_url=base_url(server))
+
+        result = extractor.extract_from_query("SELECT id FROM users")
+
+        assert result.dependencies == {"users": []}
+        path, body = server.requests[0]
+        assert path == "/v1/chat/completions"
+        assert body["model"] == "qwen"
+        assert extractor.usage_stats["prompt_tokens"] == 10
+
+    def test_aextract_from_server(self, server: ThreadingHTTPServer) -> None:
+        """Test the async client targets the local server."""
+        extractor = OpenaiCompatibleExtractor(model="qwen", base_url=base_url(server))
+
+        result = asyncio.run(extractor.aextract_from_query("SELECT id FROM orders"))
+
+        assert result.dependencies == {"orders": []}
+
+    @pytest.mark.parametrize("executor", ["process", "thread", "async"])
+    def test_extract_folder_concurrently(
+        self, server: ThreadingHTTPServer, tmp_path: Path, executor: str
+    ) -> None:
+        """Test a folder is extracted with concurrent requests to the server."""
+        for i in range(8):
+            (tmp_path / f"query_{i}.sql").write_text(f"SELECT * FROM table_{i}")
+        extractor = OpenaiCompatibleExtractor(
+            model="qwen", base_url=base_url(server), max_connections=8
+        )
+
+        results = extractor.extract_from_folder(
+            tmp_path, n_workers=8, rpm=0, use_cache=False, executor=executor
+        )
+
+        assert len(server.requests) == 8
+        assert {t for r in results.values() for t in r.dependencies} == {
+            f"table_{i}" for i in range(8)
+        }
+
+    def test_process_executor_uses_threads(self) -> None:
+        """Test the process executor falls back to threads."""
+        extractor = OpenaiCompatibleExtractor(
+            model="qwen", base_url="http://localhost:8000/v1"
+        )
+
+        with patch.object(
+            BaseSQLExtractor, "_process_files_in_parallel", return_value={}
+        ) as mock_parallel:
+            extractor._process_files_in_parallel([Path("a.sql")], executor="process")
+
+        assert mock_parallel.call_args[1]["executor"] == "thread"
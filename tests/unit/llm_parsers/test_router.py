@@ -0,0 +1,160 @@
+"""Unit tests for RouterExtractor.
+
+This module tests the routing of SQL inputs to models by complexity.
+"""
+
+import asyncio
+import json
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from sqldeps.llm_parsers import BaseSQLExtractor, FailoverExtractor, RouterExtractor
+
+PROCEDURE = """
+CREATE FUNCTION refresh() RETURNS void AS $$
+BEGIN
+    EXECUTE 'INSERT INTO report SELECT * FROM sales';
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+class ModelExtractor(BaseSQLExtractor):
+    """LLM extractor answering with its model name as table."""
+
+    def __init__(self, model: str, **kwargs: object) -> None:
+        """Initialize the fake extractor."""
+        super().__init__(model, **kwargs)
+        self.prompts_received = []
+
+    def _query_llm(self, prompt: str) -> str:
+        """Answer with the model name as table."""
+        self.prompts_received.append(prompt)
+        return json.dumps({"dependencies": {self.model: []}, "outputs": {}})
+
+
+def router(**kwargs: object) -> RouterExtractor:
+    """Create a router over a small and a large fake model."""
+    return RouterExtractor(
+        ModelExtractor("small"), ModelExtractor("large", chunk_token_limit=0), **kwargs
+    )
+
+
+class TestRouterExtractor:
+    """Test suite for RouterExtractor."""
+
+    def test_initialization(self) -> None:
+        """Test the router mirrors the complex extractor."""
+        extractor = router()
+
+        assert extractor.framework == "router"
+        assert extractor.model == "large"
+        assert extractor.chunk_token_limit == 0
+
+    def test_cache_namespace(self) -> None:
+        """Test the cache namespace depends on the models of both tiers."""
+        other = RouterExtractor(ModelExtractor("tiny"), ModelExtractor("large"))
+
+        assert router().cache_namespace == router().cache_namespace
+        assert router().cache_namespace != other.cache_namespace
+        assert router().cache_namespace != ModelExtractor("large").cache_namespace
+
+    def test_simple_query_to_small_model(self) -> None:
+        """Test simple queries go to the small model."""
+        extractor = router()
+
+        result = extractor.extract_from_query("SELECT id FROM users")
+
+        assert result.dependencies == {"small": []}
+        assert result.model == "small"
+        assert extractor.tier_stats["simple"]["inputs"] == 1
+
+    def test_complex_query_to_large_model(self) -> None:
+        """Test procedural code and dynamic SQL go to the large model."""
+        extractor = router()
+
+        result = extractor.extract_from_query(PROCEDURE)
+
+        assert result.dependencies == {"large": []}
+        assert extractor.tier_stats["complex"]["inputs"] == 1
+
+    def test_thresholds(self) -> None:
+        """Test the token threshold is configurable."""
+        sql = "SELECT id, name, email FROM users WHERE active"
+
+        assert router().extract_from_query(sql).model == "small"
+        assert router(max_tokens=5).extract_from_query(sql).model == "large"
+
+    def test_async_routing(self) -> None:
+        """Test the async path routes each query."""
+        extractor = router()
+
+        async def extract() -> list:
+            return await asyncio.gather(
+                extractor.aextract_from_query("SELECT 1 FROM t"),
+                extractor.aextract_from_query(PROCEDURE),
+            )
+
+        simple, complex_ = asyncio.run(extract())
+
+        assert simple.model == "small"
+        assert complex_.model == "large"
+
+    def test_tags_model_of_failover(self) -> None:
+        """Test profiles are tagged with the model a failover tier used."""
+        down = ModelExtractor("small")
+        error = RuntimeError("Service unavailable")
+        error.status_code = 503
+        down._query_llm = MagicMock(side_effect=error)
+        simple = FailoverExtractor([down, ModelExtractor("backup")])
+        extractor = RouterExtractor(simple, ModelExtractor("large"))
+
+        result = extractor.extract_from_query("SELECT id FROM users")
+
+        assert result.dependencies == {"backup": []}
+        assert result.model == "backup"
+
+    def test_batch_uses_most_complex_tier(self) -> None:
+        """Test a packed batch goes to the model of its most complex query."""
+        extractor = router()
+        response = json.dumps(
+            {
+                "file_1": {"dependencies": {"a": []}, "outputs": {}},
+                "file_2": {"dependencies": {"b": []}, "outputs": {}},
+            }
+        )
+
+        with patch.object(
+            ModelExtractor, "_query_llm", autospec=True, return_value=response
+        ) as mock_query:
+            results = extractor._extract_batch(
+                {"a.sql": "SELECT 1", "b.sql": PROCEDURE}
+            )
+
+        assert mock_query.call_args[0][0].model == "large"
+        assert results["a.sql"].model == "large"
+
+    def test_tier_report(self) -> None:
+        """Test the report summarizes the inputs and requests of each tier."""
+        extractor = router()
+        extractor.extract_from_query("SELECT 1 FROM t")
+        extractor.extract_from_query("SELECT 2 FROM t")
+        extractor.extract_from_query(PROCEDURE)
+
+        report = extractor.tier_report(cost=False)
+
+        assert report["simple"]["model"] == "small"
+        assert report["simple"]["inputs"] == 2
+        assert report["simple"]["requests"]["requests"] == 2
+        assert report["complex"]["requests"]["requests"] == 1
+
+    def test_process_executor_uses_threads(self) -> None:
+        """Test the process executor falls back to threads."""
+        extractor = router()
+
+        with patch.object(
+            BaseSQLExtractor, "_process_files_in_parallel", return_value={}
+        ) as mock_parallel:
+            extractor._process_files_in_parallel([Path("a.sql")], executor="process")
+
+        assert mock_parallel.call_args[1]["executor"] == "thread"
@@ -0,0 +1,74 @@
+"""Unit tests for StaticExtractor.
+
+This module tests the offline static-analysis extractor.
+"""
+
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from sqldeps.llm_parsers import create_extractor
+from sqldeps.llm_parsers.static import StaticExtractor
+
+
+class TestStaticExtractor:
+    """Test suite for StaticExtractor."""
+
+    def test_create_extractor(self) -> None:
+        """Test the static extractor is available from the factory."""
+        extractor = create_extractor(framework="static")
+
+        assert isinstance(extractor, StaticExtractor)
+        assert extractor.framework == "static"
+        assert extractor.model == "sqlparse"
+
+    def test_extract_from_query(self) -> None:
+        """Test extraction and per-statement analysis of a query."""
+        extractor = StaticExtractor()
+
+        result = extractor.extract_from_query(
+            "SELECT u.id FROM users u; EXECUTE 'SELECT 1';"
+        )
+
+        assert result.dependencies == {"users": ["id"]}
+        assert [a.resolved for a in extractor.last_analysis] == [True, False]
+
+    def test_aextract_from_query(self) -> None:
+        """Test asynchronous extraction matches the synchronous result."""
+        extractor = StaticExtractor()
+        sql = "INSERT INTO t (a) SELECT b FROM s"
+
+        result = asyncio.run(extractor.aextract_from_query(sql))
+
+        assert result == extractor.extract_from_query(sql)
+        assert result.outputs == {"t": ["a"]}
+
+    def test_extract_from_queries(self) -> None:
+        """Test batched extraction never queries an LLM."""
+        extractor = StaticExtractor()
+
+        results = extractor.extract_from_queries(
+            {"a": "SELECT Year FROM sales", "b": "SELECT id FROM users"},
+            token_budget=1000,
+        )
+
+        assert results["a"].dependencies == {"sales": ["Year"]}
+        assert results["b"].dependencies == {"users": ["id"]}
+
+    def test_extract_from_folder_threads(self, tmp_path: Path) -> None:
+        """Test folder extraction with the thread executor."""
+        (tmp_path / "a.sql").write_text("SELECT id FROM users")
+        (tmp_path / "b.sql").write_text("DELETE FROM logs")
+        extractor = StaticExtractor()
+
+        results = extractor.extract_from_folder(
+            tmp_path, n_workers=2, executor="thread", use_cache=False
+        )
+
+        assert {Path(k).name for k in results} == {"a.sql", "b.sql"}
+
+    def test_query_llm_not_available(self) -> None:
+        """Test the static extractor refuses LLM queries."""
+        with pytest.raises(NotImplementedError):
+            StaticExtractor()._query_llm("prompt")
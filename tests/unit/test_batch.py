@@ -0,0 +1,346 @@
+"""Unit tests for batch.py.
+
+This module tests the batch job workflow against a local fake batch endpoint.
+"""
+
+import json
+import re
+import threading
+from collections.abc import Iterator
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+from sqldeps.batch import (
+    _collect_output,
+    build_batch_requests,
+    collect_batches,
+    load_checkpoint,
+    submit_batches,
+    update_batches,
+)
+from sqldeps.cache import file_hashes, load_from_cache
+from sqldeps.llm_parsers import create_extractor
+from sqldeps.llm_parsers.openai_compatible import OpenaiCompatibleExtractor
+
+
+def chat_completion(prompt: str, model: str) -> dict:
+    """Answer a prompt with the first word after FROM as dependency."""
+    table = prompt.split("FROM ")[1].split()[0].strip(";")
+    content = json.dumps({"dependencies": {table: []}, "outputs": {}})
+    return {
+        "id": "chatcmpl-1",
+        "object": "chat.completion",
+        "created": 0,
+        "model": model,
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+    }
+
+
+class BatchHandler(BaseHTTPRequestHandler):
+    """Fake files and batches routes of an OpenAI-compatible batch API.
+
+    Batches are in progress when first retrieved and completed afterwards.
+    Requests whose SQL reads from a `broken` table fail.
+    """
+
+    def _send(self, payload: dict | bytes) -> None:
+        """Send a JSON or binary response."""
+        if isinstance(payload, dict):
+            payload = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _batch(self, batch_id: str) -> dict:
+        """Get the API representation of a batch."""
+        batch = self.server.batches[batch_id]
+        return {
+            "id": batch_id,
+            "object": "batch",
+            "endpoint": "/v1/chat/completions",
+            "input_file_id": batch["input_file_id"],
+            "completion_window": "24h",
+            "created_at": 0,
+            "status": batch["status"],
+            "output_file_id": batch["output_file_id"],
+            "error_file_id": None,
+            "request_counts": batch["request_counts"],
+        }
+
+    def do_POST(self) -> None:
+        """Upload a file or create a batch."""
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        if self.path == "/v1/files":
+            message = BytesParser().parsebytes(
+                f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode() + body
+            )
+            part = next(
+                p
+                for p in message.get_payload()
+                if p.get_param("name", header="content-disposition") == "file"
+            )
+            file_id = f"file-{len(self.server.files)}"
+            self.server.files[file_id] = part.get_payload(decode=True)
+            self._send(
+                {
+                    "id": file_id,
+                    "object": "file",
+                    "bytes": len(self.server.files[file_id]),
+                    "created_at": 0,
+                    "filename": "sqldeps_batch.jsonl",
+                    "purpose": "batch",
+                    "status": "processed",
+                }
+            )
+            return
+
+        request = json.loads(body)
+        batch_id = f"batch-{len(self.server.batches)}"
+        lines = self.server.files[request["input_file_id"]].decode().splitlines()
+        self.server.batches[batch_id] = {
+            "input_file_id": request["input_file_id"],
+            "status": "in_progress",
+            "output_file_id": None,
+            "polls": 0,
+            "lines": [json.loads(line) for line in lines],
+            "request_counts": {"total": len(lines), "completed": 0, "failed": 0},
+        }
+        self._send(self._batch(batch_id))
+
+    def do_GET(self) -> None:
+        """Retrieve a batch or the content of a file."""
+        content = re.fullmatch(r"/v1/files/(.+)/content", self.path)
+        if content:
+            self._send(self.server.files[content.group(1)])
+            return
+
+        batch_id = self.path.rsplit("/", 1)[1]
+        batch = self.server.batches[batch_id]
+        batch["polls"] += 1
+        if batch["polls"] == 2:
+            self._complete(batch)
+        self._send(self._batch(batch_id))
+
+    def _complete(self, batch: dict) -> None:
+        """Answer the requests of a batch into an output file."""
+        results = []
+        for line in batch["lines"]:
+            prompt = line["body"]["messages"][-1]["content"]
+            if "broken" in prompt:
+                response = {"status_code": 500, "body": {"error": "boom"}}
+                batch["request_counts"]["failed"] += 1
+            else:
+                body = chat_completion(prompt, line["body"]["model"])
+                response = {"status_code": 200, "body": body}
+                batch["request_counts"]["completed"] += 1
+            results.append(
+                {"custom_id": line["custom_id"], "response": response, "error": None}
+            )
+        output_id = f"file-{len(self.server.files)}"
+        self.server.files[output_id] = "\n".join(map(json.dumps, results)).encode()
+        batch["output_file_id"] = output_id
+        batch["status"] = "completed"
+
+    def log_message(self, format: str, *args: object) -> None:
+        """Silence request logs."""
+
+
+@pytest.fixture
+def server() -> Iterator[ThreadingHTTPServer]:
+    """Run a local fake batch endpoint.
+
+    Yields:
+        ThreadingHTTPServer: Server with the uploaded files and created batches
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), BatchHandler)
+    server.files = {}
+    server.batches = {}
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def extractor(server: ThreadingHTTPServer) -> OpenaiCompatibleExtractor:
+    """Create an extractor targeting the fake batch endpoint."""
+    return OpenaiCompatibleExtractor(
+        model="qwen", base_url=f"http://127.0.0.1:{server.server_address[1]}/v1"
+    )
+
+
+@pytest.fixture
+def sql_files(tmp_path: Path) -> list[Path]:
+    """Create SQL files, the last one failing in batch jobs."""
+    files = []
+    for table in ["users", "orders", "broken"]:
+        sql_file = tmp_path / f"{table}.sql"
+        sql_file.write_text(f"SELECT id FROM {table}")
+        files.append(sql_file)
+    return files
+
+
+def test_build_batch_requests(
+    extractor: OpenaiCompatibleExtractor, sql_files: list[Path]
+) -> None:
+    """Test batch requests carry the prompts of the regular extraction."""
+    requests = build_batch_requests(extractor, {"file-0": sql_files[0]})
+
+    assert requests[0]["custom_id"] == "file-0"
+    assert requests[0]["url"] == "/v1/chat/completions"
+    body = requests[0]["body"]
+    assert body["model"] == "qwen"
+    assert body["response_format"] == {"type": "json_object"}
+    assert "users" in body["messages"][-1]["content"]
+
+
+def test_batch_workflow(
+    extractor: OpenaiCompatibleExtractor, sql_files: list[Path], tmp_path: Path
+) -> None:
+    """Test jobs are submitted, polled and collected into the cache."""
+    checkpoint_path = tmp_path / "batches.json"
+    cache_dir = tmp_path / "cache"
+
+    jobs = submit_batches(
+        extractor,
+        sql_files,
+        checkpoint_path=checkpoint_path,
+        max_requests=2,
+        cache_dir=cache_dir,
+    )
+
+    assert [len(job["files"]) for job in jobs] == [2, 1]
+    checkpoint = load_checkpoint(checkpoint_path)
+    assert checkpoint["framework"] == "openai-compatible"
+    assert [job["id"] for job in checkpoint["jobs"]] == ["batch-0", "batch-1"]
+
+    # Jobs in progress are not collected
+    assert collect_batches(extractor, checkpoint_path, cache_dir) == {}
+    jobs = update_batches(extractor, checkpoint_path)
+    assert jobs[0]["request_counts"] == {"total": 2, "completed": 2, "failed": 0}
+
+    results = collect_batches(extractor, checkpoint_path, cache_dir)
+
+    assert {Path(f).name: p.dependencies for f, p in results.items()} == {
+        "users.sql": {"users": []},
+        "orders.sql": {"orders": []},
+    }
+    cached = load_from_cache(
+        sql_files[0], cache_dir, namespace=extractor.cache_namespace
+    )
+    assert cached.model == "qwen"
+    assert extractor.usage_stats["prompt_tokens"] == 20
+    assert all(job["collected"] for job in load_checkpoint(checkpoint_path)["jobs"])
+    # Collected jobs are not collected again
+    assert collect_batches(extractor, checkpoint_path, cache_dir) == {}
+
+    # Files without result are submitted again, cached files are skipped
+    jobs = submit_batches(
+        extractor, sql_files, checkpoint_path=checkpoint_path, cache_dir=cache_dir
+    )
+    assert list(jobs[0]["files"].values()) == [str(sql_files[2].resolve())]
+
+
+def test_collect_edited_file(
+    extractor: OpenaiCompatibleExtractor, sql_files: list[Path], tmp_path: Path
+) -> None:
+    """Test results are cached under the content submitted, not the current one."""
+    checkpoint_path = tmp_path / "batches.json"
+    cache_dir = tmp_path / "cache"
+    submitted = file_hashes(sql_files[0])
+
+    jobs = submit_batches(
+        extractor, sql_files[:1], checkpoint_path=checkpoint_path, cache_dir=cache_dir
+    )
+    assert jobs[0]["hashes"] == {"file-0": submitted}
+    sql_files[0].write_text("SELECT id FROM customers")
+    update_batches(extractor, checkpoint_path)
+
+    results = collect_batches(extractor, checkpoint_path, cache_dir)
+
+    assert len(results) == 1
+    namespace = extractor.cache_namespace
+    assert load_from_cache(sql_files[0], cache_dir, namespace=namespace) is None
+    sql_files[0].write_text("SELECT id FROM users")
+    cached = load_from_cache(sql_files[0], cache_dir, namespace=namespace)
+    assert cached.dependencies == {"users": []}
+
+
+def test_collect_malformed_output(
+    extractor: OpenaiCompatibleExtractor, sql_files: list[Path], tmp_path: Path
+) -> None:
+    """Test malformed output lines are counted as failed, not fatal."""
+    job = {
+        "id": "batch-0",
+        "files": {"file-0": str(sql_files[0]), "file-1": str(sql_files[1])},
+    }
+    prompt = extractor._prepare_prompt(sql_files[1].read_text())
+    result = {
+        "custom_id": "file-1",
+        "response": {"status_code": 200, "body": chat_completion(prompt, "qwen")},
+        "error": None,
+    }
+    output = '{"custom_id": "file-0", "resp\n[1, 2]\n' + json.dumps(result)
+
+    results, failed = _collect_output(
+        extractor, job, output, tmp_path / "cache", extractor.cache_namespace
+    )
+
+    assert failed == 2
+    assert {Path(f).name: p.dependencies for f, p in results.items()} == {
+        "orders.sql": {"orders": []}
+    }
+
+
+def test_submit_unsupported_framework(sql_files: list[Path], tmp_path: Path) -> None:
+    """Test frameworks without batch API are rejected."""
+    with pytest.raises(ValueError, match="does not support batch jobs"):
+        submit_batches(
+            create_extractor("static"),
+            sql_files,
+            checkpoint_path=tmp_path / "batches.json",
+        )
+
+
+def test_submit_checkpoint_of_other_model(
+    extractor: OpenaiCompatibleExtractor, sql_files: list[Path], tmp_path: Path
+) -> None:
+    """Test jobs of another model are not mixed in a checkpoint."""
+    checkpoint_path = tmp_path / "batches.json"
+    checkpoint_path.write_text(
+        json.dumps({"framework": "openai", "model": "gpt-4.1", "jobs": []})
+    )
+
+    with pytest.raises(ValueError, match=r"holds openai/gpt-4\.1 jobs"):
+        submit_batches(extractor, sql_files, checkpoint_path=checkpoint_path)
+
+
+def test_submit_checkpoint_of_other_settings(
+    extractor: OpenaiCompatibleExtractor, sql_files: list[Path], tmp_path: Path
+) -> None:
+    """Test jobs of another cache namespace or cache key are not mixed."""
+    checkpoint_path = tmp_path / "batches.json"
+    submit_batches(extractor, sql_files[:1], checkpoint_path=checkpoint_path)
+
+    extractor.formatting = "off"
+    with pytest.raises(ValueError, match=r"other settings \(cache_namespace\)"):
+        submit_batches(extractor, sql_files[1:], checkpoint_path=checkpoint_path)
+
+    extractor.formatting = "full"
+    extractor.cache_key = "canonical"
+    with pytest.raises(ValueError, match=r"other settings \(cache_key\)"):
+        submit_batches(extractor, sql_files[1:], checkpoint_path=checkpoint_path)
+    assert len(load_checkpoint(checkpoint_path)["jobs"]) == 1
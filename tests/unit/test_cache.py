@@ -8,7 +8,18 @@ import json
 from pathlib import Path
 from unittest.mock import MagicMock, mock_open, patch
 
-from sqldeps.cache import cleanup_cache, get_cache_path, load_from_cache, save_to_cache
+import pytest
+
+from sqldeps.cache import (
+    cache_namespace,
+    cleanup_cache,
+    flush_cache,
+    get_cache_path,
+    load_from_cache,
+    lookup_cache,
+    migrate_cache,
+    save_to_cache,
+)
 from sqldeps.models import SQLProfile
 
 
@@ -161,3 +172,161 @@ def test_cleanup_cache_nonexistent() -> None:
 
         # Verify the result
         assert result is True  # Should return True when directory doesn't exist
+
+
+def test_save_load_cache_model(tmp_path: Path) -> None:
+    """Test the model that answered is stored with the cached profile."""
+    profile = SQLProfile(dependencies={"t": ["c"]}, outputs={}, model="gpt-4o")
+
+    with patch("sqldeps.cache.get_cache_path", return_value=tmp_path / "x.json"):
+        save_to_cache(profile, "test.sql")
+        loaded = load_from_cache("test.sql")
+
+    assert loaded == profile
+    assert loaded.model == "gpt-4o"
+
+
+def test_canonical_cache_key(tmp_path: Path) -> None:
+    """Test canonical keys survive cosmetic edits but not semantic ones."""
+    sql_file = tmp_path / "query.sql"
+    sql_file.write_text("select id from users where id = 1")
+    profile = SQLProfile(dependencies={"users": ["id"]}, outputs={})
+    cache_dir = tmp_path / "cache"
+
+    save_to_cache(profile, sql_file, cache_dir, key="canonical")
+    assert lookup_cache(sql_file, cache_dir, key="canonical") == (profile, False)
+
+    # Reformatted and commented: hit, counted as an edited file
+    sql_file.write_text("-- Active users\nSELECT id\nFROM users\nWHERE id = 1\n")
+    assert load_from_cache(sql_file, cache_dir) is None
+    assert lookup_cache(sql_file, cache_dir, key="canonical") == (profile, True)
+
+    # Other literal: miss, unless literals are normalized
+    sql_file.write_text("SELECT id FROM users WHERE id = 2")
+    assert load_from_cache(sql_file, cache_dir, key="canonical") is None
+    save_to_cache(profile, sql_file, cache_dir, key="canonical-literals")
+    sql_file.write_text("SELECT id FROM users WHERE id = 3")
+    assert load_from_cache(sql_file, cache_dir, key="canonical-literals") == profile
+
+
+def test_canonical_cache_key_computed_once(tmp_path: Path) -> None:
+    """Test the canonical key of an unchanged file is computed once."""
+    sql_file = tmp_path / "once.sql"
+    sql_file.write_text("SELECT id FROM users")
+
+    with patch(
+        "sqldeps.cache.canonicalize_sql", side_effect=lambda sql, **kwargs: sql
+    ) as mock_canonicalize:
+        first = get_cache_path(sql_file, tmp_path, key="canonical")
+        second = get_cache_path(sql_file, tmp_path, key="canonical")
+
+    assert first == second
+    mock_canonicalize.assert_called_once()
+
+
+def test_get_cache_path_invalid_key() -> None:
+    """Test unsupported cache key modes are rejected."""
+    with pytest.raises(ValueError, match="Unsupported cache key"):
+        get_cache_path("file.sql", key="mtime")
+
+
+def test_cache_namespaces(tmp_path: Path) -> None:
+    """Test results of different configurations are kept side by side."""
+    sql_file = tmp_path / "query.sql"
+    sql_file.write_text("SELECT id FROM users")
+    cache_dir = tmp_path / "cache"
+    gpt = cache_namespace({"framework": "openai", "model": "gpt-4o"})
+    llama = cache_namespace({"framework": "groq", "model": "llama"})
+    profiles = {
+        gpt: SQLProfile(dependencies={"users": ["id"]}, outputs={}),
+        llama: SQLProfile(dependencies={"users": []}, outputs={}),
+    }
+
+    assert load_from_cache(sql_file, cache_dir, namespace=gpt) is None
+    for namespace, profile in profiles.items():
+        save_to_cache(profile, sql_file, cache_dir, namespace=namespace)
+    for namespace, profile in profiles.items():
+        assert load_from_cache(sql_file, cache_dir, namespace=namespace) == profile
+
+    # Only the results of the namespace are removed
+    cleanup_cache(cache_dir, namespace=gpt)
+    assert load_from_cache(sql_file, cache_dir, namespace=gpt) is None
+    assert load_from_cache(sql_file, cache_dir, namespace=llama) is not None
+
+
+def test_cache_namespace_version() -> None:
+    """Test namespaces change with the sqldeps version."""
+    fingerprint = {"framework": "openai", "model": "gpt-4o"}
+
+    with patch("sqldeps.cache.__version__", "0.0.1"):
+        old = cache_namespace(fingerprint)
+
+    assert old != cache_namespace(fingerprint)
+
+
+def test_sqlite_backend(tmp_path: Path) -> None:
+    """Test results are saved to and loaded from a single SQLite database."""
+    sql_file = tmp_path / "query.sql"
+    sql_file.write_text("select id from users")
+    cache_dir = tmp_path / "cache"
+    namespace = cache_namespace({"framework": "openai", "model": "gpt-4o"})
+    profile = SQLProfile(dependencies={"users": ["id"]}, outputs={}, model="gpt-4o")
+
+    assert load_from_cache(sql_file, cache_dir, backend="sqlite") is None
+    save_to_cache(
+        profile,
+        sql_file,
+        cache_dir,
+        key="canonical",
+        namespace=namespace,
+        backend="sqlite",
+        compress=True,
+    )
+    flush_cache()
+
+    assert [p.name for p in cache_dir.iterdir() if p.suffix == ".json"] == []
+    sql_file.write_text("SELECT id\nFROM users\n")
+    assert lookup_cache(
+        sql_file, cache_dir, key="canonical", namespace=namespace, backend="sqlite"
+    ) == (profile, True)
+    # The JSON backend does not see the results of the SQLite backend
+    assert load_from_cache(sql_file, cache_dir, "canonical", namespace) is None
+
+    cleanup_cache(cache_dir, namespace=namespace, backend="sqlite")
+    assert (
+        load_from_cache(sql_file, cache_dir, "canonical", namespace, "sqlite") is None
+    )
+    cleanup_cache(cache_dir, backend=None)
+    assert not cache_dir.exists()
+
+
+def test_invalid_cache_backend(tmp_path: Path) -> None:
+    """Test unsupported cache backends are rejected."""
+    with pytest.raises(ValueError, match="Unsupported cache backend"):
+        load_from_cache(tmp_path / "query.sql", tmp_path, backend="redis")
+
+
+def test_migrate_cache(tmp_path: Path) -> None:
+    """Test JSON cache files are imported into the SQLite database."""
+    sql_file = tmp_path / "query.sql"
+    sql_file.write_text("SELECT id FROM users")
+    cache_dir = tmp_path / "cache"
+    namespace = cache_namespace({"framework": "openai", "model": "gpt-4o"})
+    profile = SQLProfile(dependencies={"users": ["id"]}, outputs={})
+    save_to_cache(profile, sql_file, cache_dir, namespace=namespace)
+    save_to_cache(profile, sql_file, cache_dir)
+    (cache_dir / "notes.json").write_text("{}")
+    (cache_dir / "broken_0123456789abcdef.json").write_text("{")
+
+    assert migrate_cache(cache_dir, compress=True, remove=True) == 2
+
+    for ns in (namespace, None):
+        assert load_from_cache(sql_file, cache_dir, namespace=ns) is None
+        assert load_from_cache(sql_file, cache_dir, namespace=ns, backend="sqlite") == (
+            profile
+        )
+    # Skipped files are kept
+    assert sorted(p.name for p in cache_dir.glob("*.json")) == [
+        "broken_0123456789abcdef.json",
+        "notes.json",
+    ]
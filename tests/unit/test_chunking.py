@@ -0,0 +1,83 @@
+"""Unit tests for chunking.py.
+
+This module tests the statement-level chunking of oversized SQL scripts and
+the merging of per-chunk profiles.
+"""
+
+from sqldeps.chunking import (
+    chunk_sql,
+    group_statements,
+    merge_chunk_profiles,
+    split_statements,
+)
+from sqldeps.models import SQLProfile
+
+
+def test_split_statements_keeps_function_bodies() -> None:
+    """Test that dollar-quoted function bodies are not split."""
+    sql = """
+    CREATE FUNCTION f() RETURNS void AS $$
+    BEGIN
+      INSERT INTO a SELECT 1; UPDATE b SET x = 1;
+    END;
+    $$ LANGUAGE plpgsql;
+    SELECT * FROM c;
+    """
+
+    statements = split_statements(sql)
+
+    assert len(statements) == 2
+    assert "UPDATE b" in statements[0]
+    assert statements[1] == "SELECT * FROM c;"
+
+
+def test_group_statements_temp_tables() -> None:
+    """Test temp table producers are grouped with their consumers."""
+    statements = [
+        "CREATE TEMP TABLE tmp_orders AS SELECT * FROM orders;",
+        "SELECT * FROM customers;",
+        'INSERT INTO report SELECT id FROM "tmp_orders";',
+        "SELECT id INTO TEMPORARY tmp_ids FROM users;",
+        "DELETE FROM archive WHERE id IN (SELECT id FROM tmp_ids);",
+    ]
+
+    assert group_statements(statements) == [[0, 2], [1], [3, 4]]
+
+
+def test_chunk_sql_respects_budget() -> None:
+    """Test chunks are packed up to the token budget in script order."""
+    statements = [f"SELECT col_{i} FROM table_{i};" for i in range(6)]
+    sql = "\n".join(statements)
+
+    chunks = chunk_sql(sql, max_tokens=20)
+
+    assert len(chunks) == 3
+    assert chunks[0] == "\n".join(statements[:2])
+    assert chunks[-1] == "\n".join(statements[4:])
+
+
+def test_chunk_sql_oversized_group() -> None:
+    """Test a group larger than the budget is kept in a single chunk."""
+    sql = (
+        "CREATE TEMP TABLE tmp AS SELECT a, b, c FROM src;\n"
+        "INSERT INTO dst SELECT a, b, c FROM tmp;"
+    )
+
+    assert chunk_sql(sql, max_tokens=5) == [sql]
+
+
+def test_merge_chunk_profiles_created_tables() -> None:
+    """Test tables created by earlier chunks are not reported as dependencies."""
+    profiles = [
+        SQLProfile(dependencies={"src": ["a"]}, outputs={"stage": ["a"]}),
+        SQLProfile(
+            dependencies={"stage": ["a"], "dim": ["id"]},
+            outputs={"target": ["a"]},
+        ),
+        SQLProfile(dependencies={"target": ["a"]}, outputs={"target": ["a"]}),
+    ]
+
+    merged = merge_chunk_profiles(profiles)
+
+    assert merged.dependencies == {"dim": ["id"], "src": ["a"]}
+    assert merged.outputs == {"stage": ["a"], "target": ["a"]}
@@ -0,0 +1,79 @@
+"""Unit tests for circuit_breaker.py.
+
+This module tests the circuit breaker used to skip failing LLM providers.
+"""
+
+from unittest.mock import patch
+
+from sqldeps.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+def failing(breaker: CircuitBreaker, times: int) -> CircuitBreaker:
+    """Record a number of consecutive failures."""
+    for _ in range(times):
+        breaker.record_failure()
+    return breaker
+
+
+def test_opens_after_threshold() -> None:
+    """Test the circuit opens after consecutive failures."""
+    breaker = failing(CircuitBreaker("fake", failure_threshold=3), 2)
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+
+def test_success_resets_failures() -> None:
+    """Test a success resets the count of consecutive failures."""
+    breaker = failing(CircuitBreaker("fake", failure_threshold=2), 1)
+    breaker.record_success()
+    breaker.record_failure()
+
+    assert breaker.state == CLOSED
+
+
+def test_half_open_probe_closes_circuit() -> None:
+    """Test a successful probe after the reset timeout closes the circuit."""
+    with patch("sqldeps.circuit_breaker.time.monotonic", return_value=100.0):
+        breaker = failing(CircuitBreaker("fake", 1, reset_timeout=30.0), 1)
+
+    with patch("sqldeps.circuit_breaker.time.monotonic", return_value=129.0):
+        assert not breaker.allow()
+
+    with patch("sqldeps.circuit_breaker.time.monotonic", return_value=130.0):
+        assert breaker.allow()
+        assert breaker.state == HALF_OPEN
+        # A single probe is allowed at a time
+        assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+
+
+def test_half_open_probe_failure_reopens_circuit() -> None:
+    """Test a failed probe opens the circuit for another reset timeout."""
+    with patch("sqldeps.circuit_breaker.time.monotonic", return_value=100.0):
+        breaker = failing(CircuitBreaker("fake", 5, reset_timeout=30.0), 5)
+
+    with patch("sqldeps.circuit_breaker.time.monotonic", return_value=130.0):
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == OPEN
+        assert not breaker.allow()
+
+
+def test_half_open_probe_released() -> None:
+    """Test a probe ending without outcome lets the next request probe."""
+    with patch("sqldeps.circuit_breaker.time.monotonic", return_value=100.0):
+        breaker = failing(CircuitBreaker("fake", 1, reset_timeout=30.0), 1)
+
+    with patch("sqldeps.circuit_breaker.time.monotonic", return_value=130.0):
+        assert breaker.allow()
+        breaker.release()
+        assert breaker.state == OPEN
+        assert breaker.allow()
+        assert breaker.state == HALF_OPEN
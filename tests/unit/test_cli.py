@@ -3,14 +3,30 @@
 This module tests the functionality of the CLI commands and related functions.
 """
 
+import json
+import subprocess
+import sys
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 import pytest
 from typer.testing import CliRunner
 
-from sqldeps.cli import app, extract, extract_dependencies, save_output
+from sqldeps.cli import (
+    app,
+    extract,
+    extract_dependencies,
+    save_output,
+    save_usage_report,
+    wrap_extractor,
+)
+from sqldeps.llm_parsers import BaseSQLExtractor
 from sqldeps.models import SQLProfile
+from sqldeps.usage import RequestRecord, summarize_requests
+
+# Import time budget of the CLI entry point in seconds (about 0.2s locally,
+# against several seconds when provider SDKs and pandas were imported eagerly)
+CLI_IMPORT_BUDGET = 1.5
 
 
 @pytest.fixture
@@ -35,6 +51,20 @@ def mock_sql_profile() -> SQLProfile:
     )
 
 
+class ModelExtractor(BaseSQLExtractor):
+    """LLM extractor answering with its model name as table."""
+
+    def __init__(self, model: str, **kwargs: object) -> None:
+        """Initialize the fake extractor."""
+        super().__init__(model, **kwargs)
+        self.calls = 0
+
+    def _query_llm(self, prompt: str) -> str:
+        """Answer with the model name as table."""
+        self.calls += 1
+        return json.dumps({"dependencies": {self.model: []}, "outputs": {}})
+
+
 class TestCLI:
     """Test suite for command-line interface."""
 
@@ -105,6 +135,160 @@ class TestCLI:
             mock_extract.assert_called_once()
             mock_save.assert_called_once()
 
+    def test_cli_fallback(self, mock_sql_profile: SQLProfile) -> None:
+        """Test fallback providers build a failover chain."""
+        with (
+            patch("sqldeps.cli.create_failover_extractor") as mock_create_failover,
+            patch("sqldeps.cli.extract_dependencies") as mock_extract,
+            patch("sqldeps.cli.save_output"),
+        ):
+            mock_extract.return_value = mock_sql_profile
+
+            extract(
+                fpath=Path("file.sql"),
+                framework="openai",
+                model="gpt-4o",
+                fallback=["groq", "deepseek:deepseek-chat"],
+                base_url="http://localhost:8000/v1",
+                prompt=None,
+                recursive=False,
+                db_match_schema=False,
+                db_target_schemas="public",
+                db_credentials=None,
+                output=Path("dependencies.json"),
+            )
+
+            assert mock_create_failover.call_args[0][0] == [
+                ("openai", "gpt-4o"),
+                ("groq", None),
+                ("deepseek", "deepseek-chat"),
+            ]
+            assert (
+                mock_create_failover.call_args.kwargs["base_url"]
+                == "http://localhost:8000/v1"
+            )
+
+    def test_cli_thread_connection_pool(self, mock_sql_profile: SQLProfile) -> None:
+        """Test the connection pool is sized to the thread concurrency."""
+        with (
+            patch("sqldeps.cli.create_extractor") as mock_create_extractor,
+            patch("sqldeps.cli.extract_dependencies") as mock_extract,
+            patch("sqldeps.cli.save_output"),
+        ):
+            mock_extract.return_value = mock_sql_profile
+
+            extract(
+                fpath=Path("folder"),
+                framework="groq",
+                model=None,
+                prompt=None,
+                recursive=False,
+                db_match_schema=False,
+                db_target_schemas="public",
+                db_credentials=None,
+                output=Path("dependencies.json"),
+                n_workers=16,
+                executor="thread",
+            )
+
+            assert mock_create_extractor.call_args[1]["max_connections"] == 16
+
+    def test_cli_base_url(self, mock_sql_profile: SQLProfile) -> None:
+        """Test the base URL is passed to the openai-compatible extractor."""
+        with (
+            patch("sqldeps.cli.create_extractor") as mock_create_extractor,
+            patch("sqldeps.cli.extract_dependencies") as mock_extract,
+            patch("sqldeps.cli.save_output"),
+        ):
+            mock_extract.return_value = mock_sql_profile
+
+            extract(
+                fpath=Path("file.sql"),
+                framework="openai-compatible",
+                model="qwen",
+                base_url="http://localhost:8000/v1",
+                prompt=None,
+                recursive=False,
+                db_match_schema=False,
+                db_target_schemas="public",
+                db_credentials=None,
+                output=Path("dependencies.json"),
+            )
+
+            kwargs = mock_create_extractor.call_args[1]
+            assert kwargs["framework"] == "openai-compatible"
+            assert kwargs["base_url"] == "http://localhost:8000/v1"
+
+    def test_cli_simple_model(self, mock_sql_profile: SQLProfile) -> None:
+        """Test a simple model routes simple inputs away from the main model."""
+        with (
+            patch("sqldeps.cli.create_extractor") as mock_create_extractor,
+            patch("sqldeps.cli.RouterExtractor") as mock_router,
+            patch("sqldeps.cli.extract_dependencies") as mock_extract,
+            patch("sqldeps.cli.save_output"),
+        ):
+            mock_create_extractor.return_value.options = {}
+            mock_extract.return_value = mock_sql_profile
+
+            extract(
+                fpath=Path("file.sql"),
+                framework="litellm",
+                model="openai/gpt-4.1",
+                simple_model="openai/gpt-4.1-nano",
+                simple_max_tokens=300,
+                prompt=None,
+                recursive=False,
+                db_match_schema=False,
+                db_target_schemas="public",
+                db_credentials=None,
+                output=Path("dependencies.json"),
+            )
+
+            models = [c[1]["model"] for c in mock_create_extractor.call_args_list]
+            assert models == ["openai/gpt-4.1", "openai/gpt-4.1-nano"]
+            assert mock_router.call_args[1] == {"max_tokens": 300}
+            assert mock_extract.call_args[0][0] is mock_router.return_value
+
+    def test_wrap_extractor_routes_hedged_tiers(self) -> None:
+        """Test hedging keeps routing simple queries to the simple model."""
+        extractors = {}
+
+        def create(model: str, **kwargs: object) -> ModelExtractor:
+            extractors[model] = ModelExtractor(model)
+            return extractors[model]
+
+        with patch("sqldeps.cli.create_extractor", side_effect=create):
+            extractor = wrap_extractor(
+                ModelExtractor("large"),
+                "litellm",
+                None,
+                {},
+                simple_model="small",
+                hedge_model="backup",
+            )
+            result = extractor.extract_from_query("SELECT id FROM users")
+
+        assert result.dependencies == {"small": []}
+        assert result.model == "small"
+        assert extractor.tier_stats["simple"]["inputs"] == 1
+        assert extractor.extractors["complex"].hedge_extractor is extractors["backup"]
+        assert extractors["small"].calls == 1
+
+    def test_cli_usage_report(self, tmp_path: Path) -> None:
+        """Test the usage report is saved with a summary and request records."""
+        extractor = MagicMock()
+        extractor.usage_summary.return_value = summarize_requests([], cost=False)
+        extractor.request_records = [
+            RequestRecord(file="file.sql", model="gpt-4o", started=0.0)
+        ]
+        report_path = tmp_path / "usage.json"
+
+        save_usage_report(extractor, report_path)
+
+        report = json.loads(report_path.read_text())
+        assert report["summary"]["requests"] == 0
+        assert report["requests"][0]["file"] == "file.sql"
+
     def test_cli_error_handling(self) -> None:
         """Test error handling in CLI using mock directly."""
         with patch("sqldeps.cli.create_extractor") as mock_create_extractor:
@@ -182,6 +366,75 @@ class TestCLI:
             app_main()
             mock_run.assert_called_once()
 
+    def test_batch_submit_command(self, runner: CliRunner, tmp_path: Path) -> None:
+        """Test the batch submit command submits the SQL files of a folder."""
+        (tmp_path / "query.sql").write_text("SELECT 1")
+        with (
+            patch("sqldeps.cli.create_extractor") as mock_create_extractor,
+            patch("sqldeps.cli.submit_batches", return_value=[{}]) as mock_submit,
+        ):
+            result = runner.invoke(
+                app,
+                ["batch", "submit", str(tmp_path), "--model", "gpt-4.1-mini"],
+            )
+
+        assert result.exit_code == 0
+        assert mock_create_extractor.call_args[1]["framework"] == "openai"
+        assert mock_submit.call_args[0][1] == [tmp_path / "query.sql"]
+
+    def test_batch_status_and_collect_commands(
+        self, runner: CliRunner, mock_sql_profile: SQLProfile, tmp_path: Path
+    ) -> None:
+        """Test the batch status and collect commands use the checkpoint."""
+        checkpoint = tmp_path / "batches.json"
+        checkpoint.write_text(
+            json.dumps(
+                {
+                    "framework": "openai",
+                    "model": "gpt-4.1-mini",
+                    "prompt_path": None,
+                    "base_url": "https://api.openai.com/v1/",
+                    "jobs": [],
+                }
+            )
+        )
+        job = {
+            "id": "batch-0",
+            "status": "in_progress",
+            "request_counts": {"total": 10, "completed": 4, "failed": 1},
+            "collected": False,
+        }
+        output = tmp_path / "dependencies.json"
+        with (
+            patch("sqldeps.cli.create_extractor") as mock_create_extractor,
+            patch("sqldeps.cli.update_batches", return_value=[job]),
+            patch(
+                "sqldeps.cli.collect_batches",
+                return_value={"query.sql": mock_sql_profile},
+            ),
+        ):
+            status = runner.invoke(
+                app, ["batch", "status", "--checkpoint", str(checkpoint)]
+            )
+            collect = runner.invoke(
+                app,
+                [
+                    "batch",
+                    "collect",
+                    "--checkpoint",
+                    str(checkpoint),
+                    "-o",
+                    str(output),
+                ],
+            )
+
+        assert status.exit_code == 0
+        assert "batch-0: in_progress (4/10 completed, 1 failed)" in status.output
+        assert mock_create_extractor.call_args[1]["model"] == "gpt-4.1-mini"
+        assert "base_url" not in mock_create_extractor.call_args[1]
+        assert collect.exit_code == 0
+        assert "query.sql" in json.loads(output.read_text())
+
     def test_cache_clear_command(self) -> None:
         """Test the cache clear command."""
         with patch("sqldeps.cli.cleanup_cache", return_value=True) as mock_cleanup:
@@ -189,3 +442,26 @@ class TestCLI:
 
             cache_clear()
             mock_cleanup.assert_called_once()
+
+    def test_cli_import_time(self) -> None:
+        """Test the CLI imports within budget, without heavy dependencies."""
+        code = (
+            "import sys, sqldeps.cli; "
+            "heavy = ('litellm', 'openai', 'groq', 'pandas', 'sqlalchemy'); "
+            "print(','.join(m for m in heavy if m in sys.modules))"
+        )
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+
+        assert result.stdout.strip() == ""
+        # Cumulative import time of the module in microseconds
+        cumulative = next(
+            int(line.split("|")[1])
+            for line in result.stderr.splitlines()
+            if line.split("|")[-1].strip() == "sqldeps.cli"
+        )
+        assert cumulative / 1e6 < CLI_IMPORT_BUDGET
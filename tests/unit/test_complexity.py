@@ -0,0 +1,76 @@
+"""Unit tests for complexity.py.
+
+This module tests the complexity features measured to route SQL inputs.
+"""
+
+import pytest
+
+from sqldeps.complexity import SQLComplexity, measure_complexity
+
+
+@pytest.mark.parametrize(
+    ("sql", "statements", "cte_depth"),
+    [
+        ("SELECT id FROM users", 1, 0),
+        ("SELECT 1; -- SELECT 2;\nSELECT 3;", 2, 0),
+        ("SELECT ';' FROM t /* ; */", 1, 0),
+        ("WITH a AS (SELECT 1) SELECT * FROM a", 1, 1),
+        ("WITH a (x) AS (SELECT 1), b AS (SELECT 2) SELECT * FROM a, b", 1, 1),
+        (
+            "WITH a AS (WITH b AS (SELECT 1) SELECT * FROM b) "
+            "SELECT * FROM a, (WITH c AS (SELECT 2) SELECT * FROM c) d",
+            1,
+            2,
+        ),
+        ("WITH a AS (SELECT 1) SELECT 1; WITH b AS (SELECT 2) SELECT 2", 2, 1),
+        ("CREATE MATERIALIZED VIEW v AS SELECT 1 WITH NO DATA", 1, 0),
+        ("SELECT 'WITH x AS (' FROM t", 1, 0),
+    ],
+)
+def test_statements_and_cte_depth(sql: str, statements: int, cte_depth: int) -> None:
+    """Test statements are counted and CTE nesting is measured."""
+    complexity = measure_complexity(sql)
+
+    assert complexity.statements == statements
+    assert complexity.cte_depth == cte_depth
+
+
+@pytest.mark.parametrize(
+    ("sql", "procedural", "dynamic_sql"),
+    [
+        ("SELECT 1", False, False),
+        (
+            "CREATE FUNCTION f() RETURNS void AS $$ BEGIN "
+            "EXECUTE 'DELETE FROM ' || t; END; $$ LANGUAGE plpgsql",
+            True,
+            True,
+        ),
+        ("DO $body$ BEGIN INSERT INTO t VALUES (1); END $body$", True, False),
+        ("CREATE TRIGGER t AFTER INSERT ON x EXECUTE FUNCTION f()", True, False),
+        ("EXEC sp_executesql @sql", False, True),
+        ("SELECT 'EXECUTE' AS word", False, False),
+    ],
+)
+def test_procedural_and_dynamic_sql(
+    sql: str, procedural: bool, dynamic_sql: bool
+) -> None:
+    """Test procedural code and dynamic SQL are detected outside literals."""
+    complexity = measure_complexity(sql)
+
+    assert complexity.procedural == procedural
+    assert complexity.dynamic_sql == dynamic_sql
+
+
+def test_is_simple() -> None:
+    """Test thresholds and code features decide whether an input is simple."""
+    simple = SQLComplexity(
+        statements=1, tokens=50, procedural=False, dynamic_sql=False, cte_depth=1
+    )
+    thresholds = {"max_tokens": 100, "max_statements": 2, "max_cte_depth": 1}
+
+    assert simple.is_simple(**thresholds)
+    assert not SQLComplexity(3, 50, False, False, 0).is_simple(**thresholds)
+    assert not SQLComplexity(1, 150, False, False, 0).is_simple(**thresholds)
+    assert not SQLComplexity(1, 50, False, False, 2).is_simple(**thresholds)
+    assert not SQLComplexity(1, 50, True, False, 0).is_simple(**thresholds)
+    assert not SQLComplexity(1, 50, False, True, 0).is_simple(**thresholds)
@@ -0,0 +1,75 @@
+"""Unit tests for json_parsing.py.
+
+This module tests the helpers used to parse JSON responses from LLMs.
+"""
+
+import json
+
+import pytest
+
+from sqldeps.json_parsing import JsonCompletionDetector, parse_json
+
+
+@pytest.mark.parametrize(
+    ("chunks", "expected"),
+    [
+        (['{"dependencies": {}, ', '"outputs": {}}', "\n"], 2),
+        (["```json\n{", '"a": "}{\\"}"', "}\n```"], 3),
+        (['{"a": [1, {"b": []}', "]}", " trailing"], 2),
+    ],
+)
+def test_json_completion_detector(chunks: list[str], expected: int) -> None:
+    """Test the end of the first JSON object is detected across chunks."""
+    detector = JsonCompletionDetector()
+
+    results = [detector.feed(chunk) for chunk in chunks]
+
+    # Complete as soon as the chunk closing the object is fed
+    assert results.index(True) == expected - 1
+    text = "".join(chunks)
+    json.loads(text[text.index("{") : detector.end])
+
+
+def test_json_completion_detector_incomplete() -> None:
+    """Test a truncated object is not reported as complete."""
+    detector = JsonCompletionDetector()
+
+    assert not detector.feed('{"dependencies": {"t": ["a", "b"]')
+    assert detector.end is None
+
+
+@pytest.mark.parametrize(
+    ("response", "expected"),
+    [
+        # Code fences and trailing commas
+        ('```json\n{"a": ["x", "y",],}\n```', {"a": ["x", "y"]}),
+        # Object wrapped in prose, with braces in the prose
+        ('Using {table}: {"a": {}} Hope this helps!', {"a": {}}),
+        # Truncated closing brackets
+        (
+            '{"a": {"t": ["x"]}, "b": {"u": ["y"]',
+            {"a": {"t": ["x"]}, "b": {"u": ["y"]}},
+        ),
+        # Truncated string values are dropped rather than guessed
+        ('{"a": {"t": ["x", "y', {"a": {"t": ["x"]}}),
+        # Truncated keys are cut back to the last complete value
+        ('{"a": {"t": ["x"]}, "b', {"a": {"t": ["x"]}}),
+        # Strings containing JSON syntax are kept as is
+        ('{"a": ["x,]}\\"", ]}', {"a": ['x,]}"']}),
+    ],
+)
+def test_parse_json_repaired(response: str, expected: dict) -> None:
+    """Test malformed responses are repaired."""
+    assert parse_json(response) == (expected, True)
+
+
+def test_parse_json_valid() -> None:
+    """Test valid JSON is parsed without repair."""
+    assert parse_json('{"a": [1, 2]}') == ({"a": [1, 2]}, False)
+
+
+@pytest.mark.parametrize("response", ["", "Sorry, I cannot help.", "[1, 2"])
+def test_parse_json_unsalvageable(response: str) -> None:
+    """Test responses without any JSON object raise a ValueError."""
+    with pytest.raises(ValueError, match="Failed to decode JSON"):
+        parse_json(response)
@@ -108,3 +108,20 @@ def test_property_accessors() -> None:
 
     # Test outcome_tables property
     assert profile.outcome_tables == ["schema3.table3", "schema4.table4"]
+
+
+def test_model_tag() -> None:
+    """Test the model tag is kept out of equality and combined on merge."""
+    tagged = SQLProfile(dependencies={"users": ["id"]}, outputs={}, model="gpt-4o")
+    untagged = SQLProfile(dependencies={"users": ["id"]}, outputs={})
+
+    assert untagged.model is None
+    assert tagged == untagged
+    assert SQLProfile.combined_model([tagged, untagged, tagged, untagged]) == "gpt-4o"
+    assert (
+        SQLProfile.combined_model(
+            [SQLProfile({}, {}, model="llama"), SQLProfile({}, {}, model="gpt-4o")]
+        )
+        == "gpt-4o,llama"
+    )
+    assert SQLProfile.combined_model([untagged]) is None
@@ -10,12 +10,26 @@ from unittest.mock import MagicMock, patch
 
 import pytest
 
+from sqldeps.models import SQLProfile
 from sqldeps.parallel import (
+    DEFAULT_CONCURRENCY,
     _extract_from_file,
+    _extractors,
+    _get_extractor,
+    _init_worker,
     _process_batch_files,
     process_files_in_parallel,
+    process_files_in_threads,
     resolve_workers,
 )
+from sqldeps.retry import RetryPolicy
+from sqldeps.usage import RequestRecord
+
+
+@pytest.fixture(autouse=True)
+def clear_extractors() -> None:
+    """Clear the extractors reused by worker processes between tests."""
+    _extractors.clear()
 
 
 class TestParallelProcessing:
@@ -41,6 +55,19 @@ class TestParallelProcessing:
             with pytest.raises(ValueError):
                 resolve_workers(0)
 
+    def test_resolve_workers_thread(self) -> None:
+        """Test thread worker count is not capped by the CPU count."""
+        with patch("sqldeps.parallel.cpu_count", return_value=4):
+            assert resolve_workers(-1, executor="thread") == DEFAULT_CONCURRENCY
+            assert resolve_workers(64, executor="thread") == 64
+            assert resolve_workers(64, executor="async") == 64
+
+            with pytest.raises(ValueError, match="Invalid worker count"):
+                resolve_workers(0, executor="thread")
+
+            with pytest.raises(ValueError, match="Unsupported executor"):
+                resolve_workers(2, executor="fork")
+
     def test_extract_from_file_with_cache(self) -> None:
         """Test single file extraction with caching."""
         # Mock dependencies
@@ -65,6 +92,7 @@ class TestParallelProcessing:
         mock_limiter = MagicMock()
         mock_extractor = MagicMock()
         mock_extractor.extract_from_file.return_value = "result"
+        mock_extractor.create_retry_policy.return_value = RetryPolicy()
         mock_path = Path("test.sql")
 
         # Setup no cache hit, extract successful
@@ -84,6 +112,78 @@ class TestParallelProcessing:
             mock_extractor.extract_from_file.assert_called_once_with(mock_path)
             mock_save.assert_called_once()
 
+    def test_get_extractor_reused(self) -> None:
+        """Test a worker creates one extractor per configuration."""
+        with patch("sqldeps.llm_parsers.create_extractor") as mock_create:
+            mock_create.side_effect = lambda **kwargs: MagicMock()
+            first = _get_extractor("groq", "model", None, {"compact": True})
+            second = _get_extractor("groq", "model", None, {"compact": True})
+            other = _get_extractor("groq", "model", None, {"compact": False})
+
+        assert first is second
+        assert other is not first
+        assert mock_create.call_count == 2
+
+    def test_extract_from_file_params_and_namespace(self) -> None:
+        """Test workers use the parent's params and save under its namespace."""
+        mock_path = Path("test.sql")
+        mock_extractor = MagicMock()
+        mock_extractor.request_records = []
+        mock_extractor.create_retry_policy.return_value = RetryPolicy()
+        mock_extractor.cache_namespace = "worker"
+
+        with (
+            patch("sqldeps.parallel.load_from_cache", return_value=None) as mock_load,
+            patch(
+                "sqldeps.llm_parsers.create_extractor", return_value=mock_extractor
+            ) as mock_create,
+            patch("sqldeps.parallel.save_to_cache") as mock_save,
+        ):
+            _extract_from_file(
+                mock_path,
+                MagicMock(),
+                "groq",
+                "params-model",
+                cache_namespace="parent",
+                params={"temperature": 0.7},
+            )
+
+        assert mock_create.call_args[1]["params"] == {"temperature": 0.7}
+        assert mock_load.call_args[1]["namespace"] == "parent"
+        assert mock_save.call_args[1]["namespace"] == "parent"
+
+    def test_extract_from_file_collects_records(self) -> None:
+        """Test the request records of a worker's extractor are collected."""
+        record = RequestRecord(file="test.sql", model="model", started=0.0)
+        mock_extractor = MagicMock()
+        mock_extractor.request_records = []
+
+        def extract_from_file(file_path: Path) -> None:
+            mock_extractor.request_records.append(record)
+            raise ValueError("bad output")
+
+        mock_extractor.extract_from_file.side_effect = extract_from_file
+        mock_extractor.create_retry_policy.return_value = RetryPolicy(max_retries=0)
+        records = []
+
+        with (
+            patch("sqldeps.parallel.load_from_cache", return_value=None),
+            patch("sqldeps.llm_parsers.create_extractor", return_value=mock_extractor),
+        ):
+            _, result = _extract_from_file(
+                Path("test.sql"),
+                MagicMock(),
+                "groq",
+                "model",
+                use_cache=True,
+                request_records=records,
+            )
+
+        # Records of failed extractions are handed over too
+        assert result is None
+        assert records == [record]
+        assert mock_extractor.request_records == []
+
     def test_process_batch_files(self) -> None:
         """Test batch processing of files."""
         # Mock dependencies
@@ -185,8 +285,59 @@ class TestParallelProcessing:
                 # Verify batch splitting
                 mock_array_split.assert_called_once()
 
-                # Verify executor was created with correct workers
-                mock_executor_class.assert_called_once_with(max_workers=2)
+                # Verify executor was created with correct workers, each
+                # creating its extractor once with a single-connection pool
+                mock_executor_class.assert_called_once_with(
+                    max_workers=2,
+                    initializer=_init_worker,
+                    initargs=(
+                        "groq",
+                        "test-model",
+                        None,
+                        {"max_connections": 1},
+                        None,
+                    ),
+                )
 
                 # Verify submit was called for each batch
                 assert executor_instance.submit.call_count == 2
+
+    def test_process_files_in_threads(self) -> None:
+        """Test thread-pool processing shares one extractor across threads."""
+        sql_files = [Path(f"test{i}.sql") for i in range(6)]
+        mock_extractor = MagicMock()
+        mock_extractor.extract_from_file.side_effect = lambda path: SQLProfile(
+            dependencies={path.stem: []}, outputs={}
+        )
+        mock_extractor.create_retry_policy.return_value = RetryPolicy()
+
+        with (
+            patch("sqldeps.parallel.load_from_cache", return_value=None),
+            patch("sqldeps.parallel.save_to_cache") as mock_save,
+            patch("sqldeps.parallel.RateLimiter") as mock_limiter_class,
+        ):
+            results = process_files_in_threads(
+                sql_files, mock_extractor, n_workers=16, rpm=60, use_cache=True
+            )
+
+        assert set(results) == {str(f) for f in sql_files}
+        assert results["test3.sql"].dependencies == {"test3": []}
+        assert mock_extractor.extract_from_file.call_count == len(sql_files)
+        assert mock_save.call_count == len(sql_files)
+
+        # A single rate limiter is shared by all threads
+        mock_limiter_class.assert_called_once_with(60)
+        limiter = mock_limiter_class.return_value
+        assert limiter.wait_if_needed.call_count == len(sql_files)
+
+    def test_process_files_in_threads_no_results(self) -> None:
+        """Test thread-pool processing fails when every file fails."""
+        mock_extractor = MagicMock()
+        mock_extractor.extract_from_file.side_effect = RuntimeError("boom")
+
+        with (
+            patch("sqldeps.parallel.load_from_cache", return_value=None),
+            patch("sqldeps.parallel._extract_with_retry", side_effect=RuntimeError),
+            pytest.raises(ValueError, match="No dependencies could be extracted"),
+        ):
+            process_files_in_threads([Path("test.sql")], mock_extractor, n_workers=2)
@@ -0,0 +1,243 @@
+"""Unit tests for preprocessing.py.
+
+This module tests the token-minimizing transformations applied to SQL before
+it is sent to the LLM.
+"""
+
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+
+from sqldeps import preprocessing
+from sqldeps.preprocessing import (
+    canonicalize_sql,
+    compact_sql,
+    elide_literals,
+    format_sql,
+)
+
+
+def test_compact_sql_strips_comments_and_whitespace() -> None:
+    """Test comments are removed and whitespace collapsed."""
+    sql = """
+    /* Copyright header
+       spanning several lines */
+    SELECT   u.id,   -- user id
+             u.name
+    FROM     users u
+    WHERE    u.active = TRUE ;
+
+    SELECT COUNT( * ) FROM orders;
+    """
+
+    assert compact_sql(sql) == (
+        "SELECT u.id,u.name FROM users u WHERE u.active = TRUE;\n"
+        "SELECT COUNT(*) FROM orders;"
+    )
+
+
+def test_compact_sql_preserves_literals() -> None:
+    """Test string literals and hints are kept."""
+    sql = "/*+ INDEX(t idx) */ SELECT 'a  -- b', 1 - -1 FROM t;"
+
+    assert compact_sql(sql) == "/*+ INDEX(t idx) */ SELECT 'a  -- b',1 - -1 FROM t;"
+
+
+def test_compact_sql_dollar_quoted_body() -> None:
+    """Test dollar-quoted bodies are compacted, keeping their string literals."""
+    sql = (
+        "CREATE FUNCTION f() RETURNS int AS $body$\n  -- body\n"
+        "  SELECT count( * )\n  FROM t\n  WHERE s = 'a  b';\n$body$ "
+        "LANGUAGE sql;"
+    )
+
+    assert compact_sql(sql) == (
+        "CREATE FUNCTION f() RETURNS int AS "
+        "$body$SELECT count(*) FROM t WHERE s = 'a  b';$body$ LANGUAGE sql;"
+    )
+
+
+def test_compact_sql_idempotent() -> None:
+    """Test compacting twice yields the same result."""
+    sql = "SELECT a , b\nFROM t -- c\nWHERE x IN ( 1 , 2 )"
+
+    assert compact_sql(compact_sql(sql)) == compact_sql(sql)
+
+
+def test_canonicalize_sql_ignores_cosmetic_edits() -> None:
+    """Test comments, whitespace and keyword case do not change the result."""
+    original = (
+        "select u.id, \"Name\" -- user\nfrom users u where u.id = 'A'; "
+        "create function f() returns int as $$ begin return 1; end $$ "
+        "language plpgsql;"
+    )
+    reformatted = (
+        '/* header */\nSELECT u.id,\n       "Name"\nFROM users u\n'
+        "WHERE u.id = 'A';\n\nCREATE FUNCTION f() RETURNS INT AS $$\nBEGIN\n"
+        "  -- body\n  RETURN 1;\nEND\n$$ LANGUAGE plpgsql;"
+    )
+
+    assert canonicalize_sql(original) == canonicalize_sql(reformatted)
+    # Identifiers and string literals keep their case
+    assert canonicalize_sql("SELECT a FROM t WHERE x = 'A'") != canonicalize_sql(
+        "SELECT A FROM t WHERE x = 'a'"
+    )
+
+
+def test_canonicalize_sql_normalize_literals() -> None:
+    """Test literals are only replaced when requested, also in bodies."""
+    sql = "SELECT a FROM t WHERE d = '2024-01-01' AND n > {n}; DO $$ SELECT {n} $$"
+
+    assert canonicalize_sql(sql.format(n=1)) != canonicalize_sql(sql.format(n=2))
+    assert canonicalize_sql(sql.format(n=1), normalize_literals=True) == (
+        "SELECT a FROM t WHERE d = ? AND n > ? ; DO $$ SELECT ? $$"
+    )
+
+
+def test_elide_literals_values_and_in_lists() -> None:
+    """Test long VALUES and IN lists keep two examples and a placeholder."""
+    rows = ",\n".join(
+        f"({i}, 'name {i}', NULL, '2020-01-01'::date)" for i in range(500)
+    )
+    values = ", ".join(str(i) for i in range(50))
+    sql = (
+        f"INSERT INTO t (a, b, c, d) VALUES {rows};\n"
+        f"SELECT * FROM x WHERE id IN ({values}) AND y IN (1, 2);"
+    )
+
+    assert elide_literals(sql) == (
+        "INSERT INTO t (a, b, c, d) VALUES (0, 'name 0', NULL, '2020-01-01'::date),\n"
+        "(1, 'name 1', NULL, '2020-01-01'::date) /* 498 more rows */;\n"
+        "SELECT * FROM x WHERE id IN (0, 1 /* 48 more values */) AND y IN (1, 2);"
+    )
+
+
+def test_elide_literals_keeps_non_literal_rows() -> None:
+    """Test rows with columns, functions or subqueries are never elided."""
+    sql = (
+        "INSERT INTO t VALUES "
+        + ", ".join(f"({i}, now())" for i in range(20))
+        + "; SELECT * FROM x WHERE id IN (SELECT id FROM y);"
+    )
+
+    assert elide_literals(sql) == sql
+
+
+@pytest.mark.parametrize(
+    ("mode", "expected"),
+    [
+        ("off", "select a, b from t where x = 1"),
+        ("lite", "SELECT a, b FROM t WHERE x = 1"),
+        ("full", "SELECT a,\n       b\nFROM t\nWHERE x = 1"),
+    ],
+)
+def test_format_sql_modes(mode: str, expected: str) -> None:
+    """Test the three formatting modes."""
+    assert format_sql("select a, b from t where x = 1", mode) == expected
+
+
+def test_format_sql_invalid_mode() -> None:
+    """Test unsupported formatting modes are rejected."""
+    with pytest.raises(ValueError, match="Unsupported formatting mode"):
+        format_sql("SELECT 1", "pretty")
+
+
+def test_format_sql_skips_reindent_above_max_bytes() -> None:
+    """Test large SQL is only keyword-formatted."""
+    sql = "select a, b from large_table"
+
+    assert format_sql(sql, "full", max_bytes=10) == "SELECT a, b FROM large_table"
+
+
+def test_format_sql_memoized() -> None:
+    """Test formatting results are memoized by content hash."""
+    sql = "select memo_col from memo_table"
+
+    with patch.object(
+        preprocessing, "_format", wraps=preprocessing._format
+    ) as mock_format:
+        first = format_sql(sql, "full")
+        second = format_sql(sql, "full")
+
+    assert first == second
+    mock_format.assert_called_once()
+
+
+def test_format_sql_timeout() -> None:
+    """Test SQL is returned unformatted, and not memoized, when formatting times out."""
+    sql = "select slow_col from slow_table"
+
+    # Each clock reading advances the thread CPU time by 10 seconds
+    with patch.object(
+        preprocessing.time, "thread_time", side_effect=itertools.count(0, 10)
+    ):
+        assert format_sql(sql, "full", timeout=1.0) == sql
+
+    assert format_sql(sql, "full", timeout=1.0) == "SELECT slow_col\nFROM slow_table"
+
+
+def test_format_sql_timeout_during_grouping() -> None:
+    """Test the deadline is checked between the grouping passes of a statement."""
+    now = [0.0]
+    passes = []
+
+    def slow_pass(statement: object) -> None:
+        """Group nothing, using 10 seconds of CPU time."""
+        passes.append(statement)
+        now[0] += 10.0
+
+    with (
+        patch.object(preprocessing.time, "thread_time", lambda: now[0]),
+        patch.object(preprocessing, "_GROUPING_PASSES", (slow_pass, slow_pass)),
+    ):
+        sql = "select grouped_col from grouped_table"
+        assert format_sql(sql, "full", timeout=1.0) == sql
+
+    assert len(passes) == 1
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "select a, b from t where x = 1 and y in (select z from u); delete from v",
+        "with c as (select id from t) select c.id, count(*) from c group by c.id",
+        "insert into t (a) values (1), (2); update t set a = case when a > 1 "
+        "then 0 else a end",
+    ],
+)
+def test_format_sql_timed_matches_untimed(sql: str) -> None:
+    """Test formatting with a deadline gives the same result as without."""
+    assert preprocessing._format(sql, "full", timeout=60.0) == (
+        preprocessing._format(sql, "full")
+    )
+    assert preprocessing._format(sql, "lite", timeout=60.0) == (
+        preprocessing._format(sql, "lite")
+    )
+
+
+def test_format_sql_timeout_excludes_waiting() -> None:
+    """Test the timeout only counts the formatting of each query, not waiting."""
+    queries = [
+        f"select {', '.join(f'case when c{i} > {n} then c{i} end' for i in range(150))}"
+        " from t"
+        for n in range(8)
+    ]
+
+    # Concurrent threads take turns on the interpreter, so each query takes
+    # several times its own formatting time to complete
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda sql: format_sql(sql, timeout=1.0), queries))
+
+    assert all(result.startswith("SELECT CASE") for result in results)
+
+
+def test_format_sql_parse_error() -> None:
+    """Test SQL that sqlparse cannot reindent falls back to lite formatting."""
+    sql = "select " + ", ".join(f"col_{i}" for i in range(4000)) + " from wide"
+
+    formatted = format_sql(sql, "full")
+
+    assert formatted.startswith("SELECT col_0, col_1")
+    assert formatted.endswith("col_3999 FROM wide")
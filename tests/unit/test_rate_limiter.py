@@ -4,9 +4,15 @@ This module tests the rate limiting functionality which is used to control
 the frequency of API calls to LLM providers.
 """
 
-from unittest.mock import MagicMock, patch
+import asyncio
+import threading
+from unittest.mock import AsyncMock, MagicMock, patch
 
-from sqldeps.rate_limiter import MultiprocessingRateLimiter, RateLimiter
+from sqldeps.rate_limiter import (
+    AsyncRateLimiter,
+    MultiprocessingRateLimiter,
+    RateLimiter,
+)
 
 
 def test_rate_limiter_no_wait_under_limit() -> None:
@@ -67,6 +73,23 @@ def test_rate_limiter_zero_rpm() -> None:
         mock_sleep.assert_not_called()
 
 
+def test_rate_limiter_thread_safe() -> None:
+    """Test rate limiter records every call when shared between threads."""
+    limiter = RateLimiter(rpm=1000)
+
+    def worker() -> None:
+        for _ in range(50):
+            limiter.wait_if_needed()
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(limiter.call_times) == 400
+
+
 def test_multiprocessing_rate_limiter() -> None:
     """Test multiprocessing rate limiter."""
     # Create a mock manager
@@ -87,3 +110,41 @@ def test_multiprocessing_rate_limiter() -> None:
         # call_times should have been updated
         assert len(limiter.call_times) == 1
         assert limiter.call_times[0] == 100
+
+
+def test_async_rate_limiter_wait_when_limit_reached() -> None:
+    """Test async rate limiter sleeps without blocking the event loop."""
+    limiter = AsyncRateLimiter(rpm=2)
+    limiter.call_times.extend([90, 95])
+
+    with (
+        patch("time.time", return_value=100),
+        patch("asyncio.sleep", new_callable=AsyncMock) as mock_sleep,
+    ):
+        asyncio.run(limiter.wait_if_needed())
+
+        # Oldest call (90) expires at 150, i.e. 50 seconds from now
+        mock_sleep.assert_awaited_once()
+        assert abs(mock_sleep.await_args[0][0] - 50) < 0.01
+
+
+def test_rate_limiter_try_acquire() -> None:
+    """Test optional calls are recorded only while under the RPM limit."""
+    limiter = RateLimiter(rpm=2)
+
+    with patch("time.time", return_value=100):
+        assert limiter.try_acquire()
+        limiter.wait_if_needed()
+        assert not limiter.try_acquire()
+
+    assert len(limiter.call_times) == 2
+
+
+def test_async_rate_limiter_try_acquire() -> None:
+    """Test optional coroutine calls never wait for a slot."""
+    limiter = AsyncRateLimiter(rpm=1)
+
+    async def acquire_twice() -> tuple[bool, bool]:
+        return limiter.try_acquire(), limiter.try_acquire()
+
+    assert asyncio.run(acquire_twice()) == (True, False)
@@ -0,0 +1,181 @@
+"""Unit tests for retry.py.
+
+This module tests the error classification and retry policy used for calls
+to LLM providers.
+"""
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from sqldeps.retry import (
+    BAD_OUTPUT,
+    FATAL,
+    NETWORK,
+    RATE_LIMIT,
+    SERVER,
+    RetryBudget,
+    RetryPolicy,
+    classify_error,
+    current_attempt,
+    retry_after,
+)
+
+
+class APIStatusError(Exception):
+    """Provider error carrying an HTTP response, like the OpenAI client errors."""
+
+    def __init__(self, status_code: int, headers: dict | None = None) -> None:
+        """Initialize the error with a status code and response headers."""
+        super().__init__(f"Error code: {status_code}")
+        self.status_code = status_code
+        self.response = SimpleNamespace(status_code=status_code, headers=headers or {})
+
+
+class APIConnectionError(Exception):
+    """Provider connection error without response."""
+
+
+@pytest.mark.parametrize(
+    ("error", "kind"),
+    [
+        (APIStatusError(429), RATE_LIMIT),
+        (APIStatusError(503), SERVER),
+        (APIStatusError(408), NETWORK),
+        (APIStatusError(401), FATAL),
+        (APIStatusError(400), FATAL),
+        (APIConnectionError("reset"), NETWORK),
+        (TimeoutError("idle"), NETWORK),
+        (ValueError("Failed to decode JSON"), BAD_OUTPUT),
+        (FileNotFoundError("missing.sql"), FATAL),
+        (RuntimeError("boom"), FATAL),
+    ],
+)
+def test_classify_error(error: Exception, kind: str) -> None:
+    """Test errors are classified by kind."""
+    assert classify_error(error) == kind
+
+
+@pytest.mark.parametrize(
+    ("headers", "expected"),
+    [
+        ({"Retry-After": "7"}, 7.0),
+        ({"retry-after-ms": "1500"}, 1.5),
+        ({"x-ratelimit-reset-requests": "1m30s"}, 90.0),
+        ({"x-ratelimit-reset-tokens": "250ms"}, 0.25),
+        ({"x-other": "1"}, None),
+    ],
+)
+def test_retry_after(headers: dict, expected: float | None) -> None:
+    """Test the delay requested by the provider is read from headers."""
+    assert retry_after(APIStatusError(429, headers)) == expected
+
+
+def test_retry_policy_never_retries_fatal_errors() -> None:
+    """Test fatal errors are raised on the first attempt."""
+    func = MagicMock(side_effect=APIStatusError(401))
+    policy = RetryPolicy(max_retries=3)
+
+    with (
+        patch("sqldeps.retry.time.sleep") as mock_sleep,
+        pytest.raises(APIStatusError),
+    ):
+        policy.call(func)
+
+    func.assert_called_once()
+    mock_sleep.assert_not_called()
+
+
+def test_retry_policy_honors_retry_after() -> None:
+    """Test rate limited calls wait for the delay requested by the provider."""
+    func = MagicMock(side_effect=[APIStatusError(429, {"retry-after": "5"}), "ok"])
+    policy = RetryPolicy(max_retries=2)
+
+    with patch("sqldeps.retry.time.sleep") as mock_sleep:
+        assert policy.call(func) == "ok"
+
+    delay = mock_sleep.call_args[0][0]
+    assert 5 <= delay <= 5.5
+    assert policy.stats[RATE_LIMIT] == 1
+
+
+def test_retry_policy_jittered_backoff() -> None:
+    """Test server errors are retried with bounded exponential backoff."""
+    func = MagicMock(side_effect=[APIStatusError(500)] * 3 + ["ok"])
+    policy = RetryPolicy(max_retries=3, base_delay=1.0, max_delay=3.0)
+
+    with patch("sqldeps.retry.time.sleep") as mock_sleep:
+        assert policy.call(func) == "ok"
+
+    delays = [c[0][0] for c in mock_sleep.call_args_list]
+    assert all(0 <= d <= bound for d, bound in zip(delays, [1, 2, 3], strict=True))
+
+
+def test_retry_policy_max_retries() -> None:
+    """Test the last error is raised once the retries are exhausted."""
+    func = MagicMock(side_effect=APIConnectionError("reset"))
+    policy = RetryPolicy(max_retries=2)
+
+    with patch("sqldeps.retry.time.sleep"), pytest.raises(APIConnectionError):
+        policy.call(func)
+
+    assert func.call_count == 3
+
+
+def test_retry_policy_budget() -> None:
+    """Test the retry budget is shared by all calls of a run."""
+    budget = RetryBudget(2)
+    policy = RetryPolicy(max_retries=5, budget=budget)
+    func = MagicMock(side_effect=APIStatusError(503))
+
+    with patch("sqldeps.retry.time.sleep"):
+        with pytest.raises(APIStatusError):
+            policy.call(func)
+        with pytest.raises(APIStatusError):
+            policy.call(func)
+
+    # 1 + 2 retries for the first call, then no retry left for the second
+    assert func.call_count == 4
+    assert budget.used == 2
+
+
+def test_retry_policy_not_retryable_kind() -> None:
+    """Test error kinds excluded from the policy are not retried."""
+    func = MagicMock(side_effect=ValueError("bad JSON"))
+    policy = RetryPolicy(retryable=(RATE_LIMIT, NETWORK, SERVER))
+
+    with pytest.raises(ValueError):
+        policy.call(func)
+
+    func.assert_called_once()
+
+
+def test_retry_policy_acall() -> None:
+    """Test asynchronous calls are retried with asyncio.sleep."""
+    func = AsyncMock(side_effect=[APIStatusError(502), "ok"])
+    policy = RetryPolicy(max_retries=1)
+
+    with patch("sqldeps.retry.asyncio.sleep", new=AsyncMock()) as mock_sleep:
+        assert asyncio.run(policy.acall(func)) == "ok"
+
+    assert func.await_count == 2
+    mock_sleep.assert_awaited_once()
+
+
+def test_current_attempt() -> None:
+    """Test the attempt in progress is exposed to the called function."""
+    attempts = []
+
+    def func() -> str:
+        attempts.append(current_attempt())
+        if len(attempts) < 3:
+            raise APIStatusError(503)
+        return "ok"
+
+    with patch("sqldeps.retry.time.sleep"):
+        assert RetryPolicy(max_retries=2).call(func) == "ok"
+
+    assert attempts == [0, 1, 2]
+    assert current_attempt() == 0
@@ -0,0 +1,126 @@
+"""Unit tests for sqlite_cache.py.
+
+This module tests the SQLite store of cached extraction results: buffered
+writes, upserts, compression and concurrent workers.
+"""
+
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+from sqldeps.sqlite_cache import SQLiteCache, get_store, remove_database
+
+
+def write_results(path: Path, worker: int, n_results: int) -> None:
+    """Write results from a worker process, overwriting a shared key."""
+    store = SQLiteCache(path, batch_size=10)
+    for i in range(n_results):
+        store.put("ns", f"w{worker}_{i}", {"worker": worker, "i": i})
+        store.put("ns", "shared", {"worker": worker, "i": i})
+    store.flush()
+
+
+def test_buffered_writes(tmp_path: Path) -> None:
+    """Test results are committed in batches and visible to their writer."""
+    path = tmp_path / "cache.sqlite"
+    writer = SQLiteCache(path, batch_size=3, flush_interval=60)
+    reader = SQLiteCache(path)
+
+    writer.put("ns", "a", {"dependencies": {"t": ["a"]}})
+    writer.put("ns", "b", {"dependencies": {"t": ["b"]}})
+
+    # Pending results are only visible to the writing process
+    assert writer.get("ns", "a") == {"dependencies": {"t": ["a"]}}
+    assert reader.get("ns", "a") is None
+    assert reader.count() == 0
+
+    # The third result triggers the commit of the batch
+    writer.put("ns", "c", {"dependencies": {"t": ["c"]}})
+    assert reader.count() == 3
+    assert reader.get("ns", "b") == {"dependencies": {"t": ["b"]}}
+    assert writer.flush() == 0
+
+
+def test_upsert_and_namespaces(tmp_path: Path) -> None:
+    """Test results replace those of the same key and namespace only."""
+    store = SQLiteCache(tmp_path / "cache.sqlite")
+
+    store.put("gpt", "query", {"v": 1})
+    store.put("llama", "query", {"v": 1})
+    store.flush()
+    store.put("gpt", "query", {"v": 2})
+    assert store.flush() == 1
+
+    assert store.get("gpt", "query") == {"v": 2}
+    assert store.get("llama", "query") == {"v": 1}
+    assert store.count() == 2
+
+    assert store.clear("gpt") == 1
+    assert store.get("gpt", "query") is None
+    assert store.count("llama") == 1
+
+
+def test_compression(tmp_path: Path) -> None:
+    """Test compressed results are smaller and read back transparently."""
+    path = tmp_path / "cache.sqlite"
+    store = SQLiteCache(path)
+    data = {"dependencies": {f"table_{i}": ["id", "name"] for i in range(100)}}
+
+    store.put("ns", "plain", data)
+    store.put("ns", "packed", data, compress=True)
+    store.flush()
+
+    with sqlite3.connect(path) as connection:
+        sizes = dict(
+            connection.execute("SELECT key, length(data) FROM results").fetchall()
+        )
+    assert sizes["packed"] < sizes["plain"] / 4
+    assert store.get("ns", "packed") == data
+
+
+def test_wal_mode(tmp_path: Path) -> None:
+    """Test the database uses write-ahead logging."""
+    store = SQLiteCache(tmp_path / "cache.sqlite")
+
+    mode = store._connection().execute("PRAGMA journal_mode").fetchone()[0]
+
+    assert mode == "wal"
+
+
+def test_concurrent_threads(tmp_path: Path) -> None:
+    """Test threads sharing a store commit all their results."""
+    store = SQLiteCache(tmp_path / "cache.sqlite", batch_size=5)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda i: store.put("ns", f"k{i}", {"i": i}), range(200)))
+    store.flush()
+
+    assert store.count() == 200
+    assert store.get("ns", "k123") == {"i": 123}
+
+
+def test_concurrent_processes(tmp_path: Path) -> None:
+    """Test worker processes upsert results atomically into one database."""
+    path = tmp_path / "cache.sqlite"
+
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        for future in [pool.submit(write_results, path, w, 50) for w in range(4)]:
+            future.result()
+
+    store = SQLiteCache(path)
+    assert store.count() == 4 * 50 + 1
+    assert store.get("ns", "shared")["i"] == 49
+
+
+def test_remove_database(tmp_path: Path) -> None:
+    """Test removing a database drops its pending results and files."""
+    store = get_store(tmp_path)
+    store.put("ns", "committed", {"v": 1})
+    store.flush()
+    store.put("ns", "pending", {"v": 2})
+
+    remove_database(tmp_path)
+
+    assert list(tmp_path.iterdir()) == []
+    assert get_store(tmp_path) is not store
+    assert get_store(tmp_path).get("ns", "committed") is None
@@ -0,0 +1,148 @@
+"""Unit tests for static_analysis.py.
+
+This module tests the offline dependency analysis of SQL statements.
+"""
+
+import pytest
+
+from sqldeps.models import SQLProfile
+from sqldeps.static_analysis import (
+    analyze_sql,
+    analyze_statement,
+    combine_statement_profiles,
+)
+
+
+@pytest.mark.parametrize(
+    ("sql", "dependencies", "outputs"),
+    [
+        (
+            "SELECT u.id, o.amount FROM users u "
+            "LEFT OUTER JOIN orders o ON u.id = o.user_id WHERE u.status = 'active'",
+            {"orders": ["amount", "user_id"], "users": ["id", "status"]},
+            {},
+        ),
+        ("SELECT * FROM public.users", {"public.users": []}, {}),
+        (
+            "SELECT id, type, year FROM sales ORDER BY year DESC NULLS LAST",
+            {"sales": ["id", "type", "year"]},
+            {},
+        ),
+        (
+            "WITH recent AS (SELECT id FROM orders WHERE created_at > now()) "
+            "SELECT r.id, c.name FROM recent r JOIN customers c ON c.id = r.id",
+            {"customers": ["id", "name"], "orders": ["created_at", "id"]},
+            {},
+        ),
+        (
+            "INSERT INTO report (id, total) "
+            "SELECT customer_id, SUM(amount) FROM orders GROUP BY customer_id",
+            {"orders": ["amount", "customer_id"], "report": ["id", "total"]},
+            {"report": ["id", "total"]},
+        ),
+        (
+            "INSERT INTO o SELECT s.a FROM s JOIN u ON s.id = u.id",
+            {"o": [], "s": ["a", "id"], "u": ["id"]},
+            {"o": []},
+        ),
+        (
+            "INSERT INTO o (a, b) SELECT s.a, u.b FROM s JOIN u ON s.id = u.id "
+            "JOIN v ON v.id = u.id RETURNING a",
+            {"o": ["a", "b"], "s": ["a", "id"], "u": ["b", "id"], "v": ["id"]},
+            {"o": ["a", "b"]},
+        ),
+        (
+            "UPDATE accounts SET balance = b.amount FROM bonus b "
+            "WHERE accounts.id = b.account_id",
+            {"accounts": ["balance", "id"], "bonus": ["account_id", "amount"]},
+            {"accounts": ["balance"]},
+        ),
+        (
+            "DELETE FROM logs WHERE created_at < '2020-01-01'",
+            {"logs": ["created_at"]},
+            {"logs": []},
+        ),
+        (
+            "CREATE TABLE summary AS "
+            "SELECT region, COUNT(*) AS n FROM sales GROUP BY region",
+            {"sales": ["region"]},
+            {"summary": ["n", "region"]},
+        ),
+        (
+            "CREATE TABLE s.t (id int PRIMARY KEY, user_id int REFERENCES users(id))",
+            {"users": ["id"]},
+            {"s.t": ["id", "user_id"]},
+        ),
+        ("TRUNCATE TABLE staging", {"staging": []}, {"staging": []}),
+        ("DROP TABLE IF EXISTS staging", {}, {}),
+        (
+            'SELECT "Id", EXTRACT(YEAR FROM "Date")::int FROM "Sales"."Orders"',
+            {"Sales.Orders": ["Date", "Id"]},
+            {},
+        ),
+        (
+            "SELECT id FROM a WHERE EXISTS (SELECT 1 FROM b WHERE b.a_id = a.id)",
+            {"a": ["id"], "b": ["a_id"]},
+            {},
+        ),
+    ],
+)
+def test_analyze_statement_resolved(
+    sql: str, dependencies: dict[str, list[str]], outputs: dict[str, list[str]]
+) -> None:
+    """Test statements that are fully resolved by static analysis."""
+    analysis = analyze_statement(sql)
+
+    assert analysis.resolved, analysis.reasons
+    assert analysis.profile == SQLProfile(dependencies, outputs)
+
+
+@pytest.mark.parametrize(
+    ("sql", "reason"),
+    [
+        ("SELECT id, name FROM a, b", "ambiguous column: id"),
+        ("SELECT * FROM (SELECT id FROM a) x", "wildcard over a derived table"),
+        (
+            "CREATE FUNCTION f() RETURNS void AS $$ BEGIN EXECUTE 'x'; END $$ "
+            "LANGUAGE plpgsql",
+            "unsupported statement: CREATE FUNCTION",
+        ),
+        ("SELECT f.x FROM generate_series(1, 10) f(x)", "table function"),
+        ("INSERT INTO t (a) VALUES (1) ON CONFLICT DO NOTHING", "ON CONFLICT"),
+        (
+            "INSERT INTO t (a) SELECT s.a FROM s JOIN u ON s.id = u.id "
+            "ON CONFLICT DO NOTHING",
+            "ON CONFLICT",
+        ),
+        ("SELECT id, a + b FROM t INTO TEMP x", "unexpected INTO"),
+        ("SELECT (id FROM t", "unbalanced parentheses"),
+    ],
+)
+def test_analyze_statement_unresolved(sql: str, reason: str) -> None:
+    """Test statements the static analysis cannot fully resolve."""
+    analysis = analyze_statement(sql)
+
+    assert not analysis.resolved
+    assert any(reason in r for r in analysis.reasons)
+
+
+def test_analyze_sql_temp_tables() -> None:
+    """Test temporary tables are tracked and removed from the script profile."""
+    sql = """
+    CREATE TEMP TABLE tmp AS SELECT id, amount FROM orders;
+    INSERT INTO report (id, amount) SELECT id, amount FROM tmp;
+    BEGIN;
+    """
+
+    analysis = analyze_sql(sql)
+    temp_tables = set().union(*(a.temp_tables for a in analysis))
+    profile = combine_statement_profiles([a.profile for a in analysis], temp_tables)
+
+    assert len(analysis) == 3
+    assert all(a.resolved for a in analysis)
+    assert temp_tables == {"tmp"}
+    assert profile.dependencies == {
+        "orders": ["amount", "id"],
+        "report": ["amount", "id"],
+    }
+    assert profile.outputs == {"report": ["amount", "id"]}
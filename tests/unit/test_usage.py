@@ -0,0 +1,157 @@
+"""Unit tests for usage.py.
+
+This module tests reading the token usage reported by LLM providers and the
+summary of request records.
+"""
+
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from sqldeps.usage import (
+    RequestRecord,
+    estimate_cost,
+    format_summary,
+    summarize_requests,
+    take_queue_wait,
+    timed_queue_wait,
+    usage_tokens,
+)
+
+
+@pytest.mark.parametrize(
+    ("usage", "expected"),
+    [
+        # OpenAI-compatible APIs
+        (
+            SimpleNamespace(
+                prompt_tokens=3200,
+                completion_tokens=40,
+                prompt_tokens_details=SimpleNamespace(cached_tokens=3072),
+            ),
+            {"prompt_tokens": 3200, "cached_tokens": 3072, "completion_tokens": 40},
+        ),
+        # DeepSeek
+        (
+            {
+                "prompt_tokens": 3200,
+                "completion_tokens": 40,
+                "prompt_cache_hit_tokens": 3136,
+            },
+            {"prompt_tokens": 3200, "cached_tokens": 3136, "completion_tokens": 40},
+        ),
+        # Anthropic through LiteLLM
+        (
+            {
+                "prompt_tokens": 3200,
+                "completion_tokens": 40,
+                "prompt_tokens_details": None,
+                "cache_read_input_tokens": 3000,
+            },
+            {"prompt_tokens": 3200, "cached_tokens": 3000, "completion_tokens": 40},
+        ),
+        # No cache information
+        (
+            {"prompt_tokens": 100, "completion_tokens": 5},
+            {"prompt_tokens": 100, "cached_tokens": 0, "completion_tokens": 5},
+        ),
+        (None, None),
+        (MagicMock(), None),
+    ],
+)
+def test_usage_tokens(usage: object, expected: dict | None) -> None:
+    """Test prompt, cached and completion tokens are read from usage."""
+    assert usage_tokens(usage) == expected
+
+
+def record(**kwargs: object) -> RequestRecord:
+    """Create a request record with default values."""
+    defaults = {"file": "a.sql", "model": "gpt-4o", "started": 1000.0}
+    return RequestRecord(**{**defaults, **kwargs})
+
+
+def test_request_record_add_usage() -> None:
+    """Test token counts are accumulated in a record."""
+    r = record()
+    r.add_usage({"prompt_tokens": 10, "cached_tokens": 0, "completion_tokens": 2})
+    r.add_usage({"prompt_tokens": 5, "cached_tokens": 5, "completion_tokens": 1})
+
+    assert (r.prompt_tokens, r.cached_tokens, r.completion_tokens) == (15, 5, 3)
+    assert r.to_dict()["file"] == "a.sql"
+
+
+def test_timed_queue_wait() -> None:
+    """Test rate limiter waits are attributed to the next request only."""
+    with (
+        patch("sqldeps.usage.time.perf_counter", side_effect=[1.0, 3.5]),
+        timed_queue_wait(),
+    ):
+        pass
+
+    assert take_queue_wait() == 2.5
+    assert take_queue_wait() == 0.0
+
+
+def test_summarize_requests() -> None:
+    """Test request records are aggregated into a run summary."""
+    records = [
+        record(
+            started=1000.0 + i,
+            latency=float(i + 1),
+            prompt_tokens=1000,
+            cached_tokens=800,
+            completion_tokens=50,
+        )
+        for i in range(10)
+    ] + [record(file="b.sql", started=1000.0, latency=0.5, error="server")]
+
+    summary = summarize_requests(records, cost=False)
+
+    assert summary["requests"] == 11
+    assert summary["failed"] == 1
+    assert summary["files"] == 2
+    assert summary["tokens"] == {
+        "prompt": 10000,
+        "cached": 8000,
+        "completion": 500,
+        "total": 10500,
+        "cached_ratio": 0.8,
+    }
+    assert summary["latency"]["p50"] == 5.0
+    assert summary["latency"]["max"] == 10.0
+    assert summary["latency"]["p99"] <= 10.0
+    # Requests ran from t=1000 to t=1019
+    assert summary["duration"] == 19.0
+    assert summary["completion_tokens_per_second"] == pytest.approx(500 / 55)
+    assert summary["cost"] is None
+    assert "Requests: 11 (1 failed" in format_summary(summary)
+
+
+def test_summarize_no_requests() -> None:
+    """Test a run without requests has an empty summary."""
+    summary = summarize_requests([])
+
+    assert summary["requests"] == 0
+    assert summary["latency"] is None
+    assert summary["cost"] is None
+    assert "Requests: 0" in format_summary(summary)
+
+
+def test_estimate_cost() -> None:
+    """Test the cost is estimated per model, reporting unknown models."""
+
+    def cost_per_token(model: str, **tokens: int) -> tuple[float, float]:
+        if model != "gpt-4o":
+            raise ValueError(f"Unknown model: {model}")
+        return tokens["prompt_tokens"] * 1e-6, tokens["completion_tokens"] * 1e-5
+
+    records = [
+        record(prompt_tokens=1000, completion_tokens=100),
+        record(model="custom", prompt_tokens=1000, completion_tokens=100),
+    ]
+    with patch("litellm.cost_per_token", side_effect=cost_per_token):
+        cost = estimate_cost(records)
+
+    assert cost["usd"] == pytest.approx(0.002)
+    assert cost["unpriced_models"] == ["custom"]
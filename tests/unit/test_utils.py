@@ -12,7 +12,13 @@ import pandas as pd
 import pytest
 
 from sqldeps.models import SQLProfile
-from sqldeps.utils import find_sql_files, merge_profiles, merge_schemas, schema_diff
+from sqldeps.utils import (
+    estimate_tokens,
+    find_sql_files,
+    merge_profiles,
+    merge_schemas,
+    schema_diff,
+)
 
 
 class TestFileUtils:
@@ -102,6 +108,17 @@ class TestFileUtils:
             find_sql_files("nonexistent")
 
 
+class TestEstimateTokens:
+    """Test token estimation."""
+
+    def test_estimate_tokens(self) -> None:
+        """Test the ~4 characters per token heuristic."""
+        assert estimate_tokens("") == 0
+        assert estimate_tokens("abcd") == 1
+        assert estimate_tokens("abcde") == 2
+        assert estimate_tokens("x" * 400) == 100
+
+
 class TestMergeProfiles:
     """Test merging of SQL profiles."""
 